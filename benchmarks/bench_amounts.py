@@ -0,0 +1,93 @@
+"""
+Benchmark de los montos por línea: la cadena anterior de _clean_decimal
+(float -> texto -> float) frente a los montos Decimal de
+main/process/records.py, que se parsean una vez y se formatean sólo a la
+salida.
+
+Para cada línea se toma cantidad y precio como texto del XML, se calcula el
+total de la línea y se formatean los tres valores para el diccionario de
+salida. También reporta la diferencia de la suma de los totales contra la
+suma exacta.
+
+Uso:
+    python benchmarks/bench_amounts.py [--lineas 200000] [--repeticiones 3]
+"""
+import argparse
+import random
+import statistics
+import time
+from decimal import Decimal
+
+import corpus  # noqa: F401  (agrega main/ a sys.path)
+from process.records import ZERO, format_amount, parse_amount
+
+
+def clean_decimal_anterior(value, default='0', force_int=False):
+    """InvoiceProcessor._clean_decimal antes de los montos Decimal."""
+    if not value:
+        return default
+    try:
+        num = float(value)
+        if force_int and num.is_integer():
+            return str(int(num))
+        formatted = f"{num:.10f}"
+        if '.' in formatted:
+            formatted = formatted.rstrip('0').rstrip('.')
+        if '.' not in formatted:
+            formatted += '.0'
+        return formatted
+    except (ValueError, TypeError):
+        return default
+
+
+def linea_anterior(cantidad, precio):
+    total = float(clean_decimal_anterior(cantidad, force_int=True)) * float(clean_decimal_anterior(precio, '0'))
+    return clean_decimal_anterior(cantidad, force_int=True), clean_decimal_anterior(precio), str(total), total
+
+
+def linea_decimal(cantidad, precio):
+    cantidad = parse_amount(cantidad)
+    precio = parse_amount(precio)
+    total = (cantidad if cantidad is not None else ZERO) * (precio if precio is not None else ZERO)
+    return format_amount(cantidad, force_int=True), format_amount(precio), format_amount(total), total
+
+
+def generar_lineas(n, semilla=2025):
+    rnd = random.Random(semilla)
+    cantidades = ["1", "2", "3", "1.5", "0.25"]
+    return [(rnd.choice(cantidades), f"{rnd.randint(100, 250000)}.{rnd.randint(0, 99):02d}") for _ in range(n)]
+
+
+def mediana_por_linea(funcion, lineas, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for cantidad, precio in lineas:
+            funcion(cantidad, precio)
+        tiempos.append((time.perf_counter() - inicio) / len(lineas))
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lineas", type=int, default=200000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    lineas = generar_lineas(args.lineas)
+    exacta = sum(Decimal(c) * Decimal(p) for c, p in lineas)
+
+    filas = []
+    for nombre, funcion in (("float/texto", linea_anterior), ("Decimal", linea_decimal)):
+        tiempo = mediana_por_linea(funcion, lineas, args.repeticiones)
+        suma = sum(funcion(c, p)[3] for c, p in lineas)
+        filas.append((nombre, tiempo, abs(Decimal(suma) - exacta)))
+
+    print(f"\nlíneas = {args.lineas}, suma exacta = {exacta}")
+    print(f"{'montos':<12} | {'us/línea':>9} | {'error de la suma':>24}")
+    for nombre, tiempo, error in filas:
+        print(f"{nombre:<12} | {tiempo * 1e6:>9.2f} | {error:>24}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark de los backends XML del caso de uso de src/ (lxml, elementtree,
+streaming) sobre el mismo corpus.
+
+Cada backend corre en su propio proceso para que la memoria no se mezcle:
+reporta la latencia por documento (mediana y p95 de InvoiceProcessingUseCase
+.process_invoice, con un repositorio en memoria) y el RSS máximo del proceso,
+antes (intérprete, backend y corpus cargados) y después de procesar.
+
+Uso:
+    python benchmarks/bench_backends_xml.py [--documentos 300] [--lineas 0]
+        [--backends lxml elementtree streaming]
+
+Con --lineas N cada documento repite N veces su primera línea (facturas
+grandes, donde pesa más la memoria).
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from corpus import generar_attached_documents
+
+LINEA = re.compile(r"<cac:(InvoiceLine|CreditNoteLine)>.*?</cac:\1>", re.S)
+
+
+def rss_maximo_mb():
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir_backend(nombre, carpeta):
+    """Corre en el proceso hijo: procesa el corpus con el backend e imprime el resultado en JSON."""
+    from src.domain.repositories.invoice_repository import InvoiceRepository
+    from src.domain.use_cases.invoice_processor import InvoiceProcessingUseCase
+    from src.infrastructure.xml.xml_backends import create_xml_backend
+
+    class RepositorioMemoria(InvoiceRepository):
+        def save_invoice(self, invoice):
+            pass
+
+        def get_invoice(self, invoice_id):
+            return None
+
+    logging.disable(logging.INFO)
+    contenidos = []
+    for nombre_archivo in sorted(os.listdir(carpeta)):
+        with open(os.path.join(carpeta, nombre_archivo), encoding="utf-8") as f:
+            contenidos.append(f.read())
+    caso = InvoiceProcessingUseCase(RepositorioMemoria(), create_xml_backend(nombre))
+    rss_antes = rss_maximo_mb()
+    tiempos = []
+    for contenido in contenidos:
+        inicio = time.perf_counter()
+        caso.process_invoice(contenido)
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    print(json.dumps({
+        "mediana_us": statistics.median(tiempos) * 1e6,
+        "p95_us": tiempos[int(len(tiempos) * 0.95) - 1] * 1e6,
+        "rss_antes_mb": rss_antes,
+        "rss_max_mb": rss_maximo_mb(),
+    }))
+
+
+def agrandar(carpeta, lineas):
+    for nombre_archivo in os.listdir(carpeta):
+        ruta = os.path.join(carpeta, nombre_archivo)
+        with open(ruta, encoding="utf-8") as f:
+            texto = f.read()
+        linea = LINEA.search(texto)
+        if linea:
+            texto = texto.replace(linea.group(), linea.group() * lineas, 1)
+            with open(ruta, "w", encoding="utf-8") as f:
+                f.write(texto)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documentos", type=int, default=300)
+    parser.add_argument("--lineas", type=int, default=0)
+    parser.add_argument("--backends", nargs="+", default=["lxml", "elementtree", "streaming"])
+    parser.add_argument("--hijo", help=argparse.SUPPRESS)
+    parser.add_argument("--carpeta", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        medir_backend(args.hijo, args.carpeta)
+        return
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        generar_attached_documents(carpeta, args.documentos)
+        if args.lineas:
+            agrandar(carpeta, args.lineas)
+        print(f"{'BACKEND':<12} | {'MEDIANA µs':>10} | {'p95 µs':>10} | {'RSS BASE MB':>11} | {'RSS MÁX MB':>10}")
+        print("-" * 66)
+        for nombre in args.backends:
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--hijo", nombre, "--carpeta", carpeta],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(salida.strip().splitlines()[-1])
+            print(f"{nombre:<12} | {r['mediana_us']:>10.1f} | {r['p95_us']:>10.1f} | "
+                  f"{r['rss_antes_mb']:>11.1f} | {r['rss_max_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark de la lectura de sólo la cabecera (main/process/header.py).
+
+Compara, por documento, process_invoice_header (tipo, ID y fecha) con
+process_invoice_record (factura completa), también con notas crédito de muchas
+líneas (la cabecera no depende del número de líneas); y el inventario de un mes en ZIP
+(inventario_facturacion) con descomprimir y extraer cada factura completa.
+
+Uso:
+    python benchmarks/bench_cabeceras.py [--documentos 300] [--lineas 1 50 500] [--repeticiones 3]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import time
+import zipfile
+
+from bench_lineas_factura import nota_credito_con_lineas
+from corpus import generar_attached_documents
+
+from bussines.tcExtracFacturacion import inventario_facturacion
+from bussines.tcProcesFacturacion import extraer_datos_factura
+from process.invoice_processor import InvoiceProcessor
+
+
+def medir(repeticiones, funcion):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documentos", type=int, default=300)
+    parser.add_argument("--lineas", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    procesador = InvoiceProcessor()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = generar_attached_documents(os.path.join(carpeta, "xml"), args.documentos)
+        casos = [
+            ("process_invoice_header", lambda: [procesador.process_invoice_header(ruta) for ruta in rutas]),
+            ("process_invoice_record", lambda: [procesador.process_invoice_record(ruta) for ruta in rutas]),
+        ]
+        print(f"{'LECTURA':<24} | {'µs/DOCUMENTO':>12}")
+        print("-" * 39)
+        for nombre, funcion in casos:
+            print(f"{nombre:<24} | {medir(args.repeticiones, funcion) / len(rutas) * 1e6:>12.1f}")
+
+        print()
+        print(f"{'LÍNEAS':>6} | {'µs CABECERA':>12} | {'µs COMPLETA':>12}")
+        print("-" * 36)
+        for lineas in args.lineas:
+            ruta = nota_credito_con_lineas(carpeta, lineas)
+            cabecera = medir(args.repeticiones, lambda: [procesador.process_invoice_header(ruta) for _ in range(20)])
+            completa = medir(args.repeticiones, lambda: [procesador.process_invoice_record(ruta) for _ in range(20)])
+            print(f"{lineas:>6} | {cabecera / 20 * 1e6:>12.1f} | {completa / 20 * 1e6:>12.1f}")
+
+        # Un mes en 10 ZIP
+        carpeta_zip = os.path.join(carpeta, "zip")
+        os.makedirs(carpeta_zip)
+        for i in range(10):
+            with zipfile.ZipFile(os.path.join(carpeta_zip, f"mes_{i}.zip"), "w", zipfile.ZIP_DEFLATED) as zip_ref:
+                for ruta in rutas[i::10]:
+                    zip_ref.write(ruta, os.path.basename(ruta))
+
+        def completo():
+            destino = os.path.join(carpeta, "openZip")
+            for nombre in sorted(os.listdir(carpeta_zip)):
+                with zipfile.ZipFile(os.path.join(carpeta_zip, nombre)) as zip_ref:
+                    zip_ref.extractall(destino)
+            # extraer_datos_factura imprime cada archivo leído
+            with contextlib.redirect_stdout(io.StringIO()):
+                for nombre in os.listdir(destino):
+                    extraer_datos_factura(os.path.join(destino, nombre), streaming=True)
+
+        print()
+        print(f"{'INVENTARIO DEL MES':<24} | {'ms':>12}")
+        print("-" * 39)
+        print(f"{'cabeceras en el ZIP':<24} | {medir(args.repeticiones, lambda: inventario_facturacion(carpeta_zip)) * 1e3:>12.1f}")
+        print(f"{'descomprimir y extraer':<24} | {medir(args.repeticiones, completo) * 1e3:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
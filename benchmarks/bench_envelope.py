@@ -0,0 +1,106 @@
+"""
+Benchmark de la lectura del sobre AttachedDocument: árbol completo frente a
+iterparse por streaming (main/process/envelope.py).
+
+Cada combinación corre en un proceso nuevo y mide el pico de RSS de la
+lectura (la memoria de libxml2 no la ve tracemalloc). Los sobres grandes se
+arman con una muestra real más:
+
+- firma: bloques de certificados antes de la factura embebida.
+- respuesta: un ApplicationResponse grande después de la factura embebida.
+
+Uso:
+    python benchmarks/bench_envelope.py [--tamanos 0.04 2 8] [--documentos 20]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from corpus import MUESTRAS_XML
+
+RELLENO = "MIIH+TCCBeGgAwIBAgIIL0RyIJ+UbPEwDQYJKoZIhvcNAQELBQAwgbYxIzAhBgkq" * 16
+
+
+def generar_sobre(ruta, megabytes, forma):
+    """Copia la primera muestra y la completa hasta el tamaño pedido según la forma."""
+    texto = MUESTRAS_XML[0].read_text(encoding="utf-8")
+    faltante = int(megabytes * 1024 * 1024) - len(texto.encode("utf-8"))
+    if faltante > 0 and forma == "firma":
+        bloque = f"<ds:X509Certificate>{RELLENO}</ds:X509Certificate>\n"
+        bloques = bloque * (faltante // len(bloque) + 1)
+        extension = (
+            "<ext:UBLExtension><ext:ExtensionContent><ds:KeyInfo><ds:X509Data>\n"
+            f"{bloques}</ds:X509Data></ds:KeyInfo></ext:ExtensionContent></ext:UBLExtension>"
+        )
+        texto = texto.replace("</ext:UBLExtensions>", extension + "</ext:UBLExtensions>", 1)
+    elif faltante > 0:
+        # Segundo adjunto (el ApplicationResponse) al final del sobre
+        respuesta = (
+            "<cac:Attachment><cac:ExternalReference><cbc:Description><![CDATA["
+            f"{RELLENO * (faltante // len(RELLENO) + 1)}]]></cbc:Description></cac:ExternalReference></cac:Attachment>"
+        )
+        texto = texto.replace("</AttachedDocument>", respuesta + "</AttachedDocument>", 1)
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(texto)
+
+
+def rss_kb(campo):
+    with open("/proc/self/status") as f:
+        for linea in f:
+            if linea.startswith(campo):
+                return int(linea.split()[1])
+    return 0
+
+
+def medir(modo, ruta, documentos, cola):
+    from process.invoice_processor import InvoiceProcessor
+
+    procesador = InvoiceProcessor(envelope_mode=modo)
+
+    # Reinicia el pico de RSS (VmHWM) para medir sólo una lectura
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    base = rss_kb("VmRSS")
+    procesador._read_invoice_root(ruta)
+    pico = rss_kb("VmHWM") - base
+
+    inicio = time.perf_counter()
+    for _ in range(documentos):
+        procesador._read_invoice_root(ruta)
+    segundos = (time.perf_counter() - inicio) / documentos
+    cola.put((segundos, pico / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanos", type=float, nargs="+", default=[0.04, 2, 8])
+    parser.add_argument("--documentos", type=int, default=20)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+    contexto = multiprocessing.get_context("spawn")
+    filas = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        for forma in ("firma", "respuesta"):
+            for megabytes in args.tamanos:
+                ruta = os.path.join(carpeta, f"sobre_{forma}_{megabytes}.xml")
+                generar_sobre(ruta, megabytes, forma)
+                tamano = os.path.getsize(ruta) / 1024 / 1024
+                for modo in ("tree", "stream"):
+                    cola = contexto.Queue()
+                    proceso = contexto.Process(target=medir, args=(modo, ruta, args.documentos, cola))
+                    proceso.start()
+                    segundos, pico = cola.get()
+                    proceso.join()
+                    filas.append((forma, tamano, modo, segundos, pico))
+
+    print(f"\n{'forma':<9} | {'MB':>6} | {'modo':<6} | {'ms/documento':>12} | {'pico RSS MB':>11}")
+    for forma, tamano, modo, segundos, pico in filas:
+        print(f"{forma:<9} | {tamano:>6.2f} | {modo:<6} | {segundos * 1000:>12.2f} | {pico:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark de escritura de la plantilla Excel.
+
+Compara el modo por lotes (libro de solo escritura, un único guardado) con el
+modo tradicional de agregar_filas_al_excel y con el comportamiento anterior de
+guardar el libro después de cada fila. Este último sólo se mide con pocas filas
+porque su costo crece de forma cuadrática.
+
+Uso:
+    python benchmarks/bench_excel_lote.py [--filas 1000 10000 100000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from corpus import MAIN_DIR, generar_filas
+
+from openpyxl import load_workbook
+
+from bussines.tcCausar import (
+    agregar_fila_excel, agregar_filas_al_excel, crear_archivo_excel_con_cabecera,
+    escribir_excel_en_lote
+)
+from objects.fo_obj_plantilla import do_on_get_columns
+
+PLANTILLA = MAIN_DIR / "build" / "tenant" / "turboCarga" / "plantilla.json"
+
+
+def medir_lote(cabeceras, filas, carpeta):
+    path_excel = os.path.join(carpeta, f"lote_{len(filas)}.xlsx")
+    inicio = time.perf_counter()
+    escribir_excel_en_lote(path_excel, cabeceras, filas)
+    return time.perf_counter() - inicio
+
+
+def medir_tradicional(cabeceras, filas, carpeta):
+    inicio = time.perf_counter()
+    path_excel = crear_archivo_excel_con_cabecera(carpeta, f"trad_{len(filas)}", "bench", cabeceras)
+    agregar_filas_al_excel(path_excel, filas)
+    return time.perf_counter() - inicio
+
+
+def medir_guardado_por_fila(cabeceras, filas, carpeta):
+    # Reproduce el comportamiento anterior: wb.save dentro del ciclo
+    inicio = time.perf_counter()
+    path_excel = crear_archivo_excel_con_cabecera(carpeta, f"por_fila_{len(filas)}", "bench", cabeceras)
+    wb = load_workbook(path_excel)
+    for item in filas:
+        agregar_fila_excel(wb[item["InvoiceType"]], item)
+        wb.save(path_excel)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--filas-tradicional", type=int, default=1000)
+    parser.add_argument("--filas-por-fila", type=int, default=200)
+    args = parser.parse_args()
+
+    cabeceras = do_on_get_columns(str(PLANTILLA))
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        for n in args.filas:
+            filas = generar_filas(n)
+            segundos = medir_lote(cabeceras, filas, carpeta)
+            resultados.append(("lote", n, segundos))
+        if args.filas_tradicional:
+            filas = generar_filas(args.filas_tradicional)
+            segundos = medir_tradicional(cabeceras, filas, carpeta)
+            resultados.append(("tradicional", args.filas_tradicional, segundos))
+        if args.filas_por_fila:
+            filas = generar_filas(args.filas_por_fila)
+            segundos = medir_guardado_por_fila(cabeceras, filas, carpeta)
+            resultados.append(("por_fila", args.filas_por_fila, segundos))
+
+    print(f"\n{'MODO':<12} | {'FILAS':>8} | {'SEGUNDOS':>9} | {'FILAS/S':>10}")
+    print("-" * 48)
+    for modo, n, segundos in resultados:
+        print(f"{modo:<12} | {n:>8} | {segundos:>9.3f} | {n / segundos:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark de la lectura de la factura embebida por modo de sobre
+(InvoiceProcessor(envelope_mode=...)._read_invoice_root):
+
+    tree    parsea el sobre completo, toma .text y lo vuelve a codificar
+    stream  recorre el sobre con iterparse hasta la descripción embebida
+    bytes   parsea la factura directo del archivo mapeado (main/process/embedded.py)
+
+Por documento reporta µs y las asignaciones de Python medidas con
+tracemalloc (pico y memoria retenida entre start y stop). Las copias de la
+factura (str del CDATA, recorte, bytes codificados) son asignaciones de
+Python; los nodos de libxml2 no entran en la medición en ningún modo.
+
+Uso:
+    python benchmarks/bench_factura_embebida.py [--documentos 200] [--repeticiones 3]
+"""
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from corpus import generar_attached_documents
+
+from process.invoice_processor import ENVELOPE_MODES, InvoiceProcessor
+
+
+def medir_tiempo(procesador, rutas, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for ruta in rutas:
+            procesador._read_invoice_root(ruta)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / len(rutas) * 1e6
+
+
+def medir_asignaciones(procesador, rutas):
+    """Pico y memoria retenida (KiB) de Python por documento, promedio sobre las rutas."""
+    pico = retenido = 0
+    for ruta in rutas:
+        tracemalloc.start()
+        raiz = procesador._read_invoice_root(ruta)
+        actual, maximo = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        pico += maximo
+        retenido += actual
+        del raiz
+    return pico / len(rutas) / 1024, retenido / len(rutas) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documentos", type=int, default=200)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = generar_attached_documents(carpeta, args.documentos)
+        kib = sum(Path(ruta).stat().st_size for ruta in rutas) / len(rutas) / 1024
+        print(f"{len(rutas)} sobres, {kib:.1f} KiB promedio\n")
+        print(f"{'MODO':<8} | {'µs/DOCUMENTO':>12} | {'PICO KiB/DOC':>12} | {'RETENIDO KiB/DOC':>16}")
+        print("-" * 58)
+        for modo in ENVELOPE_MODES:
+            procesador = InvoiceProcessor(envelope_mode=modo)
+            micros = medir_tiempo(procesador, rutas, args.repeticiones)
+            pico, retenido = medir_asignaciones(procesador, rutas)
+            print(f"{modo:<8} | {micros:>12.1f} | {pico:>12.1f} | {retenido:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Micro-benchmark del costo por fila al escribir la plantilla Excel.
+
+Compara la versión anterior de agregar_fila_excel (unas 25 llamadas a
+ws.cell por factura, resolviendo Enum.value y ws.max_row en cada fila) con la
+fila precompilada (copia del prototipo, pocas asignaciones y un ws.append).
+
+Uso:
+    python benchmarks/bench_fila_compilada.py [--filas 3000]
+"""
+import argparse
+import time
+
+from corpus import generar_filas
+from openpyxl import Workbook
+
+from bussines.tcCausar import agregar_fila_excel, construir_fila_excel
+from plantilla.cabecera import Cabecera
+from plantilla.constants import Constants
+
+
+def agregar_fila_excel_por_celdas(ws, item):
+    # Copia de la implementación anterior, conservada sólo como referencia
+    next_row = ws.max_row + 1
+    ws.cell(row=next_row, column=Constants.ENCAB_EMPRESA.value[1], value=Constants.ENCAB_EMPRESA.value[0])
+    if item["FacturaCabecera"] == "PP" or item["FacturaCabecera"] == "PR":
+        ws.cell(row=next_row, column=Constants.ENCAB_TIPO_DOCUMENTO_FC.value[1], value=Constants.ENCAB_TIPO_DOCUMENTO_FC.value[0])
+        ws.cell(row=next_row, column=Cabecera.ENCAB_NO_DTO_EXT.value[1], value=item["FacturaNumero"])
+    else:
+        ws.cell(row=next_row, column=Constants.ENCAB_TIPO_DOCUMENTO_NCDOC.value[1], value=Constants.ENCAB_TIPO_DOCUMENTO_NCDOC.value[0])
+        ws.cell(row=next_row, column=Cabecera.ENCAB_NO_DTO_EXT.value[1], value=item["FacturaRelacionada"])
+    ws.cell(row=next_row, column=Constants.ENCAB_TERCERO_INTERNO.value[1], value=Constants.ENCAB_TERCERO_INTERNO.value[0])
+    ws.cell(row=next_row, column=Constants.ENCAB_TERCERO_EXTERNO.value[1], value=Constants.ENCAB_TERCERO_EXTERNO.value[0])
+    ws.cell(row=next_row, column=Constants.ENCAB_FORMA_PAGO.value[1], value=Constants.ENCAB_FORMA_PAGO.value[0])
+    ws.cell(row=next_row, column=Constants.ENCAB_VERIFICADO.value[1], value=Constants.ENCAB_VERIFICADO.value[0])
+    ws.cell(row=next_row, column=Constants.ENCAB_ANULADO.value[1], value=Constants.ENCAB_ANULADO.value[0])
+    ws.cell(row=next_row, column=Constants.DETALLE_PRODUCTO.value[1], value=Constants.DETALLE_PRODUCTO.value[0])
+    ws.cell(row=next_row, column=Constants.DETALLE_BODEGA.value[1], value=Constants.DETALLE_BODEGA.value[0])
+    ws.cell(row=next_row, column=Constants.DETALLE_UNIDAD_MEDIDA.value[1], value=Constants.DETALLE_UNIDAD_MEDIDA.value[0])
+    ws.cell(row=next_row, column=Constants.DETALLE_CANTIDAD.value[1], value=Constants.DETALLE_CANTIDAD.value[0])
+    ws.cell(row=next_row, column=Constants.DETALLE_IVA.value[1], value=Constants.DETALLE_IVA.value[0])
+    ws.cell(row=next_row, column=Constants.DETALLE_DESCUENTO.value[1], value=Constants.DETALLE_DESCUENTO.value[0])
+    ws.cell(row=next_row, column=Cabecera.ENCAB_FECHA.value[1], value=item["FechaEmision"])
+    ws.cell(row=next_row, column=Cabecera.ENCAB_PREF_DTO_EXT.value[1], value=item["FacturaCabecera"])
+    ws.cell(row=next_row, column=Cabecera.ENCAB_NOTA.value[1], value=item["NombrePeaje"])
+    ws.cell(row=next_row, column=Cabecera.ENCAB_FECHA_EMISION.value[1], value=item["FechaEmision"])
+    ws.cell(row=next_row, column=Cabecera.DETALLE_VALOR_UNITARIO.value[1], value=item["ValorTotal"])
+    ws.cell(row=next_row, column=Cabecera.DETALLE_VENCIMIENTO.value[1], value=item["FechaEmision"])
+    ws.cell(row=next_row, column=Cabecera.DETALLE_CENTRO_COSTOS.value[1], value=item["NumeroPlaca"])
+
+
+def medir(funcion, filas):
+    ws = Workbook().active
+    inicio = time.perf_counter()
+    for item in filas:
+        funcion(ws, item)
+    return time.perf_counter() - inicio
+
+
+def medir_construccion(filas):
+    inicio = time.perf_counter()
+    for item in filas:
+        construir_fila_excel(item)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=3000)
+    args = parser.parse_args()
+
+    filas = generar_filas(args.filas)
+    resultados = [
+        ("ws.cell por celda", medir(agregar_fila_excel_por_celdas, filas)),
+        ("fila compilada + append", medir(agregar_fila_excel, filas)),
+        ("solo construir fila", medir_construccion(filas)),
+    ]
+
+    print(f"\n{'VARIANTE':<24} | {'µs/FILA':>8}")
+    print("-" * 36)
+    for nombre, segundos in resultados:
+        print(f"{nombre:<24} | {segundos / len(filas) * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
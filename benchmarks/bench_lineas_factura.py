@@ -0,0 +1,59 @@
+"""
+Benchmark de extraer_datos_factura (main/bussines/tcProcesFacturacion.py) con
+notas crédito de varias líneas.
+
+Toma la nota crédito de peaje de main/test/peajes y repite su
+cac:CreditNoteLine para armar documentos de 1, 10 y 50 líneas; mide el costo
+por documento (lectura del sobre, parseo y recorrido de las líneas).
+
+Uso:
+    python benchmarks/bench_lineas_factura.py [--lineas 1 10 50] [--repeticiones 200]
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import tempfile
+import time
+
+from corpus import MAIN_DIR
+
+from bussines.tcProcesFacturacion import extraer_datos_factura
+
+NOTA_CREDITO = MAIN_DIR / "test" / "peajes" / "ad0900470252000250081eac8.xml"
+LINEA = re.compile(r"<cac:CreditNoteLine>.*?</cac:CreditNoteLine>", re.S)
+
+
+def nota_credito_con_lineas(carpeta, lineas):
+    texto = NOTA_CREDITO.read_text(encoding="utf-8")
+    linea = LINEA.search(texto).group()
+    ruta = os.path.join(carpeta, f"nota_{lineas}.xml")
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(texto.replace(linea, linea * lineas, 1))
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lineas", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'LÍNEAS':>6} | {'µs/DOCUMENTO':>12} | {'ÍTEMS EN LA FILA':>16}")
+    print("-" * 41)
+    with tempfile.TemporaryDirectory() as carpeta:
+        for lineas in args.lineas:
+            ruta = nota_credito_con_lineas(carpeta, lineas)
+            # extraer_datos_factura imprime cada archivo leído
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, fila = extraer_datos_factura(ruta)
+                inicio = time.perf_counter()
+                for _ in range(args.repeticiones):
+                    extraer_datos_factura(ruta)
+                segundos = time.perf_counter() - inicio
+            print(f"{lineas:>6} | {segundos / args.repeticiones * 1e6:>12.1f} | {len(fila['Items']):>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark de la caché de facturas por hash de contenido
+(main/process/parse_cache.py).
+
+Simula repetir un mes: procesa el corpus sin caché, luego con la caché vacía
+(todo fallos, se llena) y por último una segunda corrida con la caché llena
+(todo aciertos, sin parsear XML). Reporta también el tamaño del archivo SQLite.
+
+Uso:
+    python benchmarks/bench_parse_cache.py [--documentos 5000]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from corpus import generar_attached_documents
+
+from process.invoice_processor import InvoiceProcessor
+from process.parse_cache import ParseCache
+
+
+def corrida(procesador, rutas):
+    inicio = time.perf_counter()
+    for ruta in rutas:
+        procesador.process_invoice(ruta)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documentos", type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = generar_attached_documents(os.path.join(carpeta, "xml"), args.documentos)
+        ruta_cache = os.path.join(carpeta, "cache.sqlite")
+
+        filas = [("sin caché", corrida(InvoiceProcessor(), rutas), None)]
+        for nombre in ("caché vacía", "caché llena"):
+            with ParseCache(ruta_cache) as cache:
+                segundos = corrida(InvoiceProcessor(cache=cache), rutas)
+                filas.append((nombre, segundos, cache.stats()))
+        tamano = os.path.getsize(ruta_cache)
+        xml_total = sum(os.path.getsize(ruta) for ruta in rutas)
+
+    print(f"\n{'corrida':<12} | {'documentos':>10} | {'total s':>8} | {'por doc us':>10} | {'aciertos':>8} | {'fallos':>6}")
+    for nombre, segundos, estadisticas in filas:
+        aciertos = estadisticas['hits'] if estadisticas else '-'
+        fallos = estadisticas['misses'] if estadisticas else '-'
+        print(f"{nombre:<12} | {args.documentos:>10} | {segundos:>8.2f} | {segundos / args.documentos * 1e6:>10.1f} | {aciertos:>8} | {fallos:>6}")
+    print(f"\nSQLite: {tamano / 1024:.0f} KB para {xml_total / 1024:.0f} KB de XML")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark del peor caso al leer peaje y placa de la descripción de una línea
+(main/process/toll_scanner.py).
+
+Compara search con las expresiones de InvoiceProcessor (lazy) y de
+tcProcesFacturacion (greedy) frente a scan_toll en textos que las hacen
+retroceder, con tamaños crecientes: el tiempo de las expresiones crece en forma
+cuadrática o peor y el del escáner en forma lineal. Al final mide un mes
+típico (descripciones repetidas) con TollExtractor y su memoria.
+
+Uso:
+    python benchmarks/bench_peajes.py [--tamanos 250 500 1000] [--lineas 100000]
+"""
+import argparse
+import random
+import time
+
+from corpus import PEAJES, PLACAS
+
+from process.toll_scanner import GREEDY_TOLL_PATTERN, LAZY_TOLL_PATTERN, TollExtractor, scan_toll
+
+# Familias de entradas adversas: sin dígito al final la búsqueda falla en cada inicio
+ADVERSAS = {
+    "espacios": lambda n: " " * n + "x",
+    "palabras": lambda n: "ab " * (n // 3),
+    "peaje sin número": lambda n: "X ABC " * (n // 6),
+}
+
+
+def segundos(funcion, texto, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(texto)
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[250, 500, 1000])
+    parser.add_argument("--lineas", type=int, default=100000)
+    args = parser.parse_args()
+
+    variantes = [
+        ("regex lazy", LAZY_TOLL_PATTERN.search),
+        ("regex greedy", GREEDY_TOLL_PATTERN.search),
+        ("scan_toll lazy", lambda texto: scan_toll(texto)),
+        ("scan_toll greedy", lambda texto: scan_toll(texto, greedy=True)),
+    ]
+    print(f"{'ENTRADA':<17} | {'CARACTERES':>10} | " + " | ".join(f"{nombre:>16}" for nombre, _ in variantes))
+    print("-" * (33 + 19 * len(variantes)))
+    for familia, generar in ADVERSAS.items():
+        for tamano in args.tamanos:
+            texto = generar(tamano)
+            tiempos = [f"{segundos(funcion, texto) * 1e3:>13.2f} ms" for _, funcion in variantes]
+            print(f"{familia:<17} | {len(texto):>10} | " + " | ".join(tiempos))
+
+    # Mes típico: pocos peajes y placas, cada línea con su código de transacción
+    rnd = random.Random(2025)
+    descripciones = [
+        f"Paso BTS DERECHOS ECONOMICOS S.A.S {rnd.choice(PEAJES)}  {rnd.choice(PLACAS)} "
+        f"10189_{rnd.randrange(10 ** 18)}"
+        for _ in range(args.lineas)
+    ]
+    extractor = TollExtractor()
+    filas = [
+        ("regex lazy", lambda: [LAZY_TOLL_PATTERN.search(d) for d in descripciones]),
+        ("scan_toll lazy", lambda: [scan_toll(d) for d in descripciones]),
+        ("TollExtractor", lambda: [extractor.extract(d, "900470252") for d in descripciones]),
+    ]
+    print(f"\n{'MES TÍPICO':<17} | {'LÍNEAS':>10} | {'µs/LÍNEA':>10}")
+    print("-" * 44)
+    for nombre, correr in filas:
+        inicio = time.perf_counter()
+        correr()
+        total = time.perf_counter() - inicio
+        print(f"{nombre:<17} | {len(descripciones):>10} | {total / len(descripciones) * 1e6:>10.2f}")
+    print(f"\nTollExtractor: {extractor.hits} aciertos, {extractor.misses} fallos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark del pipeline de extracción del mes (extraer_zips_mes en
+main/bussines/tcExtracFacturacion.py) contra el ciclo secuencial anterior
+(leer ZIP, extraer, escribir voucher, uno tras otro).
+
+Para cada número de hilos de parseo imprime el tiempo total y la tabla de
+métricas por etapa (process.pipeline.format_metrics): elementos por segundo,
+tiempo ocupado, bloqueado al poner y esperando entrada, y profundidad de la
+cola de entrada. Cada corrida usa su propia copia de los ZIP y una caché vacía.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--zips 500] [--parsers 1 2 4] [--cola 64]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from corpus import generar_attached_documents, generar_zips_mes
+
+from bussines.tcExtracFacturacion import descomprimir_y_procesar_zip, do_on_create_voucher, extraer_zips_mes
+from bussines.tcProcesFacturacion import extraer_datos_factura
+from process.parse_cache import ParseCache
+from process.voucher_store import VoucherStore
+
+
+def preparar(originales, carpeta, nombre):
+    trabajo = os.path.join(carpeta, nombre)
+    base = os.path.join(trabajo, "zip")
+    os.makedirs(base)
+    for ruta in originales:
+        shutil.copy(ruta, base)
+    rutas = [os.path.join(trabajo, carpeta_mes) for carpeta_mes in ("openZip", "closedZip", "voucher")]
+    return base, rutas, os.path.join(trabajo, "cache.sqlite")
+
+
+def secuencial(base, rutas, cache_file):
+    open_dir, closed_dir, voucher_dir = rutas
+    with ParseCache(cache_file) as cache, VoucherStore(voucher_dir) as store:
+        for filename in sorted(os.listdir(base)):
+            origen, xmls = descomprimir_y_procesar_zip("4_2025", os.path.join(base, filename), filename, open_dir, closed_dir)
+            for nombre, datos in xmls:
+                factura_id, fila = extraer_datos_factura(os.path.join(origen, nombre), streaming=True, cache=cache, datos=datos)
+                do_on_create_voucher(str(factura_id), fila.to_json(), store)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--zips", type=int, default=500)
+    parser.add_argument("--parsers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--cola", type=int, default=64)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas_xml = generar_attached_documents(os.path.join(carpeta, "xml"), args.zips)
+        originales = generar_zips_mes(os.path.join(carpeta, "zips"), rutas_xml)
+
+        base, rutas, cache_file = preparar(originales, carpeta, "secuencial")
+        inicio = time.perf_counter()
+        # Los pasos del flujo imprimen cada archivo
+        with contextlib.redirect_stdout(io.StringIO()):
+            secuencial(base, rutas, cache_file)
+        print(f"SECUENCIAL: {time.perf_counter() - inicio:.2f} s\n")
+
+        for parsers in args.parsers:
+            base, rutas, cache_file = preparar(originales, carpeta, f"pipeline_{parsers}")
+            salida = io.StringIO()
+            with contextlib.redirect_stdout(salida):
+                extraer_zips_mes(base, "4_2025", *rutas, cache_file, parsers=parsers, tamano_cola=args.cola)
+            # La tabla de métricas es lo último que imprime extraer_zips_mes
+            lineas = salida.getvalue().splitlines()
+            inicio_tabla = max(i for i, linea in enumerate(lineas) if linea.startswith("Tiempo total"))
+            print(f"PIPELINE, {parsers} HILOS DE PARSEO")
+            print("\n".join(lineas[inicio_tabla:]) + "\n")
+
+
+if __name__ == "__main__":
+    main()
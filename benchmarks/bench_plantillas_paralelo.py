@@ -0,0 +1,65 @@
+"""
+Benchmark del cierre de mes: libros de N tenants en secuencia frente al pool de procesos.
+
+Uso:
+    python benchmarks/bench_plantillas_paralelo.py [--tenants 8] [--filas 5000] [--workers 4]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from corpus import MAIN_DIR, generar_filas
+
+from process.records import VoucherRow
+from bussines.tcCausarParalelo import (
+    TrabajoPlantilla, generar_plantilla_tenant, generar_plantillas_en_paralelo, ruta_vouchers
+)
+
+PLANTILLA = MAIN_DIR / "build" / "tenant" / "turboCarga" / "plantilla.json"
+
+
+def preparar(carpeta, tenants, filas):
+    tenant_dir = os.path.join(carpeta, "tenant")
+    trabajos = []
+    for n in range(tenants):
+        tenant_id = f"tenant{n:02d}"
+        os.makedirs(os.path.join(tenant_dir, tenant_id))
+        shutil.copy(PLANTILLA, os.path.join(tenant_dir, tenant_id, "plantilla.json"))
+        voucher_dir = ruta_vouchers(carpeta, tenant_id, "4_2025")
+        os.makedirs(voucher_dir)
+        for item in generar_filas(filas, semilla=n):
+            with open(os.path.join(voucher_dir, f"{item['FacturaID']}.txt"), "w", encoding="utf-8") as f:
+                f.write(VoucherRow.from_dict(item).to_json())
+        trabajos.append(TrabajoPlantilla(tenant_id, "4_2025", base_dir=carpeta, tenant_dir=tenant_dir))
+    return trabajos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tenants", type=int, default=8)
+    parser.add_argument("--filas", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        trabajos = preparar(carpeta, args.tenants, args.filas)
+
+        inicio = time.perf_counter()
+        for trabajo in trabajos:
+            generar_plantilla_tenant(trabajo)
+        secuencial = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        generar_plantillas_en_paralelo(trabajos, args.workers)
+        paralelo = time.perf_counter() - inicio
+
+    print(f"\n{'modo':<10} | {'libros':>6} | {'filas':>8} | {'segundos':>8}")
+    print(f"{'secuencial':<10} | {args.tenants:>6} | {args.tenants * args.filas:>8} | {secuencial:>8.2f}")
+    print(f"{'paralelo':<10} | {args.tenants:>6} | {args.tenants * args.filas:>8} | {paralelo:>8.2f}")
+    print(f"CPUs: {os.cpu_count()}  speedup: {secuencial / paralelo:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark del procesamiento por lotes InvoiceProcessor.process_invoices con
+distinto número de procesos sobre un corpus generado de AttachedDocuments.
+
+Reporta facturas por segundo y la aceleración frente a un solo proceso. La
+aceleración sólo puede acercarse a lineal si la máquina tiene esos núcleos
+libres (ver os.cpu_count() en la salida).
+
+Uso:
+    python benchmarks/bench_process_invoices.py [--documentos 20000] [--workers 1 2 4 8] [--chunksize 64]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from corpus import generar_attached_documents
+
+from process.invoice_processor import DEFAULT_CHUNKSIZE, EXTRACTION_MODES, InvoiceProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documentos", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--modo", choices=EXTRACTION_MODES, default=EXTRACTION_MODES[0])
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    procesador = InvoiceProcessor(extraction_mode=args.modo)
+    filas = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = generar_attached_documents(carpeta, args.documentos)
+        for workers in args.workers:
+            inicio = time.perf_counter()
+            errores = sum(not r.ok for r in procesador.process_invoices(rutas, workers=workers, chunksize=args.chunksize))
+            filas.append((workers, time.perf_counter() - inicio, errores))
+
+    base = filas[0][1]
+    print(f"\nos.cpu_count() = {os.cpu_count()}, documentos = {args.documentos}, chunksize = {args.chunksize}")
+    print(f"{'workers':>7} | {'total s':>8} | {'facturas/s':>10} | {'aceleración':>11} | {'errores':>7}")
+    for workers, segundos, errores in filas:
+        print(f"{workers:>7} | {segundos:>8.2f} | {args.documentos / segundos:>10.0f} | {base / segundos:>10.2f}x | {errores:>7}")
+
+
+if __name__ == "__main__":
+    main()
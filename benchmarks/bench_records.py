@@ -0,0 +1,62 @@
+"""
+Benchmark de memoria retenida por factura: diccionarios de process_invoice
+frente a registros compactos de process_invoice_record
+(main/process/records.py).
+
+Con tracemalloc activo se procesa el corpus guardando cada resultado en una
+lista (como lista_peajes hasta escribir el Excel) y se mide la memoria Python
+que queda retenida al final, dividida por el número de facturas.
+
+Uso:
+    python benchmarks/bench_records.py [--documentos 2000]
+"""
+import argparse
+import gc
+import logging
+import tempfile
+import time
+import tracemalloc
+
+from corpus import generar_attached_documents
+
+from process.invoice_processor import InvoiceProcessor
+
+
+def retenido_por_factura(funcion, rutas):
+    gc.collect()
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    segundos = time.perf_counter()
+    resultados = [funcion(ruta) for ruta in rutas]
+    segundos = time.perf_counter() - segundos
+    gc.collect()
+    retenido = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+    del resultados
+    return retenido / len(rutas), segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documentos", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    procesador = InvoiceProcessor()
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = generar_attached_documents(carpeta, args.documentos)
+        # Calentar cachés de módulos y XPath fuera de la medición
+        procesador.process_invoice_record(rutas[0])
+        filas = [
+            ("dict", *retenido_por_factura(lambda ruta: procesador.process_invoice(ruta)[1], rutas)),
+            ("InvoiceRecord", *retenido_por_factura(procesador.process_invoice_record, rutas)),
+        ]
+
+    print(f"\n{'resultado':<14} | {'documentos':>10} | {'bytes/factura':>13} | {'segundos*':>9}")
+    for nombre, bytes_factura, segundos in filas:
+        print(f"{nombre:<14} | {args.documentos:>10} | {bytes_factura:>13.0f} | {segundos:>9.2f}")
+    print("* con tracemalloc activo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark de las etapas de salida: Excel por lotes frente a CSV y parquet.
+
+Uso:
+    python benchmarks/bench_salidas.py [--filas 50000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from corpus import MAIN_DIR, generar_filas
+
+from bussines.tcCausar import escribir_excel_en_lote
+from bussines.tcSalidas import escribir_salidas_columnares, pq
+from objects.fo_obj_plantilla import do_on_get_columns
+
+PLANTILLA = MAIN_DIR / "build" / "tenant" / "turboCarga" / "plantilla.json"
+
+
+def medir(funcion, memoria=True):
+    inicio = time.perf_counter()
+    funcion()
+    segundos = time.perf_counter() - inicio
+    if not memoria:
+        return segundos, None
+    # Segunda pasada sólo para el pico de memoria: tracemalloc altera los tiempos
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=50000)
+    args = parser.parse_args()
+
+    cabeceras = do_on_get_columns(str(PLANTILLA))
+    filas = generar_filas(args.filas)
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        base = os.path.join(carpeta, "documento")
+        resultados.append(("xlsx", *medir(lambda: escribir_excel_en_lote(f"{base}.xlsx", cabeceras, filas), memoria=False)))
+        resultados.append(("csv", *medir(lambda: escribir_salidas_columnares(base, cabeceras, filas, ["csv"]))))
+        if pq is not None:
+            resultados.append(("parquet", *medir(lambda: escribir_salidas_columnares(base, cabeceras, filas, ["parquet"]))))
+
+    print(f"\n{'FORMATO':<8} | {'FILAS':>7} | {'SEGUNDOS':>8} | {'FILAS/S':>9} | {'PICO MB':>8}")
+    print("-" * 52)
+    for formato, segundos, pico in resultados:
+        pico = "-" if pico is None else f"{pico / 2**20:.1f}"
+        print(f"{formato:<8} | {len(filas):>7} | {segundos:>8.2f} | {len(filas) / segundos:>9.0f} | {pico:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark de los motores de extracción de InvoiceProcessor: una búsqueda XPath
+por campo frente al recorrido único (extraction_mode='single_pass').
+
+Mide sólo la extracción de campos sobre facturas ya parseadas y el
+process_invoice completo.
+
+Uso:
+    python benchmarks/bench_single_pass.py [--documentos 2000] [--repeticiones 3]
+"""
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+
+from corpus import generar_attached_documents
+from lxml import etree
+
+from process.invoice_processor import EXTRACTION_MODES, InvoiceProcessor
+
+
+def extraer_campos(procesador, invoice_root):
+    if procesador.extraction_mode == 'single_pass':
+        return procesador._extract_single_pass(invoice_root)
+    datos = procesador._extract_basic_invoice_data(invoice_root)
+    procesador._extract_parties_data(invoice_root, datos)
+    procesador._process_invoice_items(invoice_root, datos)
+    procesador._process_additional_data(invoice_root, datos)
+    return datos
+
+
+def mediana_por_documento(funcion, elementos, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for elemento in elementos:
+            funcion(elemento)
+        tiempos.append((time.perf_counter() - inicio) / len(elementos))
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documentos", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = generar_attached_documents(carpeta, args.documentos)
+        base = InvoiceProcessor()
+        facturas = [base._extract_embedded_invoice(etree.parse(ruta).getroot()) for ruta in rutas]
+
+        filas = []
+        for modo in EXTRACTION_MODES:
+            procesador = InvoiceProcessor(extraction_mode=modo)
+            extraccion = mediana_por_documento(lambda raiz: extraer_campos(procesador, raiz), facturas, args.repeticiones)
+            completo = mediana_por_documento(procesador.process_invoice, rutas, args.repeticiones)
+            filas.append((modo, extraccion, completo))
+
+    print(f"\n{'modo':<12} | {'documentos':>10} | {'extracción us':>13} | {'process_invoice us':>18}")
+    for modo, extraccion, completo in filas:
+        print(f"{modo:<12} | {args.documentos:>10} | {extraccion * 1e6:>13.1f} | {completo * 1e6:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark del almacén de vouchers (main/process/voucher_store.py) contra un
+<FacturaID>.txt por factura (el formato anterior de do_on_create_voucher).
+
+Para --vouchers filas del mes mide escribirlas, listar la carpeta, releer el
+mes completo con cargar_vouchers (tcCausarParalelo) y buscar --busquedas
+vouchers por ID al azar (abrir <id>.txt o VoucherStore.get; abrir el
+almacén, que carga el índice, se mide aparte).
+
+Uso:
+    python benchmarks/bench_vouchers.py [--vouchers 20000] [--busquedas 1000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from corpus import generar_filas
+
+from bussines.tcCausarParalelo import cargar_vouchers
+from process.records import VoucherRow
+from process.voucher_store import VoucherStore
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def por_id(fila):
+    return fila["FacturaID"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vouchers", type=int, default=20000)
+    parser.add_argument("--busquedas", type=int, default=1000)
+    args = parser.parse_args()
+
+    textos = [(fila["FacturaID"], VoucherRow.from_dict(fila).to_json()) for fila in generar_filas(args.vouchers)]
+    buscados = random.Random(7).sample([factura_id for factura_id, _ in textos], min(args.busquedas, len(textos)))
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        dir_txt = os.path.join(carpeta, "txt")
+        dir_store = os.path.join(carpeta, "store")
+        os.makedirs(dir_txt)
+
+        def escribir_txt():
+            for factura_id, texto in textos:
+                with open(os.path.join(dir_txt, f"{factura_id}.txt"), "w", encoding="utf-8") as f:
+                    f.write(texto)
+
+        def escribir_store():
+            with VoucherStore(dir_store) as store:
+                for factura_id, texto in textos:
+                    store.append(factura_id, texto)
+
+        def buscar_txt():
+            for factura_id in buscados:
+                with open(os.path.join(dir_txt, f"{factura_id}.txt"), encoding="utf-8") as f:
+                    f.read()
+
+        almacen = []
+
+        def abrir_store():
+            almacen.append(VoucherStore(dir_store))
+
+        def buscar_store():
+            for factura_id in buscados:
+                almacen[-1].get(factura_id)
+
+        casos = [
+            ("escribir", escribir_txt, escribir_store),
+            ("listar carpeta", lambda: os.listdir(dir_txt), lambda: os.listdir(dir_store)),
+            ("cargar el mes", lambda: cargar_vouchers(dir_txt), lambda: cargar_vouchers(dir_store)),
+            ("abrir (índice)", lambda: None, abrir_store),
+            (f"{len(buscados)} búsquedas", buscar_txt, buscar_store),
+        ]
+        print(f"{args.vouchers} vouchers\n")
+        print(f"{'OPERACIÓN':<18} | {'ms .txt':>9} | {'ms ALMACÉN':>10}")
+        print("-" * 43)
+        for nombre, con_txt, con_store in casos:
+            ms_txt, resultado_txt = medir(con_txt)
+            ms_store, resultado_store = medir(con_store)
+            # Los .txt se leen por nombre y el almacén en el orden en que se guardó
+            if nombre == "cargar el mes" and sorted(resultado_txt, key=por_id) != sorted(resultado_store, key=por_id):
+                raise SystemExit("Las filas del almacén no coinciden con las de los .txt")
+            print(f"{nombre:<18} | {ms_txt * 1e3:>9.1f} | {ms_store * 1e3:>10.1f}")
+        print(f"\narchivos: {len(os.listdir(dir_txt))} .txt, {len(os.listdir(dir_store))} en el almacén")
+
+
+if __name__ == "__main__":
+    main()
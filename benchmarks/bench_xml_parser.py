@@ -0,0 +1,83 @@
+"""
+Benchmark del parser lxml por defecto frente a los parsers ajustados de
+main/process/xml_parser.py (sin espacios ignorables, sin entidades, sin red,
+sin índice de xml:id, una instancia por hilo).
+
+Mide por documento (mejor de las repeticiones, para filtrar el ruido de la
+máquina): parseo del sobre, parseo de la factura embebida, extracción de
+campos sobre el árbol resultante y nodos de texto de la factura.
+
+Uso:
+    python benchmarks/bench_xml_parser.py [--documentos 2000] [--repeticiones 5]
+"""
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+
+from corpus import generar_attached_documents
+from lxml import etree
+
+from process import xpaths
+from process.invoice_processor import InvoiceProcessor
+from process.xml_parser import get_parser
+
+
+def mejor_por_documento(funcion, elementos, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for elemento in elementos:
+            funcion(elemento)
+        tiempos.append((time.perf_counter() - inicio) / len(elementos))
+    return min(tiempos)
+
+
+def medir(nombre, parser_sobre, parser_factura, datos, procesador, repeticiones):
+    sobres = [etree.fromstring(d, parser_sobre) for d in datos]
+    cargas = [xpaths.EMBEDDED_DESCRIPTION.element(s).text.strip().encode("utf-8") for s in sobres]
+    facturas = [etree.fromstring(c, parser_factura) for c in cargas]
+
+    def extraer(raiz):
+        datos_factura = procesador._extract_basic_invoice_data(raiz)
+        procesador._extract_parties_data(raiz, datos_factura)
+        procesador._process_invoice_items(raiz, datos_factura)
+        procesador._process_additional_data(raiz, datos_factura)
+
+    return (
+        nombre,
+        mejor_por_documento(lambda d: etree.fromstring(d, parser_sobre), datos, repeticiones),
+        mejor_por_documento(lambda c: etree.fromstring(c, parser_factura), cargas, repeticiones),
+        mejor_por_documento(extraer, facturas, repeticiones),
+        statistics.mean(len(f.xpath("//text()")) for f in facturas),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documentos", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = generar_attached_documents(carpeta, args.documentos)
+        datos = []
+        for ruta in rutas:
+            with open(ruta, "rb") as f:
+                datos.append(f.read())
+
+    procesador = InvoiceProcessor()
+    filas = [
+        medir("por defecto", None, None, datos, procesador, args.repeticiones),
+        medir("ajustado", get_parser(huge_tree=True), get_parser(), datos, procesador, args.repeticiones),
+    ]
+
+    print(f"\n{'parser':<12} | {'sobre us':>9} | {'factura us':>10} | {'extracción us':>13} | {'textos':>6}")
+    for nombre, sobre, factura, extraccion, nodos in filas:
+        print(f"{nombre:<12} | {sobre * 1e6:>9.1f} | {factura * 1e6:>10.1f} | {extraccion * 1e6:>13.1f} | {nodos:>6.0f}")
+
+
+if __name__ == "__main__":
+    main()
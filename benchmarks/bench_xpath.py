@@ -0,0 +1,80 @@
+"""
+Benchmark de InvoiceProcessor: rutas ElementPath por llamada frente al
+registro de XPath precompiladas (main/process/xpaths.py).
+
+Uso:
+    python benchmarks/bench_xpath.py [--documentos 2000] [--repeticiones 3]
+"""
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+
+from corpus import generar_attached_documents
+
+from process.invoice_processor import InvoiceProcessor, XML_NAMESPACES
+
+
+class ProcesadorElementPath(InvoiceProcessor):
+    """Procesador con la búsqueda anterior: root.find(ruta, XML_NAMESPACES) en cada llamada."""
+
+    @staticmethod
+    def _get_element_text(root, path, default=''):
+        path = getattr(path, 'path', path)
+        try:
+            elem = root.find(path, XML_NAMESPACES)
+            return elem.text.strip() if elem is not None and elem.text else default
+        except Exception:
+            return default
+
+    @staticmethod
+    def _find(root, path):
+        return root.find(path.path, XML_NAMESPACES)
+
+    @staticmethod
+    def _findall(root, path):
+        return root.findall(path.path, XML_NAMESPACES)
+
+
+def sin_marca_de_tiempo(datos):
+    return {llave: valor for llave, valor in datos.items() if llave != 'processing_timestamp'}
+
+
+def medir(procesador, rutas, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for ruta in rutas:
+            procesador.process_invoice(ruta)
+        tiempos.append((time.perf_counter() - inicio) / len(rutas))
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documentos", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = generar_attached_documents(carpeta, args.documentos)
+        anterior, compilado = ProcesadorElementPath(), InvoiceProcessor()
+
+        # Ambos procesadores deben producir los mismos datos
+        for ruta in rutas[:50]:
+            assert sin_marca_de_tiempo(anterior.process_invoice(ruta)[1]) == sin_marca_de_tiempo(compilado.process_invoice(ruta)[1]), ruta
+
+        resultados = [
+            ("elementpath", medir(anterior, rutas, args.repeticiones)),
+            ("xpath", medir(compilado, rutas, args.repeticiones)),
+        ]
+
+    print(f"\n{'modo':<12} | {'documentos':>10} | {'us/factura':>10}")
+    for modo, segundos in resultados:
+        print(f"{modo:<12} | {args.documentos:>10} | {segundos * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark de la lectura de los ZIP del mes (descomprimir_y_procesar_zip en
+main/bussines/tcExtracFacturacion.py) en memoria y archivando en openZip.
+
+Cada ZIP trae un AttachedDocument y un PDF, como los adjuntos de la DIAN. Por
+modo se procesa el mes completo (leer el ZIP, extraer la factura, mover el ZIP
+a closedZip) y se reporta el tiempo, los archivos que quedan en openZip y los
+bytes escritos por el proceso (wchar de /proc/self/io, sólo en Linux).
+
+Uso:
+    python benchmarks/bench_zip_memoria.py [--zips 500]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from corpus import generar_attached_documents, generar_zips_mes
+
+from bussines.tcExtracFacturacion import descomprimir_y_procesar_zip
+from bussines.tcProcesFacturacion import extraer_datos_factura
+
+
+def bytes_escritos():
+    """Bytes pasados a write() por el proceso hasta ahora (None fuera de Linux)."""
+    try:
+        with open("/proc/self/io") as f:
+            return next(int(linea.split()[1]) for linea in f if linea.startswith("wchar:"))
+    except OSError:
+        return None
+
+
+def procesar_mes(carpeta_zip, carpeta, archivar):
+    open_dir = os.path.join(carpeta, "openZip")
+    closed_dir = os.path.join(carpeta, "closedZip", "4_2025")
+    # extraer_datos_factura imprime cada archivo leído
+    with contextlib.redirect_stdout(io.StringIO()):
+        for nombre in sorted(os.listdir(carpeta_zip)):
+            origen, xmls = descomprimir_y_procesar_zip("4_2025", os.path.join(carpeta_zip, nombre), nombre,
+                                                       open_dir, closed_dir, archivar=archivar)
+            for nombre_xml, datos in xmls:
+                extraer_datos_factura(os.path.join(origen, nombre_xml), streaming=True, datos=datos)
+    return open_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--zips", type=int, default=500)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = generar_attached_documents(os.path.join(carpeta, "xml"), args.zips)
+        originales = generar_zips_mes(os.path.join(carpeta, "zip"), rutas)
+
+        print(f"{'MODO':<10} | {'ms/MES':>9} | {'ARCHIVOS openZip':>16} | {'KiB ESCRITOS':>12}")
+        print("-" * 57)
+        for modo, archivar in (("memoria", False), ("archivar", True)):
+            trabajo = os.path.join(carpeta, modo)
+            carpeta_zip = os.path.join(trabajo, "zip")
+            os.makedirs(carpeta_zip)
+            for ruta in originales:
+                shutil.copy(ruta, carpeta_zip)
+
+            escritos = bytes_escritos()
+            inicio = time.perf_counter()
+            open_dir = procesar_mes(carpeta_zip, trabajo, archivar)
+            ms = (time.perf_counter() - inicio) * 1e3
+            escritos = bytes_escritos() - escritos if escritos is not None else None
+
+            archivos = sum(len(nombres) for _, _, nombres in os.walk(open_dir))
+            kib = f"{escritos / 1024:.0f}" if escritos is not None else "-"
+            print(f"{modo:<10} | {ms:>9.1f} | {archivos:>16} | {kib:>12}")
+
+
+if __name__ == "__main__":
+    main()
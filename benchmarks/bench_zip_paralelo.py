@@ -0,0 +1,75 @@
+"""
+Benchmark de la lectura de los ZIP del mes en paralelo (etapa "zip" de
+extraer_zips_mes en main/bussines/tcExtracFacturacion.py): leer los XML,
+verificar el CRC de todos los miembros y mover el ZIP a closedZip tras
+escribir los vouchers de todos sus XML.
+
+Genera un mes de --zips ZIP (AttachedDocument + PDF de --pdf-kib KiB cada uno)
+y lo procesa con cada número de hilos lectores, con una copia fresca de los
+ZIP y una caché vacía por corrida. Reporta el tiempo total, el tiempo ocupado
+de la etapa zip (sumado sobre sus hilos) y comprueba que las filas salen en
+el mismo orden en todas las corridas.
+
+Uso:
+    python benchmarks/bench_zip_paralelo.py [--zips 5000] [--lectores 1 2 4] [--parsers 2] [--pdf-kib 20]
+"""
+import argparse
+import contextlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from corpus import generar_attached_documents, generar_zips_mes
+
+from bussines.tcExtracFacturacion import extraer_zips_mes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--zips", type=int, default=5000)
+    parser.add_argument("--lectores", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--parsers", type=int, default=2)
+    parser.add_argument("--pdf-kib", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = generar_attached_documents(os.path.join(carpeta, "xml"), args.zips)
+        originales = generar_zips_mes(os.path.join(carpeta, "zips"), rutas, pdf_bytes=args.pdf_kib * 1024)
+        print(f"{len(originales)} ZIP, {os.cpu_count()} CPU, {args.parsers} hilos de parseo\n")
+
+        print(f"{'LECTORES':>8} | {'s TOTAL':>8} | {'s OCUPADO zip':>13} | {'ZIP/s':>8}")
+        print("-" * 47)
+        esperado = None
+        for lectores in args.lectores:
+            trabajo = os.path.join(carpeta, f"lectores_{lectores}")
+            base = os.path.join(trabajo, "zip")
+            os.makedirs(base)
+            for ruta in originales:
+                shutil.copy(ruta, base)
+            destinos = [os.path.join(trabajo, nombre) for nombre in ("openZip", "closedZip", "voucher")]
+
+            inicio = time.perf_counter()
+            salida = io.StringIO()
+            with contextlib.redirect_stdout(salida):
+                filas = extraer_zips_mes(base, "4_2025", *destinos, os.path.join(trabajo, "cache.sqlite"),
+                                         parsers=args.parsers, lectores=lectores)
+            segundos = time.perf_counter() - inicio
+            # Fila "zip" de la tabla de métricas que imprime extraer_zips_mes
+            etapa_zip = [linea for linea in salida.getvalue().splitlines() if linea.startswith("zip ")][-1]
+            ocupado = float(etapa_zip.split("|")[5])
+
+            estados = [fila.to_state() for fila in filas]
+            if esperado is None:
+                esperado = estados
+            elif estados != esperado:
+                raise SystemExit(f"Orden distinto con {lectores} lectores")
+            print(f"{lectores:>8} | {segundos:>8.2f} | {ocupado:>13.2f} | {len(originales) / segundos:>8.0f}")
+            shutil.rmtree(trabajo)
+
+
+if __name__ == "__main__":
+    main()
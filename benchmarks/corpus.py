@@ -0,0 +1,105 @@
+"""
+Generadores de datos sintéticos para los benchmarks de Facturae Optimus.
+
+Los datos imitan la forma de las facturas reales de peajes (ver main/test/peajes)
+para que las mediciones sean representativas sin depender de correos reales.
+"""
+import os
+import random
+import re
+import sys
+import zipfile
+from decimal import Decimal
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+MAIN_DIR = ROOT_DIR / "main"
+
+# Los módulos de main/bussines usan importaciones relativas a main/
+for _path in (str(ROOT_DIR), str(MAIN_DIR)):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+# AttachedDocuments reales de peajes y de facturas de proveedores
+MUESTRAS_XML = sorted((MAIN_DIR / "test" / "peajes").glob("*.xml")) + sorted((MAIN_DIR / "test" / "facturas").glob("*.xml"))
+
+# ID de la factura embebida (primer cbc:ID con prefijo alfabético y número)
+_ID_FACTURA = re.compile(r"<cbc:ID>([A-Z]+)(\d+)</cbc:ID>")
+
+PEAJES = ["ALBARRACIN", "ROBLE", "ANDES", "TEBAIDA", "CIRCASIA", "PAVAS", "SAMACA"]
+PLACAS = ["VAK142", "SPX932", "TLZ455", "WHN210", "KOL918"]
+
+
+def generar_filas(n, semilla=2025):
+    """Genera n filas con la misma forma que devuelve extraer_datos_factura."""
+    rnd = random.Random(semilla)
+    filas = []
+    for i in range(n):
+        nota_credito = rnd.random() < 0.1
+        numero = str(4100000 + i)
+        filas.append({
+            "InvoiceType": "NOTA_CREDITO" if nota_credito else "FACTURA",
+            "FacturaID": ("NCPP" if nota_credito else "PR") + numero,
+            "FacturaCabecera": "NCPP" if nota_credito else "PR",
+            "FacturaNumero": numero,
+            "FechaEmision": f"{rnd.randint(1, 28):02d}/04/2025",
+            "ValorTotal": Decimal(rnd.choice([3400, 13000, 17600, 21300])),
+            "Moneda": "COP",
+            "ProveedorNombre": "PEAJES ELECTRONICOS S.A.S.",
+            "ProveedorNIT": "900470252",
+            "ClienteNombre": "Turbo Carga Sas",
+            "ClienteNIT": "901008808",
+            "NombrePeaje": "PEAJE " + rnd.choice(PEAJES),
+            "NumeroPlaca": rnd.choice(PLACAS),
+            "Items": [],
+            "FacturaRelacionada": str(4000000 + i) if nota_credito else "00000",
+            "xml": os.path.join("openZip", f"{numero}.xml"),
+        })
+    return filas
+
+
+def generar_attached_documents(carpeta, n, semilla=2025):
+    """
+    Escribe n AttachedDocuments en carpeta copiando las muestras reales y
+    cambiando el número de la factura embebida para que cada archivo sea único.
+
+    Returns:
+        Lista de rutas generadas.
+    """
+    rnd = random.Random(semilla)
+    plantillas = []
+    for muestra in MUESTRAS_XML:
+        texto = muestra.read_text(encoding="utf-8")
+        prefijo, numero = _ID_FACTURA.search(texto).groups()
+        plantillas.append((texto, prefijo + numero, prefijo))
+
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+    for i in range(n):
+        texto, factura_id, prefijo = plantillas[rnd.randrange(len(plantillas))]
+        ruta = os.path.join(carpeta, f"ad{i:08d}.xml")
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(texto.replace(factura_id, f"{prefijo}{5000000 + i}"))
+        rutas.append(ruta)
+    return rutas
+
+
+def generar_zips_mes(carpeta, rutas, pdf_bytes=60_000):
+    """
+    Empaca cada AttachedDocument en su propio ZIP con un PDF de relleno, como
+    los adjuntos de la DIAN que llegan por correo (un ZIP por factura).
+
+    Returns:
+        Lista de rutas de los ZIP generados.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    pdf = b"%PDF-1.4\n" + os.urandom(pdf_bytes)
+    zips = []
+    for ruta in rutas:
+        nombre = os.path.splitext(os.path.basename(ruta))[0]
+        ruta_zip = os.path.join(carpeta, f"{nombre}.zip")
+        with zipfile.ZipFile(ruta_zip, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+            zip_ref.write(ruta, f"{nombre}.xml")
+            zip_ref.writestr(f"{nombre}.pdf", pdf)
+        zips.append(ruta_zip)
+    return zips
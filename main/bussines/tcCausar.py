@@ -2,16 +2,24 @@
 from openpyxl import Workbook, load_workbook
 from datetime import datetime
 import os
-from plantilla.cabecera import Cabecera
 from plantilla.constants import Constants
+from plantilla.fila_compilada import compilar_fila_desde_enums
 
-def crear_archivo_excel_con_cabecera(base_dir,subFolder,tenant_id,cabeceras):
+# Fila precompilada una sola vez al cargar el módulo
+FILA_COMPILADA = compilar_fila_desde_enums()
+
+def ruta_archivo_excel(base_dir,subFolder,tenant_id):
     nombre_archivo = f"documento_{subFolder}.xlsx"
     # Establecer la ruta del archivo Excel
     path_excel = os.path.join(base_dir,Constants.APLICATION_NAME.value[0],tenant_id, "output", nombre_archivo)  # Aquí creas el directorio "file"
     # Verifica que la carpeta "file" exista, si no, créala
     if not os.path.exists(os.path.dirname(path_excel)):
         os.makedirs(os.path.dirname(path_excel))
+    return path_excel
+
+
+def crear_archivo_excel_con_cabecera(base_dir,subFolder,tenant_id,cabeceras):
+    path_excel = ruta_archivo_excel(base_dir,subFolder,tenant_id)
 
     wb = Workbook()
     ws = wb.active
@@ -45,49 +53,68 @@ def agregar_filas_al_excel(path_excel: str, datos: list[dict]):
         else:
             ws = wb[str(Constants.NOTA_CREDITO.value[0])]
             agregar_fila_excel(ws,item)
-        
-        wb.save(path_excel)
+
+    # Guardar una sola vez: guardar por cada fila reescribe el libro completo
+    wb.save(path_excel)
     print(f"Se agregaron {len(datos)} filas al archivo.")
 
 
-# Método para agregar una fila de datos al archivo Excel
-def agregar_fila_excel(ws, item):
-    # Detectar la siguiente fila disponible
-    next_row = ws.max_row + 1
-
-    # Agregar datos utilizando las constantes y el item
-    ws.cell(row=next_row, column=Constants.ENCAB_EMPRESA.value[1], value=Constants.ENCAB_EMPRESA.value[0])
-
-    # Condición para determinar el tipo de documento
-    if item["FacturaCabecera"] == "PP" or item["FacturaCabecera"] == "PR":
-        ws.cell(row=next_row, column=Constants.ENCAB_TIPO_DOCUMENTO_FC.value[1], value=Constants.ENCAB_TIPO_DOCUMENTO_FC.value[0])
-        ws.cell(row=next_row, column=Cabecera.ENCAB_NO_DTO_EXT.value[1], value=item["FacturaNumero"])
-    else:
-        ws.cell(row=next_row, column=Constants.ENCAB_TIPO_DOCUMENTO_NCDOC.value[1], value=Constants.ENCAB_TIPO_DOCUMENTO_NCDOC.value[0])
-        ws.cell(row=next_row, column=Cabecera.ENCAB_NO_DTO_EXT.value[1], value=item["FacturaRelacionada"])
-    
-    # Rellenar las demás celdas
-    ws.cell(row=next_row, column=Constants.ENCAB_TERCERO_INTERNO.value[1], value=Constants.ENCAB_TERCERO_INTERNO.value[0])
-    ws.cell(row=next_row, column=Constants.ENCAB_TERCERO_EXTERNO.value[1], value=Constants.ENCAB_TERCERO_EXTERNO.value[0])
-    ws.cell(row=next_row, column=Constants.ENCAB_FORMA_PAGO.value[1], value=Constants.ENCAB_FORMA_PAGO.value[0])
-    ws.cell(row=next_row, column=Constants.ENCAB_VERIFICADO.value[1], value=Constants.ENCAB_VERIFICADO.value[0])
-    ws.cell(row=next_row, column=Constants.ENCAB_ANULADO.value[1], value=Constants.ENCAB_ANULADO.value[0])
-    ws.cell(row=next_row, column=Constants.DETALLE_PRODUCTO.value[1], value=Constants.DETALLE_PRODUCTO.value[0])
-    ws.cell(row=next_row, column=Constants.DETALLE_BODEGA.value[1], value=Constants.DETALLE_BODEGA.value[0])
-    ws.cell(row=next_row, column=Constants.DETALLE_UNIDAD_MEDIDA.value[1], value=Constants.DETALLE_UNIDAD_MEDIDA.value[0])
-    ws.cell(row=next_row, column=Constants.DETALLE_CANTIDAD.value[1], value=Constants.DETALLE_CANTIDAD.value[0])
-    ws.cell(row=next_row, column=Constants.DETALLE_IVA.value[1], value=Constants.DETALLE_IVA.value[0])
-    ws.cell(row=next_row, column=Constants.DETALLE_DESCUENTO.value[1], value=Constants.DETALLE_DESCUENTO.value[0])
-
-    # Rellenar los campos específicos del item
-    ws.cell(row=next_row, column=Cabecera.ENCAB_FECHA.value[1], value=item["FechaEmision"])
-    ws.cell(row=next_row, column=Cabecera.ENCAB_PREF_DTO_EXT.value[1], value=item["FacturaCabecera"])
-    ws.cell(row=next_row, column=Cabecera.ENCAB_NOTA.value[1], value=item["NombrePeaje"])
-    ws.cell(row=next_row, column=Cabecera.ENCAB_FECHA_EMISION.value[1], value=item["FechaEmision"])
-
-    ws.cell(row=next_row, column=Cabecera.DETALLE_VALOR_UNITARIO.value[1], value=item["ValorTotal"])
-    ws.cell(row=next_row, column=Cabecera.DETALLE_VENCIMIENTO.value[1], value=item["FechaEmision"])
-    ws.cell(row=next_row, column=Cabecera.DETALLE_CENTRO_COSTOS.value[1], value=item["NumeroPlaca"])
+def crear_archivo_excel_en_lote(base_dir,subFolder,tenant_id,cabeceras,datos,fila_compilada=None):
+    """Crea el archivo Excel con cabeceras y filas en una sola pasada."""
+    path_excel = ruta_archivo_excel(base_dir,subFolder,tenant_id)
+    escribir_excel_en_lote(path_excel,cabeceras,datos,fila_compilada)
+    print(f"✅ Archivo creado: {path_excel}")
+    return path_excel
 
 
+def escribir_excel_en_lote(path_excel: str, cabeceras, datos, fila_compilada=None):
+    """
+    Escribe las hojas FACTURA y NOTA_CREDITO con un libro de solo escritura
+    (streaming de openpyxl) y guarda el archivo exactamente una vez.
+    Las filas salen de fila_compilada (la plantilla del tenant) o, si no se
+    indica, de la fila compilada desde Cabecera/Constants.
+    """
+    construir = (fila_compilada or FILA_COMPILADA).construir
+    wb = Workbook(write_only=True)
+    ws_factura = wb.create_sheet(title=str(Constants.FACTURA.value[0]))
+    ws_nota = wb.create_sheet(title=str(Constants.NOTA_CREDITO.value[0]))
+
+    fila_cabecera = construir_fila_cabecera(cabeceras)
+    ws_factura.append(fila_cabecera)
+    ws_nota.append(fila_cabecera)
+
+    hojas = {ws_factura.title: ws_factura, ws_nota.title: ws_nota}
+    total = 0
+    for item in datos:
+        hojas[hoja_de(item)].append(construir(item))
+        total += 1
+
+    wb.save(path_excel)
+    print(f"Se agregaron {total} filas al archivo.")
+    return total
+
+
+def hoja_de(item):
+    # Nombre de la hoja (FACTURA o NOTA_CREDITO) donde va el documento
+    if item["InvoiceType"] == Constants.FACTURA.value[0]:
+        return str(Constants.FACTURA.value[0])
+    return str(Constants.NOTA_CREDITO.value[0])
+
 
+def construir_fila_cabecera(cabeceras):
+    # Fila de cabecera con cada columna en la posición indicada por la plantilla
+    ancho = max((columna.index for columna in cabeceras), default=0)
+    fila = [None] * ancho
+    for columna in cabeceras:
+        fila[columna.index - 1] = str(columna.column)
+    return fila
+
+
+def construir_fila_excel(item, fila_compilada=None):
+    # Copia de la fila prototipo más las asignaciones de los campos de la factura
+    return (fila_compilada or FILA_COMPILADA).construir(item)
+
+
+# Método para agregar una fila de datos al archivo Excel
+def agregar_fila_excel(ws, item, fila_compilada=None):
+    ws.append(construir_fila_excel(item, fila_compilada))
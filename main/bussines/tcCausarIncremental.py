@@ -0,0 +1,225 @@
+﻿import json
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
+from lxml import etree
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import column_index_from_string, get_column_letter
+from bussines.tcCausar import FILA_COMPILADA, escribir_excel_en_lote, hoja_de
+from plantilla.constants import Constants
+
+# Versión del formato del índice lateral (<documento>.xlsx.idx.json)
+VERSION_INDICE = 1
+
+NS_HOJA = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PAQUETE = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+HOJAS = (str(Constants.FACTURA.value[0]), str(Constants.NOTA_CREDITO.value[0]))
+
+# <dimension ref="A1:H12"/> de la hoja: celda inicial y, si hay más de una, la final
+DIMENSION = re.compile(rb'<dimension ref="([A-Z]+\d+)(?::([A-Z]+)(\d+))?"\s*/>')
+# Sin <dimension> (openpyxl en modo write_only no la escribe) va después de <sheetPr>
+ANTES_DE_DIMENSION = re.compile(rb'<sheetPr\b[^>]*/>|</sheetPr>|<worksheet\b[^>]*>')
+
+
+def ruta_indice(path_excel):
+    return f"{path_excel}.idx.json"
+
+
+def cargar_indice(path_excel):
+    """Devuelve el índice lateral del libro o None si no existe o no corresponde."""
+    path_indice = ruta_indice(path_excel)
+    if not os.path.exists(path_excel) or not os.path.exists(path_indice):
+        return None
+    try:
+        with open(path_indice, "r", encoding="utf-8") as f:
+            indice = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Índice incremental ilegible, se reconstruye el libro: {e}")
+        return None
+    if indice.get("version") != VERSION_INDICE:
+        return None
+    indice["facturas"] = set(indice.get("facturas", []))
+    return indice
+
+
+def guardar_indice(path_excel, indice):
+    # Escritura atómica para no dejar un índice a medias si el proceso se cae
+    path_indice = ruta_indice(path_excel)
+    datos = {
+        "version": VERSION_INDICE,
+        "archivo": os.path.basename(path_excel),
+        "siguiente_fila": indice["siguiente_fila"],
+        "facturas": sorted(indice["facturas"]),
+    }
+    temporal = f"{path_indice}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(temporal, path_indice)
+
+
+def indice_de_filas(datos):
+    """Índice de un libro escrito completo con escribir_excel_en_lote(datos)."""
+    siguiente_fila = {hoja: 2 for hoja in HOJAS}
+    for item in datos:
+        siguiente_fila[hoja_de(item)] += 1
+    return {
+        "siguiente_fila": siguiente_fila,
+        "facturas": {item["FacturaID"] for item in datos},
+    }
+
+
+def escribir_libro_con_indice(path_excel, cabeceras, datos, fila_compilada=None):
+    """
+    Escribe el libro completo con escribir_excel_en_lote y renueva su índice,
+    para que la siguiente ejecución incremental anexe a partir de este libro.
+    """
+    total = escribir_excel_en_lote(path_excel, cabeceras, datos, fila_compilada)
+    guardar_indice(path_excel, indice_de_filas(datos))
+    return total
+
+
+def agregar_filas_incremental(path_excel, cabeceras, datos, fila_compilada=None, historico=None):
+    """
+    Agrega al libro sólo las facturas que aún no están registradas en el índice.
+
+    Si el libro o su índice no existen (primera ejecución incremental, libro
+    generado por otro flujo o índice borrado) se escribe el libro completo con
+    las filas de historico() más las de datos: historico debe devolver todas
+    las facturas ya extraídas del mes (los vouchers), porque los ZIP de
+    ejecuciones anteriores ya no están para volver a leerlos. En otro caso las
+    filas nuevas se anexan directamente al XML de cada hoja, a partir de la
+    siguiente fila libre guardada en el índice, sin cargar las filas
+    existentes con openpyxl.
+    """
+    indice = cargar_indice(path_excel)
+
+    if indice is None:
+        if historico is not None:
+            datos = list(historico()) + list(datos)
+        elif os.path.exists(path_excel):
+            print(f"⚠️ {os.path.basename(path_excel)} no tiene índice y no hay histórico: sólo quedan las facturas de esta ejecución")
+        nuevas = filtrar_nuevas(datos, set())
+        escribir_libro_con_indice(path_excel, cabeceras, nuevas, fila_compilada)
+        print(f"✅ Libro incremental creado con {len(nuevas)} filas: {path_excel}")
+        return len(nuevas)
+
+    nuevas = filtrar_nuevas(datos, indice["facturas"])
+
+    if not nuevas:
+        print(f"✅ Sin facturas nuevas para {os.path.basename(path_excel)} ({len(datos)} ya registradas)")
+        return 0
+
+    construir = (fila_compilada or FILA_COMPILADA).construir
+    filas_por_hoja = {hoja: [] for hoja in HOJAS}
+    for item in nuevas:
+        filas_por_hoja[hoja_de(item)].append(construir(item))
+
+    indice["siguiente_fila"] = _anexar_filas_xlsx(path_excel, filas_por_hoja, indice["siguiente_fila"])
+    indice["facturas"].update(item["FacturaID"] for item in nuevas)
+    guardar_indice(path_excel, indice)
+    print(f"Se anexaron {len(nuevas)} filas nuevas ({len(datos) - len(nuevas)} ya registradas).")
+    return len(nuevas)
+
+
+def filtrar_nuevas(datos, registradas):
+    """Facturas de datos que no están en registradas, sin repetir FacturaID."""
+    vistas = set(registradas)
+    nuevas = []
+    for item in datos:
+        factura_id = item["FacturaID"]
+        if factura_id in vistas:
+            continue
+        vistas.add(factura_id)
+        nuevas.append(item)
+    return nuevas
+
+
+def _rutas_hojas(zip_ref):
+    # Nombre de hoja -> miembro del ZIP (xl/worksheets/sheetN.xml)
+    libro = etree.fromstring(zip_ref.read("xl/workbook.xml"))
+    relaciones = etree.fromstring(zip_ref.read("xl/_rels/workbook.xml.rels"))
+    destinos = {}
+    for rel in relaciones.iter(f"{{{NS_PAQUETE}}}Relationship"):
+        destino = rel.get("Target")
+        destino = destino.lstrip("/") if destino.startswith("/") else f"xl/{destino}"
+        destinos[rel.get("Id")] = destino
+    return {
+        hoja.get("name"): destinos[hoja.get(f"{{{NS_REL}}}id")]
+        for hoja in libro.iter(f"{{{NS_HOJA}}}sheet")
+    }
+
+
+def _anexar_filas_xlsx(path_excel, filas_por_hoja, siguiente_fila):
+    siguiente_fila = dict(siguiente_fila)
+    temporal = f"{path_excel}.tmp"
+    with zipfile.ZipFile(path_excel, "r") as zin:
+        miembros = {ruta: hoja for hoja, ruta in _rutas_hojas(zin).items() if filas_por_hoja.get(hoja)}
+        with zipfile.ZipFile(temporal, "w", zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                contenido = zin.read(info.filename)
+                hoja = miembros.get(info.filename)
+                if hoja is not None:
+                    inicio = _verificar_cursor(contenido, siguiente_fila.get(hoja, 2), hoja)
+                    contenido = _insertar_filas(contenido, filas_por_hoja[hoja], inicio)
+                    siguiente_fila[hoja] = inicio + len(filas_por_hoja[hoja])
+                zout.writestr(info, contenido)
+    os.replace(temporal, path_excel)
+    return siguiente_fila
+
+
+def _verificar_cursor(contenido, cursor, hoja):
+    # El cursor del índice debe coincidir con la última fila real de la hoja
+    posicion = contenido.rfind(b'<row r="')
+    if posicion < 0:
+        real = 1
+    else:
+        inicio = posicion + len(b'<row r="')
+        real = int(contenido[inicio:contenido.index(b'"', inicio)]) + 1
+    if real != cursor:
+        print(f"⚠️ Cursor de la hoja {hoja} desactualizado ({cursor}), se usa la fila {real}")
+    return real
+
+
+def _insertar_filas(contenido, filas, inicio):
+    letras = [get_column_letter(columna) for columna in range(1, max(map(len, filas)) + 1)]
+    partes = []
+    for numero, fila in enumerate(filas, start=inicio):
+        partes.append(f'<row r="{numero}">')
+        for letra, valor in zip(letras, fila):
+            if valor is None:
+                continue
+            celda = f"{letra}{numero}"
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                partes.append(f'<c r="{celda}"><v>{valor}</v></c>')
+            else:
+                # Los caracteres de control que XML no admite dejan el libro ilegible (openpyxl los rechaza)
+                texto = escape(ILLEGAL_CHARACTERS_RE.sub("", str(valor)))
+                espacio = ' xml:space="preserve"' if texto != texto.strip() else ""
+                partes.append(f'<c r="{celda}" t="inlineStr"><is><t{espacio}>{texto}</t></is></c>')
+        partes.append("</row>")
+    nuevas = "".join(partes).encode("utf-8")
+
+    if b"</sheetData>" in contenido:
+        contenido = contenido.replace(b"</sheetData>", nuevas + b"</sheetData>", 1)
+    else:
+        contenido = contenido.replace(b"<sheetData/>", b"<sheetData>" + nuevas + b"</sheetData>", 1)
+    return _actualizar_dimension(contenido, len(letras), inicio + len(filas) - 1)
+
+
+def _actualizar_dimension(contenido, columnas, ultima_fila):
+    # Los lectores que confían en <dimension> verían sólo el rango anterior (o ninguno)
+    dimension = DIMENSION.search(contenido)
+    if dimension is None:
+        anterior = ANTES_DE_DIMENSION.search(contenido)
+        inicio, desde, hasta = "A1", anterior.end(), anterior.end()
+    else:
+        inicio, columna_final, fila_final = dimension.groups()
+        inicio, desde, hasta = inicio.decode(), dimension.start(), dimension.end()
+        if columna_final is not None:
+            columnas = max(columnas, column_index_from_string(columna_final.decode()))
+            ultima_fila = max(ultima_fila, int(fila_final))
+    ref = f'<dimension ref="{inicio}:{get_column_letter(columnas)}{ultima_fila}"/>'.encode()
+    return contenido[:desde] + ref + contenido[hasta:]
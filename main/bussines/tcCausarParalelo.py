@@ -0,0 +1,209 @@
+﻿import ast
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from bussines.tcCausar import ruta_archivo_excel
+from bussines.tcCausarIncremental import escribir_libro_con_indice
+from bussines.tcSalidas import escribir_salidas_columnares
+from objects.fo_obj_plantilla import do_on_get_columns, do_on_get_salidas
+from plantilla.constants import Constants
+from plantilla.fila_compilada import obtener_fila_compilada
+from process.records import VoucherRow
+from process.voucher_store import VoucherStore
+
+# Mismas rutas que usa el flujo interactivo (tcExtracFacturacion)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+TENANT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "build", "tenant")
+
+
+@dataclass
+class TrabajoPlantilla:
+    """Un libro a generar: un tenant y un mes (subFolder MES_AÑO)."""
+    tenant_id: str
+    subFolder: str
+    base_dir: str = BASE_DIR
+    tenant_dir: str = TENANT_DIR
+
+
+@dataclass
+class ResultadoPlantilla:
+    tenant_id: str
+    subFolder: str
+    filas: int = 0
+    rutas: Optional[List[str]] = None
+    segundos: float = 0.0
+    error: Optional[str] = None
+    # Vouchers omitidos y otros avisos del worker, para que los informe el proceso principal
+    avisos: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def validar_trabajo(trabajo: TrabajoPlantilla) -> None:
+    """
+    tenant_id y subFolder forman parte de las rutas: deben ser un único nombre
+    de carpeta, para que nada se escriba fuera de Facturae_Optimus/<tenant>/.
+    """
+    for campo in ("tenant_id", "subFolder"):
+        valor = getattr(trabajo, campo)
+        if not valor or valor in (".", "..") or os.path.basename(valor) != valor or "/" in valor or "\\" in valor:
+            raise ValueError(f"{campo} inválido: {valor!r}")
+
+
+def ruta_vouchers(base_dir, tenant_id, subFolder):
+    return os.path.join(base_dir, Constants.APLICATION_NAME.value[0], tenant_id, "voucher", subFolder)
+
+
+def cargar_vouchers(voucher_dir, avisos=None):
+    """
+    Lee las filas ya extraídas del mes como process.records.VoucherRow: las
+    del almacén del mes (process.voucher_store) en el orden en que se
+    guardaron, que es el de extracción (el mismo de lista_peajes en
+    tcExtracFacturacion), y luego, por nombre, las de los vouchers sueltos de
+    ejecuciones anteriores (<FacturaID>.txt con el JSON de VoucherRow.to_json
+    o, más antiguos, el str del dict, que se lee con ast.literal_eval). Si
+    una factura está en ambos gana el almacén; los .txt ilegibles se omiten
+    y, si se pasa la lista avisos, se anotan en ella (esta función corre en
+    los workers de generar_plantillas_en_paralelo: no imprime).
+    """
+    if not os.path.isdir(voucher_dir):
+        raise FileNotFoundError(f"No existe la carpeta de vouchers: {voucher_dir}")
+    filas = {}
+    for factura_id, texto in VoucherStore(voucher_dir).replay():
+        filas[factura_id] = VoucherRow.from_json(texto)
+    for nombre in sorted(os.listdir(voucher_dir)):
+        if not nombre.endswith(".txt") or nombre[:-len(".txt")] in filas:
+            continue
+        with open(os.path.join(voucher_dir, nombre), "r", encoding="utf-8") as f:
+            texto = f.read()
+        try:
+            filas[nombre[:-len(".txt")]] = VoucherRow.from_json(texto)
+            continue
+        except (ValueError, ArithmeticError):
+            pass
+        try:
+            fila = ast.literal_eval(texto)
+            if isinstance(fila, dict):
+                filas[nombre[:-len(".txt")]] = VoucherRow.from_dict(fila)
+        except (ValueError, SyntaxError, ArithmeticError) as e:
+            if avisos is not None:
+                avisos.append(f"Voucher ilegible omitido {nombre}: {e}")
+    return list(filas.values())
+
+
+def exportar_vouchers(voucher_dir, destino=None, ids=None):
+    """
+    Materializa vouchers del almacén del mes como <FacturaID>.txt (todos o
+    los de ids) en destino, por defecto la misma carpeta del mes.
+
+    Returns:
+        Rutas escritas.
+    """
+    store = VoucherStore(voucher_dir)
+    return store.export(destino or voucher_dir, ids)
+
+
+def generar_plantilla_tenant(trabajo: TrabajoPlantilla) -> ResultadoPlantilla:
+    """
+    Genera el libro (y las salidas columnares configuradas) de un tenant-mes a
+    partir de sus vouchers. Cualquier error queda en el resultado para no
+    afectar a los demás tenants.
+    """
+    inicio = time.perf_counter()
+    resultado = ResultadoPlantilla(tenant_id=trabajo.tenant_id, subFolder=trabajo.subFolder)
+    try:
+        validar_trabajo(trabajo)
+        plantilla_file = os.path.join(trabajo.tenant_dir, trabajo.tenant_id, "plantilla.json")
+        cabeceras = do_on_get_columns(plantilla_file)
+        salidas = do_on_get_salidas(plantilla_file)
+        fila_compilada = obtener_fila_compilada(plantilla_file)
+        datos = cargar_vouchers(ruta_vouchers(trabajo.base_dir, trabajo.tenant_id, trabajo.subFolder), resultado.avisos)
+
+        # Siempre bajo Facturae_Optimus/<tenant>/output/
+        path_excel = ruta_archivo_excel(trabajo.base_dir, trabajo.subFolder, trabajo.tenant_id)
+        rutas = []
+        if "xlsx" in salidas:
+            # El índice del modo incremental (y el de las salidas columnares) se renueva con el libro
+            escribir_libro_con_indice(path_excel, cabeceras, datos, fila_compilada)
+            rutas.append(path_excel)
+        rutas.extend(escribir_salidas_columnares(
+            os.path.splitext(path_excel)[0], cabeceras, datos, salidas, fila_compilada=fila_compilada
+        ))
+        resultado.filas = len(datos)
+        resultado.rutas = rutas
+    except Exception as e:
+        resultado.error = f"{type(e).__name__}: {e}"
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def generar_en_proceso_aislado(trabajo: TrabajoPlantilla) -> ResultadoPlantilla:
+    """generar_plantilla_tenant en un proceso propio: si el proceso muere, sólo falla este libro."""
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(generar_plantilla_tenant, trabajo).result()
+        except BrokenProcessPool as e:
+            return ResultadoPlantilla(trabajo.tenant_id, trabajo.subFolder, error=f"{type(e).__name__}: {e}")
+
+
+def generar_plantillas_en_paralelo(trabajos: List[TrabajoPlantilla], workers: Optional[int] = None) -> List[ResultadoPlantilla]:
+    """
+    Genera un libro por trabajo en un pool de procesos (un libro por worker).
+
+    Informa el avance a medida que terminan los libros y devuelve los
+    resultados en el mismo orden de los trabajos.
+
+    Si un worker muere, el pool entrega BrokenProcessPool para todos los
+    libros que no habían terminado, sin decir cuál lo causó: esos libros se
+    vuelven a generar uno por uno, cada uno en un proceso propio
+    (generar_en_proceso_aislado), y sólo falla el que vuelva a matar su
+    proceso.
+    """
+    if not trabajos:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(trabajos))
+    inicio = time.perf_counter()
+    resultados = [None] * len(trabajos)
+    terminados = 0
+
+    def informar(posicion, resultado):
+        nonlocal terminados
+        terminados += 1
+        resultados[posicion] = resultado
+        estado = f"✅ {resultado.filas} filas" if resultado.ok else f"❌ {resultado.error}"
+        print(f"[{terminados}/{len(trabajos)}] {resultado.tenant_id} {resultado.subFolder}: {estado} ({resultado.segundos:.2f} s)")
+        for aviso in resultado.avisos:
+            print(f"   ⚠️ {aviso}")
+
+    print(f"🚀 Generando {len(trabajos)} plantillas con {workers} procesos...")
+    interrumpidos = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {}
+        for posicion, trabajo in enumerate(trabajos):
+            try:
+                futuros[pool.submit(generar_plantilla_tenant, trabajo)] = posicion
+            except BrokenProcessPool:
+                # El pool ya se rompió: este libro tampoco llegó a un worker
+                interrumpidos.append(posicion)
+        for futuro in as_completed(futuros):
+            try:
+                resultado = futuro.result()
+            except BrokenProcessPool:
+                interrumpidos.append(futuros[futuro])
+                continue
+            informar(futuros[futuro], resultado)
+
+    if interrumpidos:
+        print(f"⚠️ Un proceso del pool murió: se reintentan {len(interrumpidos)} plantillas, cada una en su propio proceso")
+        for posicion in sorted(interrumpidos):
+            informar(posicion, generar_en_proceso_aislado(trabajos[posicion]))
+
+    fallidos = sum(1 for resultado in resultados if not resultado.ok)
+    print(f"🏁 {len(trabajos) - fallidos} plantillas generadas, {fallidos} con error en {time.perf_counter() - inicio:.2f} s")
+    return resultados
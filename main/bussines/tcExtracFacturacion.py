@@ -1,12 +1,25 @@
 ﻿import os
 import shutil
+import time
 import zipfile
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from lxml import etree
-from bussines.tcCausar import agregar_filas_al_excel
-from bussines.tcCausar import crear_archivo_excel_con_cabecera
+from bussines.tcCausar import ruta_archivo_excel
+from bussines.tcCausarIncremental import agregar_filas_incremental, escribir_libro_con_indice
+from bussines.tcCausarParalelo import cargar_vouchers
+from bussines.tcSalidas import escribir_salidas_columnares, escribir_salidas_incremental
 from bussines.tcProcesFacturacion import extraer_datos_factura
+from process.header import read_header
+from process.parse_cache import ParseCache
+from process.pipeline import DEFAULT_QUEUE_SIZE, Pipeline, Stage, format_metrics
+from process.records import CREDIT_NOTE, VoucherRow
+from process.run_manifest import FAILED, PARSED, PENDING, WRITTEN, RunManifest
+from process.voucher_store import VoucherStore
 from plantilla.constants import Constants
-from objects.fo_obj_plantilla import do_on_get_columns
+from plantilla.fila_compilada import obtener_fila_compilada
+from objects.fo_obj_plantilla import do_on_get_columns, do_on_get_salidas
 
 # Namespaces UBL
 ns = {
@@ -14,84 +27,401 @@ ns = {
     'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2'
 }
 
-def descomprimir_y_procesar_zip(subFolder,zipPath,zipName,processDir,closedDir):  
+def leer_xml_zip(subFolder,zipPath,zipName,processDir,closedDir,archivar=False):
+    """
+    Lee los XML del ZIP en memoria (ZipFile.open, sin escribirlos a disco) y
+    verifica el CRC de todos sus miembros; no mueve el ZIP. Con archivar=True
+    además descomprime el ZIP completo en processDir/subFolder/zipName.
+
+    Returns:
+        (origen, xmls): carpeta descomprimida (o la ruta que tendrá el ZIP en
+        closedDir si no se archiva) y lista de (nombre_xml, bytes) en el
+        orden del ZIP.
+
+    Raises:
+        zipfile.BadZipFile: Si el ZIP está dañado o un miembro no pasa el CRC.
+    """
     print(f"descomprimir_y_procesar_zip: {zipPath} | subFolder: {subFolder} | zipName: {zipName}")
     carpeta_destino = os.path.join(processDir,subFolder, zipName)
-    os.makedirs(carpeta_destino, exist_ok=True)
-    print(f"📁 Carpeta destino para descomprimir: {carpeta_destino}")
+    destino_zip = os.path.join(closedDir, os.path.basename(zipPath))
 
-    # Extraer todo el contenido
+    # Un solo ZipFile: los XML se leen del ZIP y, si se archiva, se extrae todo
     with zipfile.ZipFile(zipPath, "r") as zip_ref:
-        nombres_archivos = zip_ref.namelist()
-        archivos_xml = [nombre for nombre in nombres_archivos if nombre.lower().endswith('.xml')]
-        
+        archivos_xml = [nombre for nombre in zip_ref.namelist() if nombre.lower().endswith('.xml')]
+
         print("🧾 Archivos XML encontrados en el ZIP:")
+        xmls = []
         for xml in archivos_xml:
             print(f" - {xml}")
-            
-        zip_ref.extractall(carpeta_destino)
+            # ZipExtFile compara el CRC al llegar al final del miembro
+            with zip_ref.open(xml) as archivo:
+                xmls.append((xml, archivo.read()))
 
-    print(f"📁 ZIP descomprimido en: {carpeta_destino}")
+        if archivar:
+            os.makedirs(carpeta_destino, exist_ok=True)
+            zip_ref.extractall(carpeta_destino)
+            print(f"📁 ZIP descomprimido en: {carpeta_destino}")
+        else:
+            verificar_crc(zip_ref, [nombre for nombre in zip_ref.namelist() if nombre not in archivos_xml])
 
-    # Mover el ZIP a la carpeta 'closed'
+    return (carpeta_destino if archivar else destino_zip), xmls
+
+def verificar_crc(zip_ref, nombres):
+    """Lee los miembros (por bloques, sin guardarlos) para que ZipFile compare su CRC."""
+    for nombre in nombres:
+        with zip_ref.open(nombre) as archivo:
+            while archivo.read(1 << 20):
+                pass
+
+def mover_zip_cerrado(zipPath,closedDir):
+    """Mueve el ZIP ya procesado a la carpeta 'closed'."""
     os.makedirs(closedDir, exist_ok=True)
     destino_zip = os.path.join(closedDir, os.path.basename(zipPath))
     shutil.move(zipPath, destino_zip)
-
     print(f"📦 ZIP movido a: {destino_zip}\n")
-    return carpeta_destino,archivos_xml;
+    return destino_zip
 
-def do_on_create_voucher(factura_id, texto_factura,voucherDir):
-    
-    # Crear la carpeta 'voucherPeaje' si no existe
-    if not os.path.exists(voucherDir):
-        os.makedirs(voucherDir)
-    
-    # Crear el nombre del archivo con el factura_id
-    file_name = f"{factura_id}.txt"
-    file_path = os.path.join(voucherDir, file_name)
-    
-    # Guardar el texto de la factura en el archivo .txt
-    with open(file_path, "w", encoding="utf-8") as file:
-        file.write(texto_factura)
-    
-    print(f"Factura guardada en: {file_path}")
+def descomprimir_y_procesar_zip(subFolder,zipPath,zipName,processDir,closedDir,archivar=False):
+    """leer_xml_zip y mover el ZIP a closedDir de inmediato (un ZIP suelto, fuera del pipeline)."""
+    origen, xmls = leer_xml_zip(subFolder,zipPath,zipName,processDir,closedDir,archivar=archivar)
+    mover_zip_cerrado(zipPath,closedDir)
+    return origen, xmls
+
+def inventario_zip(zipPath):
+    """
+    Cabeceras (tipo, ID y fecha de emisión) de los XML del ZIP, leídas desde
+    el ZIP sin descomprimirlo a disco y sin parsear las facturas completas.
+
+    Returns:
+        (cabeceras, errores): lista de (nombre_xml, InvoiceHeader) y lista de
+        (nombre_xml, mensaje) de los XML que no se pudieron leer.
+    """
+    cabeceras = []
+    errores = []
+    with zipfile.ZipFile(zipPath, "r") as zip_ref:
+        for nombre in zip_ref.namelist():
+            if not nombre.lower().endswith('.xml'):
+                continue
+            try:
+                with zip_ref.open(nombre) as archivo:
+                    cabecera = read_header(archivo)
+            except (etree.XMLSyntaxError, zipfile.BadZipFile) as e:
+                errores.append((nombre, str(e)))
+                continue
+            if cabecera is None or not cabecera.invoice_id or not cabecera.issue_date:
+                errores.append((nombre, "Sin factura embebida, ID o fecha de emisión"))
+                continue
+            cabeceras.append((nombre, cabecera))
+    return cabeceras, errores
+
+def inventario_facturacion(base_facturas):
+    """
+    Inventario de los ZIP de la carpeta leyendo sólo las cabeceras: documentos
+    por mes de emisión (MES_AÑO) y tipo, facturas repetidas y XML ilegibles.
+    No descomprime ni mueve los ZIP.
+    """
+    inventario = {"zips": 0, "documentos": 0, "por_mes": {}, "duplicados": {}, "errores": []}
+    vistos = {}
+    for filename in sorted(os.listdir(base_facturas)):
+        if not filename.lower().endswith(".zip"):
+            continue
+        inventario["zips"] += 1
+        try:
+            cabeceras, errores = inventario_zip(os.path.join(base_facturas, filename))
+        except zipfile.BadZipFile as e:
+            inventario["errores"].append((filename, None, str(e)))
+            continue
+        inventario["errores"].extend((filename, nombre, mensaje) for nombre, mensaje in errores)
+        for nombre, cabecera in cabeceras:
+            origen = f"{filename}/{nombre}"
+            if cabecera.invoice_id in vistos:
+                inventario["duplicados"].setdefault(cabecera.invoice_id, [vistos[cabecera.invoice_id]]).append(origen)
+                continue
+            vistos[cabecera.invoice_id] = origen
+            inventario["documentos"] += 1
+            tipo = Constants.NOTA_CREDITO.value[0] if cabecera.invoice_type == CREDIT_NOTE else Constants.FACTURA.value[0]
+            por_tipo = inventario["por_mes"].setdefault(cabecera.period, {})
+            por_tipo[tipo] = por_tipo.get(tipo, 0) + 1
+    return inventario
+
+def do_on_create_voucher(factura_id, texto_factura, store):
+    # Una línea en el segmento del mes (process.voucher_store), no un .txt por factura
+    store.append(factura_id, texto_factura)
+    print(f"Factura guardada en: {store.directory} ({factura_id})")
+
+def listar_zips(base_facturas):
+    """ZIP completos de la carpeta en orden de nombre (las descargas a medias se omiten)."""
+    zips = []
+    for filename in sorted(os.listdir(base_facturas)):
+        if filename.endswith(".zip") and not filename.endswith(".crdownload"):
+            zips.append(filename)
+        else :
+            print(f"📦 ZIP detectado in download not process {filename}")
+    return zips
+
+@dataclass
+class ZipEnProceso:
+    """ZIP leído cuyos XML siguen en el pipeline: se cierra al escribir el voucher del último."""
+    path: str
+    pendientes: int
+    fallidos: int = 0
+    total: int = field(init=False)
+
+    def __post_init__(self):
+        self.total = self.pendientes
+
+def extraer_zips_mes(base_facturas,subFolder,process_dir,closed_dir,voucher_dir,cache_file,
+                     archivar=False,parsers=None,tamano_cola=DEFAULT_QUEUE_SIZE,lectores=None,manifest=None):
+    """
+    Lee los ZIP del mes, extrae cada factura y escribe su voucher en un
+    pipeline por etapas (process.pipeline) con colas de tamano_cola:
+
+        zip      lee los XML de cada ZIP y verifica su CRC (lectores hilos)
+        parseo   extrae la fila de cada XML (parsers hilos, cada uno con su
+                 conexión a la caché)
+        voucher  guarda el voucher de cada factura en el almacén del mes
+                 (process.voucher_store), en el orden de los ZIP y de sus
+                 XML aunque el parseo termine en otro, y con el del último
+                 XML de un ZIP lo mueve a closed_dir
+        salida   junta las filas para la plantilla, en ese mismo orden
+
+    Un ZIP sólo pasa a closed_dir cuando todos sus XML se parsearon y tienen
+    voucher: si algo falla, el ZIP queda en base_facturas para la próxima
+    ejecución. Imprime las métricas de cada etapa al terminar.
+
+    Sin manifest el primer error detiene el pipeline. Con un
+    process.run_manifest.RunManifest cada ZIP y XML registra su estado, un
+    ZIP dañado o un XML que no se puede extraer se marcan failed (su ZIP
+    queda en base_facturas) y el resto del mes sigue; la fila de un XML que
+    ya tiene voucher (mismo CRC) se lee del almacén sin volver a parsearlo.
+
+    Returns:
+        lista_peajes en el orden de los ZIP (por nombre) y de los XML dentro
+        de cada ZIP, sin importar qué hilo terminó primero: el mismo orden
+        en que quedan los vouchers y en que los relee cargar_vouchers.
+    """
+    caches = []
+    filas = []
+    os.makedirs(closed_dir, exist_ok=True)
+
+    # Caché por contenido: al repetir el mes los XML sin cambios no se vuelven a parsear
+    @contextmanager
+    def cache_del_hilo():
+        with ParseCache(cache_file) as cache:
+            caches.append(cache)
+            yield cache
+
+    def leer_zip(trabajo):
+        posicion, filename = trabajo
+        print(f"📦 ZIP detectado: {filename}")
+        path = os.path.join(base_facturas, filename)
+        try:
+            pathFileFac,archivos_xml = leer_xml_zip(subFolder,path,filename,process_dir,closed_dir,archivar=archivar)
+        except Exception as e:
+            if manifest is None:
+                raise
+            print(f"❌ ZIP ilegible {filename}: {e}")
+            manifest.mark_zip(filename, FAILED, error=describir_error(e))
+            return [sin_xml(posicion, filename)]
+        if not archivos_xml:
+            cerrar_zip(filename, path)
+            return [sin_xml(posicion, filename)]
+        en_proceso = ZipEnProceso(path, len(archivos_xml))
+        xmls = []
+        if manifest is not None:
+            manifest.mark_zip(filename, PENDING)
+        for orden, (fileNameXml, datos) in enumerate(archivos_xml):
+            if manifest is not None:
+                crc = zlib.crc32(datos)
+                if ya_escrito(filename, fileNameXml, crc):
+                    # Ya tiene voucher de una ejecución anterior: sin bytes, no se parsea
+                    datos = None
+                else:
+                    manifest.mark_xml(filename, fileNameXml, PENDING, crc=crc)
+            xmls.append(((posicion, orden), en_proceso, filename, fileNameXml, os.path.join(pathFileFac, fileNameXml), datos))
+        return xmls
+
+    # Un ZIP que no aporta facturas igual ocupa su posición en el orden de los vouchers
+    def sin_xml(posicion, filename):
+        return ((posicion, 0), None, filename, None, None, None)
+
+    def ya_escrito(filename, fileNameXml, crc):
+        return (manifest.xml_state(filename, fileNameXml) == WRITTEN
+                and manifest.xml_crc(filename, fileNameXml) == crc)
+
+    def cerrar_zip(filename, path):
+        mover_zip_cerrado(path,closed_dir)
+        if manifest is not None:
+            manifest.mark_zip(filename, WRITTEN)
+
+    def parsear(xml, cache):
+        clave, en_proceso, filename, fileNameXml, ruta_completa, datos = xml
+        if en_proceso is None:
+            return (xml,)
+        if datos is None:
+            return ((clave, en_proceso, filename, fileNameXml, manifest.invoice_ids[(filename, fileNameXml)], None),)
+        try:
+            factura_id, texto_factura = extraer_datos_factura(ruta_completa, streaming=True, cache=cache, datos=datos)
+        except Exception as e:
+            if manifest is None:
+                raise
+            print(f"❌ XML con error {filename}/{fileNameXml}: {e}")
+            manifest.mark_xml(filename, fileNameXml, FAILED, error=describir_error(e))
+            return ((clave, en_proceso, filename, fileNameXml, None, None),)
+        if manifest is not None:
+            manifest.mark_xml(filename, fileNameXml, PARSED, invoice_id=str(factura_id))
+        return ((clave, en_proceso, filename, fileNameXml, factura_id, texto_factura),)
+
+    # Un solo hilo: los contadores de ZipEnProceso no necesitan lock y el almacén tiene un escritor.
+    # factura_id None: el XML falló; texto_factura None: ya tenía voucher
+    def escribir_voucher(factura, store):
+        clave, en_proceso, filename, fileNameXml, factura_id, texto_factura = factura
+        if factura_id is not None and texto_factura is None:
+            texto = store.get(factura_id)
+            if texto is None:
+                manifest.mark_xml(filename, fileNameXml, FAILED, error=f"Voucher no encontrado: {factura_id}")
+            else:
+                texto_factura = VoucherRow.from_json(texto)
+        elif texto_factura is not None:
+            do_on_create_voucher(str(factura_id),texto_factura.to_json(),store)
+            if manifest is not None:
+                manifest.mark_xml(filename, fileNameXml, WRITTEN, invoice_id=str(factura_id))
+        if texto_factura is None:
+            en_proceso.fallidos += 1
+        en_proceso.pendientes -= 1
+        if en_proceso.pendientes == 0:
+            if en_proceso.fallidos:
+                # Se reintenta en la próxima ejecución, sólo con los XML sin voucher
+                manifest.mark_zip(filename, FAILED, error=f"{en_proceso.fallidos} XML con error")
+            else:
+                cerrar_zip(filename, en_proceso.path)
+        return () if texto_factura is None else ((clave, texto_factura),)
+
+    # Las facturas llegan en el orden en que terminó cada hilo; se retienen hasta que
+    # llegan las anteriores para que el almacén quede en el orden de los ZIP y sus XML
+    en_espera = {}
+    siguiente = (0, 0)
+
+    def escribir_en_orden(factura, store):
+        nonlocal siguiente
+        en_espera[factura[0]] = factura
+        filas_listas = []
+        while siguiente in en_espera:
+            factura = en_espera.pop(siguiente)
+            posicion, orden = siguiente
+            en_proceso = factura[1]
+            siguiente = (posicion, orden + 1) if en_proceso is not None and orden + 1 < en_proceso.total else (posicion + 1, 0)
+            if en_proceso is not None:
+                filas_listas.extend(escribir_voucher(factura, store))
+        return filas_listas
+
+    pipeline = Pipeline([
+        Stage("zip", leer_zip, workers=lectores or os.cpu_count() or 1),
+        Stage("parseo", parsear, workers=parsers or os.cpu_count() or 1, setup=cache_del_hilo),
+        Stage("voucher", escribir_en_orden, setup=lambda: VoucherStore(voucher_dir)),
+        Stage("salida", lambda fila: filas.append(fila)),
+    ], queue_size=tamano_cola)
+    inicio = time.perf_counter()
+    metricas = pipeline.run(enumerate(listar_zips(base_facturas)))
+    print(f"🗃️ Caché de facturas: {sum(c.hits for c in caches)} aciertos, {sum(c.misses for c in caches)} fallos")
+    print(format_metrics(metricas, time.perf_counter() - inicio))
+    return [texto_factura for _, texto_factura in filas]
+
+def describir_error(error):
+    return f"{type(error).__name__}: {error}"
+
+def agregar_anteriores(anteriores, lista_peajes):
+    """Antepone a lista_peajes las filas anteriores cuya factura no se volvió a extraer."""
+    nuevas = {fila["FacturaID"] for fila in lista_peajes}
+    return [fila for fila in anteriores if fila["FacturaID"] not in nuevas] + lista_peajes
+
+def filas_sin_salida(manifest, voucher_dir):
+    """
+    Filas de las facturas con voucher que una ejecución anterior no alcanzó
+    a llevar a las salidas, leídas del almacén del mes (sin volver a parsear).
+    """
+    store = VoucherStore(voucher_dir)
+    filas = []
+    for factura_id in manifest.unpublished_invoices():
+        texto = store.get(factura_id)
+        if texto is None:
+            print(f"⚠️ Voucher no encontrado para {factura_id}")
+            continue
+        filas.append(VoucherRow.from_json(texto))
+    return filas
 
 # ---------- Ejecutar ----------
-def do_on_start_extract_facturacion(subFolder,tenant_id):
+def do_on_inventory_facturacion(subFolder,tenant_id):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    base_dir = os.path.dirname(os.path.dirname(base_dir))
+    base_facturas = os.path.join(base_dir,Constants.APLICATION_NAME.value[0],tenant_id, "zip",subFolder)
+    print("🔎 Inventario de zip facturas in path...",base_facturas)
+    inventario = inventario_facturacion(base_facturas)
+    print(f"📦 ZIP: {inventario['zips']} | 🧾 Documentos: {inventario['documentos']}")
+    # La subcarpeta puede venir con el mes en dos dígitos (04_2025); el periodo no
+    mes_carpeta, _, anio_carpeta = subFolder.partition("_")
+    periodo_carpeta = f"{int(mes_carpeta)}_{anio_carpeta}" if mes_carpeta.isdigit() else subFolder
+    for mes, por_tipo in sorted(inventario["por_mes"].items(), key=lambda item: str(item[0])):
+        aviso = "" if mes == periodo_carpeta else " ⚠️ fuera del mes"
+        print(f" - {mes}: {por_tipo}{aviso}")
+    for factura_id, origenes in inventario["duplicados"].items():
+        print(f"🔁 Factura repetida {factura_id}: {', '.join(origenes)}")
+    for zip_name, xml_name, mensaje in inventario["errores"]:
+        print(f"❌ {zip_name} {xml_name or ''}: {mensaje}")
+    return inventario
+
+def do_on_start_extract_facturacion(subFolder,tenant_id,incremental=False,archivar=False,parsers=None,tamano_cola=DEFAULT_QUEUE_SIZE,lectores=None):
+    """
+    Extrae los ZIP del mes y escribe las salidas de la plantilla, con un
+    manifiesto por tenant-mes (manifest/<subFolder>.jsonl) que permite
+    retomar una ejecución cortada: los XML con error no detienen el mes, los
+    que ya tienen voucher no se repiten y las facturas con voucher que no
+    llegaron a las salidas se agregan desde el almacén del mes.
+    """
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     base_dir = os.path.dirname(os.path.dirname(base_dir))
     base_facturas = os.path.join(base_dir,Constants.APLICATION_NAME.value[0],tenant_id, "zip",subFolder)
     voucher_dir = os.path.join(base_dir,Constants.APLICATION_NAME.value[0],tenant_id, "voucher",subFolder)
     process_dir = os.path.join(base_dir,Constants.APLICATION_NAME.value[0],tenant_id, "openZip",subFolder)
     closed_dir = os.path.join(base_dir,Constants.APLICATION_NAME.value[0],tenant_id, "closedZip",subFolder)
+    cache_file = os.path.join(base_dir,Constants.APLICATION_NAME.value[0],tenant_id, "cache","parse_cache.sqlite")
+    manifest_file = os.path.join(base_dir,Constants.APLICATION_NAME.value[0],tenant_id, "manifest",f"{subFolder}.jsonl")
     print("📂 Directorio Base:", base_dir)
     print("📂 Directorio base_facturas:", base_facturas)
     print("📂 Directorio voucher_dir:", voucher_dir)
     print("📂 Directorio process_dir:", process_dir)
     print("📂 Directorio closed_dir:", closed_dir)
     
-    # Crear carpetas si no existen
+    # Crear carpetas si no existen (openZip sólo se usa si se archivan los XML)
     os.makedirs(voucher_dir, exist_ok=True)
-    os.makedirs(process_dir, exist_ok=True)
+    if archivar:
+        os.makedirs(process_dir, exist_ok=True)
     os.makedirs(closed_dir, exist_ok=True)
 
-    print("🔎 Buscando zip facturas in path...",base_facturas)
-    lista_peajes = []
-    for filename in os.listdir(base_facturas):
-        path = os.path.join(base_facturas, filename)
-        if filename.endswith(".zip") and not filename.endswith(".crdownload"):
-            if filename.lower().endswith(".zip"):
-                print(f"📦 ZIP detectado: {filename}")
-                pathFileFac,archivos_xml= descomprimir_y_procesar_zip(subFolder,path,filename,process_dir,closed_dir)
-                for fileNameXml in archivos_xml:
-                    ruta_completa = os.path.join(pathFileFac, fileNameXml)
-                    factura_id, texto_factura = extraer_datos_factura(ruta_completa)
-                    do_on_create_voucher(str(factura_id),str(texto_factura),voucher_dir)
-                    lista_peajes.append(texto_factura)
-        else :
-            print(f"📦 ZIP detectado in download not process {filename}")
-            
+    with RunManifest(manifest_file) as manifest:
+        ejecucion = manifest.start_run()
+        print(f"🧭 Ejecución {ejecucion} del mes, manifiesto: {manifest_file}")
+        # Facturas con voucher de una ejecución que se cortó antes de escribir las salidas
+        anteriores = filas_sin_salida(manifest, voucher_dir)
+        if anteriores:
+            print(f"♻️ {len(anteriores)} facturas de la ejecución anterior se agregan desde sus vouchers")
+
+        print("🔎 Buscando zip facturas in path...",base_facturas)
+        lista_peajes = extraer_zips_mes(base_facturas,subFolder,process_dir,closed_dir,voucher_dir,cache_file,
+                                        archivar=archivar,parsers=parsers,tamano_cola=tamano_cola,lectores=lectores,
+                                        manifest=manifest)
+        lista_peajes = agregar_anteriores(anteriores, lista_peajes)
+
+        escribir_plantilla(base_dir,subFolder,tenant_id,voucher_dir,lista_peajes,incremental)
+        manifest.mark_outputs_written()
+
+        resumen = manifest.summary()
+        print(f"🧭 Manifiesto: ZIP {resumen['zips']} | XML {resumen['xmls']}")
+        for zip_name, xml_name, mensaje in manifest.failures():
+            print(f"❌ Pendiente para la próxima ejecución {zip_name} {xml_name or ''}: {mensaje}")
+    print("\n✅ Proceso completado.")
+
+def escribir_plantilla(base_dir,subFolder,tenant_id,voucher_dir,lista_peajes,incremental=False):
     print("🔎 Generando plantilla...")
     plantilla_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
         "build",
@@ -101,7 +431,29 @@ def do_on_start_extract_facturacion(subFolder,tenant_id):
     )
     print("🔎 Load cabceras file: ",plantilla_file)
     cabeceras=do_on_get_columns(plantilla_file)
-    path_plantilla=crear_archivo_excel_con_cabecera(base_dir,subFolder,tenant_id,cabeceras)
-    print("🔎 Escribiendo en plantilla file: ",path_plantilla)
-    agregar_filas_al_excel(path_plantilla,lista_peajes)
-    print("\n✅ Proceso completado.")
+    salidas=do_on_get_salidas(plantilla_file)
+    # Mapeo columna -> valor compilado una vez por tenant (se recompila si cambia la plantilla)
+    fila_compilada=obtener_fila_compilada(plantilla_file)
+    print("🔎 Salidas configuradas: ",salidas)
+    path_plantilla=ruta_archivo_excel(base_dir,subFolder,tenant_id)
+    # Sin índice (libro o salidas columnares) se reconstruye con todos los vouchers del mes
+    def historico():
+        avisos=[]
+        filas=cargar_vouchers(voucher_dir,avisos)
+        for aviso in avisos:
+            print(f"⚠️ {aviso}")
+        return filas
+    if "xlsx" in salidas:
+        if incremental:
+            # Conserva las facturas de ejecuciones anteriores y anexa sólo las nuevas
+            agregar_filas_incremental(path_plantilla,cabeceras,lista_peajes,fila_compilada,historico=historico)
+        else:
+            # Reescribe el libro y su índice: una ejecución incremental posterior parte de él
+            escribir_libro_con_indice(path_plantilla,cabeceras,lista_peajes,fila_compilada)
+        print("🔎 Plantilla escrita en file: ",path_plantilla)
+    # Las salidas columnares llevan su propio índice: no dependen de que haya Excel
+    path_base=os.path.splitext(path_plantilla)[0]
+    if incremental:
+        escribir_salidas_incremental(path_base,cabeceras,lista_peajes,salidas,fila_compilada=fila_compilada,historico=historico)
+    else:
+        escribir_salidas_columnares(path_base,cabeceras,lista_peajes,salidas,fila_compilada=fila_compilada)
@@ -1,30 +1,68 @@
 ﻿from lxml import etree
+import io
 import os
 import re
 from datetime import datetime
+from decimal import Decimal
 from plantilla.constants import Constants
+from process.embedded import parse_embedded_invoice, read_embedded_invoice
+from process.envelope import read_envelope
+from process.parse_cache import content_digest
+from process.records import ZERO, LineItem, VoucherRow, format_exact_amount, parse_amount
+from process.toll_scanner import TollExtractor, toll_name
+from process.xml_parser import get_parser
 import re
 
-def extraer_datos_factura(xml_file):
+# Versión de la fila que arma extraer_datos_factura; cambiarla invalida la caché
+VERSION_EXTRACCION = "tcProcesFacturacion/5"
+
+# Peaje y placa por descripción, con el mismo resultado que (\D+)\s([A-Za-z0-9]+)\s\d+
+# pero en tiempo lineal; recuerda las descripciones ya vistas y los peajes por NIT.
+# Lo comparten los hilos de parseo del pipeline del mes (TollExtractor usa un lock)
+EXTRACTOR_PEAJES = TollExtractor(greedy=True)
+
+# Etiquetas de las líneas de factura y de nota crédito, con la de su cantidad
+_CAC = '{urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2}'
+_CBC = '{urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2}'
+ETIQUETAS_CANTIDAD = {
+    _CAC + 'InvoiceLine': _CBC + 'InvoicedQuantity',
+    _CAC + 'CreditNoteLine': _CBC + 'CreditedQuantity',
+}
+TAG_DESCRIPCION = _CBC + 'Description'
+TAG_PRECIO = _CBC + 'PriceAmount'
+TAG_ID = _CBC + 'ID'
+TAG_IDENTIFICACION_VENDEDOR = _CAC + 'SellersItemIdentification'
+
+def extraer_datos_factura(xml_file, streaming=False, cache=None, datos=None):
+    """
+    Extrae la fila de la factura como process.records.VoucherRow, que se lee
+    igual que el dict de siempre. Con cache (process.parse_cache.ParseCache)
+    se busca primero por el SHA-256 del archivo y sólo se parsea si no está.
+    Con datos (los bytes del XML, p. ej. leídos del ZIP) no se abre xml_file,
+    que queda sólo como origen de la fila.
+    """
     print("Source xml read: ",xml_file)
-    # 1. Leer el XML principal (AttachedDocument)
-    with open(xml_file, "rb") as f:
-        tree = etree.parse(f)
-
-    # 2. Extraer el contenido de <cbc:Description> (factura embebida)
-    nsmap = {
-        'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
-        'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2'
-    }
-
-    description_elem = tree.find('.//cac:Attachment/cac:ExternalReference/cbc:Description', namespaces=nsmap)
-    if description_elem is None:
-        raise Exception("No se encontró el contenido de la factura.")
-
-    factura_str = description_elem.text.strip()
-
-    # 3. Convertir el string de la factura a XML
-    factura_root = etree.fromstring(factura_str.encode('utf-8'))
+    digest = None
+    if cache is not None:
+        if datos is None:
+            with open(xml_file, "rb") as f:
+                datos = f.read()
+        digest = content_digest(datos)
+        estado = cache.get(digest, VERSION_EXTRACCION)
+        if estado is not None:
+            fila = VoucherRow.from_state(estado, xml_file)
+            return fila["FacturaID"], fila
+
+    # 1-3. Factura embebida en <cbc:Description> del AttachedDocument. Con
+    # streaming se parsea directamente de los bytes del archivo, sin copias; si
+    # el sobre no tiene la forma habitual se lee el texto de la descripción
+    factura_root = None
+    if streaming:
+        factura_root = parse_embedded_invoice(datos) if datos is not None else read_embedded_invoice(xml_file)
+    if factura_root is None:
+        origen = io.BytesIO(datos) if datos is not None else xml_file
+        factura_str = leer_factura_embebida(origen, streaming).strip()
+        factura_root = etree.fromstring(factura_str.encode('utf-8'), get_parser())
 
     invoice_ns = {
         'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
@@ -46,49 +84,19 @@ def extraer_datos_factura(xml_file):
     cliente_nombre = factura_root.findtext('.//cac:AccountingCustomerParty//cbc:RegistrationName', namespaces=invoice_ns)
     cliente_nit = factura_root.findtext('.//cac:AccountingCustomerParty//cbc:CompanyID', namespaces=invoice_ns)
 
-    # Ítems
-    items = factura_root.findall('.//cac:InvoiceLine', namespaces=invoice_ns)
-    notaCredito = factura_root.findall('.//cac:CreditNoteLine', namespaces=invoice_ns)
-
     # Nota Credito Factura Relacionada
     relatedInvoice= factura_root.findtext('.//cbc:ReferenceID', namespaces=invoice_ns)
     if relatedInvoice is None:
         relatedInvoice="00000"
 
-    # Crear las líneas de ítems para la salida
+    # Ítems: una sola pasada por las líneas; el peaje y la placa son los de la última
     lineas = []
-    l,l2 = [],[]
-    peaje=""
-    peaje1=""
-    placa=""
-    placa1 = ""
-
-    l,peaje,placa=(procesar_items(items, invoice_ns, incluir_referencia=True))
-    l2,peaje1,placa1=(procesar_items(notaCredito, invoice_ns, incluir_referencia=True))
-    
-    nombre_peaje=peaje
-    numero_placa=placa
-
-    nombre_peaje=peaje1
-    numero_placa=placa1
-    lineas.extend(l)
-    lineas.extend(l2)
-
-    for item in items:
-        descripcion = item.findtext('.//cbc:Description', namespaces=invoice_ns)
-        nombre_peaje, numero_placa=extraer_datos_peaje(descripcion)
-        referenciaItem = item.findtext('.//cac:SellersItemIdentification/cbc:ID', namespaces=invoice_ns)
-        cantidad = item.findtext('cbc:InvoicedQuantity', namespaces=invoice_ns)
-        precio = item.findtext('.//cbc:PriceAmount', namespaces=invoice_ns)
-        lineas.append(f"| Referencia:{referenciaItem} |Item: {descripcion} | Cantidad: {cantidad} | Precio: {precio}")
-    
-    for item in notaCredito:    
-        descripcion = item.findtext('.//cbc:Description', namespaces=invoice_ns)
-        nombre_peaje, numero_placa=extraer_datos_peaje(descripcion)
-        referenciaItem = item.findtext('.//cac:SellersItemIdentification/cbc:ID', namespaces=invoice_ns)
-        cantidad = item.findtext('cbc:InvoicedQuantity', namespaces=invoice_ns)
-        precio = item.findtext('.//cbc:PriceAmount', namespaces=invoice_ns)
-        lineas.append(f"| Referencia:{referenciaItem} |Item: {descripcion} | Cantidad: {cantidad} | Precio: {precio}")
+    nombre_peaje=""
+    numero_placa=""
+    for item in factura_root.iter(*ETIQUETAS_CANTIDAD):
+        linea = leer_linea(item)
+        lineas.append(linea)
+        nombre_peaje, numero_placa=extraer_datos_peaje(linea.description, proveedor_nit)
 
     fecha_convertida = datetime.strptime(fecha_emision, "%Y-%m-%d").strftime("%d/%m/%Y")
     letras = re.match(r"[A-Za-z]+", factura_id).group()
@@ -97,46 +105,72 @@ def extraer_datos_factura(xml_file):
     if letras == Constants.FACTURA_CABECERA_NOTA_CREDITO.value[0]:
         invoiceTypeXml= Constants.NOTA_CREDITO.value[0]
 
-    fila = {
-        "InvoiceType": str(invoiceTypeXml),
-        "FacturaID": factura_id,
-        "FacturaCabecera": str(letras),
-        "FacturaNumero": numeros,
-        "FechaEmision": fecha_convertida,
-        "ValorTotal": limpiar_decimal(valor_total),
-        "Moneda": moneda,
-        "ProveedorNombre": proveedor_nombre,
-        "ProveedorNIT": proveedor_nit,
-        "ClienteNombre": cliente_nombre,
-        "ClienteNIT": cliente_nit,
-        "NombrePeaje": nombre_peaje,
-        "NumeroPlaca": numero_placa,
-        "Items": lineas,
-        "FacturaRelacionada" : re.search(r"\d+", relatedInvoice).group(),
-        "xml": xml_file
-    }
+    fila = VoucherRow(
+        invoice_type=str(invoiceTypeXml),
+        invoice_id=factura_id,
+        invoice_prefix=str(letras),
+        invoice_number=numeros,
+        issue_date=fecha_convertida,
+        total_amount=Decimal(valor_total),
+        currency=moneda,
+        supplier_name=proveedor_nombre,
+        supplier_tax_id=proveedor_nit,
+        customer_name=cliente_nombre,
+        customer_tax_id=cliente_nit,
+        toll_name=nombre_peaje,
+        plate_number=numero_placa,
+        lines=lineas,
+        related_invoice=re.search(r"\d+", relatedInvoice).group(),
+        xml_file=xml_file,
+    )
+
+    if cache is not None:
+        cache.put(digest, VERSION_EXTRACCION, fila.to_state())
    
     return factura_id, fila
 
-def limpiar_decimal(valor):
-    if float(valor).is_integer():
-        return str(int(float(valor)))
+def leer_factura_embebida(xml_file, streaming=False):
+    """
+    Devuelve el texto de la factura embebida en el sobre AttachedDocument.
+    Con streaming=True el sobre se lee con iterparse hasta la descripción,
+    liberando firmas y demás elementos a medida que avanza. xml_file es una
+    ruta o un archivo binario ya abierto.
+    """
+    if streaming:
+        payload = read_envelope(xml_file).payload
+        if payload is None:
+            raise Exception("No se encontró el contenido de la factura.")
+        return payload
+
+    if hasattr(xml_file, "read"):
+        tree = etree.parse(xml_file, get_parser(huge_tree=True))
     else:
-        return str(valor)
+        with open(xml_file, "rb") as f:
+            tree = etree.parse(f, get_parser(huge_tree=True))
 
-def extraer_datos_peaje(descripcion):
-    # Expresión regular para extraer el nombre del peaje y el número de placa
-    # Asumimos que el nombre del peaje es la última palabra antes del número de placa
-    # y el número de placa es una cadena alfanumérica
-    patron = r"(\D+)\s([A-Za-z0-9]+)\s\d+"  # (\D+) -> Nombre del peaje, ([A-Za-z0-9]+) -> Placa
-    
-    # Buscar el patrón en la descripción
-    resultado = re.search(patron, descripcion)
+    nsmap = {
+        'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
+        'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2'
+    }
+
+    description_elem = tree.find('.//cac:Attachment/cac:ExternalReference/cbc:Description', namespaces=nsmap)
+    if description_elem is None:
+        raise Exception("No se encontró el contenido de la factura.")
+    return description_elem.text
+
+def limpiar_decimal(valor):
+    # Decimal y no float: los montos grandes en pesos no pierden dígitos.
+    # La fila guarda el Decimal; este texto lo arman los escritores al final
+    return format_exact_amount(Decimal(valor))
+
+def extraer_datos_peaje(descripcion, nit_proveedor=None):
+    # El nombre del peaje es la última palabra antes del número de placa y la
+    # placa es la cadena alfanumérica que sigue, antes de un número
+    resultado = EXTRACTOR_PEAJES.extract(descripcion, nit_proveedor) if descripcion is not None else None
     
     if resultado:
-        nombre_peaje =extraer_name_peaje(resultado.group(1).strip())  # Nombre del peaje (antes de la placa)
-        nombre_peaje= str(Constants.PEAJE.value[0])+str(" ") + str(nombre_peaje)
-        numero_placa = resultado.group(2).strip()  # Número de placa
+        nombre_peaje= str(Constants.PEAJE.value[0])+str(" ") + str(resultado.name)
+        numero_placa = resultado.plate  # Número de placa
         
         return nombre_peaje, numero_placa
     else:
@@ -146,39 +180,36 @@ def extraer_datos_peaje(descripcion):
     return nombre_peaje, numero_placa  # En caso de que no se encuentre el patrón
 
 def extraer_name_peaje(descripcion):
-    # Expresión regular para extraer el nombre del peaje (última palabra en la descripción)
-    patron = r"\s([A-Za-z]+)$"  # Busca la última palabra al final de la cadena
-    
-    # Buscar el patrón en la descripción
-    resultado = re.search(patron, descripcion)
-    
-    if resultado:
-        nombre_peaje = resultado.group(1).strip()  # Última palabra como nombre del peaje
-        return nombre_peaje
-    else:
-        return None  # Si no se encuentra el nombre del peaje
-
-def obtener_valor(node, path, ns):
-    """Devuelve el texto del nodo encontrado o 'N/A' si no existe"""
-    result = node.find(path, namespaces=ns)
-    return result.text if result is not None else 'N/A'
-
-def procesar_items(items, ns, incluir_referencia=True):
-    lineas = []
-    nombre_peaje =""
-    numero_placa =""
-    for item in items:
-        descripcion = obtener_valor(item, './/cbc:Description', ns)
-        nombre_peaje, numero_placa = extraer_datos_peaje(descripcion)
-
-        cantidad = obtener_valor(item, 'cbc:InvoicedQuantity', ns)
-        precio = obtener_valor(item, './/cbc:PriceAmount', ns)
-
-        if incluir_referencia:
-            referencia = obtener_valor(item, './/cac:SellersItemIdentification/cbc:ID', ns)
-            linea = f"| Referencia: {referencia} | Item: {descripcion} | Cantidad: {cantidad} | Precio: {precio} |"
-        else:
-            linea = f"- {descripcion} | Cantidad: {cantidad} | Precio: {precio} |"
-
-        lineas.append(linea)
-    return lineas,nombre_peaje,numero_placa
+    # Última palabra de la descripción (sólo letras, precedida de un espacio) o None
+    return toll_name(descripcion)
+
+def leer_linea(item):
+    """
+    Línea de la factura o nota crédito como process.records.LineItem:
+    descripción, referencia, cantidad y precio en Decimal (None si faltan)
+    y el total exacto de la línea.
+
+    Recorre la línea una vez y toma el primer elemento de cada campo, como
+    findtext: './/cbc:Description', './/cbc:PriceAmount', la cantidad hija
+    directa y './/cac:SellersItemIdentification/cbc:ID'.
+    """
+    etiqueta_cantidad = ETIQUETAS_CANTIDAD[item.tag]
+    descripcion = cantidad = precio = referencia = None
+    for elemento in item.iter(TAG_DESCRIPCION, TAG_PRECIO, TAG_ID, etiqueta_cantidad):
+        etiqueta = elemento.tag
+        if etiqueta == TAG_DESCRIPCION:
+            if descripcion is None:
+                descripcion = elemento.text or ''
+        elif etiqueta == TAG_PRECIO:
+            if precio is None:
+                precio = elemento.text or ''
+        elif etiqueta == TAG_ID:
+            if referencia is None and elemento.getparent().tag == TAG_IDENTIFICACION_VENDEDOR:
+                referencia = elemento.text or ''
+        elif cantidad is None and elemento.getparent() is item:
+            cantidad = elemento.text or ''
+
+    cantidad = parse_amount(cantidad)
+    precio = parse_amount(precio)
+    total = (cantidad if cantidad is not None else ZERO) * (precio if precio is not None else ZERO)
+    return LineItem(descripcion, cantidad, precio, referencia, total)
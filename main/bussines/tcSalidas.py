@@ -0,0 +1,275 @@
+﻿import csv
+import json
+import os
+from abc import ABC, abstractmethod
+from bussines.tcCausar import FILA_COMPILADA, construir_fila_cabecera, hoja_de
+from bussines.tcCausarIncremental import filtrar_nuevas
+from plantilla.constants import Constants
+
+# pyarrow es opcional: sólo se necesita si algún tenant pide salida parquet
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende del entorno
+    pa = None
+    pq = None
+
+HOJAS = (str(Constants.FACTURA.value[0]), str(Constants.NOTA_CREDITO.value[0]))
+
+# Filas acumuladas antes de escribir un lote en parquet
+TAMANO_LOTE = 10000
+
+# Versión del índice lateral de las salidas columnares (<documento>.salidas.idx.json)
+VERSION_INDICE_SALIDAS = 1
+
+
+class EscritorSalida(ABC):
+    """
+    Etapa de salida por streaming para las filas de la plantilla.
+
+    Recibe las mismas filas que la hoja Excel (construir_fila_excel) y las
+    escribe en un archivo por hoja, con la fila de cabecera de plantilla.json.
+    """
+    formato = ""
+
+    def __init__(self, path_base, cabeceras, anexar=False, fila_compilada=None):
+        self.path_base = path_base
+        self.anexar = anexar
+        cabecera = construir_fila_cabecera(cabeceras)
+        self.ancho = max(len(cabecera), (fila_compilada or FILA_COMPILADA).ancho)
+        self.cabecera = cabecera + [None] * (self.ancho - len(cabecera))
+        self.filas = 0
+
+    def ajustar(self, fila):
+        if len(fila) < self.ancho:
+            return fila + [None] * (self.ancho - len(fila))
+        return fila
+
+    @abstractmethod
+    def agregar(self, hoja, fila):
+        """Escribe una fila en la hoja indicada."""
+
+    @abstractmethod
+    def cerrar(self):
+        """Cierra los archivos y devuelve las rutas escritas."""
+
+
+class EscritorCsv(EscritorSalida):
+    """Un CSV por hoja; en modo anexar agrega al final sin repetir la cabecera."""
+    formato = "csv"
+
+    def __init__(self, path_base, cabeceras, anexar=False, fila_compilada=None):
+        super().__init__(path_base, cabeceras, anexar, fila_compilada)
+        self.archivos = {}
+        self.escritores = {}
+        for hoja in HOJAS:
+            path_csv = f"{path_base}_{hoja}.csv"
+            existe = anexar and os.path.exists(path_csv)
+            archivo = open(path_csv, "a" if existe else "w", encoding="utf-8", newline="")
+            escritor = csv.writer(archivo)
+            if not existe:
+                escritor.writerow(self.cabecera)
+            self.archivos[hoja] = archivo
+            self.escritores[hoja] = escritor
+
+    def agregar(self, hoja, fila):
+        self.escritores[hoja].writerow(self.ajustar(fila))
+        self.filas += 1
+
+    def cerrar(self):
+        for archivo in self.archivos.values():
+            archivo.close()
+        return [archivo.name for archivo in self.archivos.values()]
+
+
+class EscritorParquet(EscritorSalida):
+    """
+    Un dataset parquet (carpeta) por hoja, escrito en lotes de TAMANO_LOTE filas.
+    Cada ejecución agrega un archivo part-NNNNN.parquet; en modo normal la
+    carpeta se vacía primero.
+    """
+    formato = "parquet"
+
+    def __init__(self, path_base, cabeceras, anexar=False, fila_compilada=None, tamano_lote=TAMANO_LOTE):
+        if pq is None:
+            raise ImportError("La salida parquet requiere el paquete pyarrow (pip install pyarrow).")
+        super().__init__(path_base, cabeceras, anexar, fila_compilada)
+        self.tamano_lote = tamano_lote
+        self.nombres = self._nombres_columnas()
+        self.esquema = pa.schema([(nombre, pa.string()) for nombre in self.nombres])
+        self.pendientes = {hoja: [] for hoja in HOJAS}
+        self.escritores = {}
+        for hoja in HOJAS:
+            carpeta = f"{path_base}_{hoja}.parquet"
+            os.makedirs(carpeta, exist_ok=True)
+            partes = sorted(nombre for nombre in os.listdir(carpeta) if nombre.endswith(".parquet"))
+            if not anexar:
+                for nombre in partes:
+                    os.remove(os.path.join(carpeta, nombre))
+                partes = []
+            path_parte = os.path.join(carpeta, f"part-{len(partes):05d}.parquet")
+            self.escritores[hoja] = pq.ParquetWriter(path_parte, self.esquema)
+
+    def _nombres_columnas(self):
+        # Parquet exige nombres únicos y no vacíos
+        nombres = []
+        for posicion, nombre in enumerate(self.cabecera, start=1):
+            nombre = str(nombre) if nombre else f"columna_{posicion}"
+            while nombre in nombres:
+                nombre = f"{nombre}_{posicion}"
+            nombres.append(nombre)
+        return nombres
+
+    def agregar(self, hoja, fila):
+        pendientes = self.pendientes[hoja]
+        pendientes.append(self.ajustar(fila))
+        self.filas += 1
+        if len(pendientes) >= self.tamano_lote:
+            self._escribir_lote(hoja)
+
+    def _escribir_lote(self, hoja):
+        pendientes = self.pendientes[hoja]
+        columnas = [
+            pa.array([None if valor is None else str(valor) for valor in columna], type=pa.string())
+            for columna in zip(*pendientes)
+        ] if pendientes else [pa.array([], type=pa.string()) for _ in self.nombres]
+        self.escritores[hoja].write_table(pa.Table.from_arrays(columnas, schema=self.esquema))
+        self.pendientes[hoja] = []
+
+    def cerrar(self):
+        rutas = []
+        for hoja, escritor in self.escritores.items():
+            if self.pendientes[hoja]:
+                self._escribir_lote(hoja)
+            escritor.close()
+            rutas.append(escritor.where)
+        return rutas
+
+
+ESCRITORES = {
+    EscritorCsv.formato: EscritorCsv,
+    EscritorParquet.formato: EscritorParquet,
+}
+
+
+def ruta_indice_salidas(path_base):
+    return f"{path_base}.salidas.idx.json"
+
+
+def cargar_indice_salidas(path_base, formatos):
+    """
+    Facturas ya escritas en las salidas columnares de path_base, o None si no
+    hay índice, no corresponde a estos formatos o falta alguno de los archivos.
+    """
+    path_indice = ruta_indice_salidas(path_base)
+    if not os.path.exists(path_indice):
+        return None
+    try:
+        with open(path_indice, "r", encoding="utf-8") as f:
+            indice = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Índice de salidas ilegible, se reescriben las salidas: {e}")
+        return None
+    if indice.get("version") != VERSION_INDICE_SALIDAS or indice.get("formatos") != sorted(formatos):
+        return None
+    for formato in formatos:
+        for hoja in HOJAS:
+            if not os.path.exists(f"{path_base}_{hoja}.{formato}"):
+                return None
+    return set(indice.get("facturas", []))
+
+
+def guardar_indice_salidas(path_base, formatos, facturas):
+    # Escritura atómica, igual que el índice del libro Excel
+    path_indice = ruta_indice_salidas(path_base)
+    datos = {
+        "version": VERSION_INDICE_SALIDAS,
+        "formatos": sorted(formatos),
+        "facturas": sorted(facturas),
+    }
+    temporal = f"{path_indice}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(temporal, path_indice)
+
+
+def escribir_salidas_incremental(path_base, cabeceras, datos, formatos, fila_compilada=None, historico=None):
+    """
+    Anexa a las salidas columnares sólo las facturas que no están en su índice.
+
+    El índice es propio de las salidas columnares, así que un tenant sólo
+    csv/parquet conserva las facturas de ejecuciones anteriores igual que el
+    libro Excel. Sin índice las salidas se reescriben con historico() (todas
+    las facturas ya extraídas del mes) más datos.
+
+    Returns:
+        Lista con las rutas generadas.
+    """
+    formatos = _formatos_columnares(formatos)
+    if not formatos:
+        return []
+    registradas = cargar_indice_salidas(path_base, formatos)
+    if registradas is None:
+        if historico is not None:
+            datos = list(historico()) + list(datos)
+        return escribir_salidas_columnares(path_base, cabeceras, filtrar_nuevas(datos, set()), formatos,
+                                           fila_compilada=fila_compilada)
+
+    nuevas = filtrar_nuevas(datos, registradas)
+    rutas = escribir_salidas_columnares(path_base, cabeceras, nuevas, formatos, anexar=True,
+                                        fila_compilada=fila_compilada)
+    if nuevas:
+        guardar_indice_salidas(path_base, formatos, registradas.union(item["FacturaID"] for item in nuevas))
+    return rutas
+
+
+def escribir_salidas_columnares(path_base, cabeceras, datos, formatos, anexar=False, fila_compilada=None):
+    """
+    Escribe las filas de la plantilla en los formatos columnares pedidos
+    (csv, parquet) recorriendo los datos una sola vez.
+
+    Al reescribir (anexar=False) también se renueva el índice de las salidas,
+    para que el modo incremental siguiente parta de lo que quedó escrito.
+
+    Returns:
+        Lista con las rutas generadas.
+    """
+    if anexar and not datos:
+        return []
+
+    escritores = []
+    for formato in formatos:
+        clase = ESCRITORES.get(formato)
+        if clase is None:
+            continue
+        try:
+            escritores.append(clase(path_base, cabeceras, anexar=anexar, fila_compilada=fila_compilada))
+        except ImportError as e:
+            print(f"⚠️ Se omite la salida {formato}: {e}")
+
+    if not escritores:
+        return []
+
+    construir = (fila_compilada or FILA_COMPILADA).construir
+    for item in datos:
+        hoja = hoja_de(item)
+        fila = construir(item)
+        for escritor in escritores:
+            escritor.agregar(hoja, fila)
+
+    rutas = []
+    for escritor in escritores:
+        rutas.extend(escritor.cerrar())
+        print(f"✅ Salida {escritor.formato} con {escritor.filas} filas: {escritor.path_base}")
+    if not anexar:
+        guardar_indice_salidas(path_base, [escritor.formato for escritor in escritores],
+                               {item["FacturaID"] for item in datos})
+    return rutas
+
+
+def _formatos_columnares(formatos):
+    # Sólo los formatos con escritor disponible (parquet requiere pyarrow)
+    return [
+        formato for formato in formatos
+        if formato in ESCRITORES and (formato != EscritorParquet.formato or pq is not None)
+    ]
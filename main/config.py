@@ -35,6 +35,15 @@ LOG_FILE = LOG_DIR / os.getenv("LOG_FILE", "facturae_optimus.log")
 # Configuración de la aplicación
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
+# Guardar en openZip una copia descomprimida de cada ZIP procesado (los XML se leen del ZIP en memoria)
+ARCHIVE_OPEN_ZIP = os.getenv("ARCHIVE_OPEN_ZIP", "False").lower() == "true"
+
+# Pipeline de extracción del mes: hilos de parseo (0 = uno por CPU) y elementos por cola entre etapas
+EXTRACTION_PARSERS = int(os.getenv("EXTRACTION_PARSERS", "0")) or None
+EXTRACTION_QUEUE_SIZE = int(os.getenv("EXTRACTION_QUEUE_SIZE", "64"))
+# Hilos que leen y verifican los ZIP del mes (0 = uno por CPU)
+EXTRACTION_ZIP_READERS = int(os.getenv("EXTRACTION_ZIP_READERS", "0")) or None
+
 # Asegurar que los directorios existan
 for directory in [TENANTS_DIR, LOG_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
@@ -1,6 +1,8 @@
 from bussines.tcEmail import do_on_start
-from bussines.tcExtracFacturacion import do_on_start_extract_facturacion
+from bussines.tcExtracFacturacion import do_on_inventory_facturacion, do_on_start_extract_facturacion
+from bussines.tcCausarParalelo import BASE_DIR, TrabajoPlantilla, exportar_vouchers, generar_plantillas_en_paralelo, ruta_vouchers
 from objects.fo_obj_email import ConfiguracionEmail
+from config import ARCHIVE_OPEN_ZIP, EXTRACTION_PARSERS, EXTRACTION_QUEUE_SIZE, EXTRACTION_ZIP_READERS
 import os
 
 def do_on_facture_optimus(tenants,tenant_path):
@@ -18,4 +20,65 @@ def do_on_facture_optimus(tenants,tenant_path):
         subFolderDate= str(month)+str("_")+str(year)
         email=configuracionEmail.obtener_config_email()
         do_on_start(subFolderDate,int(month),int(year),email,tenant_id)
-        do_on_start_extract_facturacion(subFolderDate,tenant_id)
\ No newline at end of file
+        do_on_start_extract_facturacion(subFolderDate,tenant_id,incremental=True,archivar=ARCHIVE_OPEN_ZIP,
+                                        parsers=EXTRACTION_PARSERS,tamano_cola=EXTRACTION_QUEUE_SIZE,
+                                        lectores=EXTRACTION_ZIP_READERS)
+
+def do_on_generar_plantillas_paralelo(tenants):
+    # Cierre de mes: regenera los libros de varios tenants (y meses) desde sus vouchers
+    ids = input("Ingrese los IDs de tenant separados por coma (vacío = todos): ").strip()
+    tenant_ids = [tenant_id.strip() for tenant_id in ids.split(",") if tenant_id.strip()] if ids else list(tenants)
+    if not tenant_ids:
+        print("No hay tenants para procesar.")
+        return
+    # Sólo tenants registrados: el ID forma parte de la ruta de salida
+    desconocidos = [tenant_id for tenant_id in tenant_ids if tenant_id not in tenants]
+    if desconocidos:
+        print(f"❌ Tenants no registrados: {', '.join(desconocidos)}")
+        return
+    months = [month.strip() for month in input("Ingrese los MESES separados por coma: ").split(",") if month.strip()]
+    year = input("Ingrese el YEAR : ").strip()
+    if not year.isdigit() or not all(month.isdigit() and 1 <= int(month) <= 12 for month in months):
+        print("❌ MES debe estar entre 1 y 12 y YEAR debe ser numérico.")
+        return
+    workers = input("Número de procesos (vacío = automático): ").strip()
+    trabajos = [
+        TrabajoPlantilla(tenant_id, str(month)+str("_")+str(year))
+        for tenant_id in tenant_ids
+        for month in months
+    ]
+    generar_plantillas_en_paralelo(trabajos, int(workers) if workers else None)
+
+def do_on_inventario_mes(tenants):
+    # Conteo del mes leyendo sólo las cabeceras de los ZIP descargados (no los procesa)
+    tenant_id = input("Ingrese el ID del tenant: ").strip()
+    if tenant_id not in tenants:
+        print(f"❌ Tenant no registrado: {tenant_id}")
+        return
+    month = input("Ingrese el MES: ").strip()
+    year = input("Ingrese el YEAR : ").strip()
+    if not month.isdigit() or not 1 <= int(month) <= 12 or not year.isdigit():
+        print("❌ MES debe estar entre 1 y 12 y YEAR debe ser numérico.")
+        return
+    do_on_inventory_facturacion(str(month)+str("_")+str(year),tenant_id)
+
+def do_on_exportar_vouchers(tenants):
+    # Vouchers del almacén del mes como <FacturaID>.txt, para consultarlos o enviarlos sueltos
+    tenant_id = input("Ingrese el ID del tenant: ").strip()
+    if tenant_id not in tenants:
+        print(f"❌ Tenant no registrado: {tenant_id}")
+        return
+    month = input("Ingrese el MES: ").strip()
+    year = input("Ingrese el YEAR : ").strip()
+    if not month.isdigit() or not 1 <= int(month) <= 12 or not year.isdigit():
+        print("❌ MES debe estar entre 1 y 12 y YEAR debe ser numérico.")
+        return
+    ids = input("IDs de factura separados por coma (vacío = todas): ").strip()
+    facturas = [factura_id.strip() for factura_id in ids.split(",") if factura_id.strip()] or None
+    voucher_dir = ruta_vouchers(BASE_DIR, tenant_id, str(month)+str("_")+str(year))
+    try:
+        rutas = exportar_vouchers(voucher_dir, ids=facturas)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        return
+    print(f"✅ {len(rutas)} vouchers exportados en {voucher_dir}")
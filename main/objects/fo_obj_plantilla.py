@@ -1,7 +1,7 @@
 import os
 import json
-from dataclasses import dataclass
-from typing import List, Union, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Union, Optional
 
 @dataclass
 class Constant:
@@ -13,10 +13,18 @@ class Column:
     column: str
     index: int
     constants: Optional[Union[Constant, List[Constant]]] = None
+    # Campo de la factura (o {"FC": campo, "NCDOC": campo}) y transformación opcional
+    field: Optional[Union[str, Dict[str, str]]] = None
+    transform: Optional[str] = None
+
+# Formatos de salida disponibles por tenant (clave "salidas" en plantilla.json)
+SALIDAS_DISPONIBLES = ("xlsx", "csv", "parquet")
+SALIDAS_POR_DEFECTO = ["xlsx"]
 
 @dataclass
 class ColumnConfig:
     columns: List[Column]
+    salidas: List[str] = field(default_factory=lambda: list(SALIDAS_POR_DEFECTO))
 
     @staticmethod
     def from_json(json_str: str) -> 'ColumnConfig':
@@ -34,11 +42,18 @@ class ColumnConfig:
             column = Column(
                 column=col["column"],
                 index=col["index"],
-                constants=constants
+                constants=constants,
+                field=col.get("field"),
+                transform=col.get("transform")
             )
             columns.append(column)
-        
-        return ColumnConfig(columns=columns)
+
+        salidas = [str(formato).lower() for formato in data.get("salidas", SALIDAS_POR_DEFECTO)]
+        desconocidas = [formato for formato in salidas if formato not in SALIDAS_DISPONIBLES]
+        if desconocidas:
+            raise ValueError(f"Formatos de salida no soportados: {desconocidas}")
+
+        return ColumnConfig(columns=columns, salidas=salidas)
     
 def do_on_get_columns(plantilla_file):
     with open(plantilla_file, "r") as file:
@@ -51,4 +66,8 @@ def do_on_get_columns(plantilla_file):
                         print(f"  - Constant: {const.name} = {const.value}")
                 else:
                     print(f"  - Constant: {col.constants.name} = {col.constants.value}")'''
-        return config.columns
\ No newline at end of file
+        return config.columns
+
+def do_on_get_salidas(plantilla_file):
+    with open(plantilla_file, "r") as file:
+        return ColumnConfig.from_json(file.read()).salidas
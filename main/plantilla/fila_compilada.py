@@ -0,0 +1,212 @@
+﻿import os
+import re
+from dataclasses import dataclass
+from operator import itemgetter
+from decimal import Decimal
+from typing import Callable, Dict, List, Tuple
+
+from objects.fo_obj_plantilla import do_on_get_columns
+from plantilla.cabecera import Cabecera
+from plantilla.constants import Constants
+from process.records import format_exact_amount
+
+# Prefijos de factura que se registran como tipo de documento FC
+CABECERAS_FACTURA = ("PP", "PR")
+TIPO_FC = Constants.ENCAB_TIPO_DOCUMENTO_FC.value[0]
+TIPO_NCDOC = Constants.ENCAB_TIPO_DOCUMENTO_NCDOC.value[0]
+
+# Columnas fijas: se copian tal cual en todas las filas
+COLUMNAS_CONSTANTES = (
+    Constants.ENCAB_EMPRESA,
+    Constants.ENCAB_TERCERO_INTERNO,
+    Constants.ENCAB_TERCERO_EXTERNO,
+    Constants.ENCAB_FORMA_PAGO,
+    Constants.ENCAB_VERIFICADO,
+    Constants.ENCAB_ANULADO,
+    Constants.DETALLE_PRODUCTO,
+    Constants.DETALLE_BODEGA,
+    Constants.DETALLE_UNIDAD_MEDIDA,
+    Constants.DETALLE_CANTIDAD,
+    Constants.DETALLE_IVA,
+    Constants.DETALLE_DESCUENTO,
+)
+
+# Columnas que se llenan con un campo de la factura (columna, llave del item)
+COLUMNAS_CAMPO = (
+    (Cabecera.ENCAB_FECHA, "FechaEmision"),
+    (Cabecera.ENCAB_PREF_DTO_EXT, "FacturaCabecera"),
+    (Cabecera.ENCAB_NOTA, "NombrePeaje"),
+    (Cabecera.ENCAB_FECHA_EMISION, "FechaEmision"),
+    (Cabecera.DETALLE_VALOR_UNITARIO, "ValorTotal"),
+    (Cabecera.DETALLE_VENCIMIENTO, "FechaEmision"),
+    (Cabecera.DETALLE_CENTRO_COSTOS, "NumeroPlaca"),
+)
+
+# Campos con montos Decimal: se formatean al armar la fila, no al extraer
+CAMPOS_MONTO = ("ValorTotal",)
+
+# Campo por defecto para las columnas de plantilla.json que no traen "field"
+# ni constantes: se reconocen por el texto de la cabecera
+CAMPOS_POR_CABECERA = {columna.value[0]: llave for columna, llave in COLUMNAS_CAMPO}
+CAMPOS_POR_CABECERA[Cabecera.ENCAB_NO_DTO_EXT.value[0]] = {
+    TIPO_FC: "FacturaNumero",
+    TIPO_NCDOC: "FacturaRelacionada",
+}
+
+
+def _monto(valor):
+    # Las filas antiguas (vouchers .txt) ya traen el monto como texto
+    return format_exact_amount(valor) if isinstance(valor, Decimal) else valor
+
+
+def _texto(valor):
+    return None if valor is None else str(valor)
+
+
+def _mayusculas(valor):
+    return None if valor is None else str(valor).upper()
+
+
+def _digitos(valor):
+    return None if valor is None else re.sub(r"\D", "", str(valor))
+
+
+# Transformaciones disponibles en la clave "transform" de plantilla.json
+TRANSFORMACIONES = {
+    "texto": _texto,
+    "mayusculas": _mayusculas,
+    "digitos": _digitos,
+}
+
+
+@dataclass
+class FilaCompilada:
+    """
+    Plantilla de fila precompilada para la hoja Excel.
+
+    Cada tipo de documento tiene una fila prototipo con las columnas constantes
+    ya llenas y una lista corta de (posición, obtener_valor) para los campos
+    que dependen de la factura.
+    """
+    ancho: int
+    prototipos: Dict[str, list]
+    campos: Dict[str, List[Tuple[int, Callable]]]
+
+    @staticmethod
+    def tipo_documento(item) -> str:
+        return TIPO_FC if item["FacturaCabecera"] in CABECERAS_FACTURA else TIPO_NCDOC
+
+    def construir(self, item) -> list:
+        tipo = self.tipo_documento(item)
+        fila = self.prototipos[tipo][:]
+        for posicion, obtener in self.campos[tipo]:
+            fila[posicion] = obtener(item)
+        return fila
+
+
+def compilar_fila_desde_enums() -> FilaCompilada:
+    """Compila la fila a partir de las enumeraciones Cabecera y Constants."""
+    ancho = max(columna.value[1] for columna in Cabecera)
+    base = [None] * ancho
+    for constante in COLUMNAS_CONSTANTES:
+        base[constante.value[1] - 1] = constante.value[0]
+
+    campos_comunes = [(columna.value[1] - 1, _obtener_campo(llave, None)) for columna, llave in COLUMNAS_CAMPO]
+    posicion_tipo = Constants.ENCAB_TIPO_DOCUMENTO_FC.value[1] - 1
+    posicion_dto_ext = Cabecera.ENCAB_NO_DTO_EXT.value[1] - 1
+
+    prototipos = {}
+    campos = {}
+    for tipo, llave_dto_ext in ((TIPO_FC, "FacturaNumero"), (TIPO_NCDOC, "FacturaRelacionada")):
+        prototipo = base[:]
+        prototipo[posicion_tipo] = tipo
+        prototipos[tipo] = prototipo
+        campos[tipo] = [(posicion_dto_ext, itemgetter(llave_dto_ext))] + campos_comunes
+
+    return FilaCompilada(ancho=ancho, prototipos=prototipos, campos=campos)
+
+
+def _valores_por_tipo(valor):
+    # "field" puede ser una llave única o un dict {"FC": llave, "NCDOC": llave}
+    if isinstance(valor, dict):
+        return {tipo: valor.get(tipo) for tipo in (TIPO_FC, TIPO_NCDOC)}
+    return {TIPO_FC: valor, TIPO_NCDOC: valor}
+
+
+def _constantes_por_tipo(constantes):
+    # Una constante aplica a ambos tipos; en una lista cada constante se asigna
+    # al tipo de documento con el que termina su nombre (ENCAB_TIPO_DOCUMENTO_FC)
+    if not isinstance(constantes, list):
+        return {TIPO_FC: constantes.value, TIPO_NCDOC: constantes.value}
+    valores = {TIPO_FC: None, TIPO_NCDOC: None}
+    for constante in constantes:
+        for tipo in valores:
+            if constante.name.upper().endswith(f"_{tipo}"):
+                valores[tipo] = constante.value
+    return valores
+
+
+def _obtener_campo(llave, transformacion):
+    obtener = itemgetter(llave)
+    if llave in CAMPOS_MONTO:
+        leer_monto = obtener
+        obtener = lambda item: _monto(leer_monto(item))
+    if transformacion is None:
+        return obtener
+    return lambda item: transformacion(obtener(item))
+
+
+def compilar_fila_desde_plantilla(columnas) -> FilaCompilada:
+    """
+    Compila las columnas de plantilla.json (objects.fo_obj_plantilla.Column).
+
+    Cada columna queda como constante (por tipo de documento si trae una lista
+    de constantes), como acceso a un campo de la factura ("field" o el campo
+    por defecto de su cabecera) o vacía, con una transformación opcional.
+    """
+    ancho = max((columna.index for columna in columnas), default=0)
+    prototipos = {TIPO_FC: [None] * ancho, TIPO_NCDOC: [None] * ancho}
+    campos = {TIPO_FC: [], TIPO_NCDOC: []}
+
+    for columna in columnas:
+        posicion = columna.index - 1
+        nombre_transformacion = columna.transform
+        transformacion = None
+        if nombre_transformacion:
+            transformacion = TRANSFORMACIONES.get(nombre_transformacion)
+            if transformacion is None:
+                raise ValueError(f"Transformación no soportada en '{columna.column}': {nombre_transformacion}")
+
+        if columna.constants:
+            for tipo, valor in _constantes_por_tipo(columna.constants).items():
+                prototipos[tipo][posicion] = transformacion(valor) if transformacion else valor
+            continue
+
+        campo = columna.field or CAMPOS_POR_CABECERA.get(str(columna.column).strip())
+        if not campo:
+            continue
+        for tipo, llave in _valores_por_tipo(campo).items():
+            if llave:
+                campos[tipo].append((posicion, _obtener_campo(llave, transformacion)))
+
+    return FilaCompilada(ancho=ancho, prototipos=prototipos, campos=campos)
+
+
+# Filas compiladas por archivo de plantilla: (mtime_ns, tamaño, fila)
+_CACHE_PLANTILLAS: Dict[str, Tuple[int, int, FilaCompilada]] = {}
+
+
+def obtener_fila_compilada(plantilla_file) -> FilaCompilada:
+    """
+    Devuelve la fila compilada de la plantilla del tenant. Se recompila sólo
+    cuando cambia la fecha de modificación (o el tamaño) del archivo.
+    """
+    ruta = os.path.abspath(plantilla_file)
+    estado = os.stat(ruta)
+    guardada = _CACHE_PLANTILLAS.get(ruta)
+    if guardada and guardada[0] == estado.st_mtime_ns and guardada[1] == estado.st_size:
+        return guardada[2]
+
+    fila = compilar_fila_desde_plantilla(do_on_get_columns(ruta))
+    _CACHE_PLANTILLAS[ruta] = (estado.st_mtime_ns, estado.st_size, fila)
+    return fila
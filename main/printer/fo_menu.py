@@ -15,7 +15,9 @@ from printer.fo_tenants import (
     load_tenants, list_tenants, add_tenant, 
     edit_tenant, delete_tenant, TENANTS_FILE
 )
-from disparadores.fo_disparadores import do_on_facture_optimus
+from disparadores.fo_disparadores import (
+    do_on_exportar_vouchers, do_on_facture_optimus, do_on_generar_plantillas_paralelo, do_on_inventario_mes
+)
 
 # Configuración del logger
 logger = get_logger(__name__)
@@ -60,6 +62,9 @@ class Menu:
          [3] Editar tenant
          [4] Eliminar tenant
          [5] Ejecutar Facturae Optimus
+         [6] Generar plantillas en paralelo (cierre de mes)
+         [7] Inventario del mes (sólo cabeceras)
+         [8] Exportar vouchers del mes (.txt)
          [0] Salir
         {line}
         """.format(line="="*50)
@@ -83,6 +88,12 @@ class Menu:
                 delete_tenant(self.tenants, str(self.tenant_path))
             elif opcion == "5":
                 do_on_facture_optimus(self.tenants, str(self.tenant_path))
+            elif opcion == "6":
+                do_on_generar_plantillas_paralelo(self.tenants)
+            elif opcion == "7":
+                do_on_inventario_mes(self.tenants)
+            elif opcion == "8":
+                do_on_exportar_vouchers(self.tenants)
             elif opcion == "0":
                 self.salir()
             else:
@@ -0,0 +1,152 @@
+"""
+Factura embebida leída directamente de los bytes del sobre, sin copias.
+
+En los sobres AttachedDocument de la DIAN la factura va como bloque CDATA en
+``cac:Attachment/cac:ExternalReference/cbc:Description``. El camino de texto
+(parsear el sobre, tomar ``.text``, limpiarlo y volver a codificarlo) copia la
+factura tres o cuatro veces. ``locate_embedded_invoice`` ubica esos bytes
+dentro del buffer original y ``read_embedded_invoice`` entrega al parser una
+``memoryview`` de ese tramo sobre el archivo mapeado con mmap.
+
+Sólo se usa cuando el sobre es el habitual: UTF-8, prefijos ``cac``/``cbc``
+declarados en la raíz y la factura en un único bloque CDATA. En cualquier
+otro caso devuelve None y el llamador usa el camino de texto.
+"""
+import mmap
+import os
+import re
+from typing import Optional, Tuple
+
+from lxml import etree
+
+from .envelope import DIRECT_DOCUMENT_SUFFIXES
+from .xml_parser import get_parser
+
+CAC_BINDING = b'xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"'
+CBC_BINDING = b'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2"'
+
+ATTACHMENT_OPEN = b'<cac:Attachment'
+EXTERNAL_REFERENCE_OPEN = b'<cac:ExternalReference'
+DESCRIPTION_OPEN = b'<cbc:Description'
+DESCRIPTION_CLOSE = b'</cbc:Description>'
+CDATA_OPEN = b'<![CDATA['
+CDATA_CLOSE = b']]>'
+
+# Declaración XML del sobre (encoding opcional) y espacios XML
+_DECLARATION = re.compile(br'<\?xml[^>]*\?>')
+_ENCODING = re.compile(br'encoding\s*=\s*["\']([A-Za-z0-9._-]+)["\']')
+_WHITESPACE = b' \t\r\n'
+
+# lxml acepta objetos con protocolo de buffer en fromstring desde la versión 5
+_BUFFER_INPUT = etree.LXML_VERSION >= (5, 0)
+
+
+def _skip_whitespace(buffer, start: int, end: int) -> int:
+    while start < end and buffer[start] in _WHITESPACE:
+        start += 1
+    return start
+
+
+def _trim_whitespace(buffer, start: int, end: int) -> int:
+    while end > start and buffer[end - 1] in _WHITESPACE:
+        end -= 1
+    return end
+
+
+def _utf8_envelope_root(buffer) -> Optional[int]:
+    """Fin de la etiqueta de apertura de la raíz si el sobre es UTF-8 con los prefijos UBL; si no, None."""
+    start = 3 if buffer[:3] == b'\xef\xbb\xbf' else 0
+    start = _skip_whitespace(buffer, start, len(buffer))
+    if buffer[start:start + 5] == b'<?xml':
+        declaration = _DECLARATION.match(buffer[start:start + 256])
+        if declaration is None:
+            return None
+        encoding = _ENCODING.search(declaration.group())
+        if encoding is not None and encoding.group(1).lower() not in (b'utf-8', b'utf8'):
+            return None
+        start += declaration.end()
+    root_start = buffer.find(b'<', start)
+    # Comentarios o DOCTYPE antes de la raíz: camino de texto
+    if root_start < 0 or buffer[root_start + 1:root_start + 2] in (b'!', b'?'):
+        return None
+    root_end = buffer.find(b'>', root_start)
+    if root_end < 0:
+        return None
+    root_tag = buffer[root_start:root_end]
+    if CAC_BINDING not in root_tag or CBC_BINDING not in root_tag:
+        return None
+    return root_end + 1
+
+
+def locate_embedded_invoice(buffer) -> Optional[Tuple[int, int]]:
+    """
+    (inicio, fin) del XML de la factura dentro del buffer del sobre: el
+    contenido del bloque CDATA de la descripción embebida, sin espacios
+    alrededor. None si el sobre no tiene la forma habitual (ver el módulo).
+
+    Args:
+        buffer: bytes, mmap o cualquier objeto con ``find`` y slicing de bytes.
+    """
+    position = _utf8_envelope_root(buffer)
+    if position is None:
+        return None
+    attachment = buffer.find(ATTACHMENT_OPEN, position)
+    if attachment < 0:
+        return None
+    reference = buffer.find(EXTERNAL_REFERENCE_OPEN, attachment)
+    description = buffer.find(DESCRIPTION_OPEN, reference) if reference >= 0 else -1
+    if description < 0:
+        return None
+    # Attachment/ExternalReference/Description directos: nada abierto o cerrado entre medio
+    between = buffer[attachment + len(ATTACHMENT_OPEN):description]
+    if between.count(b'<cac:') != 1 or b'</cac:' in between:
+        return None
+    tag_end = buffer.find(b'>', description)
+    if tag_end < 0 or buffer[tag_end - 1:tag_end] == b'/':
+        return None
+    cdata = _skip_whitespace(buffer, tag_end + 1, len(buffer))
+    if buffer[cdata:cdata + len(CDATA_OPEN)] != CDATA_OPEN:
+        return None
+    start = cdata + len(CDATA_OPEN)
+    end = buffer.find(CDATA_CLOSE, start)
+    if end < 0:
+        return None
+    # Un único bloque CDATA y luego el cierre de la descripción
+    close = _skip_whitespace(buffer, end + len(CDATA_CLOSE), len(buffer))
+    if buffer[close:close + len(DESCRIPTION_CLOSE)] != DESCRIPTION_CLOSE:
+        return None
+    start = _skip_whitespace(buffer, start, end)
+    end = _trim_whitespace(buffer, start, end)
+    if start == end:
+        return None
+    return start, end
+
+
+def parse_embedded_invoice(buffer) -> Optional[etree._Element]:
+    """
+    Parsea la factura embebida directamente del tramo del buffer, sin copiarla.
+    None si el sobre no tiene la forma habitual o el tramo no es una Invoice o
+    CreditNote.
+
+    Raises:
+        etree.XMLSyntaxError: Si el tramo ubicado no es XML válido.
+    """
+    span = locate_embedded_invoice(buffer)
+    if span is None:
+        return None
+    start, end = span
+    with memoryview(buffer) as view, view[start:end] as payload:
+        # lxml < 5 sólo parsea bytes o str: una copia del tramo
+        root = etree.fromstring(payload if _BUFFER_INPUT else payload.tobytes(), get_parser())
+    if not root.tag.endswith(DIRECT_DOCUMENT_SUFFIXES):
+        return None
+    return root
+
+
+def read_embedded_invoice(path) -> Optional[etree._Element]:
+    """parse_embedded_invoice sobre el archivo mapeado en memoria (sin leerlo a un bytes)."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return parse_embedded_invoice(mapped)
@@ -0,0 +1,111 @@
+"""
+Lectura por streaming del sobre AttachedDocument de la DIAN.
+
+El sobre trae la factura como texto (CDATA) en
+``cac:Attachment/cac:ExternalReference/cbc:Description`` junto con firmas y el
+ApplicationResponse. ``read_envelope`` recorre el sobre con ``etree.iterparse``,
+libera cada elemento ya procesado y se detiene en la primera descripción que
+cumple esa ruta, sin construir el árbol completo.
+"""
+import os
+from typing import NamedTuple, Optional
+
+from lxml import etree
+
+from .xml_parser import parser_options
+
+CBC = '{urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2}'
+CAC = '{urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2}'
+
+DESCRIPTION_TAG = CBC + 'Description'
+EXTERNAL_REFERENCE_TAG = CAC + 'ExternalReference'
+ATTACHMENT_TAG = CAC + 'Attachment'
+
+# Documentos que no vienen en sobre: se devuelven completos
+DIRECT_DOCUMENT_SUFFIXES = ('}Invoice', '}CreditNote')
+
+
+class Envelope(NamedTuple):
+    """
+    Resultado de leer un sobre.
+
+    ``payload`` es el texto de la primera descripción embebida (None si no hay
+    o si está vacía). ``document`` sólo se llena cuando el archivo ya es una
+    Invoice o CreditNote y no un AttachedDocument.
+    """
+    root_tag: str
+    payload: Optional[str]
+    document: Optional[etree._Element] = None
+
+
+def is_embedded_description(elem: etree._Element) -> bool:
+    parent = elem.getparent()
+    if parent is None or parent.tag != EXTERNAL_REFERENCE_TAG:
+        return False
+    grandparent = parent.getparent()
+    # './/cac:Attachment' sólo busca descendientes: el Attachment no puede ser la raíz
+    return grandparent is not None and grandparent.tag == ATTACHMENT_TAG and grandparent.getparent() is not None
+
+
+def read_envelope(source) -> Envelope:
+    """
+    Lee el sobre por streaming y devuelve la factura embebida como texto.
+
+    Equivale a ``root.find('.//cac:Attachment/cac:ExternalReference/cbc:Description')``
+    sobre el árbol completo: se toma la primera coincidencia en orden de
+    documento, y lo que viene después (p. ej. el ApplicationResponse) no se lee.
+
+    Args:
+        source: Ruta o archivo binario del XML.
+
+    Raises:
+        etree.XMLSyntaxError: Si el XML es inválido antes de la descripción.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return _read_envelope(f)
+    return _read_envelope(source)
+
+
+def embedded_invoice_text(payload: Optional[str]) -> Optional[str]:
+    """
+    XML de la factura a partir del texto de la descripción embebida: sin
+    espacios alrededor y, si trae un bloque CDATA literal, sólo su contenido.
+    None si no hay contenido.
+    """
+    if not payload:
+        return None
+    # Un solo recorte del texto (antes: strip, dos split y otro strip)
+    start = payload.find('<![CDATA[')
+    if start >= 0 and ']]>' in payload:
+        start += len('<![CDATA[')
+        # Hasta el primer ']]>' o el siguiente '<![CDATA[', como split()[1].split()[0]
+        ends = [end for end in (payload.find(']]>', start), payload.find('<![CDATA[', start)) if end >= 0]
+        return payload[start:min(ends) if ends else len(payload)].strip()
+    return payload.strip()
+
+
+def _read_envelope(stream) -> Envelope:
+    # Sólo eventos 'end': la raíz se conoce desde el primer evento
+    context = etree.iterparse(stream, events=('end',), **parser_options(huge_tree=True))
+    root = None
+    keep_tree = False
+    for _, elem in context:
+        if root is None:
+            root = elem.getroottree().getroot()
+            keep_tree = root.tag.endswith(DIRECT_DOCUMENT_SUFFIXES)
+        if keep_tree:
+            continue
+        if elem.tag == DESCRIPTION_TAG and is_embedded_description(elem):
+            return Envelope(root.tag, elem.text)
+        # Liberar lo ya procesado: el elemento y sus hermanos anteriores
+        elem.clear(keep_tail=True)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+    root = context.root
+    if keep_tree:
+        return Envelope(root.tag, None, root)
+    return Envelope(root.tag, None)
@@ -0,0 +1,143 @@
+"""
+Lectura de la cabecera de una factura sin parsear el resto del documento.
+
+Para deduplicar, repartir por mes o contar facturas basta con el tipo de
+documento, ``cbc:ID`` y ``cbc:IssueDate``. ``read_header`` alimenta un
+``etree.XMLPullParser`` por bloques, primero con el sobre hasta la
+descripción embebida y luego con la factura embebida hasta encontrar los
+campos pedidos, y deja de leer ahí: las líneas, las partes y el
+ApplicationResponse no se parsean. El parser sólo entrega a Python los
+eventos de esas etiquetas.
+
+(``etree.iterparse`` no sirve para esto: lee la entrada en bloques grandes y
+parsea todo el bloque antes de entregar el primer evento.)
+"""
+import io
+import os
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from lxml import etree
+
+from .envelope import CBC, DESCRIPTION_TAG, DIRECT_DOCUMENT_SUFFIXES, embedded_invoice_text, is_embedded_description
+from .records import CREDIT_NOTE, INVOICE
+from .xml_parser import parser_options
+
+# Campo de la cabecera -> etiqueta hija de la raíz de la factura
+HEADER_TAGS: Dict[str, str] = {
+    'invoice_id': CBC + 'ID',
+    'issue_date': CBC + 'IssueDate',
+}
+DEFAULT_HEADER_FIELDS: Tuple[str, ...] = tuple(HEADER_TAGS)
+
+# Bytes que se entregan al parser en cada paso: cuanto menor, antes se detiene
+PULL_CHUNK_SIZE = 4096
+
+
+class InvoiceHeader(NamedTuple):
+    """
+    Cabecera de una factura. Los campos no pedidos quedan en None; uno pedido
+    que el documento no trae queda en ''.
+    """
+    invoice_type: str
+    invoice_id: Optional[str] = None
+    issue_date: Optional[str] = None
+
+    @property
+    def period(self) -> Optional[str]:
+        """Mes de emisión como las subcarpetas del mes (``MES_AÑO``, p. ej. '4_2025')."""
+        parts = (self.issue_date or '').split('-')
+        if len(parts) != 3 or not (parts[0].isdigit() and parts[1].isdigit()):
+            return None
+        return f"{int(parts[1])}_{parts[0]}"
+
+
+def document_type(root_tag: str) -> str:
+    """INVOICE o CREDIT_NOTE según la etiqueta raíz, como InvoiceProcessor."""
+    return CREDIT_NOTE if root_tag.endswith('}CreditNote') else INVOICE
+
+
+def read_header(source, fields: Sequence[str] = DEFAULT_HEADER_FIELDS) -> Optional[InvoiceHeader]:
+    """
+    Lee la cabecera de una factura (en sobre AttachedDocument o directa) y se
+    detiene apenas encuentra los campos pedidos.
+
+    Args:
+        source: Ruta o archivo binario del XML.
+        fields: Campos de HEADER_TAGS a leer.
+
+    Returns:
+        La cabecera, o None si el sobre no trae factura embebida.
+
+    Raises:
+        ValueError: Si se pide un campo desconocido.
+        etree.XMLSyntaxError: Si el XML es inválido antes de los campos.
+    """
+    unknown = [field for field in fields if field not in HEADER_TAGS]
+    if unknown:
+        raise ValueError(f"Campos de cabecera desconocidos: {', '.join(unknown)}")
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return _read_header(f, fields)
+    return _read_header(source, fields)
+
+
+def _read_header(stream, fields: Sequence[str]) -> Optional[InvoiceHeader]:
+    tags = tuple(HEADER_TAGS[field] for field in fields)
+    events = pull_events(stream, (DESCRIPTION_TAG,) + tags)
+    for _, elem in events:
+        root = elem.getroottree().getroot()
+        if root.tag.endswith(DIRECT_DOCUMENT_SUFFIXES):
+            # Factura directa: los eventos ya son los de su cabecera
+            return scan_header(_prepend(elem, events), fields)
+        if elem.tag == DESCRIPTION_TAG and is_embedded_description(elem):
+            invoice_content = embedded_invoice_text(elem.text)
+            if not invoice_content:
+                return None
+            return scan_header(pull_events(io.BytesIO(invoice_content.encode('utf-8')), tags), fields)
+    return None
+
+
+def _prepend(elem: etree._Element, events: Iterator[Tuple[str, etree._Element]]) -> Iterator[Tuple[str, etree._Element]]:
+    yield 'end', elem
+    yield from events
+
+
+def pull_events(stream, tags: Tuple[str, ...], chunk_size: int = PULL_CHUNK_SIZE) -> Iterator[Tuple[str, etree._Element]]:
+    """
+    Eventos 'end' de las etiquetas pedidas, leyendo la entrada por bloques de
+    chunk_size a medida que se consumen. Al final del documento entrega
+    además el 'end' de la raíz. Dejar de iterar deja de leer.
+    """
+    parser = etree.XMLPullParser(events=('end',), tag=tags, **parser_options(huge_tree=True))
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        parser.feed(data)
+        yield from parser.read_events()
+    # close() termina de validar el documento y devuelve la raíz
+    root = parser.close()
+    yield from parser.read_events()
+    if root.tag not in tags:
+        yield 'end', root
+
+
+def scan_header(events: Iterable[Tuple[str, etree._Element]], fields: Sequence[str]) -> InvoiceHeader:
+    """
+    Toma los campos pedidos de los eventos 'end' de una factura (sólo los
+    hijos directos de la raíz cuentan) y deja de iterar al tenerlos todos.
+    """
+    wanted = {HEADER_TAGS[field]: field for field in fields}
+    found: Dict[str, str] = {}
+    root = None
+    for _, elem in events:
+        root = elem.getroottree().getroot()
+        if len(found) == len(wanted):
+            break
+        field = wanted.get(elem.tag)
+        if field is not None and field not in found and elem.getparent() is root:
+            found[field] = (elem.text or '').strip()
+            if len(found) == len(wanted):
+                break
+    values = {field: found.get(field, '') for field in fields}
+    return InvoiceHeader(document_type(root.tag), **values)
@@ -4,34 +4,62 @@ Módulo para el procesamiento de facturas electrónicas en formato UBL.
 Este módulo proporciona funcionalidades para extraer y procesar información
 de facturas electrónicas en formato UBL (Universal Business Language).
 """
+import io
 import re
 import os
 import logging
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional, Any, Union
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 from lxml import etree
 from pathlib import Path
 
-from main.config import DEBUG
-from main.logger import get_logger
-from main.plantilla.constants import Constants
+from config import DEBUG
+from logger import get_logger
+from plantilla.constants import Constants
+from . import xpaths
+from .xpaths import XML_NAMESPACES, CompiledPath, compiled_path
+from .single_pass import InvoiceFields, extract_invoice_fields
+from .embedded import parse_embedded_invoice, read_embedded_invoice
+from .envelope import embedded_invoice_text, read_envelope
+from .header import DEFAULT_HEADER_FIELDS, InvoiceHeader, read_header
+from .parse_cache import ParseCache, content_digest
+from .xml_parser import get_parser
+from .toll_scanner import LAZY_TOLL_PATTERN, TollExtractor
+from .records import CREDIT_NOTE, INVOICE, ZERO, InvoiceRecord, LineItem, format_amount, parse_amount
 
 # Configuración del logger
 logger = get_logger(__name__)
 
-# Espacios de nombres XML
-XML_NAMESPACES = {
-    'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
-    'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
-    'ext': 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2',
-    'ds': 'http://www.w3.org/2000/09/xmldsig#',
-    'xsi': 'http://www.w3.org/2001/XMLSchema-instance'
-}
-
 # Expresiones regulares
 INVOICE_ID_PATTERN = re.compile(r'^(?P<prefix>[A-Za-z0-9-]+?)(?P<number>\d+)$')
-TOLL_DATA_PATTERN = re.compile(r'(?P<peaje>\D+?)\s+(?P<placa>[A-Za-z0-9]+)\s+\d+')
-TOLL_NAME_PATTERN = re.compile(r'\s([A-Za-z]+)$')
+# Referencia del peaje y la placa; se leen con toll_scanner, en tiempo lineal
+TOLL_DATA_PATTERN = LAZY_TOLL_PATTERN
+
+# Peajes y placas ya leídos en este proceso (memoria por descripción e índice por NIT)
+TOLL_EXTRACTOR = TollExtractor()
+
+# Motores de extracción de campos disponibles
+EXTRACTION_XPATH = 'xpath'
+EXTRACTION_SINGLE_PASS = 'single_pass'
+EXTRACTION_MODES = (EXTRACTION_XPATH, EXTRACTION_SINGLE_PASS)
+
+# Lectura del sobre AttachedDocument: árbol completo, iterparse por streaming o
+# la factura tomada directamente de los bytes del archivo (process.embedded)
+ENVELOPE_TREE = 'tree'
+ENVELOPE_STREAM = 'stream'
+ENVELOPE_BYTES = 'bytes'
+ENVELOPE_MODES = (ENVELOPE_TREE, ENVELOPE_STREAM, ENVELOPE_BYTES)
+
+# Versión del resultado de la extracción; cambiarla invalida la caché de facturas
+PARSER_VERSION = 'invoice_processor/4'
+
+# Lotes: archivos por tarea enviada al pool y tareas en vuelo por proceso
+DEFAULT_CHUNKSIZE = 64
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
 
 class InvoiceProcessingError(Exception):
     """Excepción base para errores en el procesamiento de facturas."""
@@ -45,12 +73,45 @@ class InvoiceDataError(InvoiceProcessingError):
     """Se lanza cuando faltan datos requeridos en la factura."""
     pass
 
+class InvoiceResult(NamedTuple):
+    """Resultado de una factura dentro de un lote (process_invoices)."""
+    xml_file: str
+    invoice_id: Optional[str]
+    data: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 class InvoiceProcessor:
     """Clase para procesar facturas electrónicas en formato UBL."""
     
-    def __init__(self):
-        """Inicializa el procesador de facturas."""
+    def __init__(self, extraction_mode: str = EXTRACTION_XPATH, envelope_mode: str = ENVELOPE_TREE,
+                 cache: Optional[ParseCache] = None):
+        """
+        Inicializa el procesador de facturas.
+        
+        Args:
+            extraction_mode: 'xpath' (una búsqueda compilada por campo) o
+                'single_pass' (un solo recorrido del árbol de la factura).
+            envelope_mode: 'tree' (parsea el sobre completo), 'stream'
+                (iterparse hasta la descripción embebida, liberando lo leído) o
+                'bytes' (parsea la factura embebida directamente del archivo
+                mapeado en memoria, sin copias; si el sobre no tiene la forma
+                habitual se lee como en 'tree').
+            cache: Caché por contenido (process.parse_cache). Si el SHA-256
+                del archivo ya está guardado para PARSER_VERSION, se devuelve
+                el resultado sin parsear el XML.
+        """
         # No es necesario instanciar Constants, ya que es una enumeración
+        if extraction_mode not in EXTRACTION_MODES:
+            raise ValueError(f"Modo de extracción no soportado: {extraction_mode}")
+        if envelope_mode not in ENVELOPE_MODES:
+            raise ValueError(f"Modo de lectura del sobre no soportado: {envelope_mode}")
+        self.extraction_mode = extraction_mode
+        self.envelope_mode = envelope_mode
+        self.cache = cache
     
     def process_invoice(self, xml_file: Union[str, Path]) -> Tuple[str, Dict[str, Any]]:
         """
@@ -61,7 +122,24 @@ class InvoiceProcessor:
             
         Returns:
             Una tupla con (factura_id, datos_factura) donde datos_factura es un diccionario
-            con la información extraída de la factura.
+            con la información extraída de la factura (InvoiceRecord.to_dict()).
+            
+        Raises:
+            InvoiceProcessingError: Si ocurre un error al procesar la factura.
+            FileNotFoundError: Si el archivo no existe.
+        """
+        record = self.process_invoice_record(xml_file)
+        return record.invoice_id, record.to_dict()
+    
+    def process_invoice_record(self, xml_file: Union[str, Path]) -> InvoiceRecord:
+        """
+        Procesa un archivo XML de factura y devuelve el registro compacto.
+        
+        Args:
+            xml_file: Ruta al archivo XML de la factura.
+            
+        Returns:
+            InvoiceRecord con los montos como números.
             
         Raises:
             InvoiceProcessingError: Si ocurre un error al procesar la factura.
@@ -77,37 +155,45 @@ class InvoiceProcessor:
             
             logger.info(f"Procesando factura: {xml_path}")
             
-            # 1. Leer y validar el XML
-            try:
-                tree = etree.parse(str(xml_path))
-                root = tree.getroot()
-            except etree.XMLSyntaxError as e:
-                error_msg = f"Error de sintaxis XML en {xml_path}: {str(e)}"
-                logger.error(error_msg)
-                raise InvoiceFormatError(error_msg) from e
-            
-            # 2. Extraer la factura embebida si es necesario
-            invoice_root = self._extract_embedded_invoice(root)
-            
-            # 3. Extraer datos básicos de la factura
-            invoice_data = self._extract_basic_invoice_data(invoice_root)
-            
-            # 4. Extraer datos del proveedor y cliente
-            self._extract_parties_data(invoice_root, invoice_data)
-            
-            # 5. Procesar ítems de la factura
-            self._process_invoice_items(invoice_root, invoice_data)
-            
-            # 6. Procesar datos adicionales
-            self._process_additional_data(invoice_root, invoice_data)
+            # 0. Consultar la caché por el hash del contenido
+            data = digest = None
+            if self.cache is not None:
+                data = xml_path.read_bytes()
+                digest = content_digest(data)
+                cached = self.cache.get(digest, PARSER_VERSION)
+                if cached is not None:
+                    record = InvoiceRecord.from_state(cached)
+                    self._add_run_metadata(record, xml_path)
+                    logger.info(f"Factura {record.invoice_id} tomada de la caché")
+                    return record
+            
+            # 1-2. Leer el XML y extraer la factura embebida si es necesario
+            invoice_root = self._read_invoice_root(xml_path, data)
+            
+            if self.extraction_mode == EXTRACTION_SINGLE_PASS:
+                # 3-6. Todos los campos en un solo recorrido del árbol
+                record = self._extract_single_pass(invoice_root)
+            else:
+                # 3. Extraer datos básicos de la factura
+                record = self._extract_basic_invoice_data(invoice_root)
+                
+                # 4. Extraer datos del proveedor y cliente
+                self._extract_parties_data(invoice_root, record)
+                
+                # 5. Procesar ítems de la factura
+                self._process_invoice_items(invoice_root, record)
+                
+                # 6. Procesar datos adicionales
+                self._process_additional_data(invoice_root, record)
             
-            # 7. Agregar metadatos
-            invoice_data['xml_file'] = str(xml_path)
-            invoice_data['processing_timestamp'] = datetime.now().isoformat()
+            # 7. Guardar en la caché y agregar metadatos
+            if self.cache is not None:
+                self.cache.put(digest, PARSER_VERSION, record.to_state())
+            self._add_run_metadata(record, xml_path)
             
-            logger.info(f"Factura {invoice_data['invoice_id']} procesada exitosamente")
+            logger.info(f"Factura {record.invoice_id} procesada exitosamente")
             
-            return invoice_data['invoice_id'], invoice_data
+            return record
             
         except Exception as e:
             error_msg = f"Error al procesar la factura {xml_file}: {str(e)}"
@@ -119,6 +205,223 @@ class InvoiceProcessor:
                 raise InvoiceProcessingError(error_msg) from e
             raise
     
+    def process_invoice_header(self, xml_file: Union[str, Path],
+                               fields: Tuple[str, ...] = DEFAULT_HEADER_FIELDS) -> InvoiceHeader:
+        """
+        Lee sólo la cabecera de la factura (tipo de documento y los campos
+        pedidos de process.header) y se detiene al encontrarlos, sin
+        parsear las líneas ni las partes. Para deduplicar, repartir por mes o
+        contar facturas.
+        
+        Args:
+            xml_file: Ruta al archivo XML de la factura.
+            fields: Campos de la cabecera a leer ('invoice_id', 'issue_date').
+            
+        Returns:
+            InvoiceHeader con los campos pedidos.
+            
+        Raises:
+            InvoiceDataError: Si falta un campo pedido.
+            InvoiceFormatError: Si el XML no es válido o no trae la factura.
+            FileNotFoundError: Si el archivo no existe.
+        """
+        xml_path = Path(xml_file)
+        if not xml_path.is_file():
+            error_msg = f"El archivo no existe: {xml_path}"
+            logger.error(error_msg)
+            raise FileNotFoundError(error_msg)
+        try:
+            header = read_header(xml_path, fields)
+        except etree.XMLSyntaxError as e:
+            error_msg = f"Error de sintaxis XML en {xml_path}: {str(e)}"
+            logger.error(error_msg)
+            raise InvoiceFormatError(error_msg) from e
+        if header is None:
+            raise InvoiceFormatError(f"No se encontró el contenido de la factura embebida en {xml_path}")
+        if header.invoice_id == '':
+            raise InvoiceDataError("La factura no tiene un ID válido")
+        if header.issue_date == '':
+            raise InvoiceDataError("La factura no tiene fecha de emisión")
+        return header
+    
+    def process_invoices(self, xml_files: Iterable[Union[str, Path]], workers: Optional[int] = None,
+                         chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[InvoiceResult]:
+        """
+        Procesa un lote de facturas repartiendo los archivos en un pool de procesos.
+        
+        Los resultados se generan en el mismo orden de entrada. Un error en un
+        archivo queda en su InvoiceResult y no detiene el lote. Cada proceso
+        crea su propio procesador con los mismos modos y, si hay caché, abre
+        su propia conexión al mismo archivo.
+        
+        Si un proceso del pool muere, todas las tareas en vuelo fallan con
+        BrokenProcessPool sin decir cuál lo causó: sus archivos se procesan
+        de nuevo uno por uno, cada uno en un proceso propio, y el resto del
+        lote sigue en un pool nuevo. Sólo el archivo que vuelve a matar su
+        proceso queda con el error.
+        
+        Args:
+            xml_files: Rutas de los XML (se consumen de forma perezosa).
+            workers: Procesos del pool; None usa os.cpu_count() y 1 procesa
+                en este mismo proceso, sin pool.
+            chunksize: Archivos por tarea enviada a un proceso.
+            
+        Returns:
+            Un iterador perezoso con un InvoiceResult por archivo.
+            
+        Raises:
+            ValueError: Si chunksize no es positivo (al llamar, no al iterar).
+        """
+        if chunksize < 1:
+            raise ValueError(f"chunksize debe ser positivo: {chunksize}")
+        return self._iter_results(xml_files, workers or os.cpu_count() or 1, chunksize)
+    
+    def _iter_results(self, xml_files: Iterable[Union[str, Path]], workers: int,
+                      chunksize: int) -> Iterator[InvoiceResult]:
+        chunks = _chunked(xml_files, chunksize)
+        
+        if workers == 1:
+            for chunk in chunks:
+                yield from self._process_chunk(chunk)
+            return
+        
+        executor = self._create_pool(workers)
+        # Pocas tareas en vuelo: el orden se conserva y la memoria no crece con el lote
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append((chunk, _submit_chunk(executor, chunk)))
+                if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                    results, executor = self._next_results(pending, executor, workers)
+                    yield from results
+            while pending:
+                results, executor = self._next_results(pending, executor, workers)
+                yield from results
+        finally:
+            # Cancelar a mano lo que no empezó (cancel_futures de shutdown es de Python 3.9)
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+    
+    def _create_pool(self, workers: int) -> ProcessPoolExecutor:
+        cache_config = (self.cache.path, self.cache.max_bytes) if self.cache is not None else None
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.extraction_mode, self.envelope_mode, cache_config),
+        )
+    
+    def _next_results(self, pending: deque, executor: ProcessPoolExecutor,
+                      workers: int) -> Tuple[List[InvoiceResult], ProcessPoolExecutor]:
+        """
+        Resultados de la primera tarea en vuelo. Si el pool se rompió,
+        resultados de todas las tareas en vuelo (las interrumpidas se
+        reprocesan archivo por archivo) y un pool nuevo para el resto.
+        """
+        chunk, future = pending.popleft()
+        try:
+            return future.result(), executor
+        except BrokenProcessPool:
+            pass
+        logger.warning("Un proceso del pool murió; se reprocesan por separado los archivos en vuelo")
+        interrupted = [(chunk, future)] + list(pending)
+        pending.clear()
+        executor.shutdown(wait=True)
+        results = []
+        for chunk, future in interrupted:
+            try:
+                results.extend(future.result())
+            except BrokenProcessPool:
+                results.extend(self._process_isolated(xml_file) for xml_file in chunk)
+        return results, self._create_pool(workers)
+    
+    def _process_isolated(self, xml_file: str) -> InvoiceResult:
+        """Procesa un archivo en un proceso propio: si el proceso muere, el error queda en su resultado."""
+        executor = self._create_pool(1)
+        try:
+            return executor.submit(_process_chunk_in_worker, [xml_file]).result()[0]
+        except BrokenProcessPool as e:
+            return InvoiceResult(xml_file, None, None, f"{type(e).__name__}: {e}")
+        finally:
+            executor.shutdown(wait=True)
+    
+    def _process_chunk(self, chunk: List[str]) -> List[InvoiceResult]:
+        """Procesa un grupo de archivos guardando el error de cada uno."""
+        results = []
+        try:
+            for xml_file in chunk:
+                try:
+                    invoice_id, invoice_data = self.process_invoice(xml_file)
+                    results.append(InvoiceResult(xml_file, invoice_id, invoice_data))
+                except Exception as e:
+                    results.append(InvoiceResult(xml_file, None, None, str(e)))
+        finally:
+            if self.cache is not None:
+                self.cache.flush()
+        return results
+    
+    @staticmethod
+    def _add_run_metadata(record: InvoiceRecord, xml_path: Path) -> None:
+        """Agrega la ruta del archivo y la fecha de procesamiento."""
+        record.xml_file = str(xml_path)
+        record.processing_timestamp = datetime.now().isoformat()
+    
+    def _read_invoice_root(self, xml_path: Path, data: Optional[bytes] = None) -> etree._Element:
+        """
+        Lee el archivo y devuelve el elemento raíz de la factura.
+        
+        En modo 'stream' el sobre se recorre con iterparse y la lectura se
+        detiene en la descripción embebida, de modo que errores de sintaxis
+        posteriores a ella no se detectan. En modo 'bytes' el sobre no se
+        parsea: sólo la factura embebida, tomada del buffer del archivo.
+        
+        Args:
+            xml_path: Ruta del archivo (también se usa en los mensajes de error).
+            data: Bytes ya leídos del archivo, para no leerlo dos veces.
+        
+        Raises:
+            InvoiceFormatError: Si el XML no es válido o no trae la factura.
+        """
+        if self.envelope_mode == ENVELOPE_BYTES:
+            invoice_root = self._read_embedded_bytes(xml_path, data)
+            if invoice_root is not None:
+                return invoice_root
+        
+        source = io.BytesIO(data) if data is not None else str(xml_path)
+        try:
+            if self.envelope_mode == ENVELOPE_STREAM:
+                envelope = read_envelope(source)
+            else:
+                root = etree.parse(source, get_parser(huge_tree=True)).getroot()
+        except etree.XMLSyntaxError as e:
+            error_msg = f"Error de sintaxis XML en {xml_path}: {str(e)}"
+            logger.error(error_msg)
+            raise InvoiceFormatError(error_msg) from e
+        
+        if self.envelope_mode == ENVELOPE_STREAM:
+            if envelope.document is not None:
+                return envelope.document
+            return self._parse_embedded_invoice(envelope.payload)
+        return self._extract_embedded_invoice(root)
+    
+    @staticmethod
+    def _read_embedded_bytes(xml_path: Path, data: Optional[bytes] = None) -> Optional[etree._Element]:
+        """
+        Factura embebida parseada desde los bytes del archivo (o data), sin
+        copiarla; None si el sobre no tiene la forma habitual.
+        
+        Raises:
+            InvoiceFormatError: Si la factura embebida no es un XML válido.
+        """
+        try:
+            if data is not None:
+                return parse_embedded_invoice(data)
+            return read_embedded_invoice(xml_path)
+        except etree.XMLSyntaxError as e:
+            error_msg = f"No se pudo extraer la factura embebida: El contenido embebido no es un XML válido: {str(e)}"
+            logger.error(f"Error al extraer factura embebida: {str(e)}")
+            raise InvoiceFormatError(error_msg) from e
+    
     def _extract_embedded_invoice(self, root: etree._Element) -> etree._Element:
         """
         Extrae la factura embebida en un documento AttachedDocument si es necesario.
@@ -137,25 +440,31 @@ class InvoiceProcessor:
             return root
             
         # Intentar extraer la factura embebida de un AttachedDocument
-        try:
-            description_elem = root.find(
-                './/cac:Attachment/cac:ExternalReference/cbc:Description', 
-                namespaces=XML_NAMESPACES
-            )
-            
-            if description_elem is None or not description_elem.text:
-                raise InvoiceFormatError("No se encontró el contenido de la factura embebida.")
+        description_elem = self._find(root, xpaths.EMBEDDED_DESCRIPTION)
+        return self._parse_embedded_invoice(description_elem.text if description_elem is not None else None)
+    
+    def _parse_embedded_invoice(self, payload: Optional[str]) -> etree._Element:
+        """
+        Convierte el texto de la descripción embebida en el XML de la factura.
+        
+        Args:
+            payload: Texto de cbc:Description (None si no se encontró).
             
-            # Obtener el texto del elemento y limpiarlo
-            invoice_content = description_elem.text.strip()
+        Returns:
+            Elemento raíz de la factura.
             
-            # Si el contenido está en CDATA, extraer el contenido interno
-            if '<![CDATA[' in invoice_content and ']]>' in invoice_content:
-                invoice_content = invoice_content.split('<![CDATA[')[1].split(']]>')[0].strip()
+        Raises:
+            InvoiceFormatError: Si no hay contenido o no es un XML válido.
+        """
+        try:
+            # Texto limpio y sin el bloque CDATA, si lo trae
+            invoice_content = embedded_invoice_text(payload)
+            if not invoice_content:
+                raise InvoiceFormatError("No se encontró el contenido de la factura embebida.")
             
             # Convertir el string de la factura a XML
             try:
-                return etree.fromstring(invoice_content.encode('utf-8'))
+                return etree.fromstring(invoice_content.encode('utf-8'), get_parser())
             except etree.XMLSyntaxError as e:
                 raise InvoiceFormatError(f"El contenido embebido no es un XML válido: {str(e)}")
                 
@@ -163,7 +472,7 @@ class InvoiceProcessor:
             logger.error(f"Error al extraer factura embebida: {str(e)}")
             raise InvoiceFormatError(f"No se pudo extraer la factura embebida: {str(e)}") from e
     
-    def _extract_basic_invoice_data(self, invoice_root: etree._Element) -> Dict[str, Any]:
+    def _extract_basic_invoice_data(self, invoice_root: etree._Element) -> InvoiceRecord:
         """
         Extrae los datos básicos de la factura.
         
@@ -171,49 +480,98 @@ class InvoiceProcessor:
             invoice_root: Elemento raíz de la factura.
             
         Returns:
-            Diccionario con los datos básicos de la factura.
+            Registro con los datos básicos de la factura.
         """
         # Determinar el tipo de documento
         is_credit_note = invoice_root.tag.endswith('}CreditNote')
+        return self._build_basic_invoice_data(is_credit_note, self._text_reader(invoice_root))
+    
+    def _build_basic_invoice_data(self, is_credit_note: bool, text: Callable[..., str]) -> InvoiceRecord:
+        """
+        Arma los datos básicos de la factura a partir de un lector de texto.
         
+        Args:
+            is_credit_note: Si el documento es una nota crédito.
+            text: Función (ruta_compilada, default) que devuelve el texto del campo.
+            
+        Returns:
+            Registro con los datos básicos de la factura.
+        """
         # Extraer ID de la factura
-        invoice_id = self._get_element_text(invoice_root, 'cbc:ID')
+        invoice_id = text(xpaths.INVOICE_ID)
         if not invoice_id:
             raise InvoiceDataError("La factura no tiene un ID válido")
         
         # Extraer fecha de emisión
-        issue_date = self._get_element_text(invoice_root, 'cbc:IssueDate')
+        issue_date = text(xpaths.ISSUE_DATE)
         if not issue_date:
             raise InvoiceDataError("La factura no tiene fecha de emisión")
             
+        formatted_date = self._format_issue_date(issue_date)
+        
+        # Extraer prefijo y número (o la factura relacionada de una nota crédito)
+        prefix, number, related_invoice = self._build_invoice_reference(invoice_id, is_credit_note, text)
+        
+        # Extraer moneda y monto total
+        currency = text(xpaths.CURRENCY, default="COP")
+        
+        total_amount = text(xpaths.PAYABLE_AMOUNT, default="0")
+        
+        # Crear el registro de la factura (related_invoice sólo aplica a notas crédito)
+        return InvoiceRecord(
+            invoice_type=CREDIT_NOTE if is_credit_note else INVOICE,
+            invoice_id=invoice_id,
+            invoice_prefix=prefix,
+            invoice_number=number,
+            issue_date=issue_date,
+            formatted_issue_date=formatted_date,
+            currency=currency,
+            total_amount=parse_amount(total_amount),
+            related_invoice=related_invoice,
+        )
+    
+    @staticmethod
+    def _format_issue_date(issue_date: str) -> str:
+        """Fecha en formato DD/MM/YYYY, o el texto original si no es YYYY-MM-DD."""
         try:
-            # Convertir fecha al formato DD/MM/YYYY
-            issue_date_dt = datetime.strptime(issue_date, "%Y-%m-%d")
-            formatted_date = issue_date_dt.strftime("%d/%m/%Y")
+            return datetime.strptime(issue_date, "%Y-%m-%d").strftime("%d/%m/%Y")
         except ValueError:
-            formatted_date = issue_date
+            return issue_date
+    
+    @classmethod
+    def _build_invoice_reference(cls, invoice_id: str, is_credit_note: bool,
+                                 text: Callable[..., str]) -> Tuple[str, str, Optional[str]]:
+        """
+        Prefijo y número de la factura y, en notas crédito, la factura relacionada.
         
-        # Extraer prefijo y número de factura
-        prefix, number = self._extract_invoice_parts(invoice_id)
+        Args:
+            invoice_id: ID de la factura.
+            is_credit_note: Si el documento es una nota crédito.
+            text: Función (ruta_compilada, default) que devuelve el texto del campo.
+            
+        Returns:
+            (prefijo, número, factura relacionada o None).
+        """
+        prefix, number = cls._extract_invoice_parts(invoice_id)
         
         # Para notas de crédito, extraer la factura relacionada
         related_invoice = None
         if is_credit_note:
             # Primero intentar con InvoiceDocumentReference (estándar UBL)
-            related_invoice = self._get_element_text(invoice_root, 'cac:BillingReference/cac:InvoiceDocumentReference/cbc:ID')
-            # Si no se encuentra, intentar con ReferenceID (formato alternativo)
+            related_invoice = text(xpaths.BILLING_REFERENCE_ID)
+            # Si no se encuentra, intentar con ReferenceID (formato alternativo).
+            # El respaldo './/*[local-name()="ReferenceID"]' que seguía nunca
+            # encontró nada (ElementPath no admite local-name()), así que no se
+            # busca más allá: una nota crédito sin referencia conserva su prefijo
             if not related_invoice:
-                related_invoice = self._get_element_text(invoice_root, 'cbc:ReferenceID')
-                # Si aún no se encuentra, intentar sin namespaces
-                if not related_invoice:
-                    related_invoice = self._get_element_text(invoice_root, './/*[local-name()="ReferenceID"]')
+                related_invoice = text(xpaths.REFERENCE_ID)
             
             # Si encontramos una factura relacionada, usarla para el prefijo
             if related_invoice:
                 # Guardar el ID completo de la factura relacionada
                 related_invoice = related_invoice.strip()
                 # Extraer el prefijo de la factura relacionada
-                related_prefix, _ = self._extract_invoice_parts(related_invoice)
+                related_prefix, _ = cls._extract_invoice_parts(related_invoice)
                 if related_prefix:
                     prefix = related_prefix
                 else:
@@ -224,91 +582,68 @@ class InvoiceProcessor:
         if prefix and prefix.endswith('-'):
             prefix = prefix[:-1]
         
-        # Extraer moneda y monto total
-        currency = self._get_element_text(invoice_root, 'cbc:DocumentCurrencyCode', default="COP")
-        
-        amount_path = 'cac:LegalMonetaryTotal/cbc:PayableAmount' if is_credit_note else 'cac:LegalMonetaryTotal/cbc:PayableAmount'
-        total_amount = self._get_element_text(invoice_root, amount_path, default="0")
-        
-        # Crear el diccionario de datos de la factura
-        invoice_data = {
-            'invoice_type': 'CREDIT_NOTE' if is_credit_note else 'INVOICE',
-            'invoice_id': invoice_id,
-            'invoice_prefix': prefix,
-            'invoice_number': number,
-            'issue_date': issue_date,
-            'formatted_issue_date': formatted_date,
-            'currency': currency,
-            'total_amount': self._clean_decimal(total_amount, force_int=False),
-            'items': [],
-            'toll_name': None,
-            'plate_number': None
-        }
-        
-        # Solo agregar related_invoice si es una nota de crédito
-        if is_credit_note:
-            invoice_data['related_invoice'] = related_invoice
-            
-        return invoice_data
+        return prefix, number, related_invoice
     
-    def _extract_parties_data(self, invoice_root: etree._Element, invoice_data: Dict[str, Any]) -> None:
+    def _extract_parties_data(self, invoice_root: etree._Element, record: InvoiceRecord) -> None:
         """
         Extrae los datos del proveedor y cliente de la factura.
         
         Args:
             invoice_root: Elemento raíz de la factura.
-            invoice_data: Diccionario donde se almacenarán los datos.
+            record: Registro donde se almacenarán los datos.
         """
         # Extraer datos del proveedor
-        supplier_party = invoice_root.find('.//cac:AccountingSupplierParty', XML_NAMESPACES)
+        supplier_party = self._find(invoice_root, xpaths.SUPPLIER_PARTY)
         if supplier_party is not None:
-            invoice_data['supplier_name'] = self._get_element_text(
-                supplier_party, './/cac:Party//cbc:RegistrationName'
-            )
-            invoice_data['supplier_tax_id'] = self._get_element_text(
-                supplier_party, './/cac:Party//cbc:CompanyID'
-            )
+            self._set_party_data(record, 'supplier', self._text_reader(supplier_party))
         
         # Extraer datos del cliente
-        customer_party = invoice_root.find('.//cac:AccountingCustomerParty', XML_NAMESPACES)
+        customer_party = self._find(invoice_root, xpaths.CUSTOMER_PARTY)
         if customer_party is not None:
-            invoice_data['customer_name'] = self._get_element_text(
-                customer_party, './/cac:Party//cbc:RegistrationName'
-            )
-            invoice_data['customer_tax_id'] = self._get_element_text(
-                customer_party, './/cac:Party//cbc:CompanyID'
-            )
+            self._set_party_data(record, 'customer', self._text_reader(customer_party))
     
-    def _process_invoice_items(self, invoice_root: etree._Element, invoice_data: Dict[str, Any]) -> None:
+    @staticmethod
+    def _set_party_data(record: InvoiceRecord, role: str, text: Callable[..., str]) -> None:
+        """Guarda nombre y NIT de la parte ('supplier' o 'customer')."""
+        record.set_party(role, text(xpaths.PARTY_REGISTRATION_NAME), text(xpaths.PARTY_COMPANY_ID))
+    
+    def _process_invoice_items(self, invoice_root: etree._Element, record: InvoiceRecord) -> None:
         """
         Procesa los ítems de la factura.
         
         Args:
             invoice_root: Elemento raíz de la factura.
-            invoice_data: Diccionario donde se almacenarán los ítems.
+            record: Registro donde se almacenarán los ítems.
         """
-        is_credit_note = invoice_data['invoice_type'] == 'CREDIT_NOTE'
-        items_path = './/cac:CreditNoteLine' if is_credit_note else './/cac:InvoiceLine'
+        items_path = xpaths.CREDIT_NOTE_LINES if record.is_credit_note else xpaths.INVOICE_LINES
         
-        for item in invoice_root.findall(items_path, XML_NAMESPACES):
-            try:
-                item_data = self._extract_item_data(item)
-                if item_data:
-                    invoice_data['items'].append(item_data)
+        for item in self._findall(invoice_root, items_path):
+            self._add_item(record, self._text_reader(item))
+    
+    def _add_item(self, record: InvoiceRecord, text: Callable[..., str]) -> None:
+        """
+        Agrega un ítem a la factura y toma el peaje y la placa del primero que los tenga.
+        
+        Args:
+            record: Registro donde se almacenarán los ítems.
+            text: Lector de texto de los campos de la línea.
+        """
+        try:
+            item = self._build_item_data(text)
+            record.items.append(item)
+            
+            # Extraer datos de peaje si no se han extraído antes
+            if not record.toll_name and item.description:
+                toll_data = self._extract_toll_data(item.description, record.supplier_tax_id)
+                if toll_data['toll_name'] and toll_data['plate_number']:
+                    record.set_toll(toll_data['toll_name'], toll_data['plate_number'])
                     
-                    # Extraer datos de peaje si no se han extraído antes
-                    if not invoice_data['toll_name'] and item_data.get('description'):
-                        toll_data = self._extract_toll_data(item_data['description'])
-                        if toll_data['toll_name'] and toll_data['plate_number']:
-                            invoice_data['toll_name'] = toll_data['toll_name']
-                            invoice_data['plate_number'] = toll_data['plate_number']
-                            
-            except Exception as e:
-                logger.warning(f"Error al procesar ítem de factura: {str(e)}")
-                if DEBUG:
-                    logger.exception("Detalles del error:")
-    
-    def _extract_item_data(self, item: etree._Element) -> Dict[str, Any]:
+        except Exception as e:
+            logger.warning(f"Error al procesar ítem de factura: {str(e)}")
+            if DEBUG:
+                logger.exception("Detalles del error:")
+    
+    def _extract_item_data(self, item: etree._Element) -> LineItem:
         """
         Extrae los datos de un ítem de factura.
         
@@ -316,62 +651,117 @@ class InvoiceProcessor:
             item: Elemento XML del ítem.
             
         Returns:
-            Diccionario con los datos del ítem.
+            Línea con los datos del ítem.
         """
-        description = self._get_element_text(item, './/cbc:Description')
-        quantity = self._get_element_text(item, 'cbc:InvoicedQuantity', default="1")
-        price = self._get_element_text(item, './/cbc:PriceAmount', default="0")
-        reference = self._get_element_text(item, './/cac:SellersItemIdentification/cbc:ID')
+        return self._build_item_data(self._text_reader(item))
+    
+    def _build_item_data(self, text: Callable[..., str]) -> LineItem:
+        """Arma los datos de un ítem a partir de un lector de texto de la línea."""
+        description = text(xpaths.ITEM_DESCRIPTION)
+        quantity = parse_amount(text(xpaths.ITEM_QUANTITY, default="1"))
+        price = parse_amount(text(xpaths.ITEM_PRICE, default="0"))
+        reference = text(xpaths.ITEM_REFERENCE)
         
-        return {
-            'description': description,
-            'quantity': self._clean_decimal(quantity, force_int=True),
-            'price': self._clean_decimal(price, force_int=False),
-            'reference': reference,
-            'line_total': str(float(self._clean_decimal(quantity, force_int=True)) * float(self._clean_decimal(price, '0', force_int=False)))
-        }
+        # Total exacto en Decimal; un monto no numérico cuenta como cero
+        line_total = (quantity if quantity is not None else ZERO) * (price if price is not None else ZERO)
+        return LineItem(description, quantity, price, reference, line_total)
     
-    def _process_additional_data(self, invoice_root: etree._Element, invoice_data: Dict[str, Any]) -> None:
+    def _process_additional_data(self, invoice_root: etree._Element, record: InvoiceRecord) -> None:
         """
         Procesa datos adicionales de la factura.
         
         Args:
             invoice_root: Elemento raíz de la factura.
-            invoice_data: Diccionario donde se almacenarán los datos.
+            record: Registro donde se almacenarán los datos.
         """
+        self._build_additional_data(record, self._text_reader(invoice_root))
+    
+    @staticmethod
+    def _build_additional_data(record: InvoiceRecord, text: Callable[..., str]) -> None:
+        """Completa los datos adicionales a partir de un lector de texto de la factura."""
         # Extraer factura relacionada (para notas crédito)
-        if invoice_data['invoice_type'] == 'CREDIT_NOTE' and 'related_invoice' not in invoice_data:
-            related_invoice = self._get_element_text(
-                invoice_root, './/cbc:ReferenceID'
-            )
+        if record.is_credit_note and record.related_invoice is None:
+            related_invoice = text(xpaths.DESCENDANT_REFERENCE_ID)
             if related_invoice:
                 try:
                     # Usar el ID de factura relacionada completo
-                    invoice_data['related_invoice'] = related_invoice
+                    record.related_invoice = related_invoice
                 except Exception as e:
                     logger.warning(f"No se pudo extraer el número de factura relacionada: {str(e)}")
-                    invoice_data['related_invoice'] = related_invoice
+                    record.related_invoice = related_invoice
+    
+    def _extract_single_pass(self, invoice_root: etree._Element) -> InvoiceRecord:
+        """
+        Extrae datos básicos, partes, ítems y datos adicionales recorriendo el
+        árbol de la factura una sola vez (process.single_pass).
+        
+        Produce el mismo registro que los pasos 3 a 6 de process_invoice.
+        
+        Args:
+            invoice_root: Elemento raíz de la factura.
+            
+        Returns:
+            Registro con los datos de la factura.
+        """
+        is_credit_note = invoice_root.tag.endswith('}CreditNote')
+        fields = extract_invoice_fields(invoice_root, is_credit_note)
+        
+        root_text = self._fields_reader(fields.root)
+        record = self._build_basic_invoice_data(is_credit_note, root_text)
+        if fields.supplier is not None:
+            self._set_party_data(record, 'supplier', self._fields_reader(fields.supplier))
+        if fields.customer is not None:
+            self._set_party_data(record, 'customer', self._fields_reader(fields.customer))
+        for line in fields.lines:
+            self._add_item(record, self._fields_reader(line))
+        self._build_additional_data(record, root_text)
+        return record
+    
+    def _text_reader(self, node: etree._Element) -> Callable[..., str]:
+        """Lector de texto que busca cada ruta compilada bajo node."""
+        def text(path: CompiledPath, default: str = '') -> str:
+            return self._get_element_text(node, path, default)
+        return text
+    
+    @staticmethod
+    def _fields_reader(fields: Dict[str, etree._Element]) -> Callable[..., str]:
+        """Lector de texto sobre los campos ya resueltos por el recorrido único."""
+        def text(path: CompiledPath, default: str = '') -> str:
+            return InvoiceFields.text(fields, path, default)
+        return text
     
     @staticmethod
-    def _get_element_text(root: etree._Element, path: str, default: str = '') -> str:
+    def _get_element_text(root: etree._Element, path: Union[CompiledPath, str], default: str = '') -> str:
         """
         Obtiene el texto de un elemento XML o un valor por defecto si no existe.
         
         Args:
             root: Elemento raíz desde donde buscar.
-            path: Ruta XPath del elemento.
+            path: Ruta compilada del registro (process.xpaths) o expresión
+                XPath, que se compila y registra la primera vez.
             default: Valor por defecto si el elemento no se encuentra.
             
         Returns:
             Texto del elemento o el valor por defecto.
         """
         try:
-            elem = root.find(path, XML_NAMESPACES)
-            return elem.text.strip() if elem is not None and elem.text else default
+            if not isinstance(path, CompiledPath):
+                path = compiled_path(path)
+            return path.text(root, default)
         except Exception as e:
             logger.debug(f"Error al obtener texto del elemento {path}: {str(e)}")
             return default
     
+    @staticmethod
+    def _find(root: etree._Element, path: CompiledPath) -> Optional[etree._Element]:
+        """Primer elemento que coincide con la ruta compilada o None."""
+        return path.element(root)
+    
+    @staticmethod
+    def _findall(root: etree._Element, path: CompiledPath) -> List[etree._Element]:
+        """Todos los elementos que coinciden con la ruta compilada."""
+        return path.elements(root)
+    
     @staticmethod
     def _extract_invoice_parts(invoice_id: str) -> Tuple[str, str]:
         """
@@ -405,40 +795,16 @@ class InvoiceProcessor:
             Cadena con el valor decimal limpio, asegurando que tenga punto decimal
             y un solo dígito después del punto, o como entero si force_int es True.
         """
-        if not value:
-            return default
-            
-        try:
-            # Convertir a float
-            num = float(value)
-            
-            # Si force_int es True y el número es entero, devolver como entero
-            if force_int and num.is_integer():
-                return str(int(num))
-                
-            # Formatear con suficientes decimales
-            formatted = f"{num:.10f}"
-            
-            # Eliminar ceros innecesarios después del punto decimal
-            if '.' in formatted:
-                formatted = formatted.rstrip('0').rstrip('.')
-                
-            # Asegurar que tenga al menos un decimal si no es entero
-            if '.' not in formatted:
-                formatted += '.0'
-                
-            return formatted
-            
-        except (ValueError, TypeError):
-            return default
+        return format_amount(parse_amount(value), default, force_int)
     
     @staticmethod
-    def _extract_toll_data(description: str) -> Dict[str, Optional[str]]:
+    def _extract_toll_data(description: str, supplier_tax_id: Optional[str] = None) -> Dict[str, Optional[str]]:
         """
         Extrae el nombre del peaje y el número de placa de la descripción del ítem.
         
         Args:
             description: Descripción del ítem.
+            supplier_tax_id: NIT del proveedor, para el índice de peajes conocidos.
             
         Returns:
             Diccionario con 'toll_name' y 'plate_number'.
@@ -446,33 +812,51 @@ class InvoiceProcessor:
         if not description:
             return {'toll_name': None, 'plate_number': None}
             
-        # Buscar patrón de peaje y placa
-        match = TOLL_DATA_PATTERN.search(description)
-        if not match:
+        # Buscar peaje y placa (mismo resultado que TOLL_DATA_PATTERN, sin retroceso)
+        match = TOLL_EXTRACTOR.extract(description, supplier_tax_id)
+        if match is None:
             return {'toll_name': None, 'plate_number': None}
             
-        try:
-            # Extraer nombre del peaje (última palabra)
-            toll_name = match.group('peaje').strip()
-            toll_match = TOLL_NAME_PATTERN.search(toll_name)
-            if toll_match:
-                toll_name = toll_match.group(1).strip()
-            
-            # Agregar prefijo
-            toll_name = f"{Constants.PEAJE.value[0]} {toll_name}" if toll_name else None
-            
-            # Obtener placa si existe el grupo 'plate' o 'placa'
-            plate_number = None
-            if 'plate' in match.groupdict() and match.group('plate'):
-                plate_number = match.group('plate').strip()
-            elif 'placa' in match.groupdict() and match.group('placa'):
-                plate_number = match.group('placa').strip()
-            
-            return {
-                'toll_name': toll_name,
-                'plate_number': plate_number
-            }
-            
-        except (IndexError, AttributeError) as e:
-            logger.warning(f"Error al extraer datos de peaje: {str(e)}")
-            return {'toll_name': None, 'plate_number': None}
+        # Nombre del peaje: última palabra o, si no la hay, todo el texto; con prefijo
+        toll_name = match.name or match.segment.strip()
+        toll_name = f"{Constants.PEAJE.value[0]} {toll_name}" if toll_name else None
+        
+        return {
+            'toll_name': toll_name,
+            'plate_number': match.plate
+        }
+
+
+# Procesador de cada proceso del pool de process_invoices
+_worker_processor: Optional[InvoiceProcessor] = None
+
+
+def _init_worker(extraction_mode: str, envelope_mode: str, cache_config: Optional[Tuple[str, int]]) -> None:
+    """Crea el procesador (y su conexión a la caché) una vez por proceso."""
+    global _worker_processor
+    cache = ParseCache(*cache_config) if cache_config is not None else None
+    _worker_processor = InvoiceProcessor(extraction_mode, envelope_mode, cache)
+
+
+def _process_chunk_in_worker(chunk: List[str]) -> List[InvoiceResult]:
+    return _worker_processor._process_chunk(chunk)
+
+
+def _submit_chunk(executor: ProcessPoolExecutor, chunk: List[str]) -> Future:
+    try:
+        return executor.submit(_process_chunk_in_worker, chunk)
+    except BrokenProcessPool as e:
+        # El pool se rompió antes de recibir el grupo: queda como una tarea interrumpida más
+        future = Future()
+        future.set_exception(e)
+        return future
+
+
+def _chunked(xml_files: Iterable[Union[str, Path]], size: int) -> Iterator[List[str]]:
+    """Agrupa las rutas en listas de hasta size elementos."""
+    iterator = (str(xml_file) for xml_file in xml_files)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,214 @@
+"""
+Caché persistente de facturas ya procesadas, por contenido.
+
+Cada entrada se identifica con el SHA-256 de los bytes del XML y la versión del
+extractor que la produjo: si el archivo no cambió y el extractor tampoco, el
+resultado se devuelve desde SQLite sin volver a parsear el XML. Los valores se
+guardan como JSON comprimido con zlib y, al superar ``max_bytes``, se eliminan
+primero las entradas usadas hace más tiempo.
+
+Varios procesos pueden abrir el mismo archivo: cada escritura se confirma de
+inmediato (no queda una transacción abierta que bloquee a los demás), los
+aciertos no escriben (la fecha de uso se guarda por lotes en ``flush``) y si
+la base sigue bloqueada la entrada simplemente no se guarda.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+# Tamaño máximo por defecto de los valores guardados (bytes comprimidos)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Al desalojar se baja hasta esta fracción de max_bytes para no desalojar en cada escritura
+EVICTION_TARGET = 0.9
+
+# Segundos que se espera el bloqueo de escritura cuando varios procesos comparten el
+# archivo; si se agota, la escritura se omite (la caché es sólo una optimización)
+LOCK_TIMEOUT = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    digest    TEXT    NOT NULL,
+    version   TEXT    NOT NULL,
+    value     BLOB    NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used REAL    NOT NULL,
+    PRIMARY KEY (digest, version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+"""
+
+
+def content_digest(data: bytes) -> str:
+    """SHA-256 en hexadecimal de los bytes del archivo."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParseCache:
+    """
+    Caché en disco (SQLite) de resultados de extracción por hash de contenido.
+
+    ``hits`` y ``misses`` cuentan las consultas de esta instancia,
+    ``write_errors`` las escrituras omitidas por bloqueo y ``read_errors``
+    las consultas que el bloqueo convirtió en fallos. La conexión no se
+    comparte entre hilos ni procesos: cada uno abre su propia instancia sobre
+    el mismo archivo.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Abre (o crea) la caché.
+
+        Args:
+            path: Archivo SQLite; la carpeta se crea si no existe.
+            max_bytes: Tope del tamaño total de los valores comprimidos.
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes debe ser positivo: {max_bytes}")
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.write_errors = 0
+        self.read_errors = 0
+        # (digest, version) -> última vez usada, pendiente de guardar
+        self._touched: Dict[Tuple[str, str], float] = {}
+
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        # Sin transacciones implícitas: cada sentencia se confirma al ejecutarse
+        self._conn = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._total_bytes = self._sum_sizes()
+
+    def get(self, digest: str, version: str) -> Optional[Any]:
+        """
+        Valor guardado para (digest, version) o None; actualiza los contadores.
+
+        Si otro proceso mantiene la base bloqueada más de LOCK_TIMEOUT, la
+        consulta cuenta como fallo y también en read_errors.
+        """
+        try:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE digest = ? AND version = ?", (digest, version)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            self.read_errors += 1
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[(digest, version)] = time.time()
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, digest: str, version: str, value: Any) -> None:
+        """
+        Guarda el valor (serializable a JSON) y desaloja si se supera max_bytes.
+
+        Si otro proceso mantiene la base bloqueada más de LOCK_TIMEOUT, la
+        entrada no se guarda y sólo se cuenta en write_errors.
+        """
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        try:
+            previous = self._conn.execute(
+                "SELECT size FROM entries WHERE digest = ? AND version = ?", (digest, version)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (digest, version, value, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (digest, version, blob, len(blob), time.time()),
+            )
+            self._touched.pop((digest, version), None)
+            self._total_bytes += len(blob) - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        except sqlite3.OperationalError:
+            self.write_errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Entradas, bytes guardados y contadores de aciertos/fallos."""
+        entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'write_errors': self.write_errors,
+            'read_errors': self.read_errors,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Elimina todas las entradas (los contadores no se reinician)."""
+        self._conn.execute("DELETE FROM entries")
+        self._touched.clear()
+        self._total_bytes = 0
+
+    def flush(self) -> None:
+        """Guarda en una sola transacción la fecha de uso de los aciertos pendientes."""
+        if not self._touched:
+            return
+        touched = [(last_used, digest, version) for (digest, version), last_used in self._touched.items()]
+        self._touched.clear()
+        try:
+            self._write_many("UPDATE entries SET last_used = ? WHERE digest = ? AND version = ?", touched)
+        except sqlite3.OperationalError:
+            self.write_errors += 1
+
+    def close(self) -> None:
+        """Confirma lo pendiente y cierra la conexión."""
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self) -> 'ParseCache':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _write_many(self, sql: str, rows: List[Tuple[Any, ...]]) -> None:
+        """Ejecuta sql para todas las filas en una transacción corta."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany(sql, rows)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _sum_sizes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self) -> None:
+        # El orden de desalojo depende de las fechas de uso pendientes
+        self.flush()
+        # Otro proceso pudo escribir en el mismo archivo: recalcular antes de desalojar
+        self._total_bytes = self._sum_sizes()
+        target = int(self.max_bytes * EVICTION_TARGET)
+        if self._total_bytes <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT digest, version, size FROM entries ORDER BY last_used"
+        )
+        victims = []
+        freed = 0
+        for digest, version, size in rows:
+            if self._total_bytes - freed <= target:
+                break
+            victims.append((digest, version))
+            freed += size
+        rows.close()
+        self._write_many("DELETE FROM entries WHERE digest = ? AND version = ?", victims)
+        # Sólo después de borrar: si el DELETE falla el total sigue siendo el real
+        self._total_bytes -= freed
+        self.evictions += len(victims)
@@ -0,0 +1,239 @@
+"""
+Pipeline por etapas con colas acotadas entre ellas.
+
+Cada etapa tiene uno o varios hilos que toman elementos de su cola de
+entrada, los procesan y ponen los resultados en la cola de la etapa
+siguiente. Las colas tienen un tamaño máximo: si una etapa es más lenta, la
+anterior se bloquea al poner (contrapresión) en vez de acumular el mes en
+memoria. Mientras una etapa espera disco, las demás siguen trabajando; lxml
+y zlib liberan el GIL, así que varios hilos de parseo también se solapan.
+
+Cada etapa lleva sus métricas (StageMetrics): elementos, tiempo ocupado,
+tiempo bloqueado al poner, tiempo esperando entrada y profundidad de su cola
+de entrada. La etapa más lenta es la de mayor tiempo ocupado por hilo y
+menor espera de entrada; las anteriores a ella muestran tiempo bloqueado.
+"""
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Iterable, List, Optional
+
+# Elementos en vuelo por cola entre dos etapas
+DEFAULT_QUEUE_SIZE = 64
+
+# Cada cuánto revisa un hilo bloqueado si el pipeline se detuvo por un error
+_POLL_SECONDS = 0.1
+
+# Marca de fin de la entrada de una etapa (una por hilo)
+_END = object()
+
+
+@dataclass
+class Stage:
+    """
+    Una etapa del pipeline.
+
+    Attributes:
+        name: Nombre de la etapa en las métricas.
+        func: func(item) o, con setup, func(item, state). Devuelve un iterable
+            con los elementos para la etapa siguiente (o None si no entrega
+            nada); así una etapa puede descartar o repartir elementos.
+        workers: Hilos de la etapa.
+        setup: Opcional: callable sin argumentos que devuelve un context
+            manager; cada hilo entra en él una vez y pasa lo que entrega como
+            state (p. ej. una conexión propia por hilo).
+    """
+    name: str
+    func: Callable[..., Optional[Iterable[Any]]]
+    workers: int = 1
+    setup: Optional[Callable[[], ContextManager[Any]]] = None
+
+
+@dataclass
+class StageMetrics:
+    """Métricas de una etapa tras la ejecución (tiempos sumados sobre sus hilos)."""
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    busy_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+    starved_seconds: float = 0.0
+    max_queue_depth: int = 0
+    queue_depth_total: int = 0
+
+    @property
+    def mean_queue_depth(self) -> float:
+        """Profundidad media de la cola de entrada al tomar cada elemento."""
+        return self.queue_depth_total / self.items_in if self.items_in else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Elementos por segundo que la etapa procesa con todos sus hilos ocupados."""
+        return self.items_in * self.workers / self.busy_seconds if self.busy_seconds else 0.0
+
+    def merge(self, other: 'StageMetrics') -> None:
+        self.items_in += other.items_in
+        self.items_out += other.items_out
+        self.busy_seconds += other.busy_seconds
+        self.blocked_seconds += other.blocked_seconds
+        self.starved_seconds += other.starved_seconds
+        self.max_queue_depth = max(self.max_queue_depth, other.max_queue_depth)
+        self.queue_depth_total += other.queue_depth_total
+
+
+class Pipeline:
+    """
+    Ejecuta las etapas en orden sobre los elementos de una fuente.
+
+    Un error en cualquier etapa detiene el pipeline: los hilos dejan de tomar
+    elementos y run() vuelve a lanzar la primera excepción.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = DEFAULT_QUEUE_SIZE):
+        if not stages:
+            raise ValueError("El pipeline necesita al menos una etapa")
+        if queue_size < 1:
+            raise ValueError(f"queue_size debe ser positivo: {queue_size}")
+        for stage in stages:
+            if stage.workers < 1:
+                raise ValueError(f"La etapa {stage.name} necesita al menos un hilo: {stage.workers}")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.metrics: List[StageMetrics] = []
+
+    def run(self, source: Iterable[Any]) -> List[StageMetrics]:
+        """
+        Pasa los elementos de source por todas las etapas y espera a que
+        terminen. Lo que entrega la última etapa se descarta.
+
+        Returns:
+            Las métricas de cada etapa, en orden.
+        """
+        queues = [queue.Queue(self.queue_size) for _ in self.stages]
+        self.metrics = [StageMetrics(stage.name, stage.workers) for stage in self.stages]
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self._lock = threading.Lock()
+        self._remaining = [stage.workers for stage in self.stages]
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            downstream = queues[index + 1] if index + 1 < len(queues) else None
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(index, queues[index], downstream),
+                    name=f"{stage.name}-{n}", daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in source:
+                if not self._put(queues[0], item):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for _ in range(self.stages[0].workers):
+                self._put(queues[0], _END)
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return self.metrics
+
+    def _work(self, index: int, inbox: queue.Queue, downstream: Optional[queue.Queue]) -> None:
+        stage = self.stages[index]
+        local = StageMetrics(stage.name, stage.workers)
+        try:
+            with (stage.setup() if stage.setup is not None else nullcontext()) as state:
+                args = (state,) if stage.setup is not None else ()
+                while True:
+                    waited = time.perf_counter()
+                    item = self._get(inbox)
+                    local.starved_seconds += time.perf_counter() - waited
+                    if item is _END:
+                        break
+                    depth = inbox.qsize()
+                    local.items_in += 1
+                    local.queue_depth_total += depth
+                    local.max_queue_depth = max(local.max_queue_depth, depth)
+
+                    started = time.perf_counter()
+                    results = stage.func(item, *args)
+                    # Un generador trabaja al iterarlo: sólo cuenta como bloqueo el put
+                    for result in results or ():
+                        local.items_out += 1
+                        if downstream is not None:
+                            blocked = time.perf_counter()
+                            if not self._put(downstream, result):
+                                break
+                            local.blocked_seconds += time.perf_counter() - blocked
+                    local.busy_seconds += time.perf_counter() - started
+                    if self._stop.is_set():
+                        break
+            local.busy_seconds -= local.blocked_seconds
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            with self._lock:
+                self.metrics[index].merge(local)
+                self._remaining[index] -= 1
+                last = self._remaining[index] == 0
+            # El último hilo de la etapa cierra la entrada de la siguiente
+            if last and downstream is not None:
+                for _ in range(self.stages[index + 1].workers):
+                    self._put(downstream, _END, force=True)
+
+    def _get(self, inbox: queue.Queue) -> Any:
+        while True:
+            try:
+                item = inbox.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _END
+                continue
+            # Tras un error se descarta lo pendiente hasta la marca de fin
+            if self._stop.is_set() and item is not _END:
+                continue
+            return item
+
+    def _put(self, outbox: queue.Queue, item: Any, force: bool = False) -> bool:
+        """Pone item esperando lugar; False si el pipeline se detuvo (salvo force)."""
+        while True:
+            if self._stop.is_set() and not force:
+                return False
+            try:
+                outbox.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                if self._stop.is_set() and force:
+                    # Nadie más consume: la etapa siguiente ya salió por el error
+                    return False
+
+    def _fail(self, error: BaseException) -> None:
+        with self._lock:
+            self._errors.append(error)
+        self._stop.set()
+
+
+def format_metrics(metrics: List[StageMetrics], wall_seconds: Optional[float] = None) -> str:
+    """Tabla de texto con las métricas de cada etapa."""
+    lines = []
+    if wall_seconds is not None:
+        lines.append(f"Tiempo total: {wall_seconds:.2f} s")
+    lines.append(
+        f"{'ETAPA':<10} | {'HILOS':>5} | {'ENTRAN':>7} | {'SALEN':>7} | {'ELEM/S':>10} | "
+        f"{'OCUPADO s':>9} | {'BLOQUEADO s':>11} | {'ESPERA s':>8} | {'COLA máx/media':>14}"
+    )
+    for m in metrics:
+        lines.append(
+            f"{m.name:<10} | {m.workers:>5} | {m.items_in:>7} | {m.items_out:>7} | {m.throughput:>10.1f} | "
+            f"{m.busy_seconds:>9.2f} | {m.blocked_seconds:>11.2f} | {m.starved_seconds:>8.2f} | "
+            f"{m.max_queue_depth:>6}/{m.mean_queue_depth:<7.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,387 @@
+"""
+Registros compactos de facturas y líneas.
+
+``InvoiceRecord`` y ``LineItem`` usan ``__slots__`` (sin ``__dict__`` por
+instancia), guardan los montos como ``Decimal`` y comparten por ``sys.intern``
+los textos que se repiten entre facturas (tipo, prefijo, moneda, fechas,
+partes, peajes, placas, descripciones). ``to_dict`` devuelve el diccionario
+que entregaba ``InvoiceProcessor.process_invoice``, con los montos formateados
+recién en ese momento.
+
+``VoucherRow`` es la fila de peajes del flujo de ``main/bussines``: se lee
+como el diccionario que devolvía ``extraer_datos_factura``.
+
+Cada monto se convierte una sola vez del texto del XML a ``Decimal`` y los
+cálculos (total de la línea) son exactos: no pasan por float.
+
+Este módulo no depende de lxml ni del resto de ``main``.
+"""
+import json
+import sys
+from collections.abc import Mapping
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional
+
+INVOICE = 'INVOICE'
+CREDIT_NOTE = 'CREDIT_NOTE'
+
+# Valor de un monto que falta o no es numérico
+DEFAULT_AMOUNT = '0'
+
+ZERO = Decimal(0)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
+
+
+def parse_amount(value: Optional[str]) -> Optional[Decimal]:
+    """Monto exacto del texto o None si está vacío, no es un número o no es finito."""
+    if not value:
+        return None
+    try:
+        amount = Decimal(value)
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+    return amount if amount.is_finite() else None
+
+
+def format_amount(num: Optional[Decimal], default: str = DEFAULT_AMOUNT, force_int: bool = False) -> str:
+    """
+    Formatea un monto con las reglas de ``InvoiceProcessor._clean_decimal``.
+
+    Hasta diez decimales sin ceros sobrantes y al menos un decimal; con
+    force_int los enteros se escriben sin punto. None devuelve default.
+    """
+    if num is None:
+        return default
+    if force_int and num == num.to_integral_value():
+        return str(int(num))
+    formatted = f"{num:.10f}"
+    if '.' in formatted:
+        formatted = formatted.rstrip('0').rstrip('.')
+    if '.' not in formatted:
+        formatted += '.0'
+    return formatted
+
+
+def format_exact_amount(num: Decimal) -> str:
+    """
+    Formatea un monto como ``limpiar_decimal`` de main/bussines: los enteros
+    sin punto ni decimales y el resto tal como lo trae el XML.
+    """
+    if num == num.to_integral_value():
+        return str(int(num))
+    return str(num)
+
+
+class AmountEncoder(json.JSONEncoder):
+    """
+    JSONEncoder que escribe los Decimal como texto exacto, sin pasar por float,
+    y cada LineItem como un objeto con sus campos.
+    """
+
+    def default(self, o: Any) -> Any:
+        if isinstance(o, Decimal):
+            return str(o)
+        if isinstance(o, LineItem):
+            return dict(zip(LineItem.__slots__, o.to_state()))
+        return super().default(o)
+
+
+def _state_amount(num: Optional[Decimal]) -> Optional[str]:
+    return None if num is None else str(num)
+
+
+def _amount_from_state(value: Optional[str]) -> Optional[Decimal]:
+    return None if value is None else Decimal(value)
+
+
+class LineItem:
+    """Línea de factura; quantity y price son None si el texto no era numérico."""
+
+    __slots__ = ('description', 'quantity', 'price', 'reference', 'line_total')
+
+    def __init__(self, description: str, quantity: Optional[Decimal], price: Optional[Decimal],
+                 reference: str, line_total: Decimal):
+        self.description = _intern(description)
+        self.quantity = quantity
+        self.price = price
+        self.reference = _intern(reference)
+        self.line_total = line_total
+
+    def to_dict(self) -> Dict[str, str]:
+        return {
+            'description': self.description,
+            'quantity': format_amount(self.quantity, force_int=True),
+            'price': format_amount(self.price),
+            'reference': self.reference,
+            'line_total': format_amount(self.line_total),
+        }
+
+    def to_state(self) -> List[Any]:
+        return [self.description, _state_amount(self.quantity), _state_amount(self.price),
+                self.reference, _state_amount(self.line_total)]
+
+    @classmethod
+    def from_state(cls, state: List[Any]) -> 'LineItem':
+        description, quantity, price, reference, line_total = state
+        return cls(description, _amount_from_state(quantity), _amount_from_state(price),
+                   reference, _amount_from_state(line_total))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LineItem):
+            return NotImplemented
+        return self.to_state() == other.to_state()
+
+    def __repr__(self) -> str:
+        return f"LineItem({self.description!r}, {self.quantity!r}, {self.price!r}, {self.reference!r}, {self.line_total!r})"
+
+
+class InvoiceRecord:
+    """
+    Factura o nota crédito extraída.
+
+    Los campos de una parte quedan en None si la factura no trae esa parte, y
+    related_invoice sólo aplica a notas crédito: ninguno de ellos aparece en
+    to_dict cuando no aplica, igual que en el diccionario original.
+    """
+
+    __slots__ = (
+        'invoice_type', 'invoice_id', 'invoice_prefix', 'invoice_number', 'issue_date',
+        'formatted_issue_date', 'currency', 'total_amount', 'items', 'toll_name', 'plate_number',
+        'related_invoice', 'supplier_name', 'supplier_tax_id', 'customer_name', 'customer_tax_id',
+        'xml_file', 'processing_timestamp',
+    )
+
+    def __init__(self, invoice_type: str, invoice_id: str, invoice_prefix: str, invoice_number: str,
+                 issue_date: str, formatted_issue_date: str, currency: str, total_amount: Optional[Decimal],
+                 related_invoice: Optional[str] = None):
+        self.invoice_type = _intern(invoice_type)
+        self.invoice_id = invoice_id
+        self.invoice_prefix = _intern(invoice_prefix)
+        self.invoice_number = invoice_number
+        self.issue_date = _intern(issue_date)
+        self.formatted_issue_date = _intern(formatted_issue_date)
+        self.currency = _intern(currency)
+        self.total_amount = total_amount
+        self.items: List[LineItem] = []
+        self.toll_name: Optional[str] = None
+        self.plate_number: Optional[str] = None
+        self.related_invoice = related_invoice
+        self.supplier_name: Optional[str] = None
+        self.supplier_tax_id: Optional[str] = None
+        self.customer_name: Optional[str] = None
+        self.customer_tax_id: Optional[str] = None
+        self.xml_file: Optional[str] = None
+        self.processing_timestamp: Optional[str] = None
+
+    @property
+    def is_credit_note(self) -> bool:
+        return self.invoice_type == CREDIT_NOTE
+
+    def set_party(self, role: str, name: str, tax_id: str) -> None:
+        """Guarda nombre y NIT de la parte ('supplier' o 'customer')."""
+        setattr(self, f'{role}_name', _intern(name))
+        setattr(self, f'{role}_tax_id', _intern(tax_id))
+
+    def set_toll(self, toll_name: Optional[str], plate_number: Optional[str]) -> None:
+        self.toll_name = _intern(toll_name)
+        self.plate_number = _intern(plate_number)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario con las mismas claves, orden y textos que process_invoice."""
+        data = {
+            'invoice_type': self.invoice_type,
+            'invoice_id': self.invoice_id,
+            'invoice_prefix': self.invoice_prefix,
+            'invoice_number': self.invoice_number,
+            'issue_date': self.issue_date,
+            'formatted_issue_date': self.formatted_issue_date,
+            'currency': self.currency,
+            'total_amount': format_amount(self.total_amount),
+            'items': [item.to_dict() for item in self.items],
+            'toll_name': self.toll_name,
+            'plate_number': self.plate_number,
+        }
+        if self.is_credit_note:
+            data['related_invoice'] = self.related_invoice
+        for role in ('supplier', 'customer'):
+            name = getattr(self, f'{role}_name')
+            if name is not None:
+                data[f'{role}_name'] = name
+                data[f'{role}_tax_id'] = getattr(self, f'{role}_tax_id')
+        if self.xml_file is not None:
+            data['xml_file'] = self.xml_file
+            data['processing_timestamp'] = self.processing_timestamp
+        return data
+
+    def to_state(self) -> List[Any]:
+        """Lista serializable a JSON con los campos extraídos (sin metadatos de la corrida)."""
+        return [
+            self.invoice_type, self.invoice_id, self.invoice_prefix, self.invoice_number,
+            self.issue_date, self.formatted_issue_date, self.currency, _state_amount(self.total_amount),
+            self.related_invoice, self.toll_name, self.plate_number,
+            self.supplier_name, self.supplier_tax_id, self.customer_name, self.customer_tax_id,
+            [item.to_state() for item in self.items],
+        ]
+
+    @classmethod
+    def from_state(cls, state: List[Any]) -> 'InvoiceRecord':
+        """Reconstruye el registro desde to_state()."""
+        (invoice_type, invoice_id, invoice_prefix, invoice_number, issue_date, formatted_issue_date,
+         currency, total_amount, related_invoice, toll_name, plate_number,
+         supplier_name, supplier_tax_id, customer_name, customer_tax_id, items) = state
+        record = cls(invoice_type, invoice_id, invoice_prefix, invoice_number, issue_date,
+                     formatted_issue_date, currency, _amount_from_state(total_amount), related_invoice)
+        record.set_toll(toll_name, plate_number)
+        if supplier_name is not None:
+            record.set_party('supplier', supplier_name, supplier_tax_id)
+        if customer_name is not None:
+            record.set_party('customer', customer_name, customer_tax_id)
+        record.items = [LineItem.from_state(item) for item in items]
+        return record
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, InvoiceRecord):
+            return NotImplemented
+        return (self.to_state(), self.xml_file) == (other.to_state(), other.xml_file)
+
+    def __repr__(self) -> str:
+        return f"InvoiceRecord({self.invoice_type!r}, {self.invoice_id!r}, items={len(self.items)})"
+
+
+# Llaves de la fila de peajes de main/bussines (extraer_datos_factura) y el
+# atributo de VoucherRow que guarda cada una, en el orden del dict original
+# (Items va en lines: items es un método de Mapping)
+VOUCHER_FIELDS = (
+    ('InvoiceType', 'invoice_type'),
+    ('FacturaID', 'invoice_id'),
+    ('FacturaCabecera', 'invoice_prefix'),
+    ('FacturaNumero', 'invoice_number'),
+    ('FechaEmision', 'issue_date'),
+    ('ValorTotal', 'total_amount'),
+    ('Moneda', 'currency'),
+    ('ProveedorNombre', 'supplier_name'),
+    ('ProveedorNIT', 'supplier_tax_id'),
+    ('ClienteNombre', 'customer_name'),
+    ('ClienteNIT', 'customer_tax_id'),
+    ('NombrePeaje', 'toll_name'),
+    ('NumeroPlaca', 'plate_number'),
+    ('Items', 'lines'),
+    ('FacturaRelacionada', 'related_invoice'),
+    ('xml', 'xml_file'),
+)
+VOUCHER_KEYS = tuple(key for key, _ in VOUCHER_FIELDS)
+_VOUCHER_ATTRIBUTES = dict(VOUCHER_FIELDS)
+
+
+def _line_state(line: Any) -> Any:
+    return line.to_state() if isinstance(line, LineItem) else line
+
+
+def _line_from_data(line: Any) -> Any:
+    # Estado (lista), objeto JSON del voucher o texto de un voucher anterior
+    if isinstance(line, list):
+        return LineItem.from_state(line)
+    if isinstance(line, dict):
+        return LineItem.from_state([line.get(field) for field in LineItem.__slots__])
+    return line
+
+
+class VoucherRow(Mapping):
+    """
+    Fila de peajes de ``main/bussines`` (la que arma ``extraer_datos_factura``).
+
+    Guarda los campos en ``__slots__`` y se lee como el diccionario original
+    (``fila["FacturaID"]``, ``get``, ``keys``), así que los escritores de la
+    plantilla la reciben sin cambios. ValorTotal es un ``Decimal``: los
+    escritores lo formatean con ``format_exact_amount``; Items es la lista de
+    ``LineItem`` (los vouchers anteriores traen textos). ``to_dict`` y
+    ``from_dict`` convierten desde y hacia ese diccionario; ``to_json`` y
+    ``from_json`` son el formato de los vouchers.
+    """
+
+    __slots__ = tuple(attribute for _, attribute in VOUCHER_FIELDS)
+
+    def __init__(self, invoice_type: str, invoice_id: str, invoice_prefix: str, invoice_number: str,
+                 issue_date: str, total_amount: Optional[Decimal], currency: Optional[str],
+                 supplier_name: Optional[str], supplier_tax_id: Optional[str],
+                 customer_name: Optional[str], customer_tax_id: Optional[str],
+                 toll_name: Optional[str], plate_number: Optional[str], lines: List[LineItem],
+                 related_invoice: str, xml_file: Optional[str] = None):
+        self.invoice_type = _intern(invoice_type)
+        self.invoice_id = invoice_id
+        self.invoice_prefix = _intern(invoice_prefix)
+        self.invoice_number = invoice_number
+        self.issue_date = _intern(issue_date)
+        self.total_amount = total_amount
+        self.currency = _intern(currency)
+        self.supplier_name = _intern(supplier_name)
+        self.supplier_tax_id = _intern(supplier_tax_id)
+        self.customer_name = _intern(customer_name)
+        self.customer_tax_id = _intern(customer_tax_id)
+        self.toll_name = _intern(toll_name)
+        self.plate_number = _intern(plate_number)
+        self.lines = lines
+        self.related_invoice = related_invoice
+        self.xml_file = xml_file
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            attribute = _VOUCHER_ATTRIBUTES[key]
+        except KeyError:
+            raise KeyError(key) from None
+        return getattr(self, attribute)
+
+    def __iter__(self):
+        return iter(VOUCHER_KEYS)
+
+    def __len__(self) -> int:
+        return len(VOUCHER_KEYS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario con las llaves y el orden de extraer_datos_factura."""
+        return {key: getattr(self, attribute) for key, attribute in VOUCHER_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'VoucherRow':
+        """
+        Fila desde el diccionario (p. ej. un voucher); las llaves que falten
+        quedan en None y un ValorTotal en texto se convierte a Decimal.
+        """
+        row = cls(*(data.get(key) for key in VOUCHER_KEYS))
+        row.lines = [_line_from_data(line) for line in row.lines or []]
+        if isinstance(row.total_amount, str):
+            row.total_amount = Decimal(row.total_amount)
+        return row
+
+    def to_json(self) -> str:
+        """Texto JSON del diccionario, con ValorTotal exacto."""
+        return json.dumps(self.to_dict(), cls=AmountEncoder, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> 'VoucherRow':
+        """Fila desde to_json(); ValueError si el texto no es un objeto JSON."""
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError("El voucher no es un objeto JSON")
+        return cls.from_dict(data)
+
+    def to_state(self) -> List[Any]:
+        """Lista serializable a JSON con los campos extraídos (sin la ruta del XML)."""
+        state = [getattr(self, attribute) for _, attribute in VOUCHER_FIELDS[:-1]]
+        state[VOUCHER_KEYS.index('ValorTotal')] = _state_amount(self.total_amount)
+        state[VOUCHER_KEYS.index('Items')] = [_line_state(line) for line in self.lines]
+        return state
+
+    @classmethod
+    def from_state(cls, state: List[Any], xml_file: Optional[str] = None) -> 'VoucherRow':
+        """Reconstruye la fila desde to_state()."""
+        row = cls(*state, xml_file=xml_file)
+        row.total_amount = _amount_from_state(row.total_amount)
+        row.lines = [_line_from_data(line) for line in row.lines]
+        return row
+
+    def __repr__(self) -> str:
+        return f"VoucherRow({self.invoice_type!r}, {self.invoice_id!r}, lines={len(self.lines)})"
@@ -0,0 +1,190 @@
+"""
+Manifiesto de las ejecuciones de extracción de un tenant-mes.
+
+Registra, como líneas JSON anexadas a un solo archivo, el estado de cada ZIP
+y de cada XML a medida que avanza la extracción:
+
+    ZIP  pending (leído, sus XML en proceso), written (todos sus XML tienen
+         voucher; el ZIP pasó a closedZip) o failed (no se pudo leer o algún
+         XML falló; el ZIP se queda para la próxima ejecución). Al pasar a
+         written se olvidan los XML suyos que no llegaron a written (ya no
+         están en el ZIP).
+    XML  pending (con el CRC de sus bytes), parsed (fila extraída), written
+         (voucher guardado) o failed (con el error)
+
+y un punto de control ``outputs`` cada vez que las salidas (libro y formatos
+columnares) quedan escritas. Al abrirlo se reproducen las líneas y gana el
+último estado de cada elemento, de modo que una ejecución posterior sabe qué
+XML ya tienen voucher (si el CRC no cambió no se vuelven a procesar) y qué facturas con voucher
+todavía no llegaron a las salidas (se reconstruyen desde los vouchers).
+
+Cada línea se escribe y se vacía al disco del sistema de inmediato; una
+línea a medio escribir al final (corte del proceso) se ignora y se recorta
+antes de seguir anexando. Varios hilos de una misma ejecución pueden marcar
+estados a la vez.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+PENDING = 'pending'
+PARSED = 'parsed'
+WRITTEN = 'written'
+FAILED = 'failed'
+STATES = (PENDING, PARSED, WRITTEN, FAILED)
+
+
+class RunManifest:
+    """
+    Estados de los ZIP y XML de un tenant-mes (ver el módulo).
+
+    Args:
+        path: Archivo JSONL del manifiesto; se crea (con su carpeta) al
+            registrar el primer estado.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.zips: Dict[str, str] = {}
+        self.xmls: Dict[Tuple[str, str], str] = {}
+        self.invoice_ids: Dict[Tuple[str, str], str] = {}
+        self.crcs: Dict[Tuple[str, str], int] = {}
+        self._zip_xmls: Dict[str, set] = {}
+        self.errors: Dict[Tuple[str, Optional[str]], str] = {}
+        self.runs = 0
+        # XML con voucher desde el último punto de control de las salidas
+        self._unpublished: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._valid_end = 0
+        self._load()
+
+    def xml_state(self, zip_name: str, xml_name: str) -> Optional[str]:
+        return self.xmls.get((zip_name, xml_name))
+
+    def xml_crc(self, zip_name: str, xml_name: str) -> Optional[int]:
+        return self.crcs.get((zip_name, xml_name))
+
+    def zip_state(self, zip_name: str) -> Optional[str]:
+        return self.zips.get(zip_name)
+
+    def start_run(self) -> int:
+        """Registra el inicio de una ejecución y devuelve su número."""
+        self._append({'run': self.runs + 1, 'started': datetime.now().isoformat()})
+        return self.runs
+
+    def mark_zip(self, zip_name: str, state: str, error: Optional[str] = None) -> None:
+        self._append(_record(state, error, zip=zip_name))
+
+    def mark_xml(self, zip_name: str, xml_name: str, state: str,
+                 invoice_id: Optional[str] = None, error: Optional[str] = None,
+                 crc: Optional[int] = None) -> None:
+        self._append(_record(state, error, zip=zip_name, xml=xml_name, invoice_id=invoice_id, crc=crc))
+
+    def unpublished_invoices(self) -> List[str]:
+        """IDs con voucher que aún no están en las salidas, en el orden en que se escribieron."""
+        with self._lock:
+            return list(dict.fromkeys(self._unpublished.values()))
+
+    def mark_outputs_written(self) -> None:
+        """Punto de control: todas las facturas con voucher ya están en las salidas."""
+        with self._lock:
+            count = len(self._unpublished)
+        self._append({'outputs': count, 'at': datetime.now().isoformat()})
+
+    def failures(self) -> List[Tuple[str, Optional[str], str]]:
+        """(zip, xml o None, error) de los elementos cuyo último estado es failed."""
+        with self._lock:
+            failed = [(zip_name, None) for zip_name, state in self.zips.items() if state == FAILED]
+            failed += [key for key, state in self.xmls.items() if state == FAILED]
+            return [(zip_name, xml_name, self.errors.get((zip_name, xml_name), '')) for zip_name, xml_name in failed]
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Cantidad de ZIP y de XML por estado."""
+        with self._lock:
+            return {
+                'zips': {state: sum(1 for s in self.zips.values() if s == state) for state in STATES},
+                'xmls': {state: sum(1 for s in self.xmls.values() if s == state) for state in STATES},
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> 'RunManifest':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._apply(entry)
+                self._valid_end += len(line)
+
+    def _apply(self, entry: dict) -> None:
+        if 'run' in entry:
+            self.runs = max(self.runs, entry['run'])
+        elif 'outputs' in entry:
+            self._unpublished.clear()
+        elif 'xml' in entry:
+            key = (entry['zip'], entry['xml'])
+            self.xmls[key] = entry['state']
+            self._zip_xmls.setdefault(entry['zip'], set()).add(entry['xml'])
+            if entry.get('invoice_id'):
+                self.invoice_ids[key] = entry['invoice_id']
+            if 'crc' in entry:
+                self.crcs[key] = entry['crc']
+            if entry['state'] == FAILED:
+                self.errors[key] = entry.get('error', '')
+            elif entry['state'] == WRITTEN:
+                self._unpublished[key] = self.invoice_ids[key]
+        else:
+            self.zips[entry['zip']] = entry['state']
+            if entry['state'] == FAILED:
+                self.errors[(entry['zip'], None)] = entry.get('error', '')
+            elif entry['state'] == WRITTEN:
+                xmls = self._zip_xmls.get(entry['zip'], set())
+                for xml in [xml for xml in xmls if self.xmls[(entry['zip'], xml)] != WRITTEN]:
+                    del self.xmls[(entry['zip'], xml)]
+                    xmls.discard(xml)
+
+    def _append(self, entry: dict) -> None:
+        if 'state' in entry and entry['state'] not in STATES:
+            raise ValueError(f"Estado desconocido: {entry['state']}")
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            if self._file is None:
+                self._open_for_append()
+            self._file.write(line)
+            self._file.flush()
+            self._apply(entry)
+
+    def _open_for_append(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Recorta una línea final a medio escribir antes de anexar
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self._valid_end:
+            with open(self.path, 'r+b') as f:
+                f.truncate(self._valid_end)
+        self._file = open(self.path, 'ab')
+
+
+def _record(state: str, error: Optional[str], **fields) -> dict:
+    entry = {key: value for key, value in fields.items() if value is not None}
+    entry['state'] = state
+    if error is not None:
+        entry['error'] = error
+    return entry
@@ -0,0 +1,181 @@
+"""
+Extractor de campos UBL en una sola pasada.
+
+Recorre una vez el árbol de la factura embebida (``iter`` filtrado por etiqueta,
+en orden de documento) y, según la etiqueta y sus ancestros, resuelve todas
+las rutas que usa ``InvoiceProcessor`` con la misma semántica de "primer
+elemento" que las XPath de ``process.xpaths``.
+"""
+from typing import Dict, List, Optional
+
+from lxml import etree
+
+from . import xpaths
+from .xpaths import XML_NAMESPACES
+
+CBC = '{%s}' % XML_NAMESPACES['cbc']
+CAC = '{%s}' % XML_NAMESPACES['cac']
+
+TAG_ID = CBC + 'ID'
+TAG_ISSUE_DATE = CBC + 'IssueDate'
+TAG_CURRENCY = CBC + 'DocumentCurrencyCode'
+TAG_PAYABLE_AMOUNT = CBC + 'PayableAmount'
+TAG_REFERENCE_ID = CBC + 'ReferenceID'
+TAG_REGISTRATION_NAME = CBC + 'RegistrationName'
+TAG_COMPANY_ID = CBC + 'CompanyID'
+TAG_DESCRIPTION = CBC + 'Description'
+TAG_INVOICED_QUANTITY = CBC + 'InvoicedQuantity'
+TAG_PRICE_AMOUNT = CBC + 'PriceAmount'
+TAG_LEGAL_MONETARY_TOTAL = CAC + 'LegalMonetaryTotal'
+TAG_BILLING_REFERENCE = CAC + 'BillingReference'
+TAG_INVOICE_DOCUMENT_REFERENCE = CAC + 'InvoiceDocumentReference'
+TAG_SUPPLIER_PARTY = CAC + 'AccountingSupplierParty'
+TAG_CUSTOMER_PARTY = CAC + 'AccountingCustomerParty'
+TAG_PARTY = CAC + 'Party'
+TAG_SELLERS_ITEM_IDENTIFICATION = CAC + 'SellersItemIdentification'
+TAG_INVOICE_LINE = CAC + 'InvoiceLine'
+TAG_CREDIT_NOTE_LINE = CAC + 'CreditNoteLine'
+
+# Etiquetas que interesan
+WALK_TAGS = (
+    TAG_ID, TAG_ISSUE_DATE, TAG_CURRENCY, TAG_PAYABLE_AMOUNT, TAG_REFERENCE_ID,
+    TAG_SUPPLIER_PARTY, TAG_CUSTOMER_PARTY, TAG_REGISTRATION_NAME, TAG_COMPANY_ID,
+    TAG_INVOICE_LINE, TAG_CREDIT_NOTE_LINE, TAG_DESCRIPTION, TAG_INVOICED_QUANTITY,
+    TAG_PRICE_AMOUNT,
+)
+
+# Campos de una parte (nombre de la ruta en el registro -> etiqueta)
+PARTY_FIELDS = {
+    TAG_REGISTRATION_NAME: xpaths.PARTY_REGISTRATION_NAME.name,
+    TAG_COMPANY_ID: xpaths.PARTY_COMPANY_ID.name,
+}
+
+
+class InvoiceFields:
+    """
+    Primer elemento de cada ruta del procesador, resuelto en una sola pasada.
+
+    ``root`` guarda las rutas relativas a la factura, ``supplier`` y
+    ``customer`` las relativas a cada parte (None si la parte no existe) y
+    ``lines`` las de cada línea, en orden de documento.
+    """
+
+    __slots__ = ('root', 'supplier', 'customer', 'lines')
+
+    def __init__(self):
+        self.root: Dict[str, etree._Element] = {}
+        self.supplier: Optional[Dict[str, etree._Element]] = None
+        self.customer: Optional[Dict[str, etree._Element]] = None
+        self.lines: List[Dict[str, etree._Element]] = []
+
+    @staticmethod
+    def text(fields: Dict[str, etree._Element], path: xpaths.CompiledPath, default: str = '') -> str:
+        """Mismo resultado que ``CompiledPath.text`` sobre el nodo de contexto."""
+        elem = fields.get(path.name)
+        if elem is not None and elem.text:
+            return elem.text.strip()
+        return default
+
+
+def extract_invoice_fields(invoice_root: etree._Element, is_credit_note: bool) -> InvoiceFields:
+    """
+    Recorre la factura una vez y devuelve el primer elemento de cada ruta.
+
+    Args:
+        invoice_root: Elemento raíz de la factura o nota crédito.
+        is_credit_note: Define si las líneas son CreditNoteLine o InvoiceLine.
+    """
+    fields = InvoiceFields()
+    root_fields = fields.root
+    line_tag = TAG_CREDIT_NOTE_LINE if is_credit_note else TAG_INVOICE_LINE
+    supplier_node = customer_node = None
+    lines_by_node: Dict[etree._Element, Dict[str, etree._Element]] = {}
+
+    def first(target, name, elem):
+        if name not in target:
+            target[name] = elem
+
+    def enclosing_lines(elem):
+        # Líneas ancestro del elemento (puede haber líneas anidadas)
+        if not lines_by_node:
+            return ()
+        found = []
+        node = elem.getparent()
+        while node is not None and node is not invoice_root:
+            line = lines_by_node.get(node)
+            if line is not None:
+                found.append(line)
+            node = node.getparent()
+        return found
+
+    for elem in invoice_root.iter(*WALK_TAGS):
+        tag = elem.tag
+        parent = elem.getparent()
+
+        if tag == TAG_ID:
+            if parent is invoice_root:
+                first(root_fields, xpaths.INVOICE_ID.name, elem)
+            elif parent.tag == TAG_INVOICE_DOCUMENT_REFERENCE:
+                grandparent = parent.getparent()
+                if grandparent.tag == TAG_BILLING_REFERENCE and grandparent.getparent() is invoice_root:
+                    first(root_fields, xpaths.BILLING_REFERENCE_ID.name, elem)
+            elif parent.tag == TAG_SELLERS_ITEM_IDENTIFICATION:
+                for line in enclosing_lines(parent):
+                    first(line, xpaths.ITEM_REFERENCE.name, elem)
+
+        elif tag == TAG_DESCRIPTION or tag == TAG_PRICE_AMOUNT:
+            name = xpaths.ITEM_DESCRIPTION.name if tag == TAG_DESCRIPTION else xpaths.ITEM_PRICE.name
+            for line in enclosing_lines(elem):
+                first(line, name, elem)
+
+        elif tag == TAG_INVOICED_QUANTITY:
+            line = lines_by_node.get(parent)
+            if line is not None:
+                first(line, xpaths.ITEM_QUANTITY.name, elem)
+
+        elif tag == line_tag:
+            line = {}
+            lines_by_node[elem] = line
+            fields.lines.append(line)
+
+        elif tag == TAG_REGISTRATION_NAME or tag == TAG_COMPANY_ID:
+            # .//cac:Party//cbc:X desde la parte: una cac:Party entre el campo y la parte
+            saw_party = False
+            node = parent
+            while node is not None:
+                if node is supplier_node and saw_party:
+                    first(fields.supplier, PARTY_FIELDS[tag], elem)
+                elif node is customer_node and saw_party:
+                    first(fields.customer, PARTY_FIELDS[tag], elem)
+                if node.tag == TAG_PARTY:
+                    saw_party = True
+                node = node.getparent()
+
+        elif tag == TAG_SUPPLIER_PARTY:
+            if supplier_node is None:
+                supplier_node = elem
+                fields.supplier = {}
+
+        elif tag == TAG_CUSTOMER_PARTY:
+            if customer_node is None:
+                customer_node = elem
+                fields.customer = {}
+
+        elif tag == TAG_ISSUE_DATE:
+            if parent is invoice_root:
+                first(root_fields, xpaths.ISSUE_DATE.name, elem)
+
+        elif tag == TAG_CURRENCY:
+            if parent is invoice_root:
+                first(root_fields, xpaths.CURRENCY.name, elem)
+
+        elif tag == TAG_PAYABLE_AMOUNT:
+            if parent.tag == TAG_LEGAL_MONETARY_TOTAL and parent.getparent() is invoice_root:
+                first(root_fields, xpaths.PAYABLE_AMOUNT.name, elem)
+
+        elif tag == TAG_REFERENCE_ID:
+            first(root_fields, xpaths.DESCENDANT_REFERENCE_ID.name, elem)
+            if parent is invoice_root:
+                first(root_fields, xpaths.REFERENCE_ID.name, elem)
+
+    return fields
@@ -0,0 +1,204 @@
+"""
+Extracción del peaje y la placa de la descripción de una línea, en tiempo lineal.
+
+Las descripciones de peajes tienen la forma ``"Ingresos para terceros: Paso
+ROBLE SPX932 10189"``: texto sin dígitos, la placa y un número. Las
+expresiones regulares que se usaban para leerlas (``LAZY_TOLL_PATTERN`` en
+``InvoiceProcessor`` y ``GREEDY_TOLL_PATTERN`` en ``tcProcesFacturacion``)
+retroceden en forma cuadrática o peor con descripciones largas sin dígitos
+(p. ej. muchos espacios seguidos). ``scan_toll`` da el mismo resultado que
+``search`` con cada una, pero recorre cada carácter un número acotado de veces.
+
+``TollExtractor`` suma una memoria por descripción (las mismas descripciones
+se repiten miles de veces en el mes, salvo el código de la transacción del
+final) y un índice por NIT del proveedor con los peajes ya vistos. Una misma
+instancia se puede compartir entre hilos (los del pipeline del mes usan la de
+``tcProcesFacturacion``): la memoria, el índice y los contadores se
+actualizan con un lock.
+
+Este módulo no depende de lxml ni del resto de ``main``.
+"""
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Expresiones de referencia: scan_toll reproduce su resultado (ver las pruebas)
+LAZY_TOLL_PATTERN = re.compile(r'(?P<peaje>\D+?)\s+(?P<placa>[A-Za-z0-9]+)\s+\d+')
+GREEDY_TOLL_PATTERN = re.compile(r'(\D+)\s([A-Za-z0-9]+)\s\d+')
+TOLL_NAME_PATTERN = re.compile(r'\s([A-Za-z]+)$')
+
+# Corridas que recorre el escáner; ninguna retrocede
+_SPACE_RUN = re.compile(r'\s+')
+_ALNUM_RUN = re.compile(r'[A-Za-z0-9]*')
+_LETTER_RUN_AT_END = re.compile(r'[A-Za-z]+\Z')
+_DIGIT = re.compile(r'\d')
+
+# Descripciones distintas que recuerda cada TollExtractor antes de vaciar la memoria
+DEFAULT_MEMO_SIZE = 65536
+
+# Marca de "no está en la memoria" (None es un resultado válido)
+_MISSING = object()
+
+
+class TollMatch(NamedTuple):
+    """Peaje de una descripción: el texto antes de la placa, su última palabra y la placa."""
+    segment: str
+    name: Optional[str]
+    plate: str
+
+
+def _plate_after(text: str, plate_start: int, single_space: bool) -> Optional[str]:
+    """Placa que empieza en plate_start si la siguen espacio(s) y un dígito; si no, None."""
+    plate_end = _ALNUM_RUN.match(text, plate_start).end()
+    if plate_end == plate_start or plate_end >= len(text) or not text[plate_end].isspace():
+        return None
+    digit = plate_end + 1 if single_space else _SPACE_RUN.match(text, plate_end).end()
+    if digit >= len(text) or not text[digit].isdecimal():
+        return None
+    return text[plate_start:plate_end]
+
+
+def memo_key(text: str) -> Tuple[str, Optional[bool]]:
+    """
+    Llave de la memoria: el texto sin su última palabra y si esa palabra empieza
+    con un dígito. scan_toll sólo lee el primer carácter de la última palabra
+    (una placa necesita un espacio después), así que el resultado es el mismo
+    para todas las descripciones con la misma llave, p. ej. ``"Paso ROBLE
+    SPX932 10189_5811..."`` con distinto código de transacción.
+    """
+    if not text or text[-1].isspace():
+        return text, None
+    parts = text.rsplit(None, 1)
+    if len(parts) == 1:
+        return text, None
+    last = parts[1]
+    return text[:len(text) - len(last)], last[0].isdecimal()
+
+
+def _non_digit_run_start(text: str, end: int) -> int:
+    # Inicio de la corrida sin dígitos que termina en text[end - 1]
+    start = end
+    while start > 0 and not text[start - 1].isdecimal():
+        start -= 1
+    return start
+
+
+def toll_name(segment: str) -> Optional[str]:
+    """
+    Última palabra (letras ASCII) del texto recortado si la precede un
+    espacio, como ``TOLL_NAME_PATTERN``; si no, None.
+    """
+    segment = segment.strip()
+    match = _LETTER_RUN_AT_END.search(segment)
+    if match is None or match.start() == 0 or not segment[match.start() - 1].isspace():
+        return None
+    return match.group()
+
+
+def scan_toll(text: str, greedy: bool = False) -> Optional[Tuple[str, str]]:
+    """
+    (texto del peaje, placa) como los grupos de ``LAZY_TOLL_PATTERN.search``
+    (o, con greedy, de ``GREEDY_TOLL_PATTERN.search``), en tiempo lineal.
+    None si no hay coincidencia.
+
+    La placa es una corrida completa de letras y dígitos ASCII entre espacios
+    y seguida de un dígito, así que el peaje sólo puede terminar en una
+    corrida de espacios: en la primera posible (lazy) o en la última antes
+    del siguiente dígito (greedy). Cada corrida se revisa una vez.
+    """
+    found: Optional[Tuple[int, str]] = None
+    start = 0
+    limit = len(text)
+    for space in _SPACE_RUN.finditer(text):
+        run_start, run_end = space.span()
+        if run_start >= limit:
+            break
+        if greedy:
+            # Un solo \s antes de la placa: el peaje termina en el último espacio
+            cut = run_end - 1
+            plate = _plate_after(text, run_end, single_space=True)
+            valid = cut > 0 and not text[cut - 1].isdecimal()
+        else:
+            # \s+ antes de la placa: el peaje termina en el primer corte no vacío
+            # y sin dígito al final (el inicio de la corrida o el espacio siguiente)
+            cut = run_start
+            plate = _plate_after(text, run_end, single_space=False)
+            if cut == 0 or text[cut - 1].isdecimal():
+                cut += 1
+            valid = cut < run_end
+        if plate is None or not valid:
+            continue
+        if found is None:
+            start = _non_digit_run_start(text, cut)
+            if not greedy:
+                return text[start:cut], plate
+            # El peaje (\D+) no puede pasar del siguiente dígito
+            digit = _DIGIT.search(text, cut)
+            limit = digit.start() if digit else len(text)
+        found = (cut, plate)
+    if found is None:
+        return None
+    cut, plate = found
+    return text[start:cut], plate
+
+
+class TollExtractor:
+    """
+    scan_toll con memoria por descripción y un índice de peajes por proveedor.
+
+    La memoria ignora la última palabra de la descripción (ver memo_key).
+    ``known_tolls(nit)`` devuelve los nombres de peaje vistos para ese NIT;
+    el índice (NIT -> texto del peaje -> nombre) también evita repetir el
+    paso del nombre cuando otra descripción trae el mismo texto de peaje.
+    """
+
+    def __init__(self, greedy: bool = False, memo_size: int = DEFAULT_MEMO_SIZE):
+        self.greedy = greedy
+        self.memo_size = memo_size
+        self._memo: Dict[Tuple[str, Optional[bool]], Optional[TollMatch]] = {}
+        self._index: Dict[str, Dict[str, Optional[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def extract(self, description: str, supplier_tax_id: Optional[str] = None) -> Optional[TollMatch]:
+        """Peaje y placa de la descripción (ver scan_toll); None si no los trae."""
+        key = memo_key(description)
+        with self._lock:
+            found = self._memo.get(key, _MISSING)
+            if found is not _MISSING:
+                self.hits += 1
+                if found is not None and supplier_tax_id is not None:
+                    self._index.setdefault(supplier_tax_id, {}).setdefault(found.segment, found.name)
+                return found
+            self.misses += 1
+        # El escaneo no toca el estado compartido: otro hilo puede usar la memoria mientras tanto
+        scanned = scan_toll(description, self.greedy)
+        with self._lock:
+            found = self._resolve(scanned, supplier_tax_id)
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[key] = found
+        return found
+
+    def _resolve(self, scanned: Optional[Tuple[str, str]], supplier_tax_id: Optional[str]) -> Optional[TollMatch]:
+        if scanned is None:
+            return None
+        segment, plate = scanned
+        tolls = self._index.setdefault(supplier_tax_id, {}) if supplier_tax_id is not None else {}
+        try:
+            name = tolls[segment]
+        except KeyError:
+            name = tolls[segment] = toll_name(segment)
+        return TollMatch(segment, name, plate)
+
+    def known_tolls(self, supplier_tax_id: str) -> List[str]:
+        """Nombres de peaje vistos para el proveedor, ordenados."""
+        with self._lock:
+            return sorted({name for name in self._index.get(supplier_tax_id, {}).values() if name})
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+            self._index.clear()
+            self.hits = self.misses = 0
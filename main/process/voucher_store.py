@@ -0,0 +1,256 @@
+"""
+Almacén de vouchers de un tenant-mes en archivos JSONL segmentados.
+
+En vez de un ``<FacturaID>.txt`` por factura, cada voucher se anexa como una
+línea ``<id JSON>\\t<voucher JSON>`` al segmento actual
+(``vouchers-00000.jsonl``, ``vouchers-00001.jsonl``...; se abre uno nuevo al
+superar ``segment_bytes``). ``vouchers.idx`` guarda, también por anexado, una
+línea ``[id, segmento, offset, largo]`` por voucher: al abrir el almacén se
+carga en un dict y ``get`` lee directamente esos bytes. Si una factura se
+vuelve a guardar, gana la última versión; ``replay`` recorre los segmentos en
+orden y entrega sólo esa.
+
+Cada anexado escribe primero el segmento y luego el índice. Si el proceso se
+corta entre las dos escrituras, al abrir se indexan las líneas del segmento
+que el índice no tiene; una línea a medio escribir (sin salto de línea al
+final) se ignora, y se recorta del archivo antes del siguiente anexado.
+
+Un solo escritor por carpeta (el flujo del mes escribe los vouchers desde un
+único hilo); los lectores pueden abrir la misma carpeta.
+"""
+import json
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+SEGMENT_PATTERN = re.compile(r'^vouchers-(\d{5})\.jsonl$')
+INDEX_FILE = 'vouchers.idx'
+
+# Tamaño a partir del cual se abre un segmento nuevo
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+# (segmento, offset, largo) de la línea de un voucher
+Location = Tuple[int, int, int]
+
+
+class VoucherStore:
+    """
+    Vouchers de una carpeta (``voucher/<mes>/``) por ID de factura.
+
+    Args:
+        directory: Carpeta del almacén; se crea al guardar el primer voucher.
+        segment_bytes: Tamaño máximo de cada segmento.
+    """
+
+    def __init__(self, directory, segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        if segment_bytes < 1:
+            raise ValueError(f"segment_bytes debe ser positivo: {segment_bytes}")
+        self.directory = str(directory)
+        self.segment_bytes = segment_bytes
+        self._index: Dict[str, Location] = {}
+        self._segment = None
+        self._segment_number = 0
+        self._segment_size = 0
+        self._index_file = None
+        self._load()
+
+    @staticmethod
+    def segment_name(segment: int) -> str:
+        return f"vouchers-{segment:05d}.jsonl"
+
+    def segments(self) -> List[int]:
+        """Números de los segmentos de la carpeta, en orden."""
+        if not os.path.isdir(self.directory):
+            return []
+        numbers = (SEGMENT_PATTERN.match(name) for name in os.listdir(self.directory))
+        return sorted(int(match.group(1)) for match in numbers if match)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def keys(self) -> List[str]:
+        """IDs guardados, en el orden en que se guardó cada uno por primera vez."""
+        return list(self._index)
+
+    def append(self, key: str, text: str) -> None:
+        """
+        Guarda el voucher (texto JSON de una sola línea) con su ID; si el ID
+        ya estaba, esta versión reemplaza a la anterior.
+        """
+        if '\n' in text or '\r' in text:
+            raise ValueError(f"El voucher {key} debe ser JSON de una sola línea")
+        line = (json.dumps(key, ensure_ascii=False) + '\t' + text + '\n').encode('utf-8')
+        self._open_for_append()
+        if self._segment_size and self._segment_size + len(line) > self.segment_bytes:
+            self._rotate()
+        offset = self._segment_size
+        self._segment.write(line)
+        self._segment.flush()
+        self._segment_size += len(line)
+        location = (self._segment_number, offset, len(line))
+        self._write_index(key, location)
+        self._index[key] = location
+
+    def get(self, key: str) -> Optional[str]:
+        """Texto del voucher del ID (última versión) o None si no está."""
+        location = self._index.get(key)
+        if location is None:
+            return None
+        segment, offset, length = location
+        with open(self._path(self.segment_name(segment)), 'rb') as f:
+            f.seek(offset)
+            return _record_text(f.read(length))
+
+    def replay(self) -> Iterator[Tuple[str, str]]:
+        """(id, texto) de cada voucher en orden de los segmentos, sólo la última versión."""
+        self._flush()
+        for segment in self.segments():
+            offset = 0
+            with open(self._path(self.segment_name(segment)), 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    key = _record_key(line)
+                    if self._index.get(key) == (segment, offset, len(line)):
+                        yield key, _record_text(line)
+                    offset += len(line)
+
+    def export(self, directory, keys: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Escribe ``<id>.txt`` con el texto de cada voucher (todos o los de
+        keys), como los guardaba el flujo anterior.
+
+        Returns:
+            Rutas escritas.
+
+        Raises:
+            KeyError: Si se pide un ID que no está.
+        """
+        os.makedirs(directory, exist_ok=True)
+        if keys is None:
+            items = self.replay()
+        else:
+            keys = list(keys)
+            missing = [key for key in keys if key not in self._index]
+            if missing:
+                raise KeyError(f"Vouchers inexistentes: {', '.join(missing)}")
+            items = ((key, self.get(key)) for key in keys)
+        paths = []
+        for key, text in items:
+            path = os.path.join(str(directory), f"{key}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            paths.append(path)
+        return paths
+
+    def close(self) -> None:
+        for f in (self._segment, self._index_file):
+            if f is not None:
+                f.close()
+        self._segment = self._index_file = None
+
+    def __enter__(self) -> 'VoucherStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self) -> None:
+        """Carga el índice y las líneas que le faltan, sin modificar los archivos."""
+        sizes = {segment: os.path.getsize(self._path(self.segment_name(segment))) for segment in self.segments()}
+        indexed_end = dict.fromkeys(sizes, 0)
+        self._index_end = 0
+        index_path = self._path(INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        key, segment, offset, length = json.loads(line)
+                    except (ValueError, TypeError):
+                        break
+                    self._index_end += len(line)
+                    if segment in sizes and offset + length <= sizes[segment]:
+                        self._index[key] = (segment, offset, length)
+                        indexed_end[segment] = max(indexed_end[segment], offset + length)
+
+        # Líneas escritas en el segmento pero no en el índice
+        self._unindexed: List[Tuple[str, Location]] = []
+        self._complete_end: Dict[int, int] = {}
+        for segment in sizes:
+            found, self._complete_end[segment] = self._scan(segment, indexed_end[segment])
+            self._unindexed.extend(found)
+        self._index.update(self._unindexed)
+
+    def _scan(self, segment: int, start: int) -> Tuple[List[Tuple[str, Location]], int]:
+        """Líneas completas del segmento desde start y dónde termina la última."""
+        found = []
+        offset = start
+        with open(self._path(self.segment_name(segment)), 'rb') as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                found.append((_record_key(line), (segment, offset, len(line))))
+                offset += len(line)
+        return found, offset
+
+    def _open_for_append(self) -> None:
+        if self._segment is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Antes de escribir se reparan los cortes que encontró _load
+        index_path = self._path(INDEX_FILE)
+        if os.path.exists(index_path):
+            _truncate(index_path, self._index_end)
+        for segment, end in self._complete_end.items():
+            _truncate(self._path(self.segment_name(segment)), end)
+        for key, location in self._unindexed:
+            self._write_index(key, location)
+        self._unindexed = []
+
+        segments = self.segments()
+        self._segment_number = segments[-1] if segments else 0
+        path = self._path(self.segment_name(self._segment_number))
+        self._segment = open(path, 'ab')
+        self._segment_size = self._segment.tell()
+
+    def _rotate(self) -> None:
+        self._segment.close()
+        self._segment_number += 1
+        self._segment = open(self._path(self.segment_name(self._segment_number)), 'ab')
+        self._segment_size = 0
+
+    def _write_index(self, key: str, location: Location) -> None:
+        if self._index_file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._index_file = open(self._path(INDEX_FILE), 'ab')
+        self._index_file.write((json.dumps([key, *location], ensure_ascii=False) + '\n').encode('utf-8'))
+        self._index_file.flush()
+
+    def _flush(self) -> None:
+        for f in (self._segment, self._index_file):
+            if f is not None:
+                f.flush()
+
+
+def _record_key(line: bytes) -> str:
+    return json.loads(line[:line.index(b'\t')])
+
+
+def _record_text(line: bytes) -> str:
+    return line[line.index(b'\t') + 1:].rstrip(b'\n').decode('utf-8')
+
+
+def _truncate(path: str, size: int) -> None:
+    """Corta el archivo en size si quedó una línea a medio escribir."""
+    if os.path.getsize(path) > size:
+        with open(path, 'r+b') as f:
+            f.truncate(size)
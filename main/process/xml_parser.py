@@ -0,0 +1,49 @@
+"""
+Parsers lxml ajustados y reutilizables para las facturas.
+
+Cada hilo (y cada proceso del pool) obtiene sus propias instancias de
+``etree.XMLParser``, creadas una sola vez por combinación de opciones. Las
+opciones son las de documentos confiables pero grandes: sin espacios
+ignorables, sin resolver entidades externas, sin red y sin índice de
+atributos xml:id.
+"""
+import os
+import threading
+from typing import Any, Dict
+
+from lxml import etree
+
+# Opciones comunes a XMLParser e iterparse
+PARSER_OPTIONS: Dict[str, Any] = {
+    'remove_blank_text': True,
+    'resolve_entities': False,
+    'no_network': True,
+}
+
+_local = threading.local()
+
+
+def parser_options(huge_tree: bool = False, collect_ids: bool = False) -> Dict[str, Any]:
+    """
+    Opciones del parser, también válidas para ``etree.iterparse``.
+
+    Args:
+        huge_tree: Quita los límites de libxml2 (nodos de texto de más de
+            10 MB, anidamiento profundo); para sobres con adjuntos grandes.
+        collect_ids: Indexar los atributos xml:id (no se usan en la extracción).
+    """
+    return dict(PARSER_OPTIONS, huge_tree=huge_tree, collect_ids=collect_ids)
+
+
+def get_parser(huge_tree: bool = False, collect_ids: bool = False) -> etree.XMLParser:
+    """Parser del hilo actual para esas opciones; se crea la primera vez."""
+    parsers = getattr(_local, 'parsers', None)
+    # Un proceso hijo creado con fork hereda el diccionario: se rehace en el hijo
+    if parsers is None or _local.pid != os.getpid():
+        parsers = _local.parsers = {}
+        _local.pid = os.getpid()
+    key = (huge_tree, collect_ids)
+    parser = parsers.get(key)
+    if parser is None:
+        parser = parsers[key] = etree.XMLParser(**parser_options(huge_tree, collect_ids))
+    return parser
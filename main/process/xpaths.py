@@ -0,0 +1,111 @@
+"""
+Registro de expresiones XPath precompiladas para las facturas UBL.
+
+Cada ruta que usa el procesador se compila una sola vez al importar el módulo
+(etree.XPath) y se expone con accesores tipados: el primer elemento, todos los
+elementos o el texto limpio del primer elemento.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from lxml import etree
+
+# Espacios de nombres XML
+XML_NAMESPACES = {
+    'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
+    'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
+    'ext': 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2',
+    'ds': 'http://www.w3.org/2000/09/xmldsig#',
+    'xsi': 'http://www.w3.org/2001/XMLSchema-instance'
+}
+
+
+class CompiledPath:
+    """Ruta XPath compilada una vez con accesores tipados."""
+
+    __slots__ = ('name', 'path', '_all', '_first')
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self._all = etree.XPath(path, namespaces=XML_NAMESPACES)
+        # libxml2 corta la búsqueda en la primera coincidencia con el predicado [1]
+        self._first = etree.XPath(f'({path})[1]', namespaces=XML_NAMESPACES)
+
+    def element(self, node: etree._Element) -> Optional[etree._Element]:
+        """Primer elemento (en orden de documento) o None."""
+        result = self._first(node)
+        return result[0] if result else None
+
+    def elements(self, node: etree._Element) -> List[etree._Element]:
+        """Todos los elementos en orden de documento."""
+        return self._all(node)
+
+    def text(self, node: etree._Element, default: str = '') -> str:
+        """Texto sin espacios del primer elemento o el valor por defecto."""
+        result = self._first(node)
+        if result:
+            text = result[0].text
+            if text:
+                return text.strip()
+        return default
+
+    def __repr__(self) -> str:
+        return f"CompiledPath({self.name!r}, {self.path!r})"
+
+
+# Registro nombre -> ruta compilada
+XPATHS: Dict[str, CompiledPath] = {}
+
+# Rutas sueltas (no registradas) que se guardan compiladas
+AD_HOC_CACHE_SIZE = 128
+
+
+def register(name: str, path: str) -> CompiledPath:
+    """Compila y registra una ruta; devuelve la ruta compilada."""
+    compiled = CompiledPath(name, path)
+    XPATHS[name] = compiled
+    return compiled
+
+
+def compiled_path(path: str) -> CompiledPath:
+    """
+    Devuelve la ruta registrada con ese nombre o, para una expresión suelta, la
+    ruta compilada en una caché acotada (no se agrega a XPATHS).
+    """
+    compiled = XPATHS.get(path)
+    if compiled is None:
+        compiled = _compile_ad_hoc(path)
+    return compiled
+
+
+@lru_cache(maxsize=AD_HOC_CACHE_SIZE)
+def _compile_ad_hoc(path: str) -> CompiledPath:
+    return CompiledPath(path, path)
+
+
+# Documento contenedor (AttachedDocument)
+EMBEDDED_DESCRIPTION = register('embedded_description', './/cac:Attachment/cac:ExternalReference/cbc:Description')
+
+# Encabezado de la factura o nota crédito
+INVOICE_ID = register('invoice_id', 'cbc:ID')
+ISSUE_DATE = register('issue_date', 'cbc:IssueDate')
+CURRENCY = register('currency', 'cbc:DocumentCurrencyCode')
+PAYABLE_AMOUNT = register('payable_amount', 'cac:LegalMonetaryTotal/cbc:PayableAmount')
+BILLING_REFERENCE_ID = register('billing_reference_id', 'cac:BillingReference/cac:InvoiceDocumentReference/cbc:ID')
+REFERENCE_ID = register('reference_id', 'cbc:ReferenceID')
+DESCENDANT_REFERENCE_ID = register('descendant_reference_id', './/cbc:ReferenceID')
+
+# Partes
+SUPPLIER_PARTY = register('supplier_party', './/cac:AccountingSupplierParty')
+CUSTOMER_PARTY = register('customer_party', './/cac:AccountingCustomerParty')
+PARTY_REGISTRATION_NAME = register('party_registration_name', './/cac:Party//cbc:RegistrationName')
+PARTY_COMPANY_ID = register('party_company_id', './/cac:Party//cbc:CompanyID')
+
+# Líneas
+INVOICE_LINES = register('invoice_lines', './/cac:InvoiceLine')
+CREDIT_NOTE_LINES = register('credit_note_lines', './/cac:CreditNoteLine')
+ITEM_DESCRIPTION = register('item_description', './/cbc:Description')
+ITEM_QUANTITY = register('item_quantity', 'cbc:InvoicedQuantity')
+ITEM_PRICE = register('item_price', './/cbc:PriceAmount')
+ITEM_REFERENCE = register('item_reference', './/cac:SellersItemIdentification/cbc:ID')
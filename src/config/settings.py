@@ -21,6 +21,12 @@ STORAGE_CONFIG = {
     "template_storage": str(STORAGE_DIR / "templates")
 }
 
+# Backend XML del procesamiento de facturas: "lxml", "elementtree" o "streaming"
+# (ver benchmarks/bench_backends_xml.py para elegir por despliegue)
+XML_CONFIG = {
+    "backend": os.getenv("FACTURAE_XML_BACKEND", "elementtree")
+}
+
 # Configuración de log
 LOG_CONFIG = {
     "level": "DEBUG",
@@ -2,6 +2,8 @@
 Interfaces para el repositorio de facturas.
 """
 from abc import ABC, abstractmethod
+from typing import Optional
+
 from src.domain.entities.invoice import Invoice
 
 class InvoiceRepository(ABC):
@@ -0,0 +1,51 @@
+"""
+Interfaz para el backend XML del procesamiento de facturas.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Tuple, Type
+
+# Espacios de nombres UBL que usan las búsquedas del caso de uso
+UBL_NAMESPACES = {
+    'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
+    'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
+}
+
+# Ruta de la factura embebida dentro del sobre AttachedDocument
+EMBEDDED_DESCRIPTION_PATH = './/cac:Attachment/cac:ExternalReference/cbc:Description'
+
+# Documentos que no vienen en sobre
+DIRECT_DOCUMENT_SUFFIXES = ('}Invoice', '}CreditNote')
+
+
+class XMLBackend(ABC):
+    """
+    Interfaz para el parser XML del caso de uso.
+
+    Los elementos que devuelve deben aceptar ``find``/``findall`` con
+    ``namespaces``, ``tag`` y ``text`` (ElementTree y lxml lo hacen).
+    """
+
+    # Nombre con el que se elige en la configuración
+    name: str = ''
+
+    # Excepciones de sintaxis XML del backend
+    syntax_errors: Tuple[Type[Exception], ...] = ()
+
+    @abstractmethod
+    def fromstring(self, data: bytes) -> Any:
+        """Parsea el documento completo y devuelve su raíz."""
+        pass
+
+    def read_envelope(self, data: bytes) -> Tuple[Any, Optional[str]]:
+        """
+        Lee el documento y devuelve su raíz y el texto de la factura embebida.
+
+        Si el documento ya es una Invoice o CreditNote el texto es None y la
+        raíz es el documento completo; si es un sobre, el texto es None cuando
+        no trae la descripción embebida.
+        """
+        root = self.fromstring(data)
+        if root.tag.endswith(DIRECT_DOCUMENT_SUFFIXES):
+            return root, None
+        description = root.find(EMBEDDED_DESCRIPTION_PATH, UBL_NAMESPACES)
+        return root, description.text if description is not None else None
@@ -3,12 +3,13 @@ Casos de uso para el procesamiento de facturas.
 """
 from src.domain.entities.invoice import Invoice
 from src.domain.repositories.invoice_repository import InvoiceRepository
-from src.domain.exceptions import InvoiceProcessingError
-from typing import Dict, Any
+from src.domain.repositories.xml_backend import (
+    DIRECT_DOCUMENT_SUFFIXES, UBL_NAMESPACES, XMLBackend
+)
+from typing import Dict, Any, Optional
 import logging
 from datetime import datetime
 import re
-import xml.etree.ElementTree as etree
 
 # Configuración del logger
 logger = logging.getLogger(__name__)
@@ -33,9 +34,10 @@ class InvoiceDataError(InvoiceProcessingError):
 class InvoiceProcessor:
     """Clase para procesar facturas electrónicas en formato UBL."""
     
-    def __init__(self, repository: InvoiceRepository):
-        """Inicializa el procesador de facturas."""
+    def __init__(self, repository: InvoiceRepository, backend: XMLBackend):
+        """Inicializa el procesador de facturas con el repositorio y el backend XML."""
         self.repository = repository
+        self.backend = backend
     
     def process_invoice(self, xml_content: str) -> Invoice:
         """
@@ -51,26 +53,22 @@ class InvoiceProcessor:
             InvoiceProcessingError: Si hay errores en el procesamiento
         """
         try:
-            # 1. Validar el XML
-            tree = self._parse_xml(xml_content)
-            root = tree.getroot()
+            # 1. Validar el XML y extraer la factura embebida si es necesario
+            invoice_root = self._read_invoice_root(xml_content)
             
-            # 2. Extraer la factura embebida si es necesario
-            invoice_root = self._extract_embedded_invoice(root)
-            
-            # 3. Extraer datos básicos de la factura
+            # 2. Extraer datos básicos de la factura
             invoice_data = self._extract_basic_invoice_data(invoice_root)
             
-            # 4. Extraer datos del proveedor y cliente
+            # 3. Extraer datos del proveedor y cliente
             self._extract_parties_data(invoice_root, invoice_data)
             
-            # 5. Procesar ítems de la factura
+            # 4. Procesar ítems de la factura
             self._process_invoice_items(invoice_root, invoice_data)
             
-            # 6. Procesar datos adicionales
+            # 5. Procesar datos adicionales
             self._process_additional_data(invoice_root, invoice_data)
             
-            # 7. Crear y guardar la entidad
+            # 6. Crear y guardar la entidad
             invoice = Invoice(
                 id=invoice_data['invoice_id'],
                 prefix=invoice_data['invoice_prefix'],
@@ -96,19 +94,35 @@ class InvoiceProcessor:
                 raise
             raise InvoiceProcessingError(error_msg) from e
     
-    def _parse_xml(self, xml_content: str) -> etree._ElementTree:
-        """Parsea el contenido XML."""
+    def _read_invoice_root(self, xml_content: str) -> Any:
+        """
+        Lee el documento con el backend XML y devuelve la raíz de la factura.
+        
+        Args:
+            xml_content: Contenido XML del documento (sobre o factura).
+            
+        Returns:
+            Elemento raíz de la factura.
+            
+        Raises:
+            InvoiceFormatError: Si el XML no es válido o no trae la factura.
+        """
         try:
-            return etree.fromstring(xml_content.encode('utf-8'))
-        except etree.XMLSyntaxError as e:
+            root, payload = self.backend.read_envelope(xml_content.encode('utf-8'))
+        except self.backend.syntax_errors as e:
             raise InvoiceFormatError(f"Error de sintaxis XML: {str(e)}") from e
+        
+        # Si el documento es una factura directamente, devolver el mismo elemento
+        if root.tag.endswith(DIRECT_DOCUMENT_SUFFIXES):
+            return root
+        return self._parse_embedded_invoice(payload)
     
-    def _extract_embedded_invoice(self, root: etree._Element) -> etree._Element:
+    def _parse_embedded_invoice(self, payload: Optional[str]) -> Any:
         """
-        Extrae la factura embebida en un documento AttachedDocument si es necesario.
+        Convierte el texto de la descripción embebida en el XML de la factura.
         
         Args:
-            root: Elemento raíz del documento XML.
+            payload: Texto de cbc:Description (None si no se encontró).
             
         Returns:
             Elemento raíz de la factura.
@@ -116,22 +130,12 @@ class InvoiceProcessor:
         Raises:
             InvoiceFormatError: Si no se puede extraer la factura embebida.
         """
-        # Si el documento es una factura directamente, devolver el mismo elemento
-        if root.tag.endswith('}Invoice') or root.tag.endswith('}CreditNote'):
-            return root
-            
-        # Intentar extraer la factura embebida de un AttachedDocument
         try:
-            description_elem = root.find(
-                './/cac:Attachment/cac:ExternalReference/cbc:Description', 
-                namespaces={'cac': 'urn:un:unece:uncefact:documentation:2', 'cbc': 'urn:un:unece:uncefact:documentation:2'}
-            )
-            
-            if description_elem is None or not description_elem.text:
+            if not payload:
                 raise InvoiceFormatError("No se encontró el contenido de la factura embebida.")
             
             # Obtener el texto del elemento y limpiarlo
-            invoice_content = description_elem.text.strip()
+            invoice_content = payload.strip()
             
             # Si el contenido está en CDATA, extraer el contenido interno
             if '<![CDATA[' in invoice_content and ']]>' in invoice_content:
@@ -139,15 +143,15 @@ class InvoiceProcessor:
             
             # Convertir el string de la factura a XML
             try:
-                return etree.fromstring(invoice_content.encode('utf-8'))
-            except etree.XMLSyntaxError as e:
+                return self.backend.fromstring(invoice_content.encode('utf-8'))
+            except self.backend.syntax_errors as e:
                 raise InvoiceFormatError(f"El contenido embebido no es un XML válido: {str(e)}")
                 
         except Exception as e:
             logger.error(f"Error al extraer factura embebida: {str(e)}")
             raise InvoiceFormatError(f"No se pudo extraer la factura embebida: {str(e)}") from e
     
-    def _extract_basic_invoice_data(self, invoice_root: etree._Element) -> Dict[str, Any]:
+    def _extract_basic_invoice_data(self, invoice_root: Any) -> Dict[str, Any]:
         """
         Extrae los datos básicos de la factura.
         
@@ -211,9 +215,9 @@ class InvoiceProcessor:
             'related_invoice': related_invoice if is_credit_note else None
         }
     
-    def _get_element_text(self, root: etree._Element, path: str) -> str:
+    def _get_element_text(self, root: Any, path: str) -> str:
         """Extrae el texto de un elemento."""
-        elem = root.find(path, namespaces={'cac': 'urn:un:unece:uncefact:documentation:2', 'cbc': 'urn:un:unece:uncefact:documentation:2'})
+        elem = root.find(path, namespaces=UBL_NAMESPACES)
         return elem.text if elem is not None else None
     
     def _extract_invoice_parts(self, invoice_id: str) -> (str, str):
@@ -223,10 +227,10 @@ class InvoiceProcessor:
             return match.group('prefix'), match.group('number')
         raise InvoiceDataError("La factura no tiene un ID válido")
     
-    def _extract_parties_data(self, invoice_root: etree._Element, invoice_data: Dict[str, Any]):
+    def _extract_parties_data(self, invoice_root: Any, invoice_data: Dict[str, Any]):
         """Extrae datos del proveedor y cliente."""
         # Extraer datos del proveedor
-        supplier_party = invoice_root.find('.//cac:AccountingSupplierParty', namespaces={'cac': 'urn:un:unece:uncefact:documentation:2'})
+        supplier_party = invoice_root.find('.//cac:AccountingSupplierParty', namespaces=UBL_NAMESPACES)
         if supplier_party is not None:
             # Extraer nombre del proveedor
             supplier_name = self._get_element_text(supplier_party, 'cac:PartyName/cbc:Name')
@@ -234,7 +238,7 @@ class InvoiceProcessor:
                 invoice_data['supplier_name'] = supplier_name
                 
             # Extraer dirección del proveedor
-            supplier_address = supplier_party.find('cac:PostalAddress', namespaces={'cac': 'urn:un:unece:uncefact:documentation:2'})
+            supplier_address = supplier_party.find('cac:PostalAddress', namespaces=UBL_NAMESPACES)
             if supplier_address is not None:
                 street = self._get_element_text(supplier_address, 'cbc:StreetName')
                 city = self._get_element_text(supplier_address, 'cbc:CityName')
@@ -243,7 +247,7 @@ class InvoiceProcessor:
                     invoice_data['supplier_address'] = f"{street}, {city} {postal_code}"
         
         # Extraer datos del cliente
-        customer_party = invoice_root.find('.//cac:AccountingCustomerParty', namespaces={'cac': 'urn:un:unece:uncefact:documentation:2'})
+        customer_party = invoice_root.find('.//cac:AccountingCustomerParty', namespaces=UBL_NAMESPACES)
         if customer_party is not None:
             # Extraer nombre del cliente
             customer_name = self._get_element_text(customer_party, 'cac:PartyName/cbc:Name')
@@ -251,7 +255,7 @@ class InvoiceProcessor:
                 invoice_data['customer_name'] = customer_name
                 
             # Extraer dirección del cliente
-            customer_address = customer_party.find('cac:PostalAddress', namespaces={'cac': 'urn:un:unece:uncefact:documentation:2'})
+            customer_address = customer_party.find('cac:PostalAddress', namespaces=UBL_NAMESPACES)
             if customer_address is not None:
                 street = self._get_element_text(customer_address, 'cbc:StreetName')
                 city = self._get_element_text(customer_address, 'cbc:CityName')
@@ -259,10 +263,10 @@ class InvoiceProcessor:
                 if street and city and postal_code:
                     invoice_data['customer_address'] = f"{street}, {city} {postal_code}"
     
-    def _process_invoice_items(self, invoice_root: etree._Element, invoice_data: Dict[str, Any]):
+    def _process_invoice_items(self, invoice_root: Any, invoice_data: Dict[str, Any]):
         """Procesa los ítems de la factura."""
         # Extraer ítems de la factura
-        invoice_items = invoice_root.findall('.//cac:InvoiceLine', namespaces={'cac': 'urn:un:unece:uncefact:documentation:2'})
+        invoice_items = invoice_root.findall('.//cac:InvoiceLine', namespaces=UBL_NAMESPACES)
         for item in invoice_items:
             # Extraer descripción del ítem
             description = self._get_element_text(item, 'cbc:Description')
@@ -274,7 +278,7 @@ class InvoiceProcessor:
                     'total_price': float(self._get_element_text(item, 'cbc:LineExtensionAmount'))
                 })
     
-    def _process_additional_data(self, invoice_root: etree._Element, invoice_data: Dict[str, Any]):
+    def _process_additional_data(self, invoice_root: Any, invoice_data: Dict[str, Any]):
         """Procesa datos adicionales de la factura."""
         # Extraer datos de peaje
         toll_data = self._get_element_text(invoice_root, './/cbc:Note')
@@ -292,10 +296,11 @@ class InvoiceProcessor:
 class InvoiceProcessingUseCase:
     """Casos de uso para el procesamiento de facturas."""
     
-    def __init__(self, repository: InvoiceRepository):
-        """Inicializa el caso de uso con el repositorio."""
+    def __init__(self, repository: InvoiceRepository, backend: XMLBackend):
+        """Inicializa el caso de uso con el repositorio y el backend XML (ver XML_CONFIG)."""
         self.repository = repository
-        self.processor = InvoiceProcessor(repository)
+        self.backend = backend
+        self.processor = InvoiceProcessor(repository, backend)
     
     def process_invoice(self, xml_content: str) -> Invoice:
         """
@@ -4,7 +4,8 @@ Sistema de inyección de dependencias para la aplicación.
 from src.domain.repositories.invoice_repository import InvoiceRepository
 from src.infrastructure.repositories.xml_invoice_repository import XMLInvoiceRepository
 from src.domain.use_cases.invoice_processor import InvoiceProcessingUseCase
-from src.config.settings import STORAGE_CONFIG
+from src.infrastructure.xml.xml_backends import create_xml_backend
+from src.config.settings import STORAGE_CONFIG, XML_CONFIG
 import logging
 
 # Configuración del logger
@@ -21,10 +22,13 @@ def configure_dependencies():
         # Configurar repositorio
         invoice_repo = XMLInvoiceRepository(STORAGE_CONFIG["invoice_storage"])
         
+        # Configurar backend XML
+        xml_backend = create_xml_backend(XML_CONFIG["backend"])
+        
         # Configurar caso de uso
-        use_case = InvoiceProcessingUseCase(invoice_repo)
+        use_case = InvoiceProcessingUseCase(invoice_repo, xml_backend)
         
-        logger.info("Dependencias configuradas exitosamente")
+        logger.info(f"Dependencias configuradas exitosamente (backend XML: {xml_backend.name})")
         return {
             "invoice_repository": invoice_repo,
             "invoice_use_case": use_case
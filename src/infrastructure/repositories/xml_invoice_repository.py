@@ -4,6 +4,7 @@ Implementación concreta del repositorio de facturas usando XML.
 from src.domain.repositories.invoice_repository import InvoiceRepository
 from src.domain.entities.invoice import Invoice
 import os
+from datetime import datetime
 from pathlib import Path
 import xml.etree.ElementTree as ET
 from typing import Optional
@@ -0,0 +1,101 @@
+"""
+Implementaciones del backend XML del caso de uso de facturas.
+
+- ``lxml``: parser de libxml2 ajustado (sin espacios ignorables, sin resolver
+  entidades ni usar la red, sin límite de tamaño de nodos).
+- ``elementtree``: ``xml.etree.ElementTree`` de la biblioteca estándar; no
+  necesita dependencias.
+- ``streaming``: ``ElementTree.iterparse`` sobre el sobre AttachedDocument;
+  se detiene en la factura embebida y libera lo ya leído (firmas, partes),
+  sin leer el ApplicationResponse que viene después.
+
+Se eligen por nombre con ``create_xml_backend`` (ver ``XML_CONFIG`` en
+``src.config.settings``).
+"""
+import io
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Optional, Tuple, Type
+
+from src.domain.repositories.xml_backend import DIRECT_DOCUMENT_SUFFIXES, UBL_NAMESPACES, XMLBackend
+
+CAC = '{%s}' % UBL_NAMESPACES['cac']
+CBC = '{%s}' % UBL_NAMESPACES['cbc']
+
+
+class ElementTreeBackend(XMLBackend):
+    """Backend con xml.etree.ElementTree."""
+
+    name = 'elementtree'
+    syntax_errors = (ET.ParseError,)
+
+    def fromstring(self, data: bytes) -> ET.Element:
+        return ET.fromstring(data)
+
+
+class LxmlBackend(XMLBackend):
+    """Backend con lxml; el parser se crea una vez por instancia (no compartir entre hilos)."""
+
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree
+        self.syntax_errors = (etree.XMLSyntaxError,)
+        self._etree = etree
+        self._parser = etree.XMLParser(
+            remove_blank_text=True, resolve_entities=False, no_network=True, huge_tree=True
+        )
+
+    def fromstring(self, data: bytes) -> Any:
+        return self._etree.fromstring(data, self._parser)
+
+
+class StreamingBackend(ElementTreeBackend):
+    """Backend que recorre el sobre con ElementTree.iterparse hasta la factura embebida."""
+
+    name = 'streaming'
+
+    DESCRIPTION_TAG = CBC + 'Description'
+    EMBEDDED_PARENTS = [CAC + 'Attachment', CAC + 'ExternalReference']
+
+    def read_envelope(self, data: bytes) -> Tuple[Any, Optional[str]]:
+        root = None
+        # Etiquetas de los elementos abiertos, desde la raíz
+        open_tags = []
+        for event, elem in ET.iterparse(io.BytesIO(data), events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+                    if root.tag.endswith(DIRECT_DOCUMENT_SUFFIXES):
+                        # Documento directo: se necesita completo
+                        return self.fromstring(data), None
+                open_tags.append(elem.tag)
+                continue
+            open_tags.pop()
+            # './/cac:Attachment' sólo busca descendientes: el Attachment no puede ser la raíz
+            if (elem.tag == self.DESCRIPTION_TAG and len(open_tags) > 2
+                    and open_tags[-2:] == self.EMBEDDED_PARENTS):
+                return root, elem.text
+            # Liberar lo ya leído
+            elem.clear()
+        return root, None
+
+
+XML_BACKENDS: Dict[str, Type[XMLBackend]] = {
+    backend.name: backend for backend in (LxmlBackend, ElementTreeBackend, StreamingBackend)
+}
+
+
+def create_xml_backend(name: str) -> XMLBackend:
+    """
+    Crea el backend XML con ese nombre.
+
+    Raises:
+        ValueError: Si el nombre no es uno de XML_BACKENDS.
+    """
+    try:
+        backend_class = XML_BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Backend XML desconocido: {name!r} (opciones: {', '.join(XML_BACKENDS)})"
+        ) from None
+    return backend_class()
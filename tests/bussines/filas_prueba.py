@@ -0,0 +1,41 @@
+"""
+Datos y lectores compartidos por las pruebas de main/bussines.
+"""
+from decimal import Decimal
+
+from openpyxl import load_workbook
+
+from process.records import LineItem
+
+
+def fila_ejemplo(numero, cabecera="PR", tipo="FACTURA", placa="SPX932", voucher=False):
+    """
+    Fila de lista_peajes como la arma extraer_datos_factura.
+
+    Con voucher=True incluye también los ítems y la ruta del XML, como los
+    vouchers que guarda do_on_create_voucher.
+    """
+    fila = {
+        "InvoiceType": tipo,
+        "FacturaID": f"{cabecera}{numero}",
+        "FacturaCabecera": cabecera,
+        "FacturaNumero": str(numero),
+        "FechaEmision": "11/04/2025",
+        "ValorTotal": Decimal("13000"),
+        "NombrePeaje": "PEAJE ROBLE",
+        "NumeroPlaca": placa,
+    }
+    if voucher:
+        fila["Items"] = [LineItem(
+            f"Ingresos para terceros: Paso ROBLE {placa} 10189", Decimal("1"), Decimal("13000"), None, Decimal("13000")
+        )]
+    fila["FacturaRelacionada"] = "4107504" if tipo == "NOTA_CREDITO" else "00000"
+    if voucher:
+        fila["xml"] = f"/tmp/{cabecera}{numero}.xml"
+    return fila
+
+
+def leer_hojas(path_excel):
+    """Valores de cada hoja del libro, por nombre de hoja."""
+    wb = load_workbook(path_excel)
+    return {ws.title: [list(fila) for fila in ws.iter_rows(values_only=True)] for ws in wb.worksheets}
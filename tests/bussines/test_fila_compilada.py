@@ -0,0 +1,96 @@
+"""
+Pruebas unitarias para la compilación de plantilla.json.
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+from pathlib import Path
+
+from objects.fo_obj_plantilla import do_on_get_columns
+from plantilla.fila_compilada import (
+    compilar_fila_desde_enums, compilar_fila_desde_plantilla, obtener_fila_compilada
+)
+from filas_prueba import fila_ejemplo
+
+PLANTILLA = Path(__file__).resolve().parents[2] / "main" / "build" / "tenant" / "turboCarga" / "plantilla.json"
+
+
+class TestFilaCompiladaPlantilla(unittest.TestCase):
+    """Pruebas para compilar_fila_desde_plantilla y su caché por tenant."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def escribir_plantilla(self, columnas):
+        path = os.path.join(self.carpeta, "plantilla.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"columns": columnas}, f)
+        return path
+
+    def test_plantilla_turbo_carga_igual_a_enums(self):
+        """La plantilla del tenant produce las mismas filas que Cabecera/Constants."""
+        desde_plantilla = compilar_fila_desde_plantilla(do_on_get_columns(str(PLANTILLA)))
+        desde_enums = compilar_fila_desde_enums()
+        for item in (fila_ejemplo(4112463, placa="spx932"), fila_ejemplo(541471, "NCPP", "NOTA_CREDITO", placa="spx932")):
+            self.assertEqual(desde_plantilla.construir(item), desde_enums.construir(item))
+
+    def test_campo_constante_y_transformacion(self):
+        """Las claves field y transform se aplican en la posición de la columna."""
+        path = self.escribir_plantilla([
+            {"column": "Placa", "index": 1, "field": "NumeroPlaca", "transform": "mayusculas"},
+            {"column": "Documento", "index": 2, "field": {"FC": "FacturaNumero", "NCDOC": "FacturaRelacionada"}},
+            {"column": "Tipo", "index": 3, "constants": [
+                {"name": "ENCAB_TIPO_DOCUMENTO_FC", "value": "FC"},
+                {"name": "ENCAB_TIPO_DOCUMENTO_NCDOC", "value": "NCDOC"},
+            ]},
+            {"column": "Encab: Nota", "index": 5},
+        ])
+        fila = compilar_fila_desde_plantilla(do_on_get_columns(path))
+
+        self.assertEqual(fila.construir(fila_ejemplo(1, placa="spx932")), ["SPX932", "1", "FC", None, "PEAJE ROBLE"])
+        self.assertEqual(
+            fila.construir(fila_ejemplo(2, "NCPP", "NOTA_CREDITO", placa="spx932")),
+            ["SPX932", "4107504", "NCDOC", None, "PEAJE ROBLE"],
+        )
+
+    def test_monto_decimal_se_formatea_al_construir(self):
+        """ValorTotal en Decimal sale como texto: enteros sin decimales, el resto tal cual."""
+        path = self.escribir_plantilla([
+            {"column": "Valor", "index": 1, "field": "ValorTotal"},
+            {"column": "Valor texto", "index": 2, "field": "ValorTotal", "transform": "texto"},
+        ])
+        fila = compilar_fila_desde_plantilla(do_on_get_columns(path))
+        casos = {Decimal("13000.00"): "13000", Decimal("13000.50"): "13000.50", "13000": "13000"}
+        for valor, esperado in casos.items():
+            with self.subTest(valor=valor):
+                item = dict(fila_ejemplo(1), ValorTotal=valor)
+                self.assertEqual(fila.construir(item), [esperado, esperado])
+
+    def test_transformacion_desconocida(self):
+        """Una transformación que no existe se rechaza al compilar."""
+        path = self.escribir_plantilla([{"column": "Placa", "index": 1, "field": "NumeroPlaca", "transform": "otra"}])
+        with self.assertRaises(ValueError):
+            compilar_fila_desde_plantilla(do_on_get_columns(path))
+
+    def test_cache_por_fecha_de_modificacion(self):
+        """La fila compilada se reutiliza hasta que cambia el archivo."""
+        path = self.escribir_plantilla([{"column": "Placa", "index": 1, "field": "NumeroPlaca"}])
+        primera = obtener_fila_compilada(path)
+        self.assertIs(obtener_fila_compilada(path), primera)
+
+        self.escribir_plantilla([{"column": "Fecha", "index": 1, "field": "FechaEmision"}])
+        estado = os.stat(path)
+        os.utime(path, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+        segunda = obtener_fila_compilada(path)
+        self.assertIsNot(segunda, primera)
+        self.assertEqual(segunda.construir(fila_ejemplo(1, placa="spx932")), ["11/04/2025"])
+
+
+if __name__ == "__main__":
+    unittest.main()
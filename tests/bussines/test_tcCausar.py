@@ -0,0 +1,83 @@
+"""
+Pruebas unitarias para la escritura de la plantilla Excel.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from bussines.tcCausar import (
+    agregar_filas_al_excel, construir_fila_excel, crear_archivo_excel_con_cabecera,
+    escribir_excel_en_lote
+)
+from objects.fo_obj_plantilla import do_on_get_columns
+from filas_prueba import fila_ejemplo, leer_hojas
+
+PLANTILLA = Path(__file__).resolve().parents[2] / "main" / "build" / "tenant" / "turboCarga" / "plantilla.json"
+
+
+class TestEscrituraExcel(unittest.TestCase):
+    """Pruebas para los modos de escritura de la plantilla."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.cabeceras = do_on_get_columns(str(PLANTILLA))
+        self.datos = [
+            fila_ejemplo(4112463),
+            fila_ejemplo(541471, "NCPP", "NOTA_CREDITO"),
+            fila_ejemplo(4112669),
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def test_lote_igual_a_modo_tradicional(self):
+        """El modo por lotes produce las mismas celdas que agregar_filas_al_excel."""
+        path_tradicional = crear_archivo_excel_con_cabecera(self.carpeta, "trad", "test", self.cabeceras)
+        agregar_filas_al_excel(path_tradicional, self.datos)
+
+        path_lote = os.path.join(self.carpeta, "lote.xlsx")
+        total = escribir_excel_en_lote(path_lote, self.cabeceras, self.datos)
+
+        self.assertEqual(total, 3)
+        self.assertEqual(leer_hojas(path_lote), leer_hojas(path_tradicional))
+
+    def test_lote_separa_facturas_y_notas(self):
+        """Cada documento queda en la hoja de su tipo."""
+        path_lote = os.path.join(self.carpeta, "lote.xlsx")
+        escribir_excel_en_lote(path_lote, self.cabeceras, self.datos)
+        hojas = leer_hojas(path_lote)
+
+        self.assertEqual(len(hojas["FACTURA"]), 3)
+        self.assertEqual(len(hojas["NOTA_CREDITO"]), 2)
+        self.assertEqual(hojas["NOTA_CREDITO"][1][1], "NCDOC")
+        self.assertEqual(hojas["NOTA_CREDITO"][1][8], "4107504")
+
+    def test_fila_compilada_valores(self):
+        """La fila precompilada ubica constantes y campos en su columna."""
+        factura = construir_fila_excel(fila_ejemplo(4112463))
+        nota = construir_fila_excel(fila_ejemplo(541471, "NCPP", "NOTA_CREDITO"))
+
+        self.assertEqual(len(factura), 58)
+        self.assertEqual(factura[:14], [
+            "TURBO CARGA SAS", "FC", None, None, "11/04/2025", "1010191952", "900470252",
+            "PR", "4112463", "PEAJE ROBLE", "Credito", "0", "0", "11/04/2025",
+        ])
+        self.assertEqual(factura[32:42], [
+            "61450501", "Principal", "Und.", "1", "0", "13000", "0", "11/04/2025", None, "SPX932",
+        ])
+        self.assertEqual(nota[1], "NCDOC")
+        self.assertEqual(nota[8], "4107504")
+
+    def test_fila_compilada_no_comparte_prototipo(self):
+        """Cada fila es una copia independiente del prototipo."""
+        primera = construir_fila_excel(fila_ejemplo(1))
+        segunda = construir_fila_excel(fila_ejemplo(2))
+        self.assertIsNot(primera, segunda)
+        self.assertEqual(primera[8], "1")
+        self.assertEqual(segunda[8], "2")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Pruebas unitarias para el modo incremental de la plantilla Excel.
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+
+from bussines.tcCausar import escribir_excel_en_lote
+from bussines.tcCausarIncremental import agregar_filas_incremental, cargar_indice, ruta_indice
+from objects.fo_obj_plantilla import do_on_get_columns
+from filas_prueba import fila_ejemplo, leer_hojas
+
+PLANTILLA = Path(__file__).resolve().parents[2] / "main" / "build" / "tenant" / "turboCarga" / "plantilla.json"
+
+
+class TestExcelIncremental(unittest.TestCase):
+    """Pruebas para agregar_filas_incremental."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.path_excel = os.path.join(self.carpeta, "documento_4_2025.xlsx")
+        self.cabeceras = do_on_get_columns(str(PLANTILLA))
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def test_segunda_ejecucion_anexa_solo_nuevas(self):
+        """Una segunda ejecución conserva las filas previas y no duplica facturas."""
+        primera = [fila_ejemplo(1), fila_ejemplo(2), fila_ejemplo(10, "NCPP", "NOTA_CREDITO")]
+        segunda = primera + [fila_ejemplo(3), fila_ejemplo(11, "NCPP", "NOTA_CREDITO")]
+
+        self.assertEqual(agregar_filas_incremental(self.path_excel, self.cabeceras, primera), 3)
+        self.assertEqual(agregar_filas_incremental(self.path_excel, self.cabeceras, segunda), 2)
+        self.assertEqual(agregar_filas_incremental(self.path_excel, self.cabeceras, segunda), 0)
+
+        referencia = os.path.join(self.carpeta, "referencia.xlsx")
+        escribir_excel_en_lote(referencia, self.cabeceras, segunda)
+        self.assertEqual(leer_hojas(self.path_excel), leer_hojas(referencia))
+
+        indice = cargar_indice(self.path_excel)
+        self.assertEqual(indice["siguiente_fila"], {"FACTURA": 5, "NOTA_CREDITO": 4})
+        self.assertEqual(indice["facturas"], {"PR1", "PR2", "PR3", "NCPP10", "NCPP11"})
+
+    def test_cursor_desactualizado_usa_ultima_fila_real(self):
+        """Si el cursor del índice no coincide con la hoja se usa la fila real."""
+        agregar_filas_incremental(self.path_excel, self.cabeceras, [fila_ejemplo(1)])
+        with open(ruta_indice(self.path_excel), "r", encoding="utf-8") as f:
+            indice = json.load(f)
+        indice["siguiente_fila"]["FACTURA"] = 40
+        with open(ruta_indice(self.path_excel), "w", encoding="utf-8") as f:
+            json.dump(indice, f)
+
+        agregar_filas_incremental(self.path_excel, self.cabeceras, [fila_ejemplo(2)])
+
+        hojas = leer_hojas(self.path_excel)
+        self.assertEqual(len(hojas["FACTURA"]), 3)
+        self.assertEqual(hojas["FACTURA"][2][8], "2")
+
+    def test_texto_con_caracteres_de_control_y_dimension(self):
+        """Las filas anexadas no llevan caracteres que XML no admite y la dimensión de la hoja cubre todo."""
+        agregar_filas_incremental(self.path_excel, self.cabeceras, [fila_ejemplo(1)])
+        agregar_filas_incremental(self.path_excel, self.cabeceras, [fila_ejemplo(2, placa="SPX\x0b932\x00"), fila_ejemplo(3)])
+
+        hojas = leer_hojas(self.path_excel)
+        self.assertEqual(len(hojas["FACTURA"]), 4)
+        self.assertIn("SPX932", hojas["FACTURA"][2])
+        ultima_columna = get_column_letter(len(self.cabeceras))
+        self.assertEqual(load_workbook(self.path_excel, read_only=True)["FACTURA"].calculate_dimension(), f"A1:{ultima_columna}4")
+        # Con la dimensión ya escrita, el siguiente anexado la extiende
+        agregar_filas_incremental(self.path_excel, self.cabeceras, [fila_ejemplo(4)])
+        self.assertEqual(load_workbook(self.path_excel, read_only=True)["FACTURA"].calculate_dimension(), f"A1:{ultima_columna}5")
+
+    def test_libro_borrado_se_reconstruye(self):
+        """Si se borra el libro el índice se ignora y se crea de nuevo."""
+        agregar_filas_incremental(self.path_excel, self.cabeceras, [fila_ejemplo(1)])
+        os.remove(self.path_excel)
+
+        self.assertEqual(agregar_filas_incremental(self.path_excel, self.cabeceras, [fila_ejemplo(1)]), 1)
+        self.assertEqual(len(leer_hojas(self.path_excel)["FACTURA"]), 2)
+
+    def test_libro_sin_indice_se_reconstruye_con_el_historico(self):
+        """Un libro sin índice (p. ej. generado por otro flujo) no pierde las facturas previas."""
+        previas = [fila_ejemplo(1), fila_ejemplo(10, "NCPP", "NOTA_CREDITO")]
+        escribir_excel_en_lote(self.path_excel, self.cabeceras, previas)
+        actuales = [fila_ejemplo(2)]
+
+        agregadas = agregar_filas_incremental(
+            self.path_excel, self.cabeceras, actuales, historico=lambda: previas + actuales
+        )
+
+        self.assertEqual(agregadas, 3)
+        referencia = os.path.join(self.carpeta, "referencia.xlsx")
+        escribir_excel_en_lote(referencia, self.cabeceras, previas + actuales)
+        self.assertEqual(leer_hojas(self.path_excel), leer_hojas(referencia))
+        self.assertEqual(cargar_indice(self.path_excel)["facturas"], {"PR1", "PR2", "NCPP10"})
+        self.assertEqual(agregar_filas_incremental(self.path_excel, self.cabeceras, [fila_ejemplo(3)]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
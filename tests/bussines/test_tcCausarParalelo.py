@@ -0,0 +1,171 @@
+"""
+Pruebas unitarias para la generación de plantillas en paralelo.
+"""
+import os
+from decimal import Decimal
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from bussines import tcCausarParalelo
+from bussines.tcCausar import escribir_excel_en_lote
+from bussines.tcCausarIncremental import agregar_filas_incremental, cargar_indice
+from bussines.tcCausarParalelo import (
+    ResultadoPlantilla, TrabajoPlantilla, cargar_vouchers, exportar_vouchers, generar_plantilla_tenant,
+    generar_plantillas_en_paralelo, ruta_vouchers
+)
+from objects.fo_obj_plantilla import do_on_get_columns
+from process.records import VoucherRow
+from process.voucher_store import VoucherStore
+from filas_prueba import fila_ejemplo, leer_hojas
+
+TENANT_DIR = Path(__file__).resolve().parents[2] / "main" / "build" / "tenant"
+
+
+def generar_o_morir(trabajo):
+    # Se ejecuta en el worker: el tenant "muere" termina el proceso sin pasar por Python
+    if trabajo.tenant_id == "muere":
+        os._exit(1)
+    return ResultadoPlantilla(trabajo.tenant_id, trabajo.subFolder, filas=1)
+
+
+class TestPlantillasParalelo(unittest.TestCase):
+    """Pruebas para generar_plantillas_en_paralelo."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.datos = [
+            fila_ejemplo(4112463, voucher=True),
+            fila_ejemplo(541471, "NCPP", "NOTA_CREDITO", voucher=True),
+            fila_ejemplo(4112669, voucher=True),
+        ]
+        for subFolder in ("4_2025", "5_2025"):
+            self.escribir_vouchers("turboCarga", subFolder, self.datos)
+        self.escribir_vouchers("sinPlantilla", "4_2025", self.datos)
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def escribir_vouchers(self, tenant_id, subFolder, datos):
+        voucher_dir = ruta_vouchers(self.carpeta, tenant_id, subFolder)
+        os.makedirs(voucher_dir, exist_ok=True)
+        for item in datos:
+            with open(os.path.join(voucher_dir, f"{item['FacturaID']}.txt"), "w", encoding="utf-8") as f:
+                f.write(VoucherRow.from_dict(item).to_json())
+
+    def trabajo(self, tenant_id, subFolder):
+        return TrabajoPlantilla(tenant_id, subFolder, base_dir=self.carpeta, tenant_dir=str(TENANT_DIR))
+
+    def test_cargar_vouchers(self):
+        """Los vouchers .txt se leen de vuelta como filas con los datos originales."""
+        filas = cargar_vouchers(ruta_vouchers(self.carpeta, "turboCarga", "4_2025"))
+        self.assertTrue(all(isinstance(fila, VoucherRow) for fila in filas))
+        self.assertEqual(
+            sorted(filas, key=lambda f: f["FacturaID"]),
+            sorted(map(VoucherRow.from_dict, self.datos), key=lambda f: f["FacturaID"]),
+        )
+
+    def test_cargar_vouchers_del_almacen(self):
+        """Las filas del almacén del mes se leen en el orden en que se guardaron y ganan a un .txt de la misma factura."""
+        voucher_dir = ruta_vouchers(self.carpeta, "turboCarga", "6_2025")
+        datos = [fila_ejemplo(n, voucher=True) for n in (4112669, 4112463)]
+        with VoucherStore(voucher_dir) as store:
+            for item in datos:
+                store.append(item["FacturaID"], VoucherRow.from_dict(item).to_json())
+        anterior = dict(datos[0], NumeroPlaca="XXX000")
+        with open(os.path.join(voucher_dir, f"{anterior['FacturaID']}.txt"), "w", encoding="utf-8") as f:
+            f.write(VoucherRow.from_dict(anterior).to_json())
+
+        filas = cargar_vouchers(voucher_dir)
+        self.assertEqual(filas, [VoucherRow.from_dict(item) for item in datos])
+
+        # Exportar materializa los .txt de antes, con el mismo JSON
+        destino = os.path.join(self.carpeta, "export")
+        rutas = exportar_vouchers(voucher_dir, destino, ["PR4112463"])
+        self.assertEqual([os.path.basename(ruta) for ruta in rutas], ["PR4112463.txt"])
+        self.assertEqual(Path(rutas[0]).read_text(encoding="utf-8"), VoucherRow.from_dict(datos[1]).to_json())
+        self.assertEqual(cargar_vouchers(destino), [VoucherRow.from_dict(datos[1])])
+
+    def test_cargar_vouchers_anteriores(self):
+        """Los vouchers con el str del dict (formato anterior) se siguen leyendo; los ilegibles quedan en avisos."""
+        voucher_dir = ruta_vouchers(self.carpeta, "turboCarga", "4_2025")
+        anterior = dict(fila_ejemplo(4112999, voucher=True), ValorTotal="13000.50", Items=["| Referencia: None |"])
+        with open(os.path.join(voucher_dir, "PR4112999.txt"), "w", encoding="utf-8") as f:
+            f.write(str(anterior))
+        with open(os.path.join(voucher_dir, "roto.txt"), "w", encoding="utf-8") as f:
+            f.write("{'FacturaID': ")
+
+        avisos = []
+        filas = {fila["FacturaID"]: fila for fila in cargar_vouchers(voucher_dir, avisos)}
+
+        self.assertEqual(len(filas), 4)
+        self.assertEqual(len(avisos), 1)
+        self.assertIn("roto.txt", avisos[0])
+        self.assertEqual(filas["PR4112999"]["ValorTotal"], Decimal("13000.50"))
+        self.assertEqual(filas["PR4112999"]["Items"], ["| Referencia: None |"])
+
+    def test_libros_iguales_al_modo_secuencial_y_errores_aislados(self):
+        """Cada libro coincide con la escritura secuencial; un tenant con error no afecta a los demás."""
+        trabajos = [
+            self.trabajo("turboCarga", "4_2025"),
+            self.trabajo("sinPlantilla", "4_2025"),
+            self.trabajo("turboCarga", "5_2025"),
+        ]
+        resultados = generar_plantillas_en_paralelo(trabajos, workers=2)
+
+        self.assertEqual([r.tenant_id for r in resultados], ["turboCarga", "sinPlantilla", "turboCarga"])
+        self.assertTrue(resultados[0].ok and resultados[2].ok)
+        self.assertFalse(resultados[1].ok)
+        self.assertIn("FileNotFoundError", resultados[1].error)
+
+        referencia = os.path.join(self.carpeta, "referencia.xlsx")
+        cabeceras = do_on_get_columns(str(TENANT_DIR / "turboCarga" / "plantilla.json"))
+        escribir_excel_en_lote(referencia, cabeceras, cargar_vouchers(ruta_vouchers(self.carpeta, "turboCarga", "4_2025")))
+        for resultado in (resultados[0], resultados[2]):
+            self.assertEqual(resultado.filas, 3)
+            path_excel = resultado.rutas[0]
+            self.assertEqual(
+                Path(path_excel).parent,
+                Path(self.carpeta) / "Facturae_Optimus" / "turboCarga" / "output",
+            )
+            self.assertEqual(leer_hojas(path_excel), leer_hojas(referencia))
+
+    def test_worker_muerto_no_arrastra_a_los_demas(self):
+        """Si un worker muere, sólo falla su libro: los interrumpidos se reintentan en procesos propios."""
+        trabajos = [self.trabajo(tenant_id, "4_2025") for tenant_id in ("a", "muere", "b", "c")]
+        with mock.patch.object(tcCausarParalelo, "generar_plantilla_tenant", generar_o_morir):
+            resultados = generar_plantillas_en_paralelo(trabajos, workers=2)
+
+        self.assertEqual([r.tenant_id for r in resultados], ["a", "muere", "b", "c"])
+        self.assertEqual([r.ok for r in resultados], [True, False, True, True])
+        self.assertIn("BrokenProcessPool", resultados[1].error)
+
+    def test_tenant_fuera_de_la_carpeta_se_rechaza(self):
+        """Un tenant_id o subFolder con separadores no escribe fuera de Facturae_Optimus/<tenant>/."""
+        for trabajo in (self.trabajo("../x", "4_2025"), self.trabajo("turboCarga", "../4_2025"), self.trabajo("..", "4_2025")):
+            with self.subTest(tenant_id=trabajo.tenant_id, subFolder=trabajo.subFolder):
+                resultado = generar_plantilla_tenant(trabajo)
+                self.assertFalse(resultado.ok)
+                self.assertIn("ValueError", resultado.error)
+        self.assertEqual(os.listdir(self.carpeta), ["Facturae_Optimus"])
+
+    def test_regenerar_renueva_el_indice_incremental(self):
+        """El libro regenerado deja su índice al día para la siguiente ejecución incremental."""
+        trabajo = self.trabajo("turboCarga", "4_2025")
+        path_excel = generar_plantilla_tenant(trabajo).rutas[0]
+        cabeceras = do_on_get_columns(str(TENANT_DIR / "turboCarga" / "plantilla.json"))
+        # Índice viejo con una sola factura: el libro regenerado tiene tres
+        os.remove(path_excel)
+        agregar_filas_incremental(path_excel, cabeceras, self.datos[:1])
+
+        generar_plantilla_tenant(trabajo)
+
+        self.assertEqual(cargar_indice(path_excel)["facturas"], {"PR4112463", "PR4112669", "NCPP541471"})
+        self.assertEqual(agregar_filas_incremental(path_excel, cabeceras, self.datos), 0)
+        self.assertEqual(len(leer_hojas(path_excel)["FACTURA"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
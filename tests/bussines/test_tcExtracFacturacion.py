@@ -0,0 +1,218 @@
+"""
+Pruebas unitarias para el inventario de los ZIP del mes por cabeceras.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from lxml import etree
+
+from bussines import tcExtracFacturacion
+from bussines.tcExtracFacturacion import (agregar_anteriores, descomprimir_y_procesar_zip, extraer_zips_mes, filas_sin_salida,
+                                         inventario_facturacion, leer_xml_zip)
+from bussines.tcCausarParalelo import cargar_vouchers
+from bussines.tcProcesFacturacion import extraer_datos_factura
+from process.run_manifest import WRITTEN, RunManifest
+from process.voucher_store import VoucherStore
+from muestras import MUESTRAS
+
+
+class TestInventarioFacturacion(unittest.TestCase):
+    """Pruebas para inventario_facturacion."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, ignore_errors=True)
+
+    def crear_zip(self, nombre, archivos):
+        ruta = os.path.join(self.carpeta, nombre)
+        with zipfile.ZipFile(ruta, "w") as zip_ref:
+            for nombre_xml, contenido in archivos:
+                zip_ref.writestr(nombre_xml, contenido)
+        return ruta
+
+    def test_cuenta_por_mes_y_tipo_sin_descomprimir(self):
+        """Cuenta por MES_AÑO y tipo, marca repetidas y errores, y no toca los ZIP."""
+        self.crear_zip("a.zip", [(m.name, m.read_bytes()) for m in MUESTRAS] + [("leeme.txt", b"x")])
+        self.crear_zip("b.zip", [("repetida.xml", MUESTRAS[0].read_bytes()), ("rota.xml", b"<AttachedDocument>")])
+        Path(self.carpeta, "c.zip.crdownload").write_bytes(b"")
+
+        with mock.patch.object(tcExtracFacturacion, "extraer_datos_factura", side_effect=AssertionError("parseó")):
+            inventario = inventario_facturacion(self.carpeta)
+
+        self.assertEqual(inventario["zips"], 2)
+        self.assertEqual(inventario["documentos"], len(MUESTRAS))
+        self.assertEqual(inventario["por_mes"], {
+            "4_2025": {"FACTURA": 4, "NOTA_CREDITO": 1},
+            "3_2025": {"NOTA_CREDITO": 1},
+        })
+        self.assertEqual(list(inventario["duplicados"].values()), [[f"a.zip/{MUESTRAS[0].name}", "b.zip/repetida.xml"]])
+        self.assertEqual([(z, x) for z, x, _ in inventario["errores"]], [("b.zip", "rota.xml")])
+        self.assertEqual(sorted(os.listdir(self.carpeta)), ["a.zip", "b.zip", "c.zip.crdownload"])
+
+    def test_zip_danado(self):
+        """Un ZIP que no se puede abrir queda en los errores y no detiene el inventario."""
+        Path(self.carpeta, "danado.zip").write_bytes(b"no es un zip")
+        self.crear_zip("bueno.zip", [(MUESTRAS[0].name, MUESTRAS[0].read_bytes())])
+        inventario = inventario_facturacion(self.carpeta)
+        self.assertEqual((inventario["zips"], inventario["documentos"]), (2, 1))
+        self.assertEqual([(z, x) for z, x, _ in inventario["errores"]], [("danado.zip", None)])
+
+
+
+class TestDescomprimirZip(unittest.TestCase):
+    """Pruebas para descomprimir_y_procesar_zip."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, ignore_errors=True)
+        self.zip_path = os.path.join(self.carpeta, "mes.zip")
+        with zipfile.ZipFile(self.zip_path, "w") as zip_ref:
+            for muestra in MUESTRAS[:2]:
+                zip_ref.writestr(muestra.name, muestra.read_bytes())
+            zip_ref.writestr("factura.pdf", b"%PDF-1.4 factura")
+        self.open_dir = os.path.join(self.carpeta, "openZip")
+        self.closed_dir = os.path.join(self.carpeta, "closedZip")
+
+    def descomprimir(self, archivar):
+        return descomprimir_y_procesar_zip("4_2025", self.zip_path, "mes.zip", self.open_dir, self.closed_dir, archivar=archivar)
+
+    def test_lee_los_xml_en_memoria(self):
+        """Sin archivar devuelve los bytes de los XML, no escribe en openZip y mueve el ZIP."""
+        origen, xmls = self.descomprimir(False)
+        self.assertEqual(xmls, [(m.name, m.read_bytes()) for m in MUESTRAS[:2]])
+        self.assertEqual(origen, os.path.join(self.closed_dir, "mes.zip"))
+        self.assertFalse(os.path.exists(self.open_dir))
+        self.assertTrue(os.path.exists(origen))
+        self.assertFalse(os.path.exists(self.zip_path))
+
+    def test_crc_invalido(self):
+        """Un miembro dañado (aunque no sea XML) no pasa el CRC y el ZIP no se mueve."""
+        datos = Path(self.zip_path).read_bytes()
+        Path(self.zip_path).write_bytes(datos.replace(b"%PDF-1.4 factura", b"%PDF-1.4 FACTURA"))
+        with self.assertRaisesRegex(zipfile.BadZipFile, "CRC"):
+            leer_xml_zip("4_2025", self.zip_path, "mes.zip", self.open_dir, self.closed_dir)
+        with self.assertRaisesRegex(zipfile.BadZipFile, "CRC"):
+            self.descomprimir(False)
+        self.assertTrue(os.path.exists(self.zip_path))
+
+    def test_archivar_descomprime_el_zip(self):
+        """Con archivar además descomprime el ZIP completo en openZip/<mes>/<zip>/."""
+        origen, xmls = self.descomprimir(True)
+        self.assertEqual(origen, os.path.join(self.open_dir, "4_2025", "mes.zip"))
+        self.assertEqual(sorted(os.listdir(origen)), sorted([m.name for m in MUESTRAS[:2]] + ["factura.pdf"]))
+        for nombre, datos in xmls:
+            self.assertEqual(Path(origen, nombre).read_bytes(), datos)
+
+
+
+class TestExtraerZipsMes(unittest.TestCase):
+    """Pruebas para extraer_zips_mes (pipeline de extracción del mes)."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, ignore_errors=True)
+        self.base = os.path.join(self.carpeta, "zip")
+        os.makedirs(self.base)
+        # Tres ZIP en orden inverso de nombre al de las muestras, dos XML en cada uno
+        for i in range(3):
+            with zipfile.ZipFile(os.path.join(self.base, f"{2 - i}.zip"), "w") as zip_ref:
+                for muestra in MUESTRAS[2 * i:2 * i + 2]:
+                    zip_ref.writestr(muestra.name, muestra.read_bytes())
+        Path(self.base, "3.zip.crdownload").write_bytes(b"")
+
+    def extraer(self, **opciones):
+        rutas = [os.path.join(self.carpeta, nombre) for nombre in ("openZip", "closedZip", "voucher")]
+        return extraer_zips_mes(self.base, "4_2025", *rutas, os.path.join(self.carpeta, "cache.sqlite"), **opciones)
+
+    def test_orden_determinista_con_varios_hilos(self):
+        """Filas y vouchers quedan en el orden de los ZIP y de sus XML, con cualquier número de hilos."""
+        esperado = [extraer_datos_factura(str(m))[1].to_state() for i in (2, 1, 0) for m in MUESTRAS[2 * i:2 * i + 2]]
+        filas = self.extraer(parsers=4, tamano_cola=1, lectores=3)
+        self.assertEqual([fila.to_state() for fila in filas], esperado)
+        vouchers = VoucherStore(os.path.join(self.carpeta, "voucher"))
+        self.assertEqual(vouchers.keys(), [fila["FacturaID"] for fila in filas])
+        self.assertEqual(cargar_vouchers(os.path.join(self.carpeta, "voucher")), filas)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.carpeta, "voucher"))), ["vouchers-00000.jsonl", "vouchers.idx"])
+        self.assertEqual(os.listdir(self.base), ["3.zip.crdownload"])
+
+    def test_error_de_parseo_se_propaga(self):
+        """Un XML malformado detiene el pipeline y su ZIP no pasa a closedZip."""
+        with zipfile.ZipFile(os.path.join(self.base, "9.zip"), "w") as zip_ref:
+            zip_ref.writestr(MUESTRAS[0].name, MUESTRAS[0].read_bytes())
+            zip_ref.writestr("rota.xml", b"<AttachedDocument>")
+        with self.assertRaises(etree.XMLSyntaxError):
+            self.extraer(parsers=2, lectores=2)
+        self.assertIn("9.zip", os.listdir(self.base))
+        self.assertNotIn("9.zip", os.listdir(os.path.join(self.carpeta, "closedZip")))
+
+    def test_zip_sin_xml(self):
+        """Un ZIP sin XML se cierra sin pasar por el parseo."""
+        with zipfile.ZipFile(os.path.join(self.base, "9.zip"), "w") as zip_ref:
+            zip_ref.writestr("factura.pdf", b"%PDF")
+        self.assertEqual(len(self.extraer(parsers=1, lectores=1)), len(MUESTRAS))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.carpeta, "closedZip"))), ["0.zip", "1.zip", "2.zip", "9.zip"])
+
+    def test_manifiesto_sigue_con_un_xml_roto(self):
+        """Con manifiesto un XML malformado no detiene el mes; al corregirlo sólo se reintenta ese ZIP."""
+        with zipfile.ZipFile(os.path.join(self.base, "2.zip"), "a") as zip_ref:
+            zip_ref.writestr("rota.xml", b"<AttachedDocument>")
+        manifest = RunManifest(os.path.join(self.carpeta, "manifest.jsonl"))
+        self.addCleanup(manifest.close)
+
+        self.assertEqual(len(self.extraer(parsers=2, lectores=2, manifest=manifest)), len(MUESTRAS))
+        self.assertEqual(sorted(os.listdir(self.base)), ["2.zip", "3.zip.crdownload"])
+        self.assertEqual([(z, x) for z, x, _ in manifest.failures()], [("2.zip", None), ("2.zip", "rota.xml")])
+
+        # Se corrige el ZIP: sus XML con voucher (mismo CRC) salen del almacén sin volver a parsearse
+        esperado = [extraer_datos_factura(str(m))[1].to_state() for m in MUESTRAS[:2]]
+        with zipfile.ZipFile(os.path.join(self.base, "2.zip"), "w") as zip_ref:
+            for muestra in MUESTRAS[:2]:
+                zip_ref.writestr(muestra.name, muestra.read_bytes())
+        with mock.patch.object(tcExtracFacturacion, "extraer_datos_factura", side_effect=AssertionError("parseó")):
+            filas = self.extraer(parsers=1, lectores=1, manifest=manifest)
+        self.assertEqual([fila.to_state() for fila in filas], esperado)
+        self.assertEqual((manifest.zip_state("2.zip"), manifest.failures()), (WRITTEN, []))
+        self.assertIn("2.zip", os.listdir(os.path.join(self.carpeta, "closedZip")))
+
+    def test_retoma_una_ejecucion_cortada(self):
+        """Tras un corte las filas del mes se reconstruyen desde los vouchers: ninguna se pierde ni se repite."""
+        esperado = sorted(extraer_datos_factura(str(m))[1]["FacturaID"] for m in MUESTRAS)
+        voucher_dir = os.path.join(self.carpeta, "voucher")
+        escribir = tcExtracFacturacion.do_on_create_voucher
+        escritos = []
+
+        def cortar_en_el_cuarto(factura_id, texto, store):
+            if len(escritos) == 3:
+                raise OSError("disco lleno")
+            escribir(factura_id, texto, store)
+            escritos.append(factura_id)
+
+        ruta = os.path.join(self.carpeta, "manifest.jsonl")
+        with RunManifest(ruta) as manifest, \
+                mock.patch.object(tcExtracFacturacion, "do_on_create_voucher", side_effect=cortar_en_el_cuarto):
+            with self.assertRaises(OSError):
+                self.extraer(parsers=2, lectores=1, manifest=manifest)
+
+        manifest = RunManifest(ruta)
+        self.addCleanup(manifest.close)
+        anteriores = filas_sin_salida(manifest, voucher_dir)
+        self.assertEqual([fila["FacturaID"] for fila in anteriores], escritos)
+        filas = agregar_anteriores(anteriores, self.extraer(parsers=2, lectores=1, manifest=manifest))
+        self.assertEqual(sorted(fila["FacturaID"] for fila in filas), esperado)
+        self.assertEqual(manifest.failures(), [])
+
+        manifest.mark_outputs_written()
+        self.assertEqual(filas_sin_salida(manifest, voucher_dir), [])
+        self.assertEqual(self.extraer(parsers=1, lectores=1, manifest=manifest), [])
+        self.assertEqual(sorted(VoucherStore(voucher_dir).keys()), esperado)
+        self.assertEqual(set(manifest.zips.values()), {WRITTEN})
+        self.assertEqual(os.listdir(self.base), ["3.zip.crdownload"])
+
+
+if __name__ == '__main__':
+    unittest.main()
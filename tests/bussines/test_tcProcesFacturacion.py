@@ -0,0 +1,111 @@
+"""
+Pruebas unitarias para la extracción de datos de factura del flujo interactivo.
+"""
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from decimal import Decimal
+from unittest import mock
+
+from bussines.tcProcesFacturacion import extraer_datos_factura, leer_factura_embebida, limpiar_decimal
+from process.parse_cache import ParseCache
+from lxml import etree
+
+from process.records import VOUCHER_KEYS, LineItem, VoucherRow
+from muestras import MUESTRAS
+
+
+class TestExtraerDatosFactura(unittest.TestCase):
+    """Pruebas para extraer_datos_factura."""
+
+    def test_streaming_igual_a_arbol_completo(self):
+        """Leer el sobre por streaming produce los mismos datos."""
+        for muestra in MUESTRAS:
+            with self.subTest(muestra=muestra.name):
+                self.assertEqual(
+                    extraer_datos_factura(str(muestra), streaming=True),
+                    extraer_datos_factura(str(muestra)),
+                )
+
+    def test_bytes_del_zip_sin_abrir_el_archivo(self):
+        """Con datos (los bytes leídos del ZIP) no se abre xml_file y la fila es la misma."""
+        for muestra in MUESTRAS:
+            for streaming in (False, True):
+                with self.subTest(muestra=muestra.name, streaming=streaming):
+                    origen = str(Path("closedZip", "4_2025", "mes.zip", muestra.name))
+                    factura_id, fila = extraer_datos_factura(origen, streaming=streaming, datos=muestra.read_bytes())
+                    esperado_id, esperado = extraer_datos_factura(str(muestra), streaming=streaming)
+                    self.assertEqual((factura_id, fila.to_state()), (esperado_id, esperado.to_state()))
+                    self.assertEqual(fila.xml_file, origen)
+
+    def test_cache_devuelve_la_misma_fila(self):
+        """Con caché, la segunda lectura no abre el sobre y devuelve la misma fila."""
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta, True)
+        with ParseCache(Path(carpeta) / "cache.sqlite") as cache:
+            esperado = [extraer_datos_factura(str(m), cache=cache) for m in MUESTRAS]
+            with mock.patch("bussines.tcProcesFacturacion.leer_factura_embebida", side_effect=AssertionError("parseó")):
+                for muestra, fila in zip(MUESTRAS, esperado):
+                    with self.subTest(muestra=muestra.name):
+                        self.assertEqual(extraer_datos_factura(str(muestra), cache=cache), fila)
+            self.assertEqual((cache.hits, cache.misses), (len(MUESTRAS), len(MUESTRAS)))
+
+    def test_fila_es_un_registro_que_se_lee_como_dict(self):
+        """La fila es un VoucherRow sin __dict__ con las llaves y el orden del dict original."""
+        factura_id, fila = extraer_datos_factura(str(MUESTRAS[0]))
+        self.assertIsInstance(fila, VoucherRow)
+        self.assertFalse(hasattr(fila, "__dict__"))
+        self.assertEqual(fila["FacturaID"], factura_id)
+        self.assertEqual(list(fila.to_dict()), list(VOUCHER_KEYS))
+        self.assertEqual(VoucherRow.from_dict(fila.to_dict()), fila)
+        self.assertEqual(fila.get("NoExiste", "-"), "-")
+
+    def test_valor_total_decimal_y_voucher_json(self):
+        """ValorTotal queda en Decimal y el voucher JSON lo conserva exacto."""
+        _, fila = extraer_datos_factura(str(MUESTRAS[0]))
+        self.assertIsInstance(fila["ValorTotal"], Decimal)
+        texto = fila.to_json()
+        self.assertIsInstance(json.loads(texto)["ValorTotal"], str)
+        self.assertEqual(VoucherRow.from_json(texto), fila)
+
+    def test_una_linea_tipada_por_cada_linea_del_xml(self):
+        """Cada InvoiceLine o CreditNoteLine aparece una sola vez, como LineItem con montos Decimal."""
+        for muestra in MUESTRAS:
+            with self.subTest(muestra=muestra.name):
+                _, fila = extraer_datos_factura(str(muestra))
+                embebida = leer_factura_embebida(str(muestra)).strip().encode("utf-8")
+                descripciones = [
+                    linea.findtext(".//{*}Description")
+                    for linea in etree.fromstring(embebida).iter("{*}InvoiceLine", "{*}CreditNoteLine")
+                ]
+                self.assertTrue(all(isinstance(linea, LineItem) for linea in fila["Items"]))
+                self.assertEqual([linea.description for linea in fila["Items"]], descripciones)
+                for linea in fila["Items"]:
+                    self.assertIsInstance(linea.price, Decimal)
+                    self.assertEqual(linea.line_total, linea.quantity * linea.price)
+
+    def test_peaje_de_la_nota_credito(self):
+        """La nota crédito de peaje conserva los campos de factura, el peaje y la placa."""
+        muestra = next(m for m in MUESTRAS if m.name == "ad0900470252000250081eac8.xml")
+        _, fila = extraer_datos_factura(str(muestra))
+        self.assertEqual(fila["InvoiceType"], "NOTA_CREDITO")
+        self.assertEqual((fila["NombrePeaje"], fila["NumeroPlaca"]), ("PEAJE TEBAIDA", "TLZ455"))
+        self.assertEqual(fila["Items"][0].quantity, Decimal("1.00"))
+
+    def test_limpiar_decimal_exacto(self):
+        """Los enteros pierden los decimales sin redondeo de float; el resto queda igual."""
+        casos = {
+            "13000.00": "13000",
+            "13000.50": "13000.50",
+            "-250000.00": "-250000",
+            "12345678901234567.00": "12345678901234567",
+        }
+        for valor, esperado in casos.items():
+            with self.subTest(valor=valor):
+                self.assertEqual(limpiar_decimal(valor), esperado)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Pruebas unitarias para las salidas columnares (CSV / parquet).
+"""
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from bussines.tcCausar import escribir_excel_en_lote
+from bussines.tcSalidas import (
+    cargar_indice_salidas, escribir_salidas_columnares, escribir_salidas_incremental, pq
+)
+from objects.fo_obj_plantilla import ColumnConfig, do_on_get_columns
+from filas_prueba import fila_ejemplo
+
+PLANTILLA = Path(__file__).resolve().parents[2] / "main" / "build" / "tenant" / "turboCarga" / "plantilla.json"
+
+
+def hojas_excel_como_texto(path_excel):
+    wb = load_workbook(path_excel)
+    return {
+        ws.title: [["" if valor is None else valor for valor in fila] for fila in ws.iter_rows(values_only=True)]
+        for ws in wb.worksheets
+    }
+
+
+def leer_csv(path_csv):
+    with open(path_csv, "r", encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+class TestSalidasColumnares(unittest.TestCase):
+    """Pruebas para escribir_salidas_columnares."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.path_base = os.path.join(self.carpeta, "documento_4_2025")
+        self.cabeceras = do_on_get_columns(str(PLANTILLA))
+        self.datos = [fila_ejemplo(1), fila_ejemplo(10, "NCPP", "NOTA_CREDITO"), fila_ejemplo(2)]
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def test_csv_coincide_con_excel(self):
+        """Cada CSV tiene exactamente las celdas de su hoja Excel."""
+        escribir_excel_en_lote(f"{self.path_base}.xlsx", self.cabeceras, self.datos)
+        escribir_salidas_columnares(self.path_base, self.cabeceras, self.datos, ["xlsx", "csv"])
+
+        hojas = hojas_excel_como_texto(f"{self.path_base}.xlsx")
+        for hoja, filas in hojas.items():
+            self.assertEqual(leer_csv(f"{self.path_base}_{hoja}.csv"), filas)
+
+    def test_csv_anexar_no_repite_cabecera(self):
+        """En modo anexar las filas nuevas se agregan al final del CSV."""
+        escribir_salidas_columnares(self.path_base, self.cabeceras, self.datos[:1], ["csv"])
+        escribir_salidas_columnares(self.path_base, self.cabeceras, self.datos[2:], ["csv"], anexar=True)
+
+        filas = leer_csv(f"{self.path_base}_FACTURA.csv")
+        self.assertEqual(len(filas), 3)
+        self.assertEqual([fila[8] for fila in filas[1:]], ["1", "2"])
+
+    def test_csv_incremental_sin_excel_conserva_ejecuciones_previas(self):
+        """Un tenant sólo csv anexa cada ejecución con su propio índice, sin depender del Excel."""
+        primera, segunda = self.datos[:2], self.datos[2:]
+        escribir_salidas_incremental(self.path_base, self.cabeceras, primera, ["csv"], historico=lambda: primera)
+        # Segunda ejecución: los ZIP de la primera ya están en closedZip
+        escribir_salidas_incremental(self.path_base, self.cabeceras, segunda, ["csv"], historico=lambda: self.datos)
+        escribir_salidas_incremental(self.path_base, self.cabeceras, segunda, ["csv"])
+
+        self.assertFalse(os.path.exists(f"{self.path_base}.xlsx"))
+        self.assertEqual([fila[8] for fila in leer_csv(f"{self.path_base}_FACTURA.csv")[1:]], ["1", "2"])
+        self.assertEqual(len(leer_csv(f"{self.path_base}_NOTA_CREDITO.csv")), 2)
+        self.assertEqual(cargar_indice_salidas(self.path_base, ["csv"]), {"PR1", "PR2", "NCPP10"})
+
+    def test_csv_sin_indice_se_reescribe_con_el_historico(self):
+        """Sin índice (o con otros formatos) las salidas se reescriben con todas las facturas del mes."""
+        escribir_salidas_columnares(self.path_base, self.cabeceras, self.datos[:1], ["csv"])
+        os.remove(f"{self.path_base}.salidas.idx.json")
+        self.assertIsNone(cargar_indice_salidas(self.path_base, ["csv"]))
+
+        escribir_salidas_incremental(self.path_base, self.cabeceras, self.datos[2:], ["xlsx", "csv"],
+                                     historico=lambda: self.datos)
+
+        self.assertEqual([fila[8] for fila in leer_csv(f"{self.path_base}_FACTURA.csv")[1:]], ["1", "2"])
+        self.assertIsNone(cargar_indice_salidas(self.path_base, ["csv", "parquet"]))
+
+    @unittest.skipIf(pq is None, "pyarrow no está instalado")
+    def test_parquet_coincide_con_excel(self):
+        """El parquet tiene las mismas filas y columnas que la hoja Excel."""
+        escribir_excel_en_lote(f"{self.path_base}.xlsx", self.cabeceras, self.datos)
+        escribir_salidas_columnares(self.path_base, self.cabeceras, self.datos, ["parquet"])
+
+        hojas = hojas_excel_como_texto(f"{self.path_base}.xlsx")
+        for hoja, filas in hojas.items():
+            tabla = pq.read_table(f"{self.path_base}_{hoja}.parquet")
+            self.assertEqual(tabla.column_names, filas[0])
+            valores = [["" if valor is None else valor for valor in fila.values()] for fila in tabla.to_pylist()]
+            self.assertEqual(valores, filas[1:])
+
+    def test_salidas_en_plantilla(self):
+        """La clave 'salidas' de plantilla.json selecciona los formatos."""
+        self.assertEqual(ColumnConfig.from_json('{"columns": []}').salidas, ["xlsx"])
+        self.assertEqual(ColumnConfig.from_json('{"columns": [], "salidas": ["CSV", "xlsx"]}').salidas, ["csv", "xlsx"])
+        with self.assertRaises(ValueError):
+            ColumnConfig.from_json('{"columns": [], "salidas": ["pdf"]}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,12 @@ from pathlib import Path
 root_dir = Path(__file__).parent.absolute()
 sys.path.insert(0, str(root_dir))
 
+# El código de main/ se importa relativo a main/ (``from process.records import ...``,
+# ``from plantilla.constants import Constants``), igual que al ejecutar la aplicación
+main_dir = root_dir.parent / "main"
+if str(main_dir) not in sys.path:
+    sys.path.insert(0, str(main_dir))
+
 # Configurar variables de entorno para pruebas
 os.environ["DEBUG"] = "True"
 os.environ["LOG_LEVEL"] = "DEBUG"
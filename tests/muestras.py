@@ -0,0 +1,7 @@
+"""
+Facturas de ejemplo compartidas por las pruebas.
+"""
+from pathlib import Path
+
+# AttachedDocuments reales de main/test (peajes y facturas de proveedores)
+MUESTRAS = sorted((Path(__file__).resolve().parent.parent / "main" / "test").glob("*/*.xml"))
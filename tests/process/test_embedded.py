@@ -0,0 +1,96 @@
+"""
+Pruebas unitarias para la lectura de la factura embebida desde los bytes del sobre.
+"""
+import logging
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from process.envelope import embedded_invoice_text, read_envelope
+from process.embedded import locate_embedded_invoice, parse_embedded_invoice, read_embedded_invoice
+from process.invoice_processor import ENVELOPE_BYTES, InvoiceFormatError, InvoiceProcessor
+from muestras import MUESTRAS
+
+
+def sin_metadatos(datos):
+    return {k: v for k, v in datos.items() if k not in ('xml_file', 'processing_timestamp')}
+
+
+class TestEmbedded(unittest.TestCase):
+    """Pruebas para process.embedded y el modo envelope_mode='bytes'."""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.getLogger("main").setLevel(logging.CRITICAL)
+
+    def setUp(self):
+        self.carpeta = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.carpeta, ignore_errors=True)
+        self.arbol = InvoiceProcessor()
+        self.bytes = InvoiceProcessor(envelope_mode=ENVELOPE_BYTES)
+
+    def copia(self, nombre, datos):
+        ruta = self.carpeta / nombre
+        ruta.write_bytes(datos)
+        return ruta
+
+    def test_tramo_igual_al_texto_de_la_descripcion(self):
+        """El tramo ubicado es el texto embebido que da el sobre parseado, sin copiarlo."""
+        for muestra in MUESTRAS:
+            with self.subTest(muestra=muestra.name):
+                datos = muestra.read_bytes()
+                inicio, fin = locate_embedded_invoice(datos)
+                esperado = embedded_invoice_text(read_envelope(str(muestra)).payload)
+                self.assertEqual(datos[inicio:fin].decode('utf-8').replace('\r\n', '\n'), esperado)
+
+    def test_procesador_sin_parsear_el_sobre(self):
+        """El modo 'bytes' da el mismo registro que el modo árbol sin parsear el sobre."""
+        esperados = [sin_metadatos(self.arbol.process_invoice(muestra)[1]) for muestra in MUESTRAS]
+        with mock.patch.object(InvoiceProcessor, '_extract_embedded_invoice', side_effect=AssertionError("parseó el sobre")):
+            for muestra, esperado in zip(MUESTRAS, esperados):
+                with self.subTest(muestra=muestra.name):
+                    self.assertEqual(sin_metadatos(self.bytes.process_invoice(muestra)[1]), esperado)
+
+    def test_sobres_no_habituales_usan_el_camino_de_texto(self):
+        """Sin CDATA, con otra codificación o con otros prefijos se lee como en el modo árbol."""
+        datos = MUESTRAS[0].read_bytes()
+        inicio, fin = locate_embedded_invoice(datos)
+        escapado = datos[inicio:fin].replace(b'&', b'&amp;').replace(b'<', b'&lt;').replace(b'>', b'&gt;')
+        sin_cdata = datos[:datos.rindex(b'<![CDATA[', 0, inicio)] + escapado + datos[datos.index(b']]>', fin) + 3:]
+        latin = datos.replace(b'encoding="utf-8"', b'encoding="ISO-8859-1"', 1)
+        otros_prefijos = datos.replace(b'cac:', b'agg:').replace(b'xmlns:cac=', b'xmlns:agg=')
+        for nombre, variante in [("sin_cdata", sin_cdata), ("latin", latin), ("prefijos", otros_prefijos)]:
+            with self.subTest(variante=nombre):
+                self.assertNotEqual(variante, datos)
+                self.assertIsNone(locate_embedded_invoice(variante))
+                ruta = self.copia(f"{nombre}.xml", variante)
+                self.assertEqual(
+                    sin_metadatos(self.bytes.process_invoice(ruta)[1]),
+                    sin_metadatos(self.arbol.process_invoice(ruta)[1]),
+                )
+
+    def test_errores(self):
+        """Factura embebida inválida o archivo vacío: InvoiceFormatError, como en el modo árbol."""
+        datos = MUESTRAS[0].read_bytes()
+        inicio, _ = locate_embedded_invoice(datos)
+        rota = self.copia("rota.xml", datos[:inicio] + b'<roto>' + datos[inicio:])
+        vacio = self.copia("vacio.xml", b'')
+        self.assertIsNone(read_embedded_invoice(vacio))
+        for ruta in (rota, vacio):
+            with self.subTest(ruta=ruta.name):
+                with self.assertRaises(InvoiceFormatError):
+                    self.bytes.process_invoice(ruta)
+                with self.assertRaises(InvoiceFormatError):
+                    self.arbol.process_invoice(ruta)
+
+    def test_buffer_en_memoria(self):
+        """parse_embedded_invoice acepta los bytes ya leídos (p. ej. con la caché)."""
+        raiz = parse_embedded_invoice(MUESTRAS[0].read_bytes())
+        self.assertTrue(raiz.tag.endswith('}Invoice'))
+        self.assertIsNone(parse_embedded_invoice(b'<Invoice/>'))
+
+
+if __name__ == "__main__":
+    unittest.main()
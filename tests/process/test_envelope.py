@@ -0,0 +1,109 @@
+"""
+Pruebas unitarias para la lectura por streaming del sobre AttachedDocument.
+"""
+import io
+import itertools
+import logging
+import unittest
+
+from lxml import etree
+
+from process.envelope import embedded_invoice_text, read_envelope
+from process.xml_parser import get_parser
+from process.invoice_processor import (
+    ENVELOPE_STREAM, InvoiceFormatError, InvoiceProcessor, XML_NAMESPACES
+)
+from muestras import MUESTRAS
+
+SOBRE = (
+    '<AttachedDocument xmlns="urn:oasis:names:specification:ubl:schema:xsd:AttachedDocument-2" '
+    'xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" '
+    'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">{}</AttachedDocument>'
+)
+
+
+def adjunto(texto):
+    return f'<cac:Attachment><cac:ExternalReference><cbc:Description>{texto}</cbc:Description></cac:ExternalReference></cac:Attachment>'
+
+
+def descripcion_arbol(xml):
+    # Mismo parser que usa el modo 'tree' del procesador
+    elem = etree.fromstring(xml, get_parser(huge_tree=True)).find('.//cac:Attachment/cac:ExternalReference/cbc:Description', XML_NAMESPACES)
+    return None if elem is None else elem.text
+
+
+class TestEnvelope(unittest.TestCase):
+    """Pruebas para read_envelope y el modo envelope_mode='stream'."""
+
+    def test_muestras_igual_al_arbol_completo(self):
+        """El texto embebido coincide con el de find() sobre el árbol completo."""
+        for muestra in MUESTRAS:
+            with self.subTest(muestra=muestra.name):
+                self.assertEqual(read_envelope(str(muestra)).payload, descripcion_arbol(muestra.read_bytes()))
+
+    def test_primera_coincidencia_y_rutas_que_no_aplican(self):
+        """Sólo cuenta Attachment/ExternalReference/Description; gana la primera en orden de documento."""
+        casos = [
+            '<cbc:Description>suelta</cbc:Description>' + adjunto('primera') + adjunto('segunda'),
+            '<cac:ExternalReference><cbc:Description>sin adjunto</cbc:Description></cac:ExternalReference>' + adjunto('real'),
+            '<cac:Otro>' + adjunto('anidada') + '</cac:Otro>' + adjunto('después'),
+            adjunto(''),
+            '',
+        ]
+        for cuerpo in casos:
+            xml = SOBRE.format(cuerpo).encode('utf-8')
+            with self.subTest(cuerpo=cuerpo):
+                self.assertEqual(read_envelope(io.BytesIO(xml)).payload, descripcion_arbol(xml))
+
+    def test_el_attachment_raiz_no_cuenta(self):
+        """Como './/cac:Attachment', un Attachment raíz no coincide."""
+        xml = (
+            '<cac:Attachment xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" '
+            'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+            '<cac:ExternalReference><cbc:Description>x</cbc:Description></cac:ExternalReference></cac:Attachment>'
+        ).encode('utf-8')
+        self.assertIsNone(read_envelope(io.BytesIO(xml)).payload)
+        self.assertIsNone(descripcion_arbol(xml))
+
+    def test_documento_directo(self):
+        """Una Invoice sin sobre se devuelve completa."""
+        xml = b'<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"><a/><b/></Invoice>'
+        sobre = read_envelope(io.BytesIO(xml))
+        self.assertIsNone(sobre.payload)
+        self.assertEqual(len(sobre.document), 2)
+
+    def test_procesador_en_modo_stream(self):
+        """process_invoice da el mismo resultado leyendo el sobre por streaming."""
+        logging.getLogger("main").setLevel(logging.WARNING)
+        arbol, stream = InvoiceProcessor(), InvoiceProcessor(envelope_mode=ENVELOPE_STREAM)
+        for muestra in MUESTRAS:
+            with self.subTest(muestra=muestra.name):
+                esperado, obtenido = arbol.process_invoice(muestra)[1], stream.process_invoice(muestra)[1]
+                esperado.pop('processing_timestamp')
+                obtenido.pop('processing_timestamp')
+                self.assertEqual(obtenido, esperado)
+
+    def test_sobre_sin_factura(self):
+        """Sin descripción embebida el modo stream falla igual que el modo árbol."""
+        processor = InvoiceProcessor(envelope_mode=ENVELOPE_STREAM)
+        with self.assertRaises(InvoiceFormatError):
+            processor._parse_embedded_invoice(read_envelope(io.BytesIO(SOBRE.format('').encode('utf-8'))).payload)
+
+    def test_texto_embebido_igual_al_recorte_anterior(self):
+        """embedded_invoice_text recorta igual que strip() + split('<![CDATA[') + split(']]>')."""
+        def anterior(texto):
+            if not texto:
+                return None
+            contenido = texto.strip()
+            if '<![CDATA[' in contenido and ']]>' in contenido:
+                contenido = contenido.split('<![CDATA[')[1].split(']]>')[0].strip()
+            return contenido
+
+        piezas = ['<![CDATA[', ']]>', ' ', '\n', 'a', '<x/>']
+        casos = [''.join(p) for p in itertools.product(piezas, repeat=4)] + [None, '']
+        for texto in casos:
+            self.assertEqual(embedded_invoice_text(texto), anterior(texto), repr(texto))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Pruebas unitarias para la lectura de sólo la cabecera de la factura.
+"""
+import io
+import logging
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from lxml import etree
+
+from process import header
+from process.header import InvoiceHeader, read_header
+from process.invoice_processor import InvoiceDataError, InvoiceFormatError, InvoiceProcessor
+from muestras import MUESTRAS
+
+FACTURA = (
+    '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2" '
+    'xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" '
+    'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">{}</Invoice>'
+)
+
+
+class TestHeader(unittest.TestCase):
+    """Pruebas para read_header y InvoiceProcessor.process_invoice_header."""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.getLogger("main").setLevel(logging.CRITICAL)
+
+    def setUp(self):
+        self.procesador = InvoiceProcessor()
+
+    def test_muestras_igual_al_registro_completo(self):
+        """Tipo, ID y fecha coinciden con los de process_invoice_record."""
+        for muestra in MUESTRAS:
+            with self.subTest(muestra=muestra.name):
+                registro = self.procesador.process_invoice_record(muestra)
+                cabecera = self.procesador.process_invoice_header(muestra)
+                self.assertEqual(tuple(cabecera), (registro.invoice_type, registro.invoice_id, registro.issue_date))
+                anio, mes, _ = registro.issue_date.split('-')
+                self.assertEqual(cabecera.period, f"{int(mes)}_{anio}")
+
+    def test_se_detiene_en_los_campos_pedidos(self):
+        """Lo que viene después de los campos pedidos no se lee (ni un error de sintaxis)."""
+        lineas = '<cac:InvoiceLine><cbc:ID>1</cbc:ID></cac:InvoiceLine>' * 2000
+        xml = FACTURA.format(
+            '<cbc:UBLVersionID>UBL 2.1</cbc:UBLVersionID><cac:Otro><cbc:ID>anidado</cbc:ID></cac:Otro>'
+            '<cbc:ID> PR1 </cbc:ID><cbc:IssueDate>2025-04-11</cbc:IssueDate>' + lineas + '<roto>'
+        ).encode('utf-8')
+        with self.assertRaises(etree.XMLSyntaxError):
+            etree.fromstring(xml)
+        entrada = io.BytesIO(xml)
+        self.assertEqual(read_header(entrada), InvoiceHeader('INVOICE', 'PR1', '2025-04-11'))
+        self.assertLess(entrada.tell(), len(xml) // 10)
+        self.assertEqual(read_header(io.BytesIO(xml), ('invoice_id',)), InvoiceHeader('INVOICE', 'PR1', None))
+
+    def test_campos_faltantes(self):
+        """Un campo pedido que no está queda en '' y el procesador lo rechaza."""
+        xml = FACTURA.format('<cbc:IssueDate>2025-04-11</cbc:IssueDate>').encode('utf-8')
+        self.assertEqual(read_header(io.BytesIO(xml)), InvoiceHeader('INVOICE', '', '2025-04-11'))
+        self.assertIsNone(InvoiceHeader('INVOICE', 'PR1', '11/04/2025').period)
+        with self.assertRaises(ValueError):
+            read_header(io.BytesIO(xml), ('invoice_id', 'supplier_name'))
+
+        carpeta = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, carpeta, ignore_errors=True)
+        ruta = carpeta / "sin_id.xml"
+        ruta.write_bytes(xml)
+        with self.assertRaises(InvoiceDataError):
+            self.procesador.process_invoice_header(ruta)
+        sobre = carpeta / "sin_factura.xml"
+        sobre.write_text('<AttachedDocument/>', encoding="utf-8")
+        with self.assertRaises(InvoiceFormatError):
+            self.procesador.process_invoice_header(sobre)
+
+    def test_sobre_se_lee_hasta_la_descripcion(self):
+        """Del sobre sólo se lee hasta la factura embebida; lo que sigue no se lee."""
+        for muestra in MUESTRAS:
+            with self.subTest(muestra=muestra.name):
+                datos = muestra.read_bytes()
+                entrada = io.BytesIO(datos)
+                read_header(entrada)
+                fin_descripcion = datos.index(b'</cbc:Description>', datos.index(b'<cac:Attachment'))
+                self.assertLess(entrada.tell(), fin_descripcion + 2 * header.PULL_CHUNK_SIZE)
+                self.assertLess(entrada.tell(), len(datos))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,7 +8,7 @@ from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 # Importar el procesador de facturas
-from main.process.invoice_processor import InvoiceProcessor, InvoiceProcessingError, InvoiceFormatError, InvoiceDataError
+from process.invoice_processor import InvoiceProcessor, InvoiceProcessingError, InvoiceFormatError, InvoiceDataError
 
 # Directorio de datos de prueba
 TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data')
@@ -231,7 +231,7 @@ class TestInvoiceProcessor(unittest.TestCase):
     
     def test_extract_toll_data(self):
         """Probar la extracción de datos de peaje."""
-        from main.process.invoice_processor import InvoiceProcessor
+        from process.invoice_processor import InvoiceProcessor
         
         processor = InvoiceProcessor()
         
@@ -0,0 +1,179 @@
+"""
+Pruebas unitarias para la caché de facturas por hash de contenido.
+"""
+import logging
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from process.invoice_processor import (
+    ENVELOPE_STREAM, PARSER_VERSION, InvoiceProcessor
+)
+from process.parse_cache import ParseCache, content_digest
+from muestras import MUESTRAS
+
+
+def sin_metadatos(datos):
+    return {k: v for k, v in datos.items() if k not in ('xml_file', 'processing_timestamp')}
+
+
+class TestParseCache(unittest.TestCase):
+    """Pruebas para ParseCache y el parámetro cache de InvoiceProcessor."""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.getLogger("main").setLevel(logging.WARNING)
+
+    def setUp(self):
+        self.carpeta = Path(tempfile.mkdtemp())
+        self.ruta = self.carpeta / "cache" / "facturas.sqlite"
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def test_acierto_no_parsea_el_xml(self):
+        """La segunda lectura sale de la caché, igual a la primera y sin tocar lxml."""
+        with ParseCache(self.ruta) as cache:
+            procesador = InvoiceProcessor(cache=cache)
+            primeros = [procesador.process_invoice(m) for m in MUESTRAS]
+            self.assertEqual((cache.hits, cache.misses), (0, len(MUESTRAS)))
+
+            with mock.patch.object(InvoiceProcessor, '_read_invoice_root', side_effect=AssertionError("parseó")):
+                for muestra, (factura_id, datos) in zip(MUESTRAS, primeros):
+                    with self.subTest(muestra=muestra.name):
+                        id_cache, datos_cache = procesador.process_invoice(muestra)
+                        self.assertEqual(id_cache, factura_id)
+                        self.assertEqual(sin_metadatos(datos_cache), sin_metadatos(datos))
+                        self.assertEqual(datos_cache['xml_file'], str(muestra))
+            self.assertEqual((cache.hits, cache.misses), (len(MUESTRAS), len(MUESTRAS)))
+
+    def test_persiste_y_se_comparte_entre_modos(self):
+        """Otra instancia sobre el mismo archivo acierta, y la clave no depende del modo de lectura."""
+        with ParseCache(self.ruta) as cache:
+            InvoiceProcessor(cache=cache).process_invoice(MUESTRAS[0])
+        with ParseCache(self.ruta) as cache:
+            InvoiceProcessor(envelope_mode=ENVELOPE_STREAM, cache=cache).process_invoice(MUESTRAS[0])
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_contenido_distinto_o_version_distinta_falla(self):
+        """Cambiar un byte del archivo o la versión del extractor produce un fallo."""
+        copia = self.carpeta / "copia.xml"
+        copia.write_bytes(MUESTRAS[0].read_bytes() + b"\n")
+        with ParseCache(self.ruta) as cache:
+            procesador = InvoiceProcessor(cache=cache)
+            procesador.process_invoice(MUESTRAS[0])
+            procesador.process_invoice(copia)
+            self.assertEqual(cache.misses, 2)
+            digest = content_digest(MUESTRAS[0].read_bytes())
+            self.assertIsNotNone(cache.get(digest, PARSER_VERSION))
+            self.assertIsNone(cache.get(digest, PARSER_VERSION + '-otra'))
+
+    def test_desalojo_por_tamano(self):
+        """Al superar max_bytes se eliminan las entradas menos usadas recientemente."""
+        valor = {'texto': 'x' * 50, 'lista': list(range(20))}
+        with ParseCache(self.ruta, max_bytes=10 ** 9) as cache:
+            cache.put('a', 'v', valor)
+            tamano = cache.stats()['bytes']
+        with ParseCache(self.ruta, max_bytes=tamano * 3) as cache:
+            cache.put('b', 'v', valor)
+            cache.put('c', 'v', valor)
+            with mock.patch('process.parse_cache.time.time', return_value=10 ** 10):
+                self.assertIsNotNone(cache.get('a', 'v'))
+                cache.put('d', 'v', valor)
+            estadisticas = cache.stats()
+            self.assertLessEqual(estadisticas['bytes'], tamano * 3)
+            self.assertGreater(estadisticas['evictions'], 0)
+            self.assertIsNotNone(cache.get('a', 'v'))
+            self.assertIsNotNone(cache.get('d', 'v'))
+            self.assertIsNone(cache.get('b', 'v'))
+
+    def test_desalojo_fallido_no_descuenta_bytes(self):
+        """Si el DELETE del desalojo falla, el total de bytes sigue siendo el real."""
+        valor = {'texto': 'x' * 50, 'lista': list(range(20))}
+        with ParseCache(self.ruta, max_bytes=10 ** 9) as cache:
+            cache.put('a', 'v', valor)
+            tamano = cache.stats()['bytes']
+        with ParseCache(self.ruta, max_bytes=tamano * 2) as cache:
+            cache.put('b', 'v', valor)
+            escribir = cache._write_many
+
+            def delete_bloqueado(sql, filas):
+                if sql.startswith("DELETE"):
+                    raise sqlite3.OperationalError("database is locked")
+                escribir(sql, filas)
+
+            with mock.patch.object(cache, '_write_many', side_effect=delete_bloqueado):
+                cache.put('c', 'v', valor)
+            self.assertEqual((cache.write_errors, cache.evictions), (1, 0))
+            self.assertEqual(cache.stats()['bytes'], tamano * 3)
+            cache.put('d', 'v', valor)
+            self.assertGreater(cache.evictions, 0)
+            self.assertLessEqual(cache.stats()['bytes'], tamano * 2)
+
+    def test_estadisticas(self):
+        """stats() cuenta entradas, aciertos, fallos y la tasa de aciertos."""
+        with ParseCache(self.ruta) as cache:
+            self.assertEqual(cache.stats()['hit_rate'], 0.0)
+            cache.put('a', 'v', {'n': 1})
+            cache.put('a', 'v', {'n': 2})
+            self.assertEqual(cache.get('a', 'v'), {'n': 2})
+            self.assertIsNone(cache.get('b', 'v'))
+            estadisticas = cache.stats()
+            self.assertEqual(estadisticas['entries'], 1)
+            self.assertEqual((estadisticas['hits'], estadisticas['misses']), (1, 1))
+            self.assertEqual(estadisticas['hit_rate'], 0.5)
+            cache.clear()
+            self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_dos_conexiones_no_se_bloquean(self):
+        """Cada escritura se confirma al momento: otra conexión escribe sin esperar el bloqueo."""
+        with mock.patch('process.parse_cache.LOCK_TIMEOUT', 0.1):
+            with ParseCache(self.ruta) as primera, ParseCache(self.ruta) as segunda:
+                primera.put('a', 'v', {'n': 1})
+                self.assertEqual(segunda.get('a', 'v'), {'n': 1})
+                segunda.put('b', 'v', {'n': 2})
+                primera.put('c', 'v', {'n': 3})
+                self.assertEqual(primera.get('b', 'v'), {'n': 2})
+                self.assertEqual(primera.write_errors + segunda.write_errors, 0)
+
+    def test_base_bloqueada_omite_la_escritura(self):
+        """Si otro proceso retiene el bloqueo, put no falla: la entrada no se guarda."""
+        with mock.patch('process.parse_cache.LOCK_TIMEOUT', 0.1):
+            with ParseCache(self.ruta) as cache:
+                cache.put('a', 'v', {'n': 1})
+                self.assertIsNotNone(cache.get('a', 'v'))
+                otra = sqlite3.connect(str(self.ruta), isolation_level=None)
+                otra.execute("BEGIN IMMEDIATE")
+                try:
+                    cache.put('b', 'v', {'n': 2})
+                    cache.flush()
+                finally:
+                    otra.execute("ROLLBACK")
+                    otra.close()
+                self.assertEqual(cache.write_errors, 2)
+                self.assertIsNone(cache.get('b', 'v'))
+                cache.put('b', 'v', {'n': 2})
+                self.assertEqual(cache.get('b', 'v'), {'n': 2})
+
+    def test_lectura_bloqueada_es_un_fallo(self):
+        """Si la lectura agota la espera del bloqueo, get cuenta un fallo en vez de lanzar el error."""
+        with ParseCache(self.ruta) as cache:
+            cache.put('a', 'v', {'n': 1})
+            bloqueada = mock.Mock(wraps=cache._conn)
+            bloqueada.execute.side_effect = sqlite3.OperationalError("database is locked")
+            with mock.patch.object(cache, '_conn', bloqueada):
+                self.assertIsNone(cache.get('a', 'v'))
+            self.assertEqual((cache.misses, cache.read_errors, cache.stats()['read_errors']), (1, 1, 1))
+            self.assertEqual(cache.get('a', 'v'), {'n': 1})
+
+    def test_max_bytes_invalido(self):
+        """max_bytes debe ser positivo."""
+        with self.assertRaises(ValueError):
+            ParseCache(self.ruta, max_bytes=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
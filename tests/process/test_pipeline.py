@@ -0,0 +1,92 @@
+"""
+Pruebas unitarias para el pipeline por etapas con colas acotadas.
+"""
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+
+from process.pipeline import Pipeline, Stage, format_metrics
+
+
+class TestPipeline(unittest.TestCase):
+    """Pruebas para Pipeline y StageMetrics."""
+
+    def test_etapas_en_orden_con_reparto_y_descarte(self):
+        """Cada etapa recibe lo que entrega la anterior; una etapa puede repartir o descartar."""
+        salida = []
+        lock = threading.Lock()
+
+        def juntar(x):
+            with lock:
+                salida.append(x)
+
+        metricas = Pipeline([
+            Stage("repartir", lambda n: range(n)),
+            Stage("pares", lambda x: (x * 10,) if x % 2 == 0 else (), workers=3),
+            Stage("juntar", juntar),
+        ], queue_size=2).run([3, 4, 5])
+
+        self.assertEqual(sorted(salida), [0, 0, 0, 20, 20, 20, 40])
+        self.assertEqual([(m.name, m.items_in, m.items_out) for m in metricas],
+                         [("repartir", 3, 12), ("pares", 12, 7), ("juntar", 7, 0)])
+
+    def test_contrapresion_acota_las_colas(self):
+        """Con una etapa lenta la cola no pasa de queue_size y la anterior queda bloqueada."""
+        metricas = Pipeline([
+            Stage("rapida", lambda x: (x,)),
+            Stage("lenta", lambda x: time.sleep(0.002)),
+        ], queue_size=3).run(range(60))
+
+        rapida, lenta = metricas
+        self.assertEqual(lenta.items_in, 60)
+        self.assertLessEqual(max(rapida.max_queue_depth, lenta.max_queue_depth), 3)
+        self.assertGreater(rapida.blocked_seconds, 0.02)
+        self.assertGreater(lenta.busy_seconds, rapida.busy_seconds)
+        self.assertIn("lenta", format_metrics(metricas, 1.0))
+
+    def test_setup_por_hilo(self):
+        """Cada hilo entra una vez en su setup y recibe su propio estado."""
+        abiertos = []
+
+        @contextmanager
+        def conexion():
+            estado = {"cerrado": False}
+            abiertos.append(estado)
+            yield estado
+            estado["cerrado"] = True
+
+        Pipeline([Stage("usar", lambda x, estado: None, workers=4, setup=conexion)]).run(range(20))
+        self.assertEqual(len(abiertos), 4)
+        self.assertTrue(all(estado["cerrado"] for estado in abiertos))
+
+    def test_error_detiene_el_pipeline(self):
+        """Un error en una etapa se vuelve a lanzar en run() sin dejar hilos colgados."""
+        def fallar(x):
+            if x == 5:
+                raise ValueError("XML malformado")
+            return (x,)
+
+        consumidos = []
+        pipeline = Pipeline([
+            Stage("fallar", fallar, workers=2),
+            Stage("lenta", lambda x: consumidos.append(x) or time.sleep(0.01)),
+        ], queue_size=1)
+        hilos = threading.active_count()
+        with self.assertRaisesRegex(ValueError, "XML malformado"):
+            pipeline.run(range(1000))
+        self.assertLess(len(consumidos), 1000)
+        self.assertEqual(threading.active_count(), hilos)
+
+    def test_configuracion_invalida(self):
+        """Sin etapas, con colas o hilos no positivos se rechaza la configuración."""
+        with self.assertRaises(ValueError):
+            Pipeline([])
+        with self.assertRaises(ValueError):
+            Pipeline([Stage("a", lambda x: None)], queue_size=0)
+        with self.assertRaises(ValueError):
+            Pipeline([Stage("a", lambda x: None, workers=0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Pruebas unitarias para el procesamiento por lotes (process_invoices).
+"""
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from process import invoice_processor
+from process.invoice_processor import EXTRACTION_SINGLE_PASS, InvoiceProcessor
+from process.parse_cache import ParseCache
+from muestras import MUESTRAS
+
+
+procesar_grupo = invoice_processor._process_chunk_in_worker
+
+
+def procesar_o_morir(chunk):
+    # Se ejecuta en el worker: un grupo con muere.xml termina el proceso sin pasar por Python
+    if any(ruta.endswith("muere.xml") for ruta in chunk):
+        os._exit(1)
+    return procesar_grupo(chunk)
+
+
+def sin_timestamp(datos):
+    return {k: v for k, v in datos.items() if k != 'processing_timestamp'}
+
+
+class TestProcessInvoices(unittest.TestCase):
+    """Pruebas para InvoiceProcessor.process_invoices."""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+        cls.carpeta = Path(tempfile.mkdtemp())
+        invalido = cls.carpeta / "invalido.xml"
+        invalido.write_text("<AttachedDocument><sin cerrar>", encoding="utf-8")
+        # Muestras repetidas con dos archivos que fallan intercalados
+        cls.rutas = [str(m) for m in MUESTRAS] * 3
+        cls.rutas.insert(2, str(cls.carpeta / "no_existe.xml"))
+        cls.rutas.insert(9, str(invalido))
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(cls.carpeta, ignore_errors=True)
+
+    def esperado(self, procesador):
+        resultado = []
+        for ruta in self.rutas:
+            try:
+                factura_id, datos = procesador.process_invoice(ruta)
+                resultado.append((ruta, factura_id, sin_timestamp(datos)))
+            except Exception:
+                resultado.append((ruta, None, None))
+        return resultado
+
+    def obtenido(self, resultados):
+        return [(r.xml_file, r.invoice_id, sin_timestamp(r.data) if r.ok else None) for r in resultados]
+
+    def test_orden_y_errores_por_archivo(self):
+        """Con y sin pool, los resultados siguen el orden de entrada y los errores no detienen el lote."""
+        procesador = InvoiceProcessor(extraction_mode=EXTRACTION_SINGLE_PASS)
+        esperado = self.esperado(procesador)
+        for workers, chunksize in ((1, 4), (2, 1), (2, 3), (3, 100)):
+            with self.subTest(workers=workers, chunksize=chunksize):
+                resultados = list(procesador.process_invoices(self.rutas, workers=workers, chunksize=chunksize))
+                self.assertEqual(self.obtenido(resultados), esperado)
+                fallidos = [r.xml_file for r in resultados if not r.ok]
+                self.assertEqual(fallidos, [self.rutas[2], self.rutas[9]])
+                self.assertTrue(all(r.error for r in resultados if not r.ok))
+
+    def test_generador_perezoso(self):
+        """Acepta un iterable y se puede cortar antes de terminar el lote."""
+        procesador = InvoiceProcessor()
+        resultados = procesador.process_invoices(iter(MUESTRAS * 50), workers=2, chunksize=2)
+        primeros = [next(resultados) for _ in range(3)]
+        resultados.close()
+        self.assertEqual([r.xml_file for r in primeros], [str(m) for m in MUESTRAS[:3]])
+
+    def test_cache_compartida_entre_procesos(self):
+        """Los procesos del pool escriben en la misma caché y la corrida siguiente acierta."""
+        ruta_cache = self.carpeta / "cache.sqlite"
+        with ParseCache(ruta_cache) as cache:
+            procesador = InvoiceProcessor(cache=cache)
+            primera = list(procesador.process_invoices(MUESTRAS, workers=2, chunksize=1))
+        with ParseCache(ruta_cache) as cache:
+            self.assertEqual(cache.stats()['entries'], len(MUESTRAS))
+            segunda = list(InvoiceProcessor(cache=cache).process_invoices(MUESTRAS, workers=1))
+            self.assertEqual((cache.hits, cache.misses), (len(MUESTRAS), 0))
+        self.assertEqual(self.obtenido(segunda), self.obtenido(primera))
+
+    def test_proceso_muerto_no_corta_el_lote(self):
+        """Si un proceso del pool muere, sólo el archivo que lo mata queda con error y el lote sigue."""
+        procesador = InvoiceProcessor()
+        muere = str(self.carpeta / "muere.xml")
+        rutas = [str(m) for m in MUESTRAS] * 2
+        rutas.insert(4, muere)
+        with mock.patch.object(invoice_processor, "_process_chunk_in_worker", procesar_o_morir):
+            resultados = list(procesador.process_invoices(rutas, workers=2, chunksize=2))
+
+        self.assertEqual([r.xml_file for r in resultados], rutas)
+        self.assertEqual([r.xml_file for r in resultados if not r.ok], [muere])
+        self.assertIn("BrokenProcessPool", resultados[4].error)
+        self.assertEqual(self.obtenido(resultados[:4]), self.obtenido(resultados[len(MUESTRAS) + 1:len(MUESTRAS) + 5]))
+
+    def test_chunksize_invalido(self):
+        """chunksize debe ser positivo y se valida al llamar, no al iterar."""
+        with self.assertRaises(ValueError):
+            InvoiceProcessor().process_invoices(MUESTRAS, chunksize=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Pruebas unitarias para los registros compactos InvoiceRecord y LineItem.
+"""
+import json
+import logging
+import unittest
+from decimal import Decimal
+
+from process.invoice_processor import EXTRACTION_MODES, InvoiceProcessor
+from process.records import InvoiceRecord, LineItem, format_amount, parse_amount
+from muestras import MUESTRAS
+
+
+class TestRecords(unittest.TestCase):
+    """Pruebas para InvoiceRecord, LineItem y process_invoice_record."""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_formato_de_montos(self):
+        """Mismas reglas de _clean_decimal, pero exactas: sin pasar por float."""
+        casos = [
+            # valor, sin force_int, con force_int
+            ('', '0', '0'), (None, '0', '0'), ('abc', '0', '0'), ('nan', '0', '0'), ('inf', '0', '0'),
+            ('0', '0.0', '0'), ('-0', '-0.0', '0'), ('2.0', '2.0', '2'), ('1.5', '1.5', '1.5'),
+            ('13000.00', '13000.0', '13000'), ('-250.5', '-250.5', '-250.5'), ('1E3', '1000.0', '1000'),
+            (' 7 ', '7.0', '7'), ('0.12345678901234', '0.123456789', '0.123456789'),
+            ('12345678901234567890.5', '12345678901234567890.5', '12345678901234567890.5'),
+            ('12345678901234567.00', '12345678901234567.0', '12345678901234567'),
+        ]
+        for valor, esperado, esperado_entero in casos:
+            with self.subTest(valor=valor):
+                self.assertEqual(format_amount(parse_amount(valor)), esperado)
+                self.assertEqual(format_amount(parse_amount(valor), force_int=True), esperado_entero)
+                self.assertEqual(InvoiceProcessor._clean_decimal(valor), esperado)
+
+    def test_total_de_linea_exacto(self):
+        """El total de la línea es cantidad * precio en Decimal, sin error de float."""
+        item = InvoiceProcessor()._build_item_data(
+            lambda path, default='': {'item_quantity': '3', 'item_price': '0.1'}.get(path.name, default))
+        self.assertEqual(item.line_total, Decimal('0.3'))
+        self.assertEqual(item.to_dict()['line_total'], '0.3')
+
+    def test_registro_y_diccionario(self):
+        """process_invoice es process_invoice_record().to_dict() con montos numéricos en el registro."""
+        for modo in EXTRACTION_MODES:
+            procesador = InvoiceProcessor(extraction_mode=modo)
+            for muestra in MUESTRAS:
+                with self.subTest(modo=modo, muestra=muestra.name):
+                    registro = procesador.process_invoice_record(muestra)
+                    factura_id, datos = procesador.process_invoice(muestra)
+                    datos.pop('processing_timestamp')
+                    esperado = registro.to_dict()
+                    esperado.pop('processing_timestamp')
+                    self.assertEqual(factura_id, registro.invoice_id)
+                    self.assertEqual(esperado, datos)
+                    self.assertIsInstance(registro.total_amount, Decimal)
+                    self.assertTrue(all(isinstance(item, LineItem) for item in registro.items))
+                    self.assertTrue(all(isinstance(item.line_total, Decimal) for item in registro.items))
+
+    def test_estado_serializable(self):
+        """to_state pasa por JSON y from_state reconstruye el mismo registro."""
+        procesador = InvoiceProcessor()
+        for muestra in MUESTRAS:
+            with self.subTest(muestra=muestra.name):
+                registro = procesador.process_invoice_record(muestra)
+                copia = InvoiceRecord.from_state(json.loads(json.dumps(registro.to_state())))
+                copia.xml_file = registro.xml_file
+                copia.processing_timestamp = registro.processing_timestamp
+                self.assertEqual(copia, registro)
+                self.assertEqual(copia.to_dict(), registro.to_dict())
+
+    def test_slots_y_textos_compartidos(self):
+        """Sin __dict__ por instancia y con los textos repetidos compartidos entre registros."""
+        procesador = InvoiceProcessor()
+        primero = procesador.process_invoice_record(MUESTRAS[0])
+        segundo = procesador.process_invoice_record(MUESTRAS[0])
+        self.assertFalse(hasattr(primero, '__dict__'))
+        self.assertFalse(hasattr(primero.items[0], '__dict__'))
+        for campo in ('invoice_type', 'invoice_prefix', 'currency', 'supplier_name', 'supplier_tax_id', 'toll_name'):
+            with self.subTest(campo=campo):
+                self.assertIs(getattr(primero, campo), getattr(segundo, campo))
+        self.assertIs(primero.items[0].description, segundo.items[0].description)
+
+    def test_claves_opcionales(self):
+        """related_invoice sólo en notas crédito y las partes sólo si existen."""
+        factura = InvoiceRecord('INVOICE', 'PR1', 'PR', '1', '2025-04-11', '11/04/2025', 'COP', None)
+        self.assertNotIn('related_invoice', factura.to_dict())
+        self.assertNotIn('supplier_name', factura.to_dict())
+        self.assertEqual(factura.to_dict()['total_amount'], '0')
+        nota = InvoiceRecord('CREDIT_NOTE', 'NC1', 'PR', '', '2025-04-11', '11/04/2025', 'COP', -250.5, '')
+        nota.set_party('customer', 'CLIENTE', '900')
+        datos = nota.to_dict()
+        self.assertEqual(datos['related_invoice'], '')
+        self.assertEqual((datos['customer_name'], datos['customer_tax_id']), ('CLIENTE', '900'))
+        self.assertEqual(datos['total_amount'], '-250.5')
+
+
+if __name__ == "__main__":
+    unittest.main()
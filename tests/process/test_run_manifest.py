@@ -0,0 +1,94 @@
+"""
+Pruebas unitarias para el manifiesto de ejecuciones de un tenant-mes.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from process.run_manifest import FAILED, PARSED, PENDING, WRITTEN, RunManifest
+
+
+class TestRunManifest(unittest.TestCase):
+    """Pruebas para RunManifest."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, ignore_errors=True)
+        self.ruta = os.path.join(self.carpeta, "manifest", "4_2025.jsonl")
+
+    def test_estados_y_reapertura(self):
+        """Al reabrir gana el último estado de cada ZIP y XML, con su CRC y su error."""
+        with RunManifest(self.ruta) as manifest:
+            self.assertEqual(manifest.start_run(), 1)
+            manifest.mark_zip("a.zip", PENDING)
+            manifest.mark_xml("a.zip", "1.xml", PENDING, crc=123)
+            manifest.mark_xml("a.zip", "2.xml", PENDING, crc=456)
+            manifest.mark_xml("a.zip", "1.xml", PARSED, invoice_id="PR1")
+            manifest.mark_xml("a.zip", "1.xml", WRITTEN, invoice_id="PR1")
+            manifest.mark_xml("a.zip", "2.xml", FAILED, error="XMLSyntaxError: rota")
+            manifest.mark_zip("a.zip", FAILED, error="1 XML con error")
+
+        manifest = RunManifest(self.ruta)
+        self.assertEqual(manifest.start_run(), 2)
+        self.assertEqual((manifest.xml_state("a.zip", "1.xml"), manifest.xml_crc("a.zip", "1.xml")), (WRITTEN, 123))
+        self.assertEqual(manifest.zip_state("a.zip"), FAILED)
+        self.assertIsNone(manifest.xml_state("b.zip", "1.xml"))
+        self.assertEqual(manifest.failures(), [("a.zip", None, "1 XML con error"), ("a.zip", "2.xml", "XMLSyntaxError: rota")])
+        self.assertEqual(manifest.summary()["xmls"], {PENDING: 0, PARSED: 0, WRITTEN: 1, FAILED: 1})
+        with self.assertRaises(ValueError):
+            manifest.mark_zip("a.zip", "terminado")
+        # Al cerrarse el ZIP se olvida el XML que ya no está en él
+        manifest.mark_zip("a.zip", WRITTEN)
+        manifest.close()
+        manifest = RunManifest(self.ruta)
+        self.assertEqual((manifest.failures(), manifest.xml_state("a.zip", "2.xml")), ([], None))
+        self.assertEqual(manifest.xml_state("a.zip", "1.xml"), WRITTEN)
+
+    def test_punto_de_control_de_salidas(self):
+        """unpublished_invoices lista lo escrito desde el último punto de control, sin repetir."""
+        with RunManifest(self.ruta) as manifest:
+            manifest.mark_xml("a.zip", "1.xml", WRITTEN, invoice_id="PR1")
+            manifest.mark_outputs_written()
+            manifest.mark_xml("a.zip", "2.xml", WRITTEN, invoice_id="PR2")
+            manifest.mark_xml("b.zip", "1.xml", WRITTEN, invoice_id="NC3")
+            manifest.mark_xml("a.zip", "2.xml", WRITTEN, invoice_id="PR2")
+            self.assertEqual(manifest.unpublished_invoices(), ["PR2", "NC3"])
+        manifest = RunManifest(self.ruta)
+        self.assertEqual(manifest.unpublished_invoices(), ["PR2", "NC3"])
+        manifest.mark_outputs_written()
+        self.assertEqual(RunManifest(self.ruta).unpublished_invoices(), [])
+
+    def test_linea_cortada(self):
+        """Una línea a medio escribir se ignora al abrir y se recorta antes de anexar."""
+        with RunManifest(self.ruta) as manifest:
+            manifest.mark_xml("a.zip", "1.xml", WRITTEN, invoice_id="PR1")
+        with open(self.ruta, "ab") as f:
+            f.write(b'{"zip": "a.zip", "xml": "2.x')
+
+        manifest = RunManifest(self.ruta)
+        self.assertIsNone(manifest.xml_state("a.zip", "2.xml"))
+        self.assertTrue(Path(self.ruta).read_bytes().endswith(b'"2.x'))  # abrir no modifica
+        manifest.mark_xml("a.zip", "2.xml", WRITTEN, invoice_id="PR2")
+        manifest.close()
+        self.assertEqual(RunManifest(self.ruta).unpublished_invoices(), ["PR1", "PR2"])
+        self.assertEqual(len(Path(self.ruta).read_bytes().splitlines()), 2)
+
+    def test_varios_hilos(self):
+        """Los hilos de una ejecución pueden marcar estados a la vez sin perder líneas."""
+        with RunManifest(self.ruta) as manifest:
+            def marcar(hilo):
+                for n in range(200):
+                    manifest.mark_xml(f"{hilo}.zip", f"{n}.xml", PARSED, invoice_id=f"PR{hilo}-{n}")
+            hilos = [threading.Thread(target=marcar, args=(hilo,)) for hilo in range(4)]
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        self.assertEqual(RunManifest(self.ruta).summary()["xmls"][PARSED], 800)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Pruebas de equivalencia entre el extractor de una sola pasada y las XPath.
+"""
+import random
+import unittest
+from pathlib import Path
+
+from lxml import etree
+
+from process.invoice_processor import (
+    EXTRACTION_SINGLE_PASS, InvoiceDataError, InvoiceProcessor
+)
+from muestras import MUESTRAS
+
+NS = (
+    'xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" '
+    'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2" '
+    'xmlns:otro="urn:otro"'
+)
+
+
+def documento(tipo, cuerpo):
+    raiz = 'Invoice' if tipo == 'INVOICE' else 'CreditNote'
+    return f'<{raiz} xmlns="urn:oasis:names:specification:ubl:schema:xsd:{raiz}-2" {NS}>{cuerpo}</{raiz}>'
+
+
+def linea(tipo, descripcion='Paso ROBLE SPX932 10189', cantidad='1', precio='13000.00', referencia='P1', extra=''):
+    etiqueta = 'cac:InvoiceLine' if tipo == 'INVOICE' else 'cac:CreditNoteLine'
+    partes = [extra]
+    if cantidad is not None:
+        partes.append(f'<cbc:InvoicedQuantity>{cantidad}</cbc:InvoicedQuantity>')
+    item = ''
+    if descripcion is not None:
+        item += f'<cbc:Description>{descripcion}</cbc:Description>'
+    if referencia is not None:
+        item += f'<cac:SellersItemIdentification><cbc:ID>{referencia}</cbc:ID></cac:SellersItemIdentification>'
+    partes.append(f'<cac:Item>{item}</cac:Item>')
+    if precio is not None:
+        partes.append(f'<cac:Price><cbc:PriceAmount>{precio}</cbc:PriceAmount></cac:Price>')
+    return f'<{etiqueta}>{"".join(partes)}</{etiqueta}>'
+
+
+def parte(rol, nombre='PEAJES SAS', nit='900470252', envolver=True):
+    campos = f'<cac:PartyLegalEntity><cbc:RegistrationName>{nombre}</cbc:RegistrationName><cbc:CompanyID>{nit}</cbc:CompanyID></cac:PartyLegalEntity>'
+    if envolver:
+        campos = f'<cac:Party>{campos}</cac:Party>'
+    return f'<cac:{rol}>{campos}</cac:{rol}>'
+
+
+def documento_aleatorio(rnd):
+    """Combina aleatoriamente los fragmentos que afectan la semántica de cada ruta."""
+    tipo = rnd.choice(['INVOICE', 'CREDIT_NOTE'])
+    fragmentos = []
+    if rnd.random() < 0.95:
+        fragmentos.append(f'<cbc:ID>{rnd.choice(["PR", "NCPP", "FE-", ""])}{rnd.randint(1, 99999)}</cbc:ID>')
+    if rnd.random() < 0.2:
+        fragmentos.append('<cbc:ID>  </cbc:ID>')
+    if rnd.random() < 0.95:
+        fragmentos.append(rnd.choice(['<cbc:IssueDate>2025-04-11</cbc:IssueDate>', '<cbc:IssueDate>11/04/2025</cbc:IssueDate>']))
+    if rnd.random() < 0.5:
+        fragmentos.append('<cbc:DocumentCurrencyCode>COP</cbc:DocumentCurrencyCode>')
+    opciones = [
+        '<cac:BillingReference><cac:InvoiceDocumentReference><cbc:ID>PR4107504</cbc:ID></cac:InvoiceDocumentReference></cac:BillingReference>',
+        '<cac:BillingReference><cac:InvoiceDocumentReference><cbc:ID></cbc:ID></cac:InvoiceDocumentReference></cac:BillingReference>',
+        '<cbc:ReferenceID>PR4100001</cbc:ReferenceID>',
+        '<cac:DiscrepancyResponse><cbc:ReferenceID>PR4100002</cbc:ReferenceID></cac:DiscrepancyResponse>',
+        '<otro:Extra><otro:ReferenceID>X-77</otro:ReferenceID></otro:Extra>',
+        '<cac:LegalMonetaryTotal><cbc:PayableAmount>13000.00</cbc:PayableAmount></cac:LegalMonetaryTotal>',
+        '<cac:LegalMonetaryTotal><cbc:LineExtensionAmount>1</cbc:LineExtensionAmount></cac:LegalMonetaryTotal>',
+        '<cac:Otro><cbc:PayableAmount>99</cbc:PayableAmount></cac:Otro>',
+        parte('AccountingSupplierParty'),
+        parte('AccountingSupplierParty', 'SEGUNDO', '1'),
+        parte('AccountingSupplierParty', envolver=False),
+        parte('AccountingCustomerParty', 'Turbo Carga Sas', '901008808'),
+        parte('AccountingCustomerParty', envolver=False),
+        '<cac:Delivery><cac:Party><cbc:RegistrationName>FUERA</cbc:RegistrationName></cac:Party></cac:Delivery>',
+        '<cbc:Description>Descripción de la factura</cbc:Description>',
+    ]
+    fragmentos += rnd.sample(opciones, rnd.randint(0, len(opciones)))
+    for _ in range(rnd.randint(0, 4)):
+        anidada = linea(tipo, descripcion='Ingresos para terceros: Paso ANDES  VAK142 2') if rnd.random() < 0.2 else ''
+        fragmentos.append(linea(
+            tipo,
+            descripcion=rnd.choice([None, '', 'Paso ROBLE SPX932 10189', 'DESCUENTO', 'Ingresos para terceros: Paso BTS ALBARRACIN  VAK142 10189_5901']),
+            cantidad=rnd.choice([None, '1', '2.0', '1.5', 'x']),
+            precio=rnd.choice([None, '13000.00', '-250.5', 'abc']),
+            referencia=rnd.choice([None, 'P1', '']),
+            extra=anidada,
+        ))
+    rnd.shuffle(fragmentos)
+    return documento(tipo, ''.join(fragmentos))
+
+
+class TestSinglePassEquivalence(unittest.TestCase):
+    """El modo single_pass debe producir exactamente lo mismo que el modo xpath."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.xpath = InvoiceProcessor()
+        cls.single_pass = InvoiceProcessor(extraction_mode=EXTRACTION_SINGLE_PASS)
+
+    def comparar_raiz(self, invoice_root):
+        try:
+            esperado = self.xpath._extract_basic_invoice_data(invoice_root)
+            self.xpath._extract_parties_data(invoice_root, esperado)
+            self.xpath._process_invoice_items(invoice_root, esperado)
+            self.xpath._process_additional_data(invoice_root, esperado)
+        except InvoiceDataError as e:
+            with self.assertRaises(InvoiceDataError) as contexto:
+                self.single_pass._extract_single_pass(invoice_root)
+            self.assertEqual(str(contexto.exception), str(e))
+            return
+        self.assertEqual(self.single_pass._extract_single_pass(invoice_root), esperado)
+
+    def test_muestras_reales(self):
+        """process_invoice da el mismo resultado en ambos modos para las muestras reales."""
+        for muestra in MUESTRAS:
+            with self.subTest(muestra=muestra.name):
+                _, esperado = self.xpath.process_invoice(muestra)
+                _, obtenido = self.single_pass.process_invoice(muestra)
+                esperado.pop('processing_timestamp')
+                obtenido.pop('processing_timestamp')
+                self.assertEqual(obtenido, esperado)
+
+    def test_casos_borde(self):
+        """Referencias alternativas, partes sin cac:Party, líneas anidadas y textos vacíos."""
+        casos = [
+            documento('CREDIT_NOTE', '<cbc:ID>NCPP1</cbc:ID><cbc:IssueDate>2025-04-11</cbc:IssueDate>'
+                      '<cac:DiscrepancyResponse><cbc:ReferenceID>PR4100002</cbc:ReferenceID></cac:DiscrepancyResponse>'),
+            documento('CREDIT_NOTE', '<cbc:ID>NCPP1</cbc:ID><cbc:IssueDate>2025-04-11</cbc:IssueDate>'
+                      '<otro:ReferenceID>X-77</otro:ReferenceID><cbc:ReferenceID>PR9</cbc:ReferenceID>'),
+            documento('INVOICE', '<cbc:ID>PR1</cbc:ID><cbc:IssueDate>2025-04-11</cbc:IssueDate>'
+                      + parte('AccountingSupplierParty', envolver=False) + parte('AccountingCustomerParty')
+                      + linea('INVOICE', extra=linea('INVOICE', descripcion='Paso ANDES VAK142 2'))),
+            documento('INVOICE', '<cbc:ID></cbc:ID><cbc:IssueDate>2025-04-11</cbc:IssueDate>'),
+            documento('INVOICE', '<cbc:ID>PR1</cbc:ID>'),
+        ]
+        for caso in casos:
+            with self.subTest(caso=caso[:120]):
+                self.comparar_raiz(etree.fromstring(caso.encode('utf-8')))
+
+    def test_nota_credito_sin_referencia_conserva_su_prefijo(self):
+        """Sin BillingReference ni cbc:ReferenceID directo no se toma un ReferenceID anidado."""
+        caso = documento('CREDIT_NOTE', '<cbc:ID>NCPP512005</cbc:ID><cbc:IssueDate>2025-04-11</cbc:IssueDate>'
+                         '<cac:DiscrepancyResponse><cbc:ReferenceID>PR3366407</cbc:ReferenceID></cac:DiscrepancyResponse>')
+        raiz = etree.fromstring(caso.encode('utf-8'))
+        for procesador in (self.xpath, self.single_pass):
+            with self.subTest(modo=procesador.extraction_mode):
+                if procesador is self.xpath:
+                    registro = procesador._extract_basic_invoice_data(raiz)
+                    procesador._process_additional_data(raiz, registro)
+                else:
+                    registro = procesador._extract_single_pass(raiz)
+                self.assertEqual((registro.invoice_prefix, registro.invoice_number, registro.related_invoice),
+                                 ('NCPP', '512005', ''))
+
+    def test_documentos_aleatorios(self):
+        """Documentos generados al azar con todas las variantes de cada ruta."""
+        rnd = random.Random(2025)
+        for _ in range(400):
+            caso = documento_aleatorio(rnd)
+            with self.subTest(caso=caso):
+                self.comparar_raiz(etree.fromstring(caso.encode('utf-8')))
+
+    def test_modo_desconocido(self):
+        """Un modo de extracción inválido se rechaza al crear el procesador."""
+        with self.assertRaises(ValueError):
+            InvoiceProcessor(extraction_mode='otro')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Pruebas unitarias para el escáner lineal de peajes y placas.
+"""
+import random
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from process.toll_scanner import (
+    GREEDY_TOLL_PATTERN, LAZY_TOLL_PATTERN, TOLL_NAME_PATTERN, TollExtractor, memo_key, scan_toll, toll_name
+)
+
+# Piezas de las descripciones aleatorias: espacios Unicode, letras ASCII y no
+# ASCII, dígitos ASCII y de otros sistemas (\d de re) y separadores
+PIEZAS = [" ", "  ", "\t", "\n", "\u00a0", "\u2003", "a", "B", "Z", "ñ", "1", "9", "٣", "-", ":", "x1"]
+
+DESCRIPCION = "Ingresos para terceros: Paso ROBLE SPX932 10189"
+
+
+def por_regex(patron, texto):
+    encontrado = patron.search(texto)
+    return None if encontrado is None else (encontrado.group(1), encontrado.group(2))
+
+
+def nombre_por_regex(texto):
+    encontrado = TOLL_NAME_PATTERN.search(texto.strip())
+    return encontrado.group(1) if encontrado else None
+
+
+class TestTollScanner(unittest.TestCase):
+    """Pruebas para scan_toll, toll_name y TollExtractor."""
+
+    def test_igual_a_las_expresiones_regulares(self):
+        """En textos aleatorios el escáner coincide con search de cada expresión."""
+        rnd = random.Random(2025)
+        for _ in range(20000):
+            texto = "".join(rnd.choice(PIEZAS) for _ in range(rnd.randint(0, 14)))
+            self.assertEqual(scan_toll(texto), por_regex(LAZY_TOLL_PATTERN, texto), repr(texto))
+            self.assertEqual(scan_toll(texto, greedy=True), por_regex(GREEDY_TOLL_PATTERN, texto), repr(texto))
+            self.assertEqual(toll_name(texto), nombre_por_regex(texto), repr(texto))
+
+    def test_memoria_no_cambia_el_resultado(self):
+        """Textos con la misma llave de memoria dan el mismo resultado que el escáner."""
+        rnd = random.Random(7)
+        finales = ["1", "10189_58", "x", "A1", "٣", "-9"]
+        for _ in range(5000):
+            base = "".join(rnd.choice(PIEZAS) for _ in range(rnd.randint(0, 12)))
+            textos = [base + rnd.choice(finales) for _ in range(3)]
+            for greedy in (False, True):
+                extractor = TollExtractor(greedy=greedy)
+                for texto in textos:
+                    encontrado = extractor.extract(texto)
+                    esperado = scan_toll(texto, greedy)
+                    self.assertEqual(None if encontrado is None else (encontrado.segment, encontrado.plate),
+                                     esperado, repr(texto))
+
+    def test_llave_ignora_el_codigo_de_transaccion(self):
+        """Dos líneas del mismo peaje y placa comparten la llave de memoria."""
+        self.assertEqual(memo_key("Paso ROBLE  SPX932 10189_581"), memo_key("Paso ROBLE  SPX932 10189_590"))
+        self.assertNotEqual(memo_key("Paso ROBLE  SPX932 10189"), memo_key("Paso ROBLE  SPX932 X0189"))
+
+    def test_descripcion_de_peaje(self):
+        """La descripción típica da el texto del peaje, su nombre y la placa."""
+        self.assertEqual(scan_toll(DESCRIPCION), ("Ingresos para terceros: Paso ROBLE", "SPX932"))
+        self.assertEqual(toll_name("Ingresos para terceros: Paso ROBLE"), "ROBLE")
+        self.assertIsNone(scan_toll("DESCUENTO ESPECIAL"))
+
+    def test_entradas_adversas_en_tiempo_lineal(self):
+        """Textos largos que hacen retroceder a la expresión se resuelven de inmediato."""
+        for texto in (" " * 200000 + "x", "ab " * 100000, "X ABC " * 50000):
+            for greedy in (False, True):
+                with self.subTest(inicio=texto[:6], greedy=greedy):
+                    inicio = time.perf_counter()
+                    self.assertIsNone(scan_toll(texto, greedy))
+                    self.assertLess(time.perf_counter() - inicio, 2.0)
+
+    def test_memoria_e_indice_por_nit(self):
+        """Las descripciones repetidas salen de la memoria y el índice guarda los peajes por NIT."""
+        extractor = TollExtractor()
+        primero = extractor.extract(DESCRIPCION, "900470252")
+        self.assertEqual(primero, ("Ingresos para terceros: Paso ROBLE", "ROBLE", "SPX932"))
+        self.assertIs(extractor.extract(DESCRIPCION, "900470252"), primero)
+        extractor.extract("Ingresos para terceros: Paso ROBLE VAK142 10190", "900470252")
+        extractor.extract("Paso ANDES TLZ455 1", "800123456")
+        self.assertIsNone(extractor.extract("DESCUENTO ESPECIAL"))
+        self.assertEqual((extractor.hits, extractor.misses), (1, 4))
+        self.assertEqual(extractor.known_tolls("900470252"), ["ROBLE"])
+        self.assertEqual(extractor.known_tolls("800123456"), ["ANDES"])
+        self.assertEqual(extractor.known_tolls("otro"), [])
+
+    def test_memoria_acotada(self):
+        """Al llenarse la memoria se vacía y se sigue resolviendo igual."""
+        extractor = TollExtractor(memo_size=2)
+        for numero in range(5):
+            self.assertEqual(extractor.extract(f"Paso ROBLE SPX93{numero} 1").plate, f"SPX93{numero}")
+        self.assertLessEqual(len(extractor._memo), 2)
+
+    def test_compartido_entre_hilos(self):
+        """Varios hilos con la misma instancia no pierden cuentas ni resultados."""
+        extractor = TollExtractor(memo_size=50)
+        descripciones = [f"Paso PEAJE{chr(65 + n % 26)} SPX{n % 97:03d} {n}" for n in range(2000)]
+
+        def extraer(inicio):
+            return [extractor.extract(d, "900470252").plate for d in descripciones[inicio:] + descripciones[:inicio]]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            resultados = list(pool.map(extraer, (0, 500, 1000, 1500)))
+        for inicio, placas in zip((0, 500, 1000, 1500), resultados):
+            self.assertEqual(placas, [scan_toll(d)[1] for d in descripciones[inicio:] + descripciones[:inicio]])
+        self.assertEqual(extractor.hits + extractor.misses, 4 * len(descripciones))
+        self.assertEqual(len(extractor.known_tolls("900470252")), 26)
+
+
+if __name__ == "__main__":
+    unittest.main()
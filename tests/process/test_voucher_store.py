@@ -0,0 +1,98 @@
+"""
+Pruebas unitarias para el almacén de vouchers en JSONL segmentado.
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from process.voucher_store import INDEX_FILE, VoucherStore
+
+
+def voucher(factura_id, **extra):
+    return json.dumps(dict({"FacturaID": factura_id, "ValorTotal": "13000"}, **extra), ensure_ascii=False)
+
+
+class TestVoucherStore(unittest.TestCase):
+    """Pruebas para VoucherStore."""
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.carpeta, ignore_errors=True)
+        self.directorio = os.path.join(self.carpeta, "voucher", "4_2025")
+
+    def test_guardar_buscar_y_recorrer(self):
+        """get lee cada voucher por su ID y replay entrega sólo la última versión, en orden."""
+        with VoucherStore(self.directorio) as store:
+            store.append("PR1", voucher("PR1"))
+            store.append("NCPP2", voucher("NCPP2", Peaje="CIRCASIA ñ"))
+            store.append("PR1", voucher("PR1", ValorTotal="17600"))
+
+        store = VoucherStore(self.directorio)
+        self.assertEqual(len(store), 2)
+        self.assertIn("PR1", store)
+        self.assertEqual(store.get("PR1"), voucher("PR1", ValorTotal="17600"))
+        self.assertEqual(store.get("NCPP2"), voucher("NCPP2", Peaje="CIRCASIA ñ"))
+        self.assertIsNone(store.get("PR9"))
+        self.assertEqual(list(store.replay()), [
+            ("NCPP2", voucher("NCPP2", Peaje="CIRCASIA ñ")),
+            ("PR1", voucher("PR1", ValorTotal="17600")),
+        ])
+
+    def test_segmentos(self):
+        """Al superar segment_bytes se abre un segmento nuevo y las búsquedas siguen funcionando."""
+        with VoucherStore(self.directorio, segment_bytes=200) as store:
+            for n in range(10):
+                store.append(f"PR{n}", voucher(f"PR{n}"))
+            self.assertGreater(len(store.segments()), 1)
+        store = VoucherStore(self.directorio, segment_bytes=200)
+        self.assertEqual([store.get(f"PR{n}") for n in range(10)], [voucher(f"PR{n}") for n in range(10)])
+        self.assertEqual([clave for clave, _ in store.replay()], [f"PR{n}" for n in range(10)])
+
+    def test_recupera_un_corte(self):
+        """Líneas sin índice se recuperan y una línea a medio escribir se descarta antes de seguir."""
+        with VoucherStore(self.directorio) as store:
+            for n in range(3):
+                store.append(f"PR{n}", voucher(f"PR{n}"))
+        indice = Path(self.directorio, INDEX_FILE)
+        lineas = indice.read_bytes().splitlines(keepends=True)
+        # Corte después de escribir el segmento del último voucher y a mitad de su línea de índice
+        indice.write_bytes(b"".join(lineas[:2]) + lineas[2][:5])
+        segmento = Path(self.directorio, VoucherStore.segment_name(0))
+        with open(segmento, "ab") as f:
+            f.write(b'"PR9"\t{"Factu')
+
+        store = VoucherStore(self.directorio)
+        self.assertEqual(store.keys(), ["PR0", "PR1", "PR2"])
+        self.assertTrue(segmento.read_bytes().endswith(b'{"Factu'))  # abrir no modifica
+
+        store.append("PR3", voucher("PR3"))
+        store.close()
+        store = VoucherStore(self.directorio)
+        self.assertEqual([clave for clave, _ in store.replay()], ["PR0", "PR1", "PR2", "PR3"])
+        self.assertEqual(len(indice.read_bytes().splitlines()), 4)
+
+    def test_exportar(self):
+        """export escribe <id>.txt con el texto del voucher; un ID inexistente es un error."""
+        with VoucherStore(self.directorio) as store:
+            store.append("PR1", voucher("PR1"))
+            store.append("PR2", voucher("PR2"))
+            destino = os.path.join(self.carpeta, "txt")
+            self.assertEqual(len(store.export(destino)), 2)
+            self.assertEqual(Path(destino, "PR2.txt").read_text(encoding="utf-8"), voucher("PR2"))
+            with self.assertRaises(KeyError):
+                store.export(destino, ["PR1", "PR9"])
+
+    def test_carpeta_inexistente_y_texto_invalido(self):
+        """Abrir una carpeta que no existe no la crea; un voucher de varias líneas se rechaza."""
+        store = VoucherStore(self.directorio)
+        self.assertEqual((len(store), list(store.replay())), (0, []))
+        self.assertFalse(os.path.exists(self.directorio))
+        with self.assertRaises(ValueError):
+            store.append("PR1", '{\n"FacturaID": "PR1"}')
+
+
+if __name__ == '__main__':
+    unittest.main()
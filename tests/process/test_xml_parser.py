@@ -0,0 +1,72 @@
+"""
+Pruebas unitarias para los parsers lxml ajustados (process.xml_parser).
+"""
+import logging
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from lxml import etree
+
+from process import xml_parser
+from process.invoice_processor import (
+    ENVELOPE_MODES, EXTRACTION_MODES, InvoiceProcessor
+)
+from process.xml_parser import get_parser
+from muestras import MUESTRAS
+
+
+def sin_timestamp(datos):
+    return {k: v for k, v in datos.items() if k != 'processing_timestamp'}
+
+
+class TestXmlParser(unittest.TestCase):
+    """Pruebas para get_parser y su uso en InvoiceProcessor."""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_una_instancia_por_hilo_y_opciones(self):
+        """El mismo hilo reutiliza el parser; otro hilo y otras opciones obtienen uno propio."""
+        self.assertIs(get_parser(), get_parser())
+        self.assertIsNot(get_parser(), get_parser(huge_tree=True))
+        self.assertIsNot(get_parser(), get_parser(collect_ids=True))
+        otros = []
+        hilo = threading.Thread(target=lambda: otros.append(get_parser()))
+        hilo.start()
+        hilo.join()
+        self.assertIsNot(otros[0], get_parser())
+
+    def test_no_resuelve_entidades_externas(self):
+        """Las entidades externas del DTD no se leen del disco."""
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write("secreto")
+        xml = f'<!DOCTYPE a [<!ENTITY e SYSTEM "file://{f.name}">]><a>&e;</a>'.encode()
+        self.assertNotIn("secreto", etree.tostring(etree.fromstring(xml, get_parser()), encoding=str))
+        Path(f.name).unlink()
+
+    def test_mismos_datos_que_el_parser_por_defecto(self):
+        """Quitar los espacios ignorables no cambia lo que extrae el procesador."""
+        por_defecto = etree.XMLParser()
+        for extraccion in EXTRACTION_MODES:
+            for sobre in ENVELOPE_MODES:
+                procesador = InvoiceProcessor(extraction_mode=extraccion, envelope_mode=sobre)
+                for muestra in MUESTRAS:
+                    with self.subTest(extraccion=extraccion, sobre=sobre, muestra=muestra.name):
+                        ajustado = procesador.process_invoice(muestra)
+                        with mock.patch.object(xml_parser, 'PARSER_OPTIONS', {}), \
+                                mock.patch('process.invoice_processor.get_parser', return_value=por_defecto):
+                            original = procesador.process_invoice(muestra)
+                        self.assertEqual(ajustado[0], original[0])
+                        self.assertEqual(sin_timestamp(ajustado[1]), sin_timestamp(original[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
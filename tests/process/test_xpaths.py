@@ -0,0 +1,53 @@
+"""
+Pruebas unitarias para el registro de XPath precompiladas.
+"""
+import unittest
+from pathlib import Path
+
+from lxml import etree
+
+from process import xpaths
+from process.invoice_processor import InvoiceProcessor, XML_NAMESPACES
+from muestras import MUESTRAS
+
+# Rutas que ElementPath (root.find) sabe evaluar, para comparar resultados
+RUTAS_ELEMENTPATH = [ruta for nombre, ruta in xpaths.XPATHS.items() if "local-name" not in ruta.path]
+
+
+class TestXPaths(unittest.TestCase):
+    """Pruebas para process.xpaths."""
+
+    @classmethod
+    def setUpClass(cls):
+        processor = InvoiceProcessor()
+        cls.facturas = [
+            processor._extract_embedded_invoice(etree.parse(str(muestra)).getroot())
+            for muestra in MUESTRAS
+        ]
+
+    def test_mismo_resultado_que_elementpath(self):
+        """Cada ruta compilada devuelve el mismo primer elemento y texto que root.find."""
+        for factura in self.facturas:
+            for nodo in [factura] + xpaths.INVOICE_LINES.elements(factura) + xpaths.CREDIT_NOTE_LINES.elements(factura):
+                for ruta in RUTAS_ELEMENTPATH:
+                    with self.subTest(ruta=ruta.name):
+                        self.assertIs(ruta.element(nodo), nodo.find(ruta.path, XML_NAMESPACES))
+                        self.assertEqual(ruta.elements(nodo), nodo.findall(ruta.path, XML_NAMESPACES))
+
+    def test_texto_con_valor_por_defecto(self):
+        """text() limpia espacios y usa el valor por defecto si no hay elemento."""
+        factura = self.facturas[0]
+        self.assertEqual(xpaths.INVOICE_ID.text(factura), factura.find('cbc:ID', XML_NAMESPACES).text.strip())
+        self.assertEqual(xpaths.ITEM_QUANTITY.text(factura, default="1"), "1")
+
+    def test_rutas_sin_registrar_se_compilan_una_vez(self):
+        """compiled_path reutiliza la ruta registrada o la compila la primera vez."""
+        self.assertIs(xpaths.compiled_path('invoice_id'), xpaths.INVOICE_ID)
+        nueva = xpaths.compiled_path('cbc:UUID')
+        self.assertIs(xpaths.compiled_path('cbc:UUID'), nueva)
+        self.assertTrue(InvoiceProcessor._get_element_text(self.facturas[0], 'cbc:UUID'))
+        self.assertNotIn('cbc:UUID', xpaths.XPATHS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Pruebas unitarias para los backends XML del caso de uso de src/.
+"""
+import logging
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src.domain.repositories.invoice_repository import InvoiceRepository
+from src.domain.use_cases.invoice_processor import InvoiceFormatError, InvoiceProcessingUseCase
+from src.infrastructure import dependencies
+from src.infrastructure.repositories.xml_invoice_repository import XMLInvoiceRepository
+from src.infrastructure.xml.xml_backends import XML_BACKENDS, create_xml_backend
+from muestras import MUESTRAS
+
+
+class RepositorioMemoria(InvoiceRepository):
+    """Repositorio en memoria para las pruebas."""
+
+    def __init__(self):
+        self.facturas = {}
+
+    def save_invoice(self, invoice):
+        self.facturas[invoice.id] = invoice
+
+    def get_invoice(self, invoice_id):
+        return self.facturas.get(invoice_id)
+
+
+def caso_de_uso(nombre):
+    return InvoiceProcessingUseCase(RepositorioMemoria(), create_xml_backend(nombre))
+
+
+class TestBackendsXML(unittest.TestCase):
+    """Pruebas para create_xml_backend e InvoiceProcessingUseCase con cada backend."""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.getLogger("src").setLevel(logging.CRITICAL)
+
+    def test_todos_los_backends_dan_la_misma_factura(self):
+        """lxml, elementtree y streaming producen la misma entidad para cada muestra."""
+        for muestra in MUESTRAS:
+            contenido = muestra.read_text(encoding="utf-8")
+            with self.subTest(muestra=muestra.name):
+                facturas = {nombre: caso_de_uso(nombre).process_invoice(contenido) for nombre in XML_BACKENDS}
+                referencia = facturas["elementtree"]
+                self.assertTrue(referencia.id)
+                for nombre, factura in facturas.items():
+                    self.assertEqual(factura, referencia, nombre)
+
+    def test_streaming_no_lee_despues_de_la_factura(self):
+        """El backend streaming se detiene en la factura embebida; lo que sigue no se parsea."""
+        contenido = MUESTRAS[0].read_text(encoding="utf-8")
+        fin = contenido.index("</cac:Attachment>") + len("</cac:Attachment>")
+        roto = contenido[:fin] + "<roto>" + contenido[fin:]
+        self.assertEqual(caso_de_uso("streaming").process_invoice(roto).id, caso_de_uso("lxml").process_invoice(contenido).id)
+        for nombre in ("lxml", "elementtree"):
+            with self.subTest(backend=nombre), self.assertRaises(InvoiceFormatError):
+                caso_de_uso(nombre).process_invoice(roto)
+
+    def test_factura_directa_y_errores(self):
+        """Una Invoice sin sobre se procesa igual; XML inválido o sin factura es InvoiceFormatError."""
+        for nombre in XML_BACKENDS:
+            with self.subTest(backend=nombre):
+                contenido = MUESTRAS[0].read_text(encoding="utf-8")
+                embebida = contenido.split("<![CDATA[", 1)[1].split("]]>", 1)[0].strip()
+                self.assertEqual(caso_de_uso(nombre).process_invoice(embebida), caso_de_uso(nombre).process_invoice(contenido))
+                with self.assertRaises(InvoiceFormatError):
+                    caso_de_uso(nombre).process_invoice("<AttachedDocument>")
+                with self.assertRaises(InvoiceFormatError):
+                    caso_de_uso(nombre).process_invoice("<AttachedDocument/>")
+
+    def test_backend_desconocido(self):
+        """Un nombre fuera de XML_BACKENDS es ValueError."""
+        with self.assertRaises(ValueError):
+            create_xml_backend("sax")
+
+    def test_dependencias_usan_la_configuracion(self):
+        """configure_dependencies crea el backend de XML_CONFIG y el repositorio guarda la factura."""
+        carpeta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, carpeta, ignore_errors=True)
+        with mock.patch.dict(dependencies.XML_CONFIG, {"backend": "streaming"}), \
+                mock.patch.dict(dependencies.STORAGE_CONFIG, {"invoice_storage": carpeta}):
+            configuradas = dependencies.configure_dependencies()
+        caso = configuradas["invoice_use_case"]
+        self.assertEqual(caso.backend.name, "streaming")
+        self.assertIsInstance(configuradas["invoice_repository"], XMLInvoiceRepository)
+        factura = caso.process_invoice(MUESTRAS[0].read_text(encoding="utf-8"))
+        self.assertEqual(configuradas["invoice_repository"].get_invoice(factura.id), factura)
+
+
+if __name__ == "__main__":
+    unittest.main()